@@ -7,6 +7,7 @@ import wades_config
 ROOT_PATH = pathlib.Path(__file__).parent.absolute()
 TEST_WADES_DIR_PATH = ROOT_PATH / "wades"
 TEST_APP_PROF_DATA_DIR_PATH = TEST_WADES_DIR_PATH / "data"
+TEST_CONTROL_UNIX_SOCKET_PATH = TEST_WADES_DIR_PATH / wades_config.control_unix_socket_file_name
 SAMPLE_APP_PROF_DATA_PATH = ROOT_PATH / "src/tests/sample_data"
 LOGGER_TEST_DIR_PATH = ROOT_PATH / "log"
 
@@ -15,6 +16,7 @@ WADES_DIR_PATH = pathlib.Path("/var/lib").absolute() / "wades"
 APP_PROF_DATA_DIR_PATH = WADES_DIR_PATH / "data"
 PID_FILES_DIR_PATH = WADES_DIR_PATH / "run"
 LOGGER_DIR_PATH = WADES_DIR_PATH / "log"
+CONTROL_UNIX_SOCKET_PATH = PID_FILES_DIR_PATH / wades_config.control_unix_socket_file_name
 
 if wades_config.is_test:
     TEST_APP_PROF_DATA_DIR_PATH.mkdir(parents=True, exist_ok=True)
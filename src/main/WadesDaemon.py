@@ -1,18 +1,31 @@
 import atexit
+import datetime
 import json
 import logging
 import threading
-import time
 import traceback
-from socket import socket
+from typing import List, Union
+
+import psutil
 
 import paths
 import wades_config
+from src.main.common.AbnormalAppsQuery import AbnormalAppsQuery
+from src.main.common.CycleScheduler import CycleScheduler
 from src.main.common.Daemon import Daemon
 from src.main.common.LoggerUtils import LoggerUtils
+from src.main.common.MetricsRegistry import MetricsRegistry
+from src.main.common.PipelineStage import PipelineStage
+from src.main.common.enum.OverflowPolicy import OverflowPolicy
+from src.main.common.enum.OverrunPolicy import OverrunPolicy
+from src.main.common.enum.RiskLevel import RiskLevel
 from src.main.modeller.Modeller import Modeller
+from src.main.psHandler.AppProfileCache import AppProfileCache
 from src.main.psHandler.AppProfileDataManager import AppProfileDataManager
 from src.main.psHandler.ProcessHandler import ProcessHandler
+from src.main.server.ControlServer import ControlServer
+from src.main.server.SubscriptionHub import SubscriptionHub
+from src.utils.BenchmarkingUtils import BenchmarkingUtils
 from src.utils.error_messages import expected_type_but_received_message
 
 
@@ -27,11 +40,26 @@ class WadesDaemon(Daemon):
         self.__logger_base_dir = paths.LOGGER_DIR_PATH if not wades_config.is_test else paths.LOGGER_TEST_DIR_PATH
         LoggerUtils.setup_logger(self.__logger_name, self.__logger_base_dir / (self.__logger_name +
                                                                                wades_config.log_file_extension))
-        self.__ps_handler = ProcessHandler(logger_name)
-        self.__modeller = Modeller(logger_name)
-        self.__socket = None
+        # Shared by the process handler and the modeller, so the profiles saved by one are read from memory by the
+        # other.
+        self.__app_profile_cache = AppProfileCache() if wades_config.use_app_profile_cache else None
+        # Updated by every stage on the hot path; the gauges are only read when the metrics are requested.
+        self.__metrics_registry = MetricsRegistry()
+        self.__daemon_process = psutil.Process()
+        self.__ps_handler = ProcessHandler(logger_name, app_profile_cache=self.__app_profile_cache,
+                                           metrics_registry=self.__metrics_registry)
+        self.__modeller = Modeller(logger_name, app_profile_cache=self.__app_profile_cache,
+                                   metrics_registry=self.__metrics_registry)
         self.__run_server = wades_config.run_modeller_server
         self.__stop_modelling = False
+        self.__cycles_count = 0
+        # Latest state published by the pipeline, captured by each stage in its own thread.
+        self.__published_state = None
+        # Pushes the anomalies of each cycle to the subscribed clients.
+        self.__subscription_hub = SubscriptionHub()
+        self.__pipeline_stages = self.__build_pipeline()
+        self.__collection_scheduler = None
+        self.__control_server = self.__build_control_server()
         super(WadesDaemon, self).__init__(logger_name)
 
     def set_modeller_service_flag(self, run_modeller_server_new_value: bool) -> None:
@@ -57,19 +85,272 @@ class WadesDaemon(Daemon):
         """
         return self.__run_server
 
+    def __build_pipeline(self) -> List[PipelineStage]:
+        """
+        Builds the stages of the daemon:
+        collection -> ingestion (saving the application profiles) -> modelling -> publishing (checkpointing).
+        The collection stage is run by the collection scheduler, at each of its deadlines. The other stages run in
+        their own threads.
+        The ingestion and modelling stages follow the overflow policies in wades_config. Modelling requests that are
+        merged keep the latest running applications and all the applications that must be modelled.
+        The publishing stage only keeps the latest state.
+        Each stage is traced as a span of the cycle of its item, so that the time spent on a cycle can be broken down.
+        For more info: 'src.utils.Tracer.Tracer.get_cycle_breakdowns'.
+        :return: The stages, in pipeline order.
+        :rtype: List[PipelineStage]
+        """
+        pipeline_stages = [
+            PipelineStage("collection", self.__collect, queue_size=1, overflow_policy=OverflowPolicy.drop_oldest,
+                          metrics_registry=self.__metrics_registry, logger_name=self.__logger_name),
+            PipelineStage("ingestion", self.__ingest, queue_size=wades_config.pipeline_ingestion_queue_size,
+                          overflow_policy=OverflowPolicy[wades_config.pipeline_ingestion_overflow_policy],
+                          metrics_registry=self.__metrics_registry, logger_name=self.__logger_name),
+            PipelineStage("modelling", self.__model, queue_size=wades_config.pipeline_modelling_queue_size,
+                          overflow_policy=OverflowPolicy[wades_config.pipeline_modelling_overflow_policy],
+                          merge_items=WadesDaemon.__merge_modelling_requests,
+                          metrics_registry=self.__metrics_registry, logger_name=self.__logger_name),
+            PipelineStage("publishing", self.__publish, queue_size=1, overflow_policy=OverflowPolicy.drop_oldest,
+                          metrics_registry=self.__metrics_registry, logger_name=self.__logger_name)
+        ]
+        for pipeline_stage, next_pipeline_stage in zip(pipeline_stages, pipeline_stages[1:]):
+            pipeline_stage.set_next_stage(next_pipeline_stage)
+        return pipeline_stages
+
+    def __collect(self, cycle_timing: dict) -> tuple:
+        """
+        Collection stage: collects the running processes information.
+        :param cycle_timing: The timing of the collection cycle. For more info about the format:
+                'src.main.common.CycleScheduler.CycleScheduler.wait_for_next_cycle'.
+        :type cycle_timing: dict
+        :return: The retrieval timestamp, the running processes mapped by application name and the cycle timing.
+        :rtype: tuple
+        """
+        with BenchmarkingUtils.span("collection", cycle_index=cycle_timing["cycle_index"]):
+            retrieval_time, app_name_to_processes_map = self.__ps_handler.collect_running_processes()
+        return retrieval_time, app_name_to_processes_map, cycle_timing
+
+    def __ingest(self, collection: tuple) -> dict:
+        """
+        Ingestion stage: saves the collected processes information in the application profiles.
+        :param collection: The retrieval timestamp, the running processes mapped by application name and the cycle
+                timing.
+        :type collection: tuple
+        :return: The modelling request, with the state of the process handler after the ingestion.
+        :rtype: dict
+        """
+        retrieval_time, app_name_to_processes_map, cycle_timing = collection
+        with BenchmarkingUtils.span("ingestion", cycle_index=cycle_timing["cycle_index"]):
+            self.__ps_handler.save_running_processes(retrieval_time, app_name_to_processes_map)
+            return {
+                "running_app_names": self.__ps_handler.get_registered_app_profile_names(),
+                "forced_app_names": self.__ps_handler.get_prohibited_files_app_names(),
+                "cycle_timing": cycle_timing,
+                "process_handler": self.__ps_handler.dict_format()
+            }
+
+    @staticmethod
+    def __merge_modelling_requests(oldest_modelling_request: dict, modelling_request: dict) -> dict:
+        """
+        Merges a modelling request that is dropped from the queue into the newest one, so the applications that must
+        be modelled are not forgotten.
+        :param oldest_modelling_request: The dropped modelling request.
+        :type oldest_modelling_request: dict
+        :param modelling_request: The newest modelling request.
+        :type modelling_request: dict
+        :return: The merged modelling request.
+        :rtype: dict
+        """
+        merged_modelling_request = dict(modelling_request)
+        merged_modelling_request["forced_app_names"] = oldest_modelling_request["forced_app_names"].union(
+            modelling_request["forced_app_names"])
+        return merged_modelling_request
+
+    def __model(self, modelling_request: dict) -> Union[dict, None]:
+        """
+        Modelling stage: models the running applications, unless modelling is paused.
+        :param modelling_request: The modelling request from the ingestion stage.
+        :type modelling_request: dict
+        :return: The state to publish, with the index of its collection cycle, or None if modelling is paused.
+        :rtype: Union[dict, None]
+        """
+        if self.__stop_modelling:
+            return None
+        cycle_index = modelling_request["cycle_timing"]["cycle_index"]
+        with BenchmarkingUtils.span("modelling", cycle_index=cycle_index):
+            cycle_app_summaries = self.__modeller.model_running_applications(
+                running_app_names=modelling_request["running_app_names"],
+                forced_app_names=modelling_request["forced_app_names"], cycle_timing=modelling_request["cycle_timing"])
+            # The summaries kept for the applications skipped in this cycle were already published.
+            return {
+                "cycle_index": cycle_index,
+                "modeller": self.__modeller.dict_format(),
+                "process_handler": modelling_request["process_handler"],
+                "abnormal_applications": [app_summary for app_summary in cycle_app_summaries
+                                          if app_summary.get_risk_level() is not RiskLevel.none]
+            }
+
+    def __publish(self, daemon_state: dict) -> None:
+        """
+        Publishing stage: counts and pushes the anomalies of the cycle to the subscribed clients, keeps the latest state
+        of the daemon and saves it in the snapshot every wades_config.daemon_snapshot_interval_cycles cycles.
+        :param daemon_state: The state of the modeller and the process handler at the end of a cycle, and the
+                applications found abnormal in the cycle.
+        :type daemon_state: dict
+        """
+        with BenchmarkingUtils.span("publishing", cycle_index=daemon_state["cycle_index"]):
+            for app_summary in daemon_state["abnormal_applications"]:
+                self.__metrics_registry.increment("anomalies_total",
+                                                  labels={"risk": app_summary.get_risk_level().name})
+            self.__subscription_hub.publish(daemon_state["abnormal_applications"])
+            self.__published_state = daemon_state
+            self.__cycles_count += 1
+            if self.__cycles_count % wades_config.daemon_snapshot_interval_cycles == 0:
+                self.save_snapshot()
+                logger = logging.getLogger(self.__logger_name)
+                logger.info("Pipeline metrics: {}".format(self.get_pipeline_metrics()))
+                if self.__app_profile_cache is not None:
+                    logger.info("Application profile cache metrics: {}".format(
+                        self.__app_profile_cache.get_metrics()))
+
+    def get_pipeline_metrics(self) -> List[dict]:
+        """
+        Gets the throughput and queue metrics of each stage of the daemon.
+        For more info about the format: 'src.main.common.PipelineStage.PipelineStage.get_metrics'.
+        :return: The metrics of each stage, in pipeline order.
+        :rtype: List[dict]
+        """
+        return [pipeline_stage.get_metrics() for pipeline_stage in self.__pipeline_stages]
+
+    def get_collection_metrics(self) -> Union[dict, None]:
+        """
+        Gets the state of the collection schedule, with its overruns.
+        For more info about the format: 'src.main.common.CycleScheduler.CycleScheduler.get_metrics'.
+        :return: The state of the collection schedule. None if the collections haven't started.
+        :rtype: Union[dict, None]
+        """
+        if self.__collection_scheduler is None:
+            return None
+        return self.__collection_scheduler.get_metrics()
+
+    def get_metrics_registry(self) -> MetricsRegistry:
+        """
+        Gets the registry of the metrics of the daemon, without updating its gauges.
+        :return: The registry of the metrics.
+        :rtype: MetricsRegistry
+        """
+        return self.__metrics_registry
+
+    def get_metrics(self) -> dict:
+        """
+        Gets the metrics of the daemon, once its gauges are updated:
+        * Counters: processes seen and skipped by reason, application profiles saved and loaded, bytes written in
+            the application profiles and anomalies by risk level.
+        * Latency histograms: collection duration, modelling duration, modelling duration of each technique and
+            duration of each pipeline stage.
+        * Gauges: queue depth of each pipeline stage, resident memory and CPU usage of the daemon, and active control
+            connections.
+        For more info about the format: 'src.main.common.MetricsRegistry.MetricsRegistry.get_metrics'.
+        :return: The metrics of the daemon.
+        :rtype: dict
+        """
+        self.__update_metrics_gauges()
+        return self.__metrics_registry.get_metrics()
+
+    def get_metrics_text_exposition(self) -> str:
+        """
+        Gets the metrics of the daemon in the Prometheus text format, once its gauges are updated. For more info about
+        the metrics: 'get_metrics()'.
+        :return: The metrics in the text format.
+        :rtype: str
+        """
+        self.__update_metrics_gauges()
+        return self.__metrics_registry.get_text_exposition()
+
+    def __update_metrics_gauges(self) -> None:
+        """
+        Sets the gauges of the metrics registry to the current queue depths and resource usage. The CPU usage is the
+        percentage since the previous update.
+        """
+        for pipeline_stage_metrics in self.get_pipeline_metrics():
+            self.__metrics_registry.set_gauge("pipeline_queue_depth", pipeline_stage_metrics["queue_depth"],
+                                              {"stage": pipeline_stage_metrics["name"]})
+        with self.__daemon_process.oneshot():
+            self.__metrics_registry.set_gauge("daemon_resident_memory_bytes",
+                                              self.__daemon_process.memory_info().rss)
+            cpu_times = self.__daemon_process.cpu_times()
+            self.__metrics_registry.set_gauge("daemon_cpu_seconds", cpu_times.user + cpu_times.system)
+            self.__metrics_registry.set_gauge("daemon_cpu_percent", self.__daemon_process.cpu_percent())
+        self.__metrics_registry.set_gauge("control_active_connections",
+                                          self.__control_server.get_metrics()["active_connections_count"])
+
+    @BenchmarkingUtils.traced()
+    def save_snapshot(self) -> None:
+        """
+        Saves the in-memory state of the modeller and the process handler in the daemon snapshot file.
+        Once the pipeline has completed a cycle, the state it published is saved, since the stages may be changing the
+        state of the modeller and the process handler.
+        The application profiles and their fitted models are already saved on each cycle, so they are not part of the
+        snapshot.
+        """
+        daemon_state = self.__published_state
+        if daemon_state is None:
+            daemon_state = {
+                "modeller": self.__modeller.dict_format(),
+                "process_handler": self.__ps_handler.dict_format()
+            }
+        daemon_snapshot = {
+            "version": wades_config.daemon_snapshot_version,
+            "saved_timestamp": datetime.datetime.now().strftime(wades_config.datetime_format),
+            "modeller": daemon_state["modeller"],
+            "process_handler": daemon_state["process_handler"]
+        }
+        AppProfileDataManager.save_daemon_snapshot(daemon_snapshot)
+
+    def load_snapshot(self) -> bool:
+        """
+        Restores the in-memory state of the modeller and the process handler from the daemon snapshot file, so the
+        latest summaries can be served before the first modelling. The first cycle then brings them up to date.
+        Snapshots older than wades_config.daemon_snapshot_max_age_sec, or saved with another
+        wades_config.daemon_snapshot_version, are ignored.
+        :return: True if the state was restored, False otherwise.
+        :rtype: bool
+        """
+        logger = logging.getLogger(self.__logger_name)
+        daemon_snapshot = AppProfileDataManager.get_daemon_snapshot()
+        if daemon_snapshot is None or daemon_snapshot.get("version") != wades_config.daemon_snapshot_version:
+            return False
+        saved_timestamp = datetime.datetime.strptime(daemon_snapshot["saved_timestamp"], wades_config.datetime_format)
+        snapshot_age_sec = (datetime.datetime.now() - saved_timestamp).total_seconds()
+        if snapshot_age_sec > wades_config.daemon_snapshot_max_age_sec:
+            logger.info("Ignoring daemon snapshot saved {:.0f} seconds ago.".format(snapshot_age_sec))
+            return False
+
+        # noinspection PyBroadException
+        try:
+            self.__modeller.set_value_from_dict(daemon_snapshot["modeller"])
+            self.__ps_handler.set_value_from_dict(daemon_snapshot["process_handler"])
+        except Exception:
+            logger.error(traceback.format_exc())
+            self.__modeller = Modeller(self.__logger_name, app_profile_cache=self.__app_profile_cache,
+                                       metrics_registry=self.__metrics_registry)
+            self.__ps_handler = ProcessHandler(self.__logger_name, app_profile_cache=self.__app_profile_cache,
+                                               metrics_registry=self.__metrics_registry)
+            return False
+        logger.info("Restored {} modelled applications from the daemon snapshot.".format(
+            len(self.__modeller.get_modelled_applications())))
+        return True
+
     def run(self) -> None:
         """
         Starts the process handler as a daemon.
         """
-        atexit.register(self.__exit_handler, self)
-        
+        atexit.register(self.__exit_handler)
+        self.load_snapshot()
+
         if self.__run_server:
             modelling_thread = threading.Thread(target=self.main_thread_run)
             modelling_thread.daemon = True
             modelling_thread.start()
-            self.__socket = socket()
-            self.__socket.bind((wades_config.localhost_address, wades_config.modeller_thread_port))
-            self.__socket.listen()
             self.service_run()
         else:
             self.main_thread_run()
@@ -77,74 +358,117 @@ class WadesDaemon(Daemon):
     def main_thread_run(self) -> None:
         """
         Runs the collecting and modelling server. This should be used as daemonize thread if service is enabled.
+        Starts the stages of the daemon and collects the running processes at the deadlines of the collection
+        scheduler, so the collections keep a fixed period whatever the time spent on them and on modelling.
         """
         logger = logging.getLogger(self.__logger_name)
+        period_sec = min(wades_config.retrieval_periodicity_sec, wades_config.max_retrieval_periodicity_sec)
+        self.__collection_scheduler = CycleScheduler(
+            period_sec=period_sec, overrun_policy=OverrunPolicy[wades_config.collection_overrun_policy],
+            phase_offset_sec=CycleScheduler.get_host_phase_offset(
+                min(wades_config.collection_max_phase_offset_sec, period_sec)),
+            max_period_sec=max(wades_config.max_retrieval_periodicity_sec, period_sec),
+            max_jitter_sec=min(wades_config.collection_max_jitter_sec, period_sec / 2),
+            max_catch_up_cycles_count=wades_config.collection_max_catch_up_cycles_count)
+        collection_stage = self.__pipeline_stages[0]
+        for pipeline_stage in self.__pipeline_stages[1:]:
+            pipeline_stage.start()
 
         while True:
             # noinspection PyBroadException
             try:
-                self.__ps_handler.collect_running_processes_information()
-                # Add modeller part here.
-                if not self.__stop_modelling:
-                    self.__modeller.model_running_applications()
-
-                sleep_time = wades_config.retrieval_periodicity_sec \
-                    if wades_config.retrieval_periodicity_sec <= wades_config.max_retrieval_periodicity_sec \
-                    else wades_config.max_retrieval_periodicity_sec
-                time.sleep(sleep_time)
+                cycle_timing = self.__collection_scheduler.wait_for_next_cycle()
+                if cycle_timing["is_overrun"]:
+                    logger.warning("Collection cycle {} started {:.1f} seconds late, {} cycles skipped.".format(
+                        cycle_timing["cycle_index"], cycle_timing["lateness_sec"],
+                        cycle_timing["skipped_cycles_count"]))
+                collection_stage.put(cycle_timing)
+                collection_stage.process_next_item(timeout_sec=0)
 
             except Exception:
                 logger.error(traceback.format_exc())
 
-    def service_run(self) -> None:
+    def __build_control_server(self) -> ControlServer:
         """
-        Runs the listener service thread. All request send by the ui/front-end will be handled here.
+        Builds the server of the commands sent by the ui/front-end.
+        :return: The control server, with the commands of the daemon.
+        :rtype: ControlServer
         """
-        logger = logging.getLogger(self.__logger_name)
-        while True:
-            # noinspection PyBroadException
-            try:
-                connection, address = self.__socket.accept()
-                with connection:
-
-                    data_raw = connection.recv(1024)
-                    data = data_raw.decode()
-                    logger.info("Request received {} from {}".format(data, address))
-                    if data == "modelled apps":
-                        data_to_send = self.__modeller.get_modelled_application_as_json()
-                        encoded_data = data_to_send.encode()  # Defaults to utf-8
-                        connection.sendall(encoded_data)
-
-                    elif data.startswith("abnormal apps"):
-                        if data.endswith(" --history"):
-                            data_to_send = json.dumps(AppProfileDataManager.get_saved_abnormal_apps())
-                        else:
-                            data_to_send = self.__modeller.get_modelled_application_as_json()
-                        encoded_data = data_to_send.encode()  # Defaults to utf-8
-                        connection.sendall(encoded_data)
-
-                    elif data == "modeller pause":
-                        self.__stop_modelling = True
-                        logger.info("Starting modelling")
-
-                    elif data == "modeller continue":
-                        self.__stop_modelling = False
-                        logger.info("Stopping modelling")
-
-                    elif data == "modeller status":
-                        data_raw = ["Modelling paused."] if self.__stop_modelling else ["Modelling running."]
-                        data_to_send = json.dumps(data_raw)
-                        connection.sendall(data_to_send.encode())
-                    else:
-                        data_to_send = json.dumps(["Command not supported"])
-                        connection.sendall(data_to_send.encode())
+        unix_socket_path = None
+        if wades_config.use_control_unix_socket:
+            unix_socket_path = paths.TEST_CONTROL_UNIX_SOCKET_PATH if wades_config.is_test \
+                else paths.CONTROL_UNIX_SOCKET_PATH
+        control_server = ControlServer(unix_socket_path=unix_socket_path, logger_name=self.__logger_name)
+        # Encoded once per modelling cycle, and served as is to every client.
+        control_server.register_command("modelled apps", lambda: self.__modeller.get_modelled_applications_response())
+        control_server.register_command("abnormal apps", lambda: self.__modeller.get_abnormal_applications_response())
+        # Reads the file of abnormal applications, so it runs outside of the event loop.
+        control_server.register_command("abnormal apps --history", self.__get_abnormal_apps_history, is_blocking=True,
+                                        has_arguments=True)
+        control_server.register_command("modeller pause", lambda: self.__set_modelling_paused(True))
+        control_server.register_command("modeller continue", lambda: self.__set_modelling_paused(False))
+        control_server.register_command("modeller status", lambda: json.dumps(
+            ["Modelling paused."] if self.__stop_modelling else ["Modelling running."]))
+        control_server.register_command("pipeline status", lambda: json.dumps(self.get_pipeline_metrics()))
+        control_server.register_command("collection status", lambda: json.dumps(self.get_collection_metrics()))
+        control_server.register_command("subscriptions status",
+                                        lambda: json.dumps(self.__subscription_hub.get_metrics()))
+        control_server.register_command("metrics", lambda: json.dumps(self.get_metrics()))
+        control_server.register_command("metrics --text", lambda: json.dumps(self.get_metrics_text_exposition()))
+        control_server.register_command("trace stats", lambda: json.dumps(BenchmarkingUtils.get_tracer().get_stats()))
+        control_server.register_command("trace cycles",
+                                        lambda: json.dumps(BenchmarkingUtils.get_tracer().get_cycle_breakdowns()))
+        control_server.register_subscription_command("subscribe anomalies",
+                                                     self.__subscription_hub.subscribe_with_arguments)
+        if wades_config.serve_metrics_over_http:
+            control_server.register_http_path(wades_config.metrics_http_path, self.get_metrics_text_exposition)
+        return control_server
 
-            except Exception:
-                logger.error(traceback.format_exc())
+    @staticmethod
+    def __get_abnormal_apps_history(arguments: str) -> str:
+        """
+        Gets a page of the saved abnormal applications.
+        :param arguments: The filters, cursor and limit of the page. For more info about the format:
+                'src.main.common.AbnormalAppsQuery.AbnormalAppsQuery.from_arguments'
+        :type arguments: str
+        :return: The page as a json string, or the reason why the arguments are invalid. For more info about the
+                format: 'src.main.psHandler.AppProfileDataManager.AppProfileDataManager.get_saved_abnormal_apps_page'
+        :rtype: str
+        """
+        try:
+            abnormal_apps_query = AbnormalAppsQuery.from_arguments(arguments)
+        except ValueError as error:
+            return json.dumps(["Invalid arguments: {}".format(error)])
+        return json.dumps(AppProfileDataManager.get_saved_abnormal_apps_page(abnormal_apps_query))
+
+    def __set_modelling_paused(self, is_paused: bool) -> str:
+        """
+        Pauses or continues the modelling.
+        :param is_paused: True to pause the modelling, False to continue it.
+        :type is_paused: bool
+        :return: The status of the modelling as a json string.
+        :rtype: str
+        """
+        self.__stop_modelling = is_paused
+        status_message = "Modelling paused." if is_paused else "Modelling running."
+        logging.getLogger(self.__logger_name).info(status_message)
+        return json.dumps([status_message])
+
+    def service_run(self) -> None:
+        """
+        Runs the control server. All request send by the ui/front-end will be handled here.
+        It blocks until the daemon exits.
+        """
+        self.__control_server.run()
 
     def __exit_handler(self) -> None:
         """
-        Used to clean up the daemon's socket.
+        Used to save the daemon snapshot, stop the modelling workers and stop the control server.
         """
-        if isinstance(self.__socket, socket):
-            self.__socket.close()
+        # noinspection PyBroadException
+        try:
+            self.save_snapshot()
+        except Exception:
+            logging.getLogger(self.__logger_name).error(traceback.format_exc())
+        self.__modeller.shutdown()
+        self.__control_server.stop()
@@ -0,0 +1,157 @@
+import datetime
+import shlex
+from typing import List, Set, Union
+
+import wades_config
+from src.main.common.enum.RiskLevel import RiskLevel
+from src.utils.error_messages import expected_type_but_received_message, expected_value_but_received_message
+
+
+class AbnormalAppsQuery:
+    # Options of the history command, e.g. "abnormal apps --history --app firefox --since '2021-01-31 20:00:00'".
+    app_option = "--app"
+    since_option = "--since"
+    until_option = "--until"
+    min_risk_option = "--min-risk"
+    attribute_option = "--attribute"
+    cursor_option = "--cursor"
+    limit_option = "--limit"
+
+    def __init__(self, app_names: Union[Set[str], None] = None, since: Union[datetime.datetime, None] = None,
+                 until: Union[datetime.datetime, None] = None, min_risk_level: RiskLevel = RiskLevel.low,
+                 attribute_names: Union[Set[str], None] = None, cursor: int = 0,
+                 limit: int = wades_config.history_query_default_limit) -> None:
+        """
+        Abstracts a query of one page of the saved abnormal apps. The filters are combined: a record must match all
+        of them. For more info about the records: 'src.main.psHandler.AppProfileDataManager.AppProfileDataManager.
+        get_saved_abnormal_apps_page'
+        :raises TypeError if app_names or attribute_names are not of type 'Union[Set[str], None]', if since or until
+                are not of type 'Union[datetime.datetime, None]', if min_risk_level is not of type 'RiskLevel', or if
+                cursor or limit are not of type 'int'.
+        :raises ValueError if cursor is negative, or if limit is not between 1 and wades_config.history_query_max_limit.
+        :param app_names: The names of the applications to get the records of. If None, all of them.
+        :type app_names: Union[Set[str], None]
+        :param since: The earliest retrieval time of the records. If None, from the first record.
+        :type since: Union[datetime.datetime, None]
+        :param until: The latest retrieval time of the records. If None, up to the last record.
+        :type until: Union[datetime.datetime, None]
+        :param min_risk_level: The lowest risk level of the records.
+        :type min_risk_level: RiskLevel
+        :param attribute_names: The records must have at least one of these abnormal attributes. If None, any.
+        :type attribute_names: Union[Set[str], None]
+        :param cursor: Where the page starts, as returned with the previous page. 0 for the first page.
+        :type cursor: int
+        :param limit: The maximum number of records of the page.
+        :type limit: int
+        """
+        for argument_name, argument_value in [("app_names", app_names), ("attribute_names", attribute_names)]:
+            if argument_value is not None and not isinstance(argument_value, set):
+                raise TypeError(expected_type_but_received_message.format(argument_name, "Union[Set[str], None]",
+                                                                          argument_value))
+        for argument_name, argument_value in [("since", since), ("until", until)]:
+            if argument_value is not None and not isinstance(argument_value, datetime.datetime):
+                raise TypeError(expected_type_but_received_message.format(
+                    argument_name, "Union[datetime.datetime, None]", argument_value))
+        if not isinstance(min_risk_level, RiskLevel):
+            raise TypeError(expected_type_but_received_message.format("min_risk_level", "RiskLevel", min_risk_level))
+        for argument_name, argument_value in [("cursor", cursor), ("limit", limit)]:
+            if not isinstance(argument_value, int):
+                raise TypeError(expected_type_but_received_message.format(argument_name, "int", argument_value))
+        if cursor < 0:
+            raise ValueError(expected_value_but_received_message.format("cursor", "at least 0", cursor))
+        if limit < 1 or limit > wades_config.history_query_max_limit:
+            raise ValueError(expected_value_but_received_message.format(
+                "limit", "between 1 and {}".format(wades_config.history_query_max_limit), limit))
+
+        self.__app_names = set(app_names) if app_names is not None else None
+        self.__since = since
+        self.__until = until
+        self.__min_risk_level = min_risk_level
+        self.__attribute_names = set(attribute_names) if attribute_names is not None else None
+        self.__cursor = cursor
+        self.__limit = limit
+        # The saved timestamp format sorts like the timestamps themselves, so records are filtered without parsing
+        # their timestamps.
+        self.__since_timestamp = since.strftime(wades_config.datetime_format) if since is not None else None
+        self.__until_timestamp = until.strftime(wades_config.datetime_format) if until is not None else None
+
+    @staticmethod
+    def from_arguments(arguments: str) -> 'AbnormalAppsQuery':
+        """
+        Builds a query from the options of the history command. Every option is optional, and the application and
+        attribute options can be repeated. Times are in ISO format, e.g. "2021-01-31" or "2021-01-31 20:09:03".
+        :raises TypeError if arguments is not of type 'str'.
+        :raises ValueError if an option is unknown, misses its value, or has an invalid value.
+        :param arguments: The options of the command. Values with spaces must be quoted.
+        :type arguments: str
+        :return: The query.
+        :rtype: AbnormalAppsQuery
+        """
+        if not isinstance(arguments, str):
+            raise TypeError(expected_type_but_received_message.format("arguments", "str", arguments))
+
+        tokens = shlex.split(arguments)
+        if len(tokens) % 2 != 0:
+            raise ValueError(expected_value_but_received_message.format("arguments", "options with values",
+                                                                        arguments))
+        query_arguments = dict()
+        for option, value in zip(tokens[::2], tokens[1::2]):
+            if option == AbnormalAppsQuery.app_option:
+                query_arguments["app_names"] = query_arguments.get("app_names", set()) | {value}
+            elif option == AbnormalAppsQuery.attribute_option:
+                query_arguments["attribute_names"] = query_arguments.get("attribute_names", set()) | {value}
+            elif option in [AbnormalAppsQuery.since_option, AbnormalAppsQuery.until_option]:
+                query_arguments[option.lstrip("-")] = datetime.datetime.fromisoformat(value)
+            elif option == AbnormalAppsQuery.min_risk_option:
+                if value not in RiskLevel.__members__ or value == RiskLevel.none.name:
+                    raise ValueError(expected_value_but_received_message.format(option, "low, medium or high",
+                                                                                value))
+                query_arguments["min_risk_level"] = RiskLevel[value]
+            elif option in [AbnormalAppsQuery.cursor_option, AbnormalAppsQuery.limit_option]:
+                query_arguments[option.lstrip("-")] = int(value)
+            else:
+                raise ValueError(expected_value_but_received_message.format("option", "a history option", option))
+        return AbnormalAppsQuery(**query_arguments)
+
+    def get_cursor(self) -> int:
+        """
+        Gets where the page starts.
+        :return: The cursor of the page. 0 for the first page.
+        :rtype: int
+        """
+        return self.__cursor
+
+    def get_limit(self) -> int:
+        """
+        Gets the maximum number of records of the page.
+        :return: The limit of the page.
+        :rtype: int
+        """
+        return self.__limit
+
+    def matches(self, app_name: str, risk: str, retrieval_timestamp: str) -> bool:
+        """
+        Checks if a saved record matches the application, risk and time filters of the query.
+        :param app_name: The name of the application of the record.
+        :type app_name: str
+        :param risk: The name of the risk level of the record.
+        :type risk: str
+        :param retrieval_timestamp: The retrieval timestamp of the record, in wades_config.datetime_format.
+        :type retrieval_timestamp: str
+        :return: True if the record matches, False otherwise.
+        :rtype: bool
+        """
+        return (self.__app_names is None or app_name in self.__app_names) and \
+            (self.__since_timestamp is None or retrieval_timestamp >= self.__since_timestamp) and \
+            (self.__until_timestamp is None or retrieval_timestamp <= self.__until_timestamp) and \
+            risk in RiskLevel.__members__ and RiskLevel[risk] >= self.__min_risk_level
+
+    def matches_abnormal_attributes(self, abnormal_attributes: List[str]) -> bool:
+        """
+        Checks if the abnormal attributes of a saved record match the attribute filter of the query.
+        :param abnormal_attributes: The abnormal attributes of the record.
+        :type abnormal_attributes: List[str]
+        :return: True if the record has one of the attributes of the filter, or if there is no filter, False otherwise.
+        :rtype: bool
+        """
+        return self.__attribute_names is None or not self.__attribute_names.isdisjoint(abnormal_attributes)
@@ -0,0 +1,440 @@
+import copy
+import datetime
+from bisect import bisect_right
+from typing import Set, Union, Dict, List
+
+import numpy
+
+import wades_config
+from src.main.common.AppProfileBaseline import AppProfileBaseline
+from src.main.common.KnownValues import KnownValues
+from src.main.common.MultivariateBaseline import MultivariateBaseline
+from src.main.common.NumericAttributeModel import NumericAttributeModel
+from src.main.common.PathMatcher import PathMatcher
+from src.main.common.PathTrie import PathTrie
+from src.main.common.StreamingBaseline import StreamingBaseline
+from src.main.common.enum.AppProfileAttribute import AppProfileAttribute
+from src.utils.error_messages import expected_type_but_received_message
+
+
+class AppModelCache:
+
+    def __init__(self, application_name: str) -> None:
+        """
+        Abstracts the fitted models of an application: one numeric model per numeric attribute and the known opened
+        files and users. New data is scored against the cached models, which are only refitted after enough new
+        samples or when the new samples drift away from them. The known values are updated with every new sample.
+        :raises TypeError if application_name is not of type 'str'.
+        :param application_name: The name of the application.
+        :type application_name: str
+        """
+        if not isinstance(application_name, str):
+            raise TypeError(expected_type_but_received_message.format("application_name", "str", application_name))
+
+        self.__name = application_name
+        self.__numeric_models = dict()
+        self.__known_files = AppModelCache.__build_known_files()
+        self.__known_users = KnownValues(bloom_filter_threshold=wades_config.known_values_bloom_filter_threshold)
+        # Kept apart so the blacklist check stays exact when the known files are generalized or in Bloom filters.
+        self.__accessed_prohibited_files = set()
+        self.__fitted_timestamp = None
+        self.__last_seen_timestamp = None
+        self.__new_samples_count = 0
+        self.__new_outliers_counts = dict()
+        self.__streaming_baseline = None
+        self.__multivariate_baseline = None
+
+    @staticmethod
+    def __build_known_files() -> Union[PathTrie, KnownValues]:
+        """
+        Builds the container of the known opened files: a PathTrie if wades_config.opened_files_generalization_threshold
+        is set, KnownValues otherwise.
+        :return: The empty container of the known opened files.
+        :rtype: Union[PathTrie, KnownValues]
+        """
+        if wades_config.opened_files_generalization_threshold is not None:
+            return PathTrie(generalization_threshold=wades_config.opened_files_generalization_threshold)
+        return KnownValues(bloom_filter_threshold=wades_config.known_values_bloom_filter_threshold)
+
+    def get_application_name(self) -> str:
+        """
+        Gets the name of the application.
+        :return: The name of the application.
+        :rtype: str
+        """
+        return self.__name
+
+    def get_numeric_model(self, attribute_name: str) -> Union[NumericAttributeModel, None]:
+        """
+        Gets the fitted model of a numeric attribute.
+        :param attribute_name: The name of the numeric attribute.
+        :type attribute_name: str
+        :return: The fitted model of the attribute, None if the models have never been fitted.
+        :rtype: Union[NumericAttributeModel, None]
+        """
+        return copy.deepcopy(self.__numeric_models.get(attribute_name))
+
+    def get_known_files(self) -> Union[PathTrie, KnownValues]:
+        """
+        Gets the opened files that are known behaviour for the application.
+        :return: The known opened files.
+        :rtype: Union[PathTrie, KnownValues]
+        """
+        return copy.deepcopy(self.__known_files)
+
+    def get_known_users(self) -> KnownValues:
+        """
+        Gets the users that are known behaviour for the application.
+        :return: The known users.
+        :rtype: KnownValues
+        """
+        return copy.deepcopy(self.__known_users)
+
+    def get_known_files_observations_count(self) -> int:
+        """
+        Gets the number of opened files seen, with repetitions.
+        :return: The number of opened files seen.
+        :rtype: int
+        """
+        return self.__known_files.get_observations_count()
+
+    def get_known_users_observations_count(self) -> int:
+        """
+        Gets the number of users seen, with repetitions.
+        :return: The number of users seen.
+        :rtype: int
+        """
+        return self.__known_users.get_observations_count()
+
+    def get_unknown_files(self, opened_files: List[str]) -> Set[str]:
+        """
+        Gets the opened files that are not known behaviour for the application.
+        :param opened_files: The opened files to check.
+        :type opened_files: List[str]
+        :return: The opened files that are not known.
+        :rtype: Set[str]
+        """
+        return self.__known_files.get_unknown_values(opened_files)
+
+    def get_unknown_users(self, users: List[str]) -> Set[str]:
+        """
+        Gets the users that are not known behaviour for the application.
+        :param users: The users to check.
+        :type users: List[str]
+        :return: The users that are not known.
+        :rtype: Set[str]
+        """
+        return self.__known_users.get_unknown_values(users)
+
+    def get_accessed_prohibited_files(self) -> Set[str]:
+        """
+        Gets the opened files, matching wades_config.prohibited_files, that the application has already opened.
+        :return: The prohibited files already opened.
+        :rtype: Set[str]
+        """
+        return copy.deepcopy(self.__accessed_prohibited_files)
+
+    def get_streaming_baseline(self) -> Union[StreamingBaseline, None]:
+        """
+        Gets the running statistics of the numeric attributes, kept by the streaming technique.
+        :return: The running statistics, None if the application has not been modelled by the streaming technique.
+        :rtype: Union[StreamingBaseline, None]
+        """
+        return copy.deepcopy(self.__streaming_baseline)
+
+    def get_streaming_last_seen_timestamp(self) -> Union[datetime.datetime, None]:
+        """
+        Gets the retrieval timestamp of the newest sample folded into the running statistics.
+        :return: The retrieval timestamp of the newest folded sample, None if no sample has been folded.
+        :rtype: Union[datetime.datetime, None]
+        """
+        if self.__streaming_baseline is None:
+            return None
+        return self.__streaming_baseline.get_last_seen_timestamp()
+
+    def add_streaming_samples(self, app_profile_data: dict) -> None:
+        """
+        Folds the samples that haven't been folded yet into the running statistics, in place. The statistics are
+        created the first time, with wades_config.streaming_alpha and wades_config.streaming_seasonal_alpha.
+        :raises TypeError if app_profile_data is not of type 'dict'.
+        :param app_profile_data: The data to fold. For more info about the format:
+                'src.main.common.StreamingBaseline.StreamingBaseline.add_samples'
+        :type app_profile_data: dict
+        """
+        if not isinstance(app_profile_data, dict):
+            raise TypeError(expected_type_but_received_message.format("app_profile_data", "dict", app_profile_data))
+        if self.__streaming_baseline is None:
+            self.__streaming_baseline = StreamingBaseline(attribute_names=AppProfileBaseline.numeric_attribute_names,
+                                                          alpha=wades_config.streaming_alpha,
+                                                          seasonal_alpha=wades_config.streaming_seasonal_alpha)
+        self.__streaming_baseline.add_samples(app_profile_data)
+
+    def get_streaming_z_scores(self, app_profile_data: dict, minimum_samples_count: int,
+                               seasonal_minimum_samples_count: int) -> Dict[str, numpy.ndarray]:
+        """
+        Scores data against the running statistics without copying them.
+        :raises TypeError if app_profile_data is not of type 'dict'.
+        :param app_profile_data: The data to score. For more info about the format:
+                'src.main.common.AppProfile.AppProfile.get_latest_retrieved_data'
+        :type app_profile_data: dict
+        :param minimum_samples_count: The number of values the overall statistics need to score a value.
+        :type minimum_samples_count: int
+        :param seasonal_minimum_samples_count: The number of values the statistics of an hour of the week need to be
+                used instead of the overall statistics.
+        :type seasonal_minimum_samples_count: int
+        :return: The z-scores of the values of each numeric attribute. For more info about the format:
+                'src.main.common.StreamingBaseline.StreamingBaseline.get_z_scores'. If there are no running statistics
+                yet, every value has a NaN z-score.
+        :rtype: Dict[str, numpy.ndarray]
+        """
+        if not isinstance(app_profile_data, dict):
+            raise TypeError(expected_type_but_received_message.format("app_profile_data", "dict", app_profile_data))
+        if self.__streaming_baseline is None:
+            return {attribute_name: numpy.full(len(app_profile_data.get(attribute_name, list())), numpy.nan)
+                    for attribute_name in AppProfileBaseline.numeric_attribute_names}
+        return self.__streaming_baseline.get_z_scores(app_profile_data, minimum_samples_count=minimum_samples_count,
+                                                      seasonal_minimum_samples_count=seasonal_minimum_samples_count)
+
+    def get_multivariate_baseline(self) -> Union[MultivariateBaseline, None]:
+        """
+        Gets the mean and covariance of the numeric attributes, used by the multivariate scoring.
+        :return: The multivariate baseline, None if the application has not been scored jointly.
+        :rtype: Union[MultivariateBaseline, None]
+        """
+        return copy.deepcopy(self.__multivariate_baseline)
+
+    def set_multivariate_baseline(self, multivariate_baseline: MultivariateBaseline) -> None:
+        """
+        Sets the mean and covariance of the numeric attributes, used by the multivariate scoring.
+        :raises TypeError if multivariate_baseline is not of type 'MultivariateBaseline'.
+        :param multivariate_baseline: The multivariate baseline.
+        :type multivariate_baseline: MultivariateBaseline
+        """
+        if not isinstance(multivariate_baseline, MultivariateBaseline):
+            raise TypeError(expected_type_but_received_message.format("multivariate_baseline", "MultivariateBaseline",
+                                                                      multivariate_baseline))
+        self.__multivariate_baseline = copy.deepcopy(multivariate_baseline)
+
+    def get_fitted_timestamp(self) -> Union[datetime.datetime, None]:
+        """
+        Gets the retrieval timestamp of the newest sample used to fit the numeric models.
+        :return: The retrieval timestamp of the newest fitted sample, None if the models have never been fitted.
+        :rtype: Union[datetime.datetime, None]
+        """
+        return self.__fitted_timestamp
+
+    def get_last_seen_timestamp(self) -> Union[datetime.datetime, None]:
+        """
+        Gets the retrieval timestamp of the newest sample added to the cache, either by fitting or as new samples.
+        :return: The retrieval timestamp of the newest sample, None if no sample has been added.
+        :rtype: Union[datetime.datetime, None]
+        """
+        return self.__last_seen_timestamp
+
+    def get_new_samples_count(self) -> int:
+        """
+        Gets the number of samples added since the numeric models were fitted.
+        :return: The number of samples added since the last fit.
+        :rtype: int
+        """
+        return self.__new_samples_count
+
+    def get_new_outliers_count(self, attribute_name: str) -> int:
+        """
+        Gets the number of values of a numeric attribute, added since the last fit, that are outside the outlier
+        fences of its model.
+        :param attribute_name: The name of the numeric attribute.
+        :type attribute_name: str
+        :return: The number of outliers added since the last fit.
+        :rtype: int
+        """
+        return self.__new_outliers_counts.get(attribute_name, 0)
+
+    def is_refit_needed(self) -> bool:
+        """
+        Checks if the numeric models should be refitted. This happens when:
+        * The models have never been fitted or were fitted with too few samples to model.
+        * wades_config.model_cache_refit_samples_count samples have been added since the last fit.
+        * At least wades_config.model_cache_drift_min_samples_count samples have been added since the last fit and
+            more than wades_config.model_cache_drift_outlier_fraction of the values of an attribute are outliers.
+        :return: True if the numeric models should be refitted, False otherwise.
+        :rtype: bool
+        """
+        if len(self.__numeric_models) == 0 or any(
+                model.get_fitted_samples_count() < wades_config.minimum_retrieval_size_for_modelling
+                for model in self.__numeric_models.values()):
+            return True
+        if self.__new_samples_count >= wades_config.model_cache_refit_samples_count:
+            return True
+        if self.__new_samples_count >= wades_config.model_cache_drift_min_samples_count:
+            max_new_outliers_count = max(self.__new_outliers_counts.values(), default=0)
+            return max_new_outliers_count > wades_config.model_cache_drift_outlier_fraction * self.__new_samples_count
+        return False
+
+    def fit(self, app_profile_data: dict) -> None:
+        """
+        Fits the numeric models to the modelled data. The samples that haven't been added to the cache yet are added
+        first, so their opened files and users become known. The counters of new samples are reset, and the
+        multivariate baseline is dropped so that it is rebuilt from the same data as the numeric models.
+        :raises TypeError if app_profile_data is not of type 'dict'.
+        :param app_profile_data: The data to model. For more info about the format:
+                'src.main.common.AppProfile.AppProfile.get_previously_retrieved_data'
+        :type app_profile_data: dict
+        """
+        if not isinstance(app_profile_data, dict):
+            raise TypeError(expected_type_but_received_message.format("app_profile_data", "dict", app_profile_data))
+
+        self.add_new_samples(app_profile_data)
+        numeric_models = dict()
+        for attribute_name in AppProfileBaseline.numeric_attribute_names:
+            numeric_models[attribute_name] = NumericAttributeModel()
+            numeric_models[attribute_name].fit(app_profile_data.get(attribute_name, list()))
+        self.__numeric_models = numeric_models
+
+        retrieval_timestamps = app_profile_data.get(AppProfileAttribute.data_retrieval_timestamps.name, list())
+        if len(retrieval_timestamps) > 0:
+            self.__fitted_timestamp = datetime.datetime.strptime(retrieval_timestamps[-1],
+                                                                 wades_config.datetime_format)
+        self.__new_samples_count = 0
+        self.__new_outliers_counts = dict()
+        self.__multivariate_baseline = None
+
+    def add_new_samples(self, app_profile_data: dict) -> None:
+        """
+        Adds the samples that haven't been added to the cache yet. Their opened files and users become known behaviour,
+        and they are counted, along with their outliers, to decide when the numeric models should be refitted.
+        Only the new samples are read, so the cost doesn't depend on the length of the history.
+        :raises TypeError if app_profile_data is not of type 'dict'.
+        :param app_profile_data: The data to add. Only the samples retrieved after the last seen timestamp are added.
+                For more info about the format: 'src.main.common.AppProfile.AppProfile.get_previously_retrieved_data'
+        :type app_profile_data: dict
+        """
+        if not isinstance(app_profile_data, dict):
+            raise TypeError(expected_type_but_received_message.format("app_profile_data", "dict", app_profile_data))
+
+        retrieval_timestamps = app_profile_data.get(AppProfileAttribute.data_retrieval_timestamps.name, list())
+        if len(retrieval_timestamps) == 0:
+            return
+        first_new_sample_index = 0
+        if self.__last_seen_timestamp is not None:
+            # The timestamp format sorts like the timestamps themselves.
+            last_seen_timestamp = self.__last_seen_timestamp.strftime(wades_config.datetime_format)
+            first_new_sample_index = bisect_right(retrieval_timestamps, last_seen_timestamp)
+        if first_new_sample_index >= len(retrieval_timestamps):
+            return
+
+        new_samples_data = {attribute_name: values[first_new_sample_index:]
+                            for attribute_name, values in app_profile_data.items() if isinstance(values, list)}
+        self.__add_known_values(new_samples_data)
+        self.__new_samples_count += len(retrieval_timestamps) - first_new_sample_index
+        for attribute_name, model in self.__numeric_models.items():
+            self.__new_outliers_counts[attribute_name] = self.__new_outliers_counts.get(attribute_name, 0) + \
+                model.count_outliers(new_samples_data.get(attribute_name, list()))
+        self.__last_seen_timestamp = datetime.datetime.strptime(retrieval_timestamps[-1],
+                                                                wades_config.datetime_format)
+
+    def __add_known_values(self, app_profile_data: dict) -> None:
+        """
+        Adds the opened files and users of the provided data to the known values.
+        :param app_profile_data: The data with the opened files and users to add.
+        :type app_profile_data: dict
+        """
+        opened_files_flat = list()
+        for opened_files in app_profile_data.get(AppProfileAttribute.opened_files.name, list()):
+            opened_files_flat.extend(opened_files)
+        self.__known_files.add_values(opened_files_flat)
+        self.__known_users.add_values(list(app_profile_data.get(AppProfileAttribute.usernames.name, list())))
+        prohibited_files_matcher = PathMatcher.get_compiled_matcher(wades_config.prohibited_files)
+        self.__accessed_prohibited_files.update(prohibited_files_matcher.get_matching_paths(opened_files_flat))
+
+    def dict_format(self) -> dict:
+        """
+        Converts this cache into a json-serializable dictionary.
+        Format:
+            {
+                app_name: "Some name",
+                numeric_models: {memory_infos: {...}, cpu_percents: {...}, ...},
+                opened_files: {...},
+                usernames: {...},
+                accessed_prohibited_files: [path_1, path_2, ...],
+                fitted_timestamp: "2020-12-12 14:30:32:34.232",
+                last_seen_timestamp: "2020-12-13 14:30:32:34.232",
+                new_samples_count: 23,
+                new_outliers_counts: {memory_infos: 2, cpu_percents: 0, ...},
+                streaming_baseline: {...},
+                multivariate_baseline: {...}
+            }
+        For more info about the numeric models format:
+        'src.main.common.NumericAttributeModel.NumericAttributeModel.dict_format'.
+        For more info about the known values format: 'src.main.common.KnownValues.KnownValues.dict_format'. The known
+        opened files can also have the format of 'src.main.common.PathTrie.PathTrie.dict_format'.
+        For more info about the streaming baseline format, None if there is none:
+        'src.main.common.StreamingBaseline.StreamingBaseline.dict_format'.
+        For more info about the multivariate baseline format, None if there is none:
+        'src.main.common.MultivariateBaseline.MultivariateBaseline.dict_format'.
+        All timestamp have 'YYYY-MM-DD HH:MM:SS:microseconds' format.
+        :return: The cache as a dictionary.
+        :rtype: dict
+        """
+        fitted_timestamp = self.__fitted_timestamp.strftime(wades_config.datetime_format) \
+            if self.__fitted_timestamp is not None else None
+        last_seen_timestamp = self.__last_seen_timestamp.strftime(wades_config.datetime_format) \
+            if self.__last_seen_timestamp is not None else None
+        return {
+            AppProfileAttribute.app_name.name: self.__name,
+            "numeric_models": {attribute_name: model.dict_format()
+                               for attribute_name, model in self.__numeric_models.items()},
+            AppProfileAttribute.opened_files.name: self.__known_files.dict_format(),
+            AppProfileAttribute.usernames.name: self.__known_users.dict_format(),
+            "accessed_prohibited_files": sorted(self.__accessed_prohibited_files),
+            "fitted_timestamp": fitted_timestamp,
+            "last_seen_timestamp": last_seen_timestamp,
+            "new_samples_count": self.__new_samples_count,
+            "new_outliers_counts": copy.deepcopy(self.__new_outliers_counts),
+            "streaming_baseline": self.__streaming_baseline.dict_format()
+            if self.__streaming_baseline is not None else None,
+            "multivariate_baseline": self.__multivariate_baseline.dict_format()
+            if self.__multivariate_baseline is not None else None
+        }
+
+    def set_value_from_dict(self, model_cache_dict: dict) -> None:
+        """
+        Sets the values of this cache from a dictionary. Any old values will be lost.
+        If app_name is passed as a key, that value is ignored.
+        :raises TypeError if model_cache_dict is not of type 'dict'.
+        :param model_cache_dict: The cache as a dictionary. For more info about the format: 'dict_format()'.
+        :type model_cache_dict: dict
+        """
+        if not isinstance(model_cache_dict, dict):
+            raise TypeError(expected_type_but_received_message.format("model_cache_dict", "dict", model_cache_dict))
+
+        numeric_models: Dict[str, NumericAttributeModel] = dict()
+        for attribute_name, model_dict in model_cache_dict["numeric_models"].items():
+            numeric_models[attribute_name] = NumericAttributeModel()
+            numeric_models[attribute_name].set_value_from_dict(model_dict)
+        self.__numeric_models = numeric_models
+        known_files_dict = model_cache_dict[AppProfileAttribute.opened_files.name]
+        self.__known_files = PathTrie() if PathTrie.is_path_trie_dict(known_files_dict) else KnownValues()
+        self.__known_files.set_value_from_dict(known_files_dict)
+        self.__known_users = KnownValues()
+        self.__known_users.set_value_from_dict(model_cache_dict[AppProfileAttribute.usernames.name])
+        self.__accessed_prohibited_files = set(model_cache_dict["accessed_prohibited_files"])
+        fitted_timestamp = model_cache_dict["fitted_timestamp"]
+        last_seen_timestamp = model_cache_dict["last_seen_timestamp"]
+        self.__fitted_timestamp = datetime.datetime.strptime(fitted_timestamp, wades_config.datetime_format) \
+            if fitted_timestamp is not None else None
+        self.__last_seen_timestamp = datetime.datetime.strptime(last_seen_timestamp, wades_config.datetime_format) \
+            if last_seen_timestamp is not None else None
+        self.__new_samples_count = model_cache_dict["new_samples_count"]
+        self.__new_outliers_counts = copy.deepcopy(model_cache_dict["new_outliers_counts"])
+        # Caches saved before the streaming technique or the multivariate scoring existed have no baselines for them.
+        streaming_baseline_dict = model_cache_dict.get("streaming_baseline")
+        self.__streaming_baseline = None
+        if streaming_baseline_dict is not None:
+            self.__streaming_baseline = StreamingBaseline(attribute_names=list(), alpha=1.0, seasonal_alpha=1.0)
+            self.__streaming_baseline.set_value_from_dict(streaming_baseline_dict)
+        multivariate_baseline_dict = model_cache_dict.get("multivariate_baseline")
+        self.__multivariate_baseline = None
+        if multivariate_baseline_dict is not None:
+            self.__multivariate_baseline = MultivariateBaseline(attribute_names=list())
+            self.__multivariate_baseline.set_value_from_dict(multivariate_baseline_dict)
@@ -1,15 +1,27 @@
+import bisect
 import copy
 import datetime
+import math
 import time
+
+import numpy
 import psutil
 
 import wades_config
+from src.main.common.AppProfileBaseline import AppProfileBaseline
+from src.main.common.QuantileSketch import QuantileSketch
 from src.main.common.enum.AppProfileAttribute import AppProfileAttribute
-from src.utils.error_messages import expected_type_but_received_message, expected_value_but_received_message
-from typing import Union
+from src.utils.error_messages import expected_type_but_received_message, expected_value_but_received_message, \
+    collection_length_mismatch_message
+from typing import Union, List, Dict
 
 
 class AppProfile:
+    # Approximate memory used by a sample (numbers, timestamp and list slots) and by a stored string, in bytes.
+    # They are used to estimate the size of a profile without walking every object with sys.getsizeof.
+    __estimated_sample_size_bytes = 6 * 32 + 48
+    __estimated_string_overhead_bytes = 49
+
     def __init__(self, application_name: str) -> None:
         """
         Abstracts the Application Profile past and current usages.
@@ -30,6 +42,10 @@ class AppProfile:
         self.__users = list()
         self.__threads_numbers = list()
         self.__connections_numbers = list()
+        self.__baseline = AppProfileBaseline()
+        # Streaming summaries of the previously retrieved data, one per numeric attribute.
+        self.__quantile_sketches = dict()
+        self.__quantile_sketches_timestamp = None  # Newest retrieval timestamp folded into the sketches.
 
     def get_application_name(self) -> str:
         """
@@ -97,6 +113,246 @@ class AppProfile:
         """
         return copy.deepcopy(self.__cpu_percent_usages)
 
+    def get_baseline(self) -> AppProfileBaseline:
+        """
+        Gets the summary of the samples evicted from this application profile.
+        :return: The summary of the evicted samples.
+        :rtype: AppProfileBaseline
+        """
+        return copy.deepcopy(self.__baseline)
+
+    def get_evicted_samples_count(self) -> int:
+        """
+        Gets the number of samples that were evicted from this application profile into its baseline.
+        :return: The number of evicted samples.
+        :rtype: int
+        """
+        return self.__baseline.get_evicted_samples_count()
+
+    def has_state(self) -> bool:
+        """
+        Checks if this application profile has state that is not part of its samples (baseline or sketches).
+        :return: True if there is state to save, False otherwise.
+        :rtype: bool
+        """
+        return self.get_evicted_samples_count() > 0 or len(self.__quantile_sketches) > 0
+
+    def get_quantile_sketches(self) -> Dict[str, QuantileSketch]:
+        """
+        Gets the quantile sketches of the numeric attributes. The sketches summarize the previously retrieved data,
+        including the samples evicted from the sliding window, up to the last call to `update_quantile_sketches`.
+        :return: The quantile sketches mapped by numeric attribute name.
+        :rtype: Dict[str, QuantileSketch]
+        """
+        return copy.deepcopy(self.__quantile_sketches)
+
+    def get_quantile_sketches_timestamp(self) -> Union[datetime.datetime, None]:
+        """
+        Gets the newest retrieval timestamp folded into the quantile sketches.
+        :return: The newest retrieval timestamp folded into the quantile sketches, None if no data has been folded.
+        :rtype: Union[datetime.datetime, None]
+        """
+        return self.__quantile_sketches_timestamp
+
+    def update_quantile_sketches(self, k: int = wades_config.quantile_sketch_k) -> None:
+        """
+        Folds the previously retrieved data that is not in the quantile sketches yet. The latest retrieved data is not
+        folded until a newer batch is added, so the sketches always summarize the data the latest batch is compared to.
+        :param k: The accuracy parameter of sketches that don't exist yet. For more info:
+            'src.main.common.QuantileSketch.QuantileSketch'.
+        :type k: int
+        """
+        last_index_to_fold = len(self.__data_retrieval_timestamp) - self.get_latest_retrieved_data_size()
+        first_index_to_fold = 0 if self.__quantile_sketches_timestamp is None else \
+            bisect.bisect_right(self.__data_retrieval_timestamp, self.__quantile_sketches_timestamp)
+        if first_index_to_fold >= last_index_to_fold:
+            return
+
+        for attribute_name, attribute_values in self.__get_numeric_attributes_values().items():
+            if attribute_name not in self.__quantile_sketches:
+                self.__quantile_sketches[attribute_name] = QuantileSketch(k=k)
+            self.__quantile_sketches[attribute_name].add_values(
+                attribute_values[first_index_to_fold:last_index_to_fold])
+        self.__quantile_sketches_timestamp = self.__data_retrieval_timestamp[last_index_to_fold - 1]
+
+    def __get_numeric_attributes_values(self) -> Dict[str, list]:
+        """
+        Gets the samples of the numeric attributes. The lists are not copied.
+        :return: The samples of the numeric attributes mapped by attribute name.
+        :rtype: Dict[str, list]
+        """
+        return {
+            AppProfileAttribute.memory_infos.name: self.__memory_usages,
+            AppProfileAttribute.cpu_percents.name: self.__cpu_percent_usages,
+            AppProfileAttribute.children_counts.name: self.__child_processes_count,
+            AppProfileAttribute.threads_numbers.name: self.__threads_numbers,
+            AppProfileAttribute.connections_numbers.name: self.__connections_numbers
+        }
+
+    def get_samples_count(self) -> int:
+        """
+        Gets the number of samples kept in this application profile. Evicted samples are not counted.
+        :return: The number of samples kept in this application profile.
+        :rtype: int
+        """
+        return len(self.__data_retrieval_timestamp)
+
+    def get_estimated_size_bytes(self) -> int:
+        """
+        Gets an estimate of the memory used by the samples kept in this application profile.
+        :return: The estimated size of this application profile in bytes.
+        :rtype: int
+        """
+        strings_size = sum(len(opened_file) + AppProfile.__estimated_string_overhead_bytes
+                           for opened_files_batch in self.__open_files for opened_file in opened_files_batch)
+        strings_size += sum(len(user) + AppProfile.__estimated_string_overhead_bytes for user in self.__users)
+        return len(self.__data_retrieval_timestamp) * AppProfile.__estimated_sample_size_bytes + strings_size
+
+    def evict_oldest_samples(self, samples_count: int) -> int:
+        """
+        Evicts the oldest samples of this application profile into its baseline.
+        The latest retrieved data is never evicted, as it is the data that is going to be modelled.
+        :raises TypeError if samples_count is not of type 'int'.
+        :raises ValueError if samples_count is negative.
+        :param samples_count: The number of samples to evict.
+        :type samples_count: int
+        :return: The number of samples that were evicted.
+        :rtype: int
+        """
+        if not isinstance(samples_count, int):
+            raise TypeError(expected_type_but_received_message.format("samples_count", "int", samples_count))
+        if samples_count < 0:
+            raise ValueError(expected_value_but_received_message.format("samples_count", "non-negative",
+                                                                        samples_count))
+
+        latest_retrieved_data_size = self.get_latest_retrieved_data_size()
+        samples_count = min(samples_count, len(self.__data_retrieval_timestamp) - latest_retrieved_data_size)
+        if samples_count <= 0:
+            return 0
+        # Samples must be in the sketches before they are lost.
+        if self.__quantile_sketches_timestamp is not None:
+            self.update_quantile_sketches()
+        # Users may have less entries than the other attributes (processes without username).
+        users_count = max(0, min(samples_count, len(self.__users) - latest_retrieved_data_size))
+
+        self.__baseline.add_samples({
+            AppProfileAttribute.usernames.name: self.__users[:users_count],
+            AppProfileAttribute.memory_infos.name: self.__memory_usages[:samples_count],
+            AppProfileAttribute.opened_files.name: self.__open_files[:samples_count],
+            AppProfileAttribute.cpu_percents.name: self.__cpu_percent_usages[:samples_count],
+            AppProfileAttribute.children_counts.name: self.__child_processes_count[:samples_count],
+            AppProfileAttribute.threads_numbers.name: self.__threads_numbers[:samples_count],
+            AppProfileAttribute.connections_numbers.name: self.__connections_numbers[:samples_count],
+            AppProfileAttribute.data_retrieval_timestamps.name: self.__data_retrieval_timestamp[:samples_count]
+        })
+
+        del self.__users[:users_count]
+        del self.__memory_usages[:samples_count]
+        del self.__open_files[:samples_count]
+        del self.__cpu_percent_usages[:samples_count]
+        del self.__child_processes_count[:samples_count]
+        del self.__threads_numbers[:samples_count]
+        del self.__connections_numbers[:samples_count]
+        del self.__data_retrieval_timestamp[:samples_count]
+        return samples_count
+
+    def apply_sliding_window(self, max_samples: Union[int, None] = None,
+                             max_time_span_sec: Union[int, float, None] = None,
+                             max_size_bytes: Union[int, None] = None) -> int:
+        """
+        Evicts the oldest samples into the baseline until the application profile fits in the sliding window.
+        A limit set to None is not enforced. The latest retrieved data is always kept.
+        :raises TypeError if max_samples or max_size_bytes are not of type 'int',
+                or if max_time_span_sec is not of type 'Union[int, float]'.
+        :param max_samples: The maximum number of samples to keep.
+        :type max_samples: Union[int, None]
+        :param max_time_span_sec: The maximum time between the oldest and the latest kept samples in seconds.
+        :type max_time_span_sec: Union[int, float, None]
+        :param max_size_bytes: The maximum estimated size of the kept samples in bytes.
+        :type max_size_bytes: Union[int, None]
+        :return: The number of samples that were evicted.
+        :rtype: int
+        """
+        if max_samples is not None and not isinstance(max_samples, int):
+            raise TypeError(expected_type_but_received_message.format("max_samples", "int", max_samples))
+        if max_time_span_sec is not None and not isinstance(max_time_span_sec, (int, float)):
+            raise TypeError(expected_type_but_received_message.format("max_time_span_sec", "Union[int, float]",
+                                                                      max_time_span_sec))
+        if max_size_bytes is not None and not isinstance(max_size_bytes, int):
+            raise TypeError(expected_type_but_received_message.format("max_size_bytes", "int", max_size_bytes))
+
+        samples_count = len(self.__data_retrieval_timestamp)
+        if samples_count == 0:
+            return 0
+
+        samples_to_evict = 0
+        if max_samples is not None:
+            samples_to_evict = max(samples_to_evict, samples_count - max_samples)
+
+        if max_time_span_sec is not None:
+            oldest_timestamp_to_keep = self.__data_retrieval_timestamp[-1] - \
+                                       datetime.timedelta(seconds=max_time_span_sec)
+            # Timestamps are appended in retrieval order, so they are sorted.
+            samples_to_evict = max(samples_to_evict,
+                                   bisect.bisect_left(self.__data_retrieval_timestamp, oldest_timestamp_to_keep))
+
+        if max_size_bytes is not None:
+            size_bytes = self.get_estimated_size_bytes()
+            if size_bytes > max_size_bytes:
+                samples_to_evict = max(samples_to_evict,
+                                       math.ceil(samples_count * (1 - max_size_bytes / size_bytes)))
+
+        return self.evict_oldest_samples(samples_to_evict)
+
+    def state_dict_format(self) -> dict:
+        """
+        Converts the state of this application profile that is not part of its samples into a dictionary.
+        It is saved next to the profile's samples.
+        Format:
+            {
+                baseline: {...},
+                quantile_sketches: {memory_infos: {...}, cpu_percents: {...}, ...},
+                quantile_sketches_timestamp: "2020-12-12 14:30:32:34.232"
+            }
+        For more info about the baseline format: 'src.main.common.AppProfileBaseline.AppProfileBaseline.dict_format'.
+        For more info about the sketches format: 'src.main.common.QuantileSketch.QuantileSketch.dict_format'.
+        :return: The state of this application profile.
+        :rtype: dict
+        """
+        quantile_sketches_timestamp = \
+            self.__quantile_sketches_timestamp.strftime(wades_config.datetime_format) \
+            if self.__quantile_sketches_timestamp is not None else None
+        return {
+            "baseline": self.__baseline.dict_format(),
+            "quantile_sketches": {attribute_name: sketch.dict_format()
+                                  for attribute_name, sketch in self.__quantile_sketches.items()},
+            "quantile_sketches_timestamp": quantile_sketches_timestamp
+        }
+
+    def set_state_from_dict(self, state_dict: dict) -> None:
+        """
+        Sets the state of this application profile that is not part of its samples. Any old state will be lost.
+        :raises TypeError if state_dict is not of type 'dict'.
+        :param state_dict: The state of the application profile. For more info about the format: 'state_dict_format'.
+        :type state_dict: dict
+        """
+        if not isinstance(state_dict, dict):
+            raise TypeError(expected_type_but_received_message.format("state_dict", "dict", state_dict))
+        baseline = AppProfileBaseline()
+        if "baseline" in state_dict:
+            baseline.set_value_from_dict(state_dict["baseline"])
+        self.__baseline = baseline
+
+        quantile_sketches = dict()
+        for attribute_name, sketch_dict in state_dict.get("quantile_sketches", dict()).items():
+            quantile_sketches[attribute_name] = QuantileSketch()
+            quantile_sketches[attribute_name].set_value_from_dict(sketch_dict)
+        self.__quantile_sketches = quantile_sketches
+        quantile_sketches_timestamp = state_dict.get("quantile_sketches_timestamp")
+        self.__quantile_sketches_timestamp = \
+            datetime.datetime.strptime(quantile_sketches_timestamp, wades_config.datetime_format) \
+            if quantile_sketches_timestamp is not None else None
+
     def __str__(self) -> str:
         """
         Overload of the method __str__ to display the information about the application in a more readable format.
@@ -129,6 +385,28 @@ class AppProfile:
         """
         return not self.__eq__(other=other)
 
+    def __copy__(self) -> "AppProfile":
+        """
+        Overload of copy.copy. The copy can take new samples and evict old ones without changing this application
+        profile: the lists of samples are copied, but not the samples, which are never changed once they are added.
+        The baseline and the quantile sketches, whose size doesn't depend on the number of samples, are deep copied.
+        :return: A copy of this application profile.
+        :rtype: AppProfile
+        """
+        app_profile = AppProfile.__new__(AppProfile)
+        app_profile.__dict__.update(self.__dict__)
+        app_profile.__memory_usages = list(self.__memory_usages)
+        app_profile.__cpu_percent_usages = list(self.__cpu_percent_usages)
+        app_profile.__open_files = list(self.__open_files)
+        app_profile.__data_retrieval_timestamp = list(self.__data_retrieval_timestamp)
+        app_profile.__child_processes_count = list(self.__child_processes_count)
+        app_profile.__users = list(self.__users)
+        app_profile.__threads_numbers = list(self.__threads_numbers)
+        app_profile.__connections_numbers = list(self.__connections_numbers)
+        app_profile.__baseline = copy.deepcopy(self.__baseline)
+        app_profile.__quantile_sketches = copy.deepcopy(self.__quantile_sketches)
+        return app_profile
+
     def add_new_information_from_process_object(self, process: psutil.Process,
                                                 data_retrieval_timestamp: datetime.datetime) -> None:
         """
@@ -247,6 +525,109 @@ class AppProfile:
         self.__threads_numbers.append(threads_number)
         self.__connections_numbers.append(connections_num)
 
+    def add_new_information_batch(self, memory_usages: List[int], child_processes_counts: List[int],
+                                  users: List[str], open_files: List[list], cpu_percentages: List[float],
+                                  data_retrieval_timestamp: datetime.datetime, threads_numbers: List[int],
+                                  connections_numbers: List[int]) -> None:
+        """
+        Adds the information of all the processes associated to this application that were retrieved in the same
+        cycle. This is equivalent to calling `add_new_information` once per process, but the batch is validated once
+        with array-level checks and then appended in one shot.
+        :raises TypeError if one of the following criteria is met:
+            - memory_usages, child_processes_counts, threads_numbers or connections_numbers are not of type
+              'List[int]'
+            - users is not of type 'List[str]'
+            - open_files is not of type 'List[list]'
+            - cpu_percentages is not of type 'List[float]'
+            - data_retrieval_timestamp is not of type 'datetime.datetime'
+        :raises ValueError if the numeric collections don't have the same length as open_files,
+                or if any of the numeric values is negative,
+                or if data_retrieval_timestamp is newer than current time.
+        :param memory_usages: The memory usages of the processes (one per process).
+        :type memory_usages: List[int]
+        :param child_processes_counts: The number of child processes registered at the moment (one per process).
+        :type child_processes_counts: List[int]
+        :param users: The users that are running the processes.
+        :type users: List[str]
+        :param open_files: The open files of each process (one list per process).
+        :type open_files: List[list]
+        :param cpu_percentages: Current CPU usages of the processes (one per process).
+        :type cpu_percentages: List[float]
+        :param data_retrieval_timestamp: The time the data was retrieved. It is shared by the whole batch.
+        :type data_retrieval_timestamp: datetime.datetime
+        :param threads_numbers: The number of threads associated to each process.
+        :type threads_numbers: List[int]
+        :param connections_numbers: The number of connections of each process.
+        :type connections_numbers: List[int]
+        """
+        numeric_attributes = {
+            "memory_usages": (memory_usages, "iu", "List[int]"),
+            "child_processes_counts": (child_processes_counts, "iu", "List[int]"),
+            "cpu_percentages": (cpu_percentages, "f", "List[float]"),
+            "threads_numbers": (threads_numbers, "iu", "List[int]"),
+            "connections_numbers": (connections_numbers, "iu", "List[int]")
+        }
+        if not isinstance(users, list):
+            raise TypeError(expected_type_but_received_message.format("users", "List[str]", users))
+        if not isinstance(open_files, list):
+            raise TypeError(expected_type_but_received_message.format("open_files", "List[list]", open_files))
+        if not isinstance(data_retrieval_timestamp, datetime.datetime):
+            raise TypeError(expected_type_but_received_message.format("data_retrieval_timestamp", "datetime.datetime",
+                                                                      data_retrieval_timestamp))
+
+        batch_size = len(open_files)
+        numeric_arrays = AppProfile.__get_numeric_batch_arrays(numeric_attributes, batch_size)
+        if batch_size == 0:
+            return
+
+        if data_retrieval_timestamp.replace(tzinfo=None) > datetime.datetime.now():
+            raise ValueError("Argument data_retrieval_timestamp cannot be newer than current time. Value receive: {}"
+                             .format(data_retrieval_timestamp))
+
+        opened_files_batch = list()
+        for process_open_files in open_files:
+            if not isinstance(process_open_files, list):
+                raise TypeError(expected_type_but_received_message.format("open_files", "List[list]", open_files))
+            opened_files_batch.append(list({open_file.path for open_file in process_open_files}))
+
+        # tolist() converts numpy scalars back into python's int and float, which is what the profile stores.
+        self.__open_files.extend(opened_files_batch)
+        self.__memory_usages.extend(numeric_arrays["memory_usages"].tolist())
+        self.__child_processes_count.extend(numeric_arrays["child_processes_counts"].tolist())
+        self.__users.extend(users)
+        self.__cpu_percent_usages.extend(numeric_arrays["cpu_percentages"].tolist())
+        self.__data_retrieval_timestamp.extend([data_retrieval_timestamp] * batch_size)
+        self.__threads_numbers.extend(numeric_arrays["threads_numbers"].tolist())
+        self.__connections_numbers.extend(numeric_arrays["connections_numbers"].tolist())
+
+    @staticmethod
+    def __get_numeric_batch_arrays(numeric_attributes: Dict[str, tuple], batch_size: int) -> Dict[str, numpy.ndarray]:
+        """
+        Validates the numeric collections of a batch and converts them into arrays.
+        :raises TypeError if one of the collections is not a list, or if its values are not of the expected kind.
+        :raises ValueError if one of the collections doesn't have batch_size values, or if it has a negative value.
+        :param numeric_attributes: The collections mapped by attribute name, each one along with the numpy kinds of
+               its values and the name of its expected type.
+        :type numeric_attributes: Dict[str, tuple]
+        :param batch_size: The number of processes in the batch.
+        :type batch_size: int
+        :return: The arrays of the collections mapped by attribute name.
+        :rtype: Dict[str, numpy.ndarray]
+        """
+        numeric_arrays = dict()
+        for attribute_name, (values, expected_kinds, expected_type_name) in numeric_attributes.items():
+            if not isinstance(values, list):
+                raise TypeError(expected_type_but_received_message.format(attribute_name, expected_type_name, values))
+            if len(values) != batch_size:
+                raise ValueError(collection_length_mismatch_message.format(attribute_name, batch_size, len(values)))
+            values_array = numpy.asarray(values)
+            if batch_size > 0 and values_array.dtype.kind not in expected_kinds:
+                raise TypeError(expected_type_but_received_message.format(attribute_name, expected_type_name, values))
+            if batch_size > 0 and values_array.min() < 0:
+                raise ValueError(expected_value_but_received_message.format(attribute_name, "non-negative", values))
+            numeric_arrays[attribute_name] = values_array
+        return numeric_arrays
+
     def add_open_files(self, open_files: list, data_retrieval_timestamp: datetime.datetime) -> None:
         """
         Adds the open files to the list of open files for this application.
@@ -399,10 +780,77 @@ class AppProfile:
         """
         if len(self.__data_retrieval_timestamp) <= 0:
             return 0
+        # Timestamps are appended in retrieval order, so the latest batch is found from the end of the list.
         last_retrieved_data_timestamp = self.__data_retrieval_timestamp[-1]
-        return self.__data_retrieval_timestamp.count(last_retrieved_data_timestamp)
+        return len(self.__data_retrieval_timestamp) - \
+            bisect.bisect_left(self.__data_retrieval_timestamp, last_retrieved_data_timestamp)
+
+    def get_retrieved_data(self, since_timestamp: Union[datetime.datetime, None] = None,
+                           until_timestamp: Union[datetime.datetime, None] = None) -> dict:
+        """
+        Get the data retrieved after since_timestamp and up to until_timestamp as a dictionary. Only the samples in
+        that range are copied, so reading the newest samples doesn't depend on the length of the history.
+        Users may have less entries than the other attributes (processes without username). They are taken from the
+        end of the list when the range ends with the latest sample, and from the start of the list otherwise.
+        :raises TypeError if since_timestamp or until_timestamp are not of type 'Union[datetime.datetime, None]'.
+        :param since_timestamp: The samples retrieved at this time or before are left out. If None, the data starts
+                with the oldest sample.
+        :type since_timestamp: Union[datetime.datetime, None]
+        :param until_timestamp: The samples retrieved after this time are left out. If None, the data ends with the
+                latest sample.
+        :type until_timestamp: Union[datetime.datetime, None]
+        :return: The retrieved data in the range. For more info about the format: 'get_previously_retrieved_data()'.
+        :rtype: dict
+        """
+        if since_timestamp is not None and not isinstance(since_timestamp, datetime.datetime):
+            raise TypeError(expected_type_but_received_message.format("since_timestamp",
+                                                                      "Union[datetime.datetime, None]",
+                                                                      since_timestamp))
+        if until_timestamp is not None and not isinstance(until_timestamp, datetime.datetime):
+            raise TypeError(expected_type_but_received_message.format("until_timestamp",
+                                                                      "Union[datetime.datetime, None]",
+                                                                      until_timestamp))
+
+        first_index = 0 if since_timestamp is None else \
+            bisect.bisect_right(self.__data_retrieval_timestamp, since_timestamp)
+        last_index = len(self.__data_retrieval_timestamp) if until_timestamp is None else \
+            bisect.bisect_right(self.__data_retrieval_timestamp, until_timestamp)
+        return self.__get_retrieved_data_slice(first_index, max(first_index, last_index))
+
+    def __get_retrieved_data_slice(self, first_index: int, last_index: int) -> dict:
+        """
+        Copies the samples from first_index to last_index, excluded, into a dictionary.
+        :param first_index: The index of the first sample.
+        :type first_index: int
+        :param last_index: The index after the last sample.
+        :type last_index: int
+        :return: The samples in the format of 'get_previously_retrieved_data()'.
+        :rtype: dict
+        """
+        samples_count = len(self.__data_retrieval_timestamp)
+        if last_index == samples_count:
+            users_offset = len(self.__users) - samples_count
+            first_users_index = max(0, first_index + users_offset)
+            last_users_index = max(0, last_index + users_offset)
+        else:
+            first_users_index = min(first_index, len(self.__users))
+            last_users_index = min(last_index, len(self.__users))
+
+        return {
+            AppProfileAttribute.app_name.name: self.__name,
+            AppProfileAttribute.memory_infos.name: self.__memory_usages[first_index:last_index],
+            AppProfileAttribute.cpu_percents.name: self.__cpu_percent_usages[first_index:last_index],
+            AppProfileAttribute.opened_files.name: [list(opened_files) for opened_files
+                                                    in self.__open_files[first_index:last_index]],
+            AppProfileAttribute.data_retrieval_timestamps.name: [
+                timestamp.strftime(wades_config.datetime_format)
+                for timestamp in self.__data_retrieval_timestamp[first_index:last_index]],
+            AppProfileAttribute.children_counts.name: self.__child_processes_count[first_index:last_index],
+            AppProfileAttribute.usernames.name: self.__users[first_users_index:last_users_index],
+            AppProfileAttribute.threads_numbers.name: self.__threads_numbers[first_index:last_index],
+            AppProfileAttribute.connections_numbers.name: self.__connections_numbers[first_index:last_index]
+        }
 
-    # noinspection DuplicatedCode
     def get_latest_retrieved_data(self) -> dict:
         """
         Get the latest retrieved data as a dictionary. The returned value can be be used for data modelling.
@@ -425,36 +873,9 @@ class AppProfile:
         if len(self.__data_retrieval_timestamp) <= 0:
             return dict()
 
-        app_profile_dict = self.dict_format()
-        last_retrieved_data_size = self.get_latest_retrieved_data_size()
-        app_profile_dict.pop(AppProfileAttribute.date_created_timestamp.name)
-
-        app_profile_dict[AppProfileAttribute.memory_infos.name] = \
-            app_profile_dict[AppProfileAttribute.memory_infos.name][-last_retrieved_data_size:]
-
-        app_profile_dict[AppProfileAttribute.cpu_percents.name] = \
-            app_profile_dict[AppProfileAttribute.cpu_percents.name][-last_retrieved_data_size:]
-
-        app_profile_dict[AppProfileAttribute.children_counts.name] = \
-            app_profile_dict[AppProfileAttribute.children_counts.name][-last_retrieved_data_size:]
-
-        app_profile_dict[AppProfileAttribute.usernames.name] = \
-            app_profile_dict[AppProfileAttribute.usernames.name][-last_retrieved_data_size:]
-
-        app_profile_dict[AppProfileAttribute.data_retrieval_timestamps.name] = \
-            app_profile_dict[AppProfileAttribute.data_retrieval_timestamps.name][-last_retrieved_data_size:]
+        samples_count = len(self.__data_retrieval_timestamp)
+        return self.__get_retrieved_data_slice(samples_count - self.get_latest_retrieved_data_size(), samples_count)
 
-        app_profile_dict[AppProfileAttribute.opened_files.name] = \
-            app_profile_dict[AppProfileAttribute.opened_files.name][-last_retrieved_data_size:]
-        app_profile_dict[AppProfileAttribute.threads_numbers.name] = \
-            app_profile_dict[AppProfileAttribute.threads_numbers.name][-last_retrieved_data_size:]
-
-        app_profile_dict[AppProfileAttribute.connections_numbers.name] = \
-            app_profile_dict[AppProfileAttribute.connections_numbers.name][-last_retrieved_data_size:]
-
-        return app_profile_dict
-
-    # noinspection DuplicatedCode
     def get_previously_retrieved_data(self) -> dict:
         """
         Get the previously retrieved data as a dictionary. The returned value can be be used for data modelling.
@@ -475,34 +896,17 @@ class AppProfile:
         """
         if len(self.__data_retrieval_timestamp) <= 0:
             return dict()
-        app_profile_dict = self.dict_format()
-
-        last_retrieved_data_size = self.get_latest_retrieved_data_size()
-        old_data_size = len(self.__data_retrieval_timestamp) - last_retrieved_data_size
-        app_profile_dict.pop(AppProfileAttribute.date_created_timestamp.name)
-
-        app_profile_dict[AppProfileAttribute.memory_infos.name] = \
-            app_profile_dict[AppProfileAttribute.memory_infos.name][:old_data_size]
-
-        app_profile_dict[AppProfileAttribute.cpu_percents.name] = \
-            app_profile_dict[AppProfileAttribute.cpu_percents.name][:old_data_size]
-
-        app_profile_dict[AppProfileAttribute.children_counts.name] = \
-            app_profile_dict[AppProfileAttribute.children_counts.name][:old_data_size]
 
-        app_profile_dict[AppProfileAttribute.usernames.name] = \
-            app_profile_dict[AppProfileAttribute.usernames.name][:old_data_size]
+        old_data_size = len(self.__data_retrieval_timestamp) - self.get_latest_retrieved_data_size()
+        return self.__get_retrieved_data_slice(0, old_data_size)
 
-        app_profile_dict[AppProfileAttribute.data_retrieval_timestamps.name] = \
-            app_profile_dict[AppProfileAttribute.data_retrieval_timestamps.name][:old_data_size]
-
-        app_profile_dict[AppProfileAttribute.opened_files.name] = \
-            app_profile_dict[AppProfileAttribute.opened_files.name][:old_data_size]
-
-        app_profile_dict[AppProfileAttribute.threads_numbers.name] = \
-            app_profile_dict[AppProfileAttribute.threads_numbers.name][:old_data_size]
-
-        app_profile_dict[AppProfileAttribute.connections_numbers.name] = \
-            app_profile_dict[AppProfileAttribute.connections_numbers.name][:old_data_size]
-
-        return app_profile_dict
+    def get_previous_retrieval_timestamp(self) -> Union[datetime.datetime, None]:
+        """
+        Gets the retrieval timestamp of the newest sample before the latest retrieved data batch.
+        :return: The retrieval timestamp of the previous batch, None if there is only one batch.
+        :rtype: Union[datetime.datetime, None]
+        """
+        old_data_size = len(self.__data_retrieval_timestamp) - self.get_latest_retrieved_data_size()
+        if old_data_size <= 0:
+            return None
+        return self.__data_retrieval_timestamp[old_data_size - 1]
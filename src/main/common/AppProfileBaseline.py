@@ -0,0 +1,145 @@
+import copy
+import datetime
+from typing import Set, Union
+
+import wades_config
+from src.main.common.enum.AppProfileAttribute import AppProfileAttribute
+from src.utils.error_messages import expected_type_but_received_message
+
+
+class AppProfileBaseline:
+    # Numeric attributes of an AppProfile.
+    numeric_attribute_names = [AppProfileAttribute.memory_infos.name, AppProfileAttribute.cpu_percents.name,
+                               AppProfileAttribute.children_counts.name, AppProfileAttribute.threads_numbers.name,
+                               AppProfileAttribute.connections_numbers.name]
+
+    def __init__(self) -> None:
+        """
+        Abstracts the summary of the samples that were evicted from an application profile's sliding window.
+        The raw samples are lost, but their users and opened files are kept so the modeller still treats them as known
+        behaviour.
+        """
+        self.__evicted_samples_count = 0
+        self.__oldest_evicted_timestamp = None
+        self.__newest_evicted_timestamp = None
+        self.__users = set()
+        self.__opened_files = set()
+
+    def get_evicted_samples_count(self) -> int:
+        """
+        Gets the number of samples summarized by this baseline.
+        :return: The number of evicted samples.
+        :rtype: int
+        """
+        return self.__evicted_samples_count
+
+    def get_oldest_evicted_timestamp(self) -> Union[datetime.datetime, None]:
+        """
+        Gets the retrieval timestamp of the oldest evicted sample.
+        :return: The retrieval timestamp of the oldest evicted sample, None if no sample has been evicted.
+        :rtype: Union[datetime.datetime, None]
+        """
+        return self.__oldest_evicted_timestamp
+
+    def get_newest_evicted_timestamp(self) -> Union[datetime.datetime, None]:
+        """
+        Gets the retrieval timestamp of the newest evicted sample.
+        :return: The retrieval timestamp of the newest evicted sample, None if no sample has been evicted.
+        :rtype: Union[datetime.datetime, None]
+        """
+        return self.__newest_evicted_timestamp
+
+    def get_users(self) -> Set[str]:
+        """
+        Gets the users found in the evicted samples.
+        :return: The users found in the evicted samples.
+        :rtype: Set[str]
+        """
+        return copy.deepcopy(self.__users)
+
+    def get_opened_files(self) -> Set[str]:
+        """
+        Gets the opened files found in the evicted samples.
+        :return: The opened files found in the evicted samples.
+        :rtype: Set[str]
+        """
+        return copy.deepcopy(self.__opened_files)
+
+    def is_empty(self) -> bool:
+        """
+        Checks if the baseline summarizes any sample.
+        :return: True if no sample has been evicted into this baseline, False otherwise.
+        :rtype: bool
+        """
+        return self.__evicted_samples_count == 0
+
+    def add_samples(self, evicted_data: dict) -> None:
+        """
+        Folds evicted samples into the baseline.
+        :raises TypeError if evicted_data is not of type 'dict'.
+        :param evicted_data: The evicted samples. It uses the same format as
+            'src.main.common.AppProfile.AppProfile.get_previously_retrieved_data', but data_retrieval_timestamps
+            are datetime objects.
+        :type evicted_data: dict
+        """
+        if not isinstance(evicted_data, dict):
+            raise TypeError(expected_type_but_received_message.format("evicted_data", "dict", evicted_data))
+
+        retrieval_timestamps = evicted_data[AppProfileAttribute.data_retrieval_timestamps.name]
+        if len(retrieval_timestamps) == 0:
+            return
+
+        self.__evicted_samples_count += len(retrieval_timestamps)
+        if self.__oldest_evicted_timestamp is None:
+            self.__oldest_evicted_timestamp = retrieval_timestamps[0]
+        self.__newest_evicted_timestamp = retrieval_timestamps[-1]
+        self.__users.update(evicted_data[AppProfileAttribute.usernames.name])
+        for opened_files_batch in evicted_data[AppProfileAttribute.opened_files.name]:
+            self.__opened_files.update(opened_files_batch)
+
+    def dict_format(self) -> dict:
+        """
+        Converts this baseline into a json-serializable dictionary.
+        :return: The baseline as a dictionary.
+            Format:
+            {
+                evicted_samples_count: 120,
+                oldest_evicted_timestamp: "2020-12-12 14:30:32:34.232",
+                newest_evicted_timestamp: "2020-12-13 14:30:32:34.232",
+                usernames: [user_1, user_2, ...],
+                opened_files: [path_1, path_2, ...]
+            }
+        All timestamp have 'YYYY-MM-DD HH:MM:SS:microseconds' format.
+        :rtype: dict
+        """
+        oldest_timestamp = self.__oldest_evicted_timestamp.strftime(wades_config.datetime_format) \
+            if self.__oldest_evicted_timestamp is not None else None
+        newest_timestamp = self.__newest_evicted_timestamp.strftime(wades_config.datetime_format) \
+            if self.__newest_evicted_timestamp is not None else None
+        return {
+            "evicted_samples_count": self.__evicted_samples_count,
+            "oldest_evicted_timestamp": oldest_timestamp,
+            "newest_evicted_timestamp": newest_timestamp,
+            AppProfileAttribute.usernames.name: sorted(self.__users),
+            AppProfileAttribute.opened_files.name: sorted(self.__opened_files)
+        }
+
+    def set_value_from_dict(self, baseline_dict: dict) -> None:
+        """
+        Sets the values of this baseline from a dictionary. Any old values will be lost.
+        :raises TypeError if baseline_dict is not of type 'dict'.
+        :param baseline_dict: The baseline as a dictionary. For more info about the format: 'dict_format()'.
+        :type baseline_dict: dict
+        """
+        if not isinstance(baseline_dict, dict):
+            raise TypeError(expected_type_but_received_message.format("baseline_dict", "dict", baseline_dict))
+
+        oldest_timestamp = baseline_dict["oldest_evicted_timestamp"]
+        newest_timestamp = baseline_dict["newest_evicted_timestamp"]
+        self.__evicted_samples_count = baseline_dict["evicted_samples_count"]
+        self.__oldest_evicted_timestamp = datetime.datetime.strptime(oldest_timestamp, wades_config.datetime_format) \
+            if oldest_timestamp is not None else None
+        self.__newest_evicted_timestamp = datetime.datetime.strptime(newest_timestamp, wades_config.datetime_format) \
+            if newest_timestamp is not None else None
+        self.__users = set(baseline_dict[AppProfileAttribute.usernames.name])
+        self.__opened_files = set(baseline_dict[AppProfileAttribute.opened_files.name])
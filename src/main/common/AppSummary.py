@@ -5,11 +5,13 @@ from typing import Union, Set
 from src.main.common.enum.AppProfileAttribute import AppProfileAttribute
 from src.main.common.enum.AppSummaryAttribute import AppSummaryAttribute
 from src.main.common.enum.RiskLevel import RiskLevel
+from src.utils.error_messages import expected_type_but_received_message
 
 
 class AppSummary:
     def __init__(self, app_name: str, error_message: Union[str, None], risk: RiskLevel, abnormal_attrs: Set[str],
-                 latest_retrieved_app_details: dict, modelled_app_details: dict) -> None:
+                 latest_retrieved_app_details: dict, modelled_app_details: dict, anomalous_points_count: int = 0,
+                 worst_point: Union[dict, None] = None) -> None:
         """
         Constructor for the AppSummary class.
         :param app_name: The name of the application.
@@ -24,6 +26,11 @@ class AppSummary:
         :type latest_retrieved_app_details: dict
         :param modelled_app_details: The modelled data of a specific app_profile.
         :type modelled_app_details: dict
+        :param anomalous_points_count: The number of latest retrieved samples with an anomalous numeric value.
+        :type anomalous_points_count: int
+        :param worst_point: The numeric value with the highest risk level. For more info about the format:
+                'get_worst_point()'.
+        :type worst_point: Union[dict, None]
         """
         self.__app_name = app_name
         self.__error_message = error_message
@@ -31,6 +38,8 @@ class AppSummary:
         self.__abnormal_attributes = abnormal_attrs
         self.__latest_retrieved_app_details = latest_retrieved_app_details
         self.__modelled_app_details = modelled_app_details
+        self.__anomalous_points_count = anomalous_points_count
+        self.__worst_point = worst_point
 
     def get_app_name(self) -> str:
         """
@@ -103,6 +112,30 @@ class AppSummary:
         """
         return copy.deepcopy(self.__modelled_app_details)
 
+    def get_anomalous_points_count(self) -> int:
+        """
+        Gets the number of latest retrieved samples with an anomalous numeric value.
+        :return: The number of anomalous samples.
+        :rtype: int
+        """
+        return self.__anomalous_points_count
+
+    def get_worst_point(self) -> Union[dict, None]:
+        """
+        Gets the numeric value of the latest retrieved data with the highest risk level.
+        Format:
+            {
+                attribute_name: "memory_infos",
+                index: 3,
+                value: 23215,
+                risk: risk_level
+            }
+        The index is the position of the value in the latest retrieved data of the attribute.
+        :return: The worst point, None if no numeric value is anomalous.
+        :rtype: Union[dict, None]
+        """
+        return copy.deepcopy(self.__worst_point)
+
     def dict_format(self) -> dict:
         """
         Get the AppSummary object as a dictionary.
@@ -114,7 +147,9 @@ class AppSummary:
                 error_message: some_message,
                 abnormal_attributes: abnormal_attrs,
                 modelled_app_details: modelled_app_info,
-                latest_retrieved_app_details: latest_retrieved_app_data
+                latest_retrieved_app_details: latest_retrieved_app_data,
+                anomalous_points_count: 2,
+                worst_point: {...}
             }
             Note: All keys uses the enum's names in AppSummaryAttribute.
         :rtype: dict
@@ -125,7 +160,9 @@ class AppSummary:
             AppSummaryAttribute.error_message.name: self.__error_message,
             AppSummaryAttribute.abnormal_attributes.name: copy.deepcopy(self.__abnormal_attributes),
             AppSummaryAttribute.modelled_app_details.name: copy.deepcopy(self.__modelled_app_details),
-            AppSummaryAttribute.latest_retrieved_app_details.name: copy.deepcopy(self.__latest_retrieved_app_details)
+            AppSummaryAttribute.latest_retrieved_app_details.name: copy.deepcopy(self.__latest_retrieved_app_details),
+            AppSummaryAttribute.anomalous_points_count.name: self.__anomalous_points_count,
+            AppSummaryAttribute.worst_point.name: copy.deepcopy(self.__worst_point)
         }
 
     def __str__(self) -> str:
@@ -144,6 +181,35 @@ class AppSummary:
             AppSummaryAttribute.app_name.name: self.__app_name,
             AppSummaryAttribute.risk.name: self.__risk.name,
             AppSummaryAttribute.error_message.name: self.__error_message,
-            AppSummaryAttribute.abnormal_attributes.name: list(self.__abnormal_attributes)
+            AppSummaryAttribute.abnormal_attributes.name: list(self.__abnormal_attributes),
+            AppSummaryAttribute.anomalous_points_count.name: self.__anomalous_points_count
         }
+        if self.__worst_point is not None:
+            worst_point = dict(self.__worst_point)
+            worst_point["risk"] = worst_point["risk"].name
+            app_values[AppSummaryAttribute.worst_point.name] = worst_point
         return json.dumps(app_values)
+
+    def set_value_from_dict(self, app_summary_dict: dict) -> None:
+        """
+        Sets the values of this summary from a dictionary. Any old values will be lost.
+        The risk levels can be RiskLevel members or their values, and the abnormal attributes any collection, so that
+        the output of 'dict_format()' can be loaded after going through json.
+        :raises TypeError if app_summary_dict is not of type 'dict'.
+        :param app_summary_dict: The summary as a dictionary. For more info about the format: 'dict_format()'.
+        :type app_summary_dict: dict
+        """
+        if not isinstance(app_summary_dict, dict):
+            raise TypeError(expected_type_but_received_message.format("app_summary_dict", "dict", app_summary_dict))
+
+        self.__app_name = app_summary_dict[AppSummaryAttribute.app_name.name]
+        self.__error_message = app_summary_dict[AppSummaryAttribute.error_message.name]
+        self.__risk = RiskLevel(app_summary_dict[AppSummaryAttribute.risk.name])
+        self.__abnormal_attributes = set(app_summary_dict[AppSummaryAttribute.abnormal_attributes.name])
+        self.__latest_retrieved_app_details = copy.deepcopy(
+            app_summary_dict[AppSummaryAttribute.latest_retrieved_app_details.name])
+        self.__modelled_app_details = copy.deepcopy(app_summary_dict[AppSummaryAttribute.modelled_app_details.name])
+        self.__anomalous_points_count = app_summary_dict.get(AppSummaryAttribute.anomalous_points_count.name, 0)
+        self.__worst_point = copy.deepcopy(app_summary_dict.get(AppSummaryAttribute.worst_point.name))
+        if self.__worst_point is not None:
+            self.__worst_point["risk"] = RiskLevel(self.__worst_point["risk"])
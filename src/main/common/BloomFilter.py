@@ -0,0 +1,178 @@
+import base64
+import hashlib
+import math
+from typing import Tuple
+
+from src.utils.error_messages import expected_type_but_received_message, expected_value_but_received_message
+
+
+class BloomFilter:
+
+    def __init__(self, capacity: int, false_positive_rate: float) -> None:
+        """
+        Creates a Bloom filter: a set of strings with a fixed memory size that can report values that were never
+        added (false positives) but never misses a value that was added. The false positive rate holds as long as no
+        more than 'capacity' values are added.
+        :raises TypeError if capacity is not of type 'int' or if false_positive_rate is not of type 'float'.
+        :raises ValueError if capacity is lower than 1 or if false_positive_rate is not between 0 and 1.
+        :param capacity: The number of values the filter is sized for.
+        :type capacity: int
+        :param false_positive_rate: The probability of reporting a value that was never added, once the filter is full.
+        :type false_positive_rate: float
+        """
+        if not isinstance(capacity, int):
+            raise TypeError(expected_type_but_received_message.format("capacity", "int", capacity))
+        if not isinstance(false_positive_rate, float):
+            raise TypeError(expected_type_but_received_message.format("false_positive_rate", "float",
+                                                                      false_positive_rate))
+        if capacity < 1:
+            raise ValueError(expected_value_but_received_message.format("capacity", "1 or larger", capacity))
+        if not 0 < false_positive_rate < 1:
+            raise ValueError(expected_value_but_received_message.format("false_positive_rate", "between 0 and 1",
+                                                                        false_positive_rate))
+
+        self.__capacity = capacity
+        self.__false_positive_rate = false_positive_rate
+        self.__bits_count, self.__hashes_count = BloomFilter.__get_filter_dimensions(capacity, false_positive_rate)
+        self.__bits = bytearray(int(math.ceil(self.__bits_count / 8)))
+        self.__items_count = 0
+
+    @staticmethod
+    def __get_filter_dimensions(capacity: int, false_positive_rate: float) -> Tuple[int, int]:
+        """
+        Gets the optimal number of bits and hash functions of a Bloom filter.
+        :param capacity: The number of values the filter is sized for.
+        :type capacity: int
+        :param false_positive_rate: The false positive rate of the filter once it is full.
+        :type false_positive_rate: float
+        :return: The number of bits and the number of hash functions.
+        :rtype: Tuple[int, int]
+        """
+        bits_count = max(8, int(math.ceil(-capacity * math.log(false_positive_rate) / math.log(2) ** 2)))
+        hashes_count = max(1, int(round(bits_count / capacity * math.log(2))))
+        return bits_count, hashes_count
+
+    def get_capacity(self) -> int:
+        """
+        Gets the number of values the filter is sized for.
+        :return: The capacity of the filter.
+        :rtype: int
+        """
+        return self.__capacity
+
+    def get_false_positive_rate(self) -> float:
+        """
+        Gets the false positive rate of the filter when it is full.
+        :return: The false positive rate.
+        :rtype: float
+        """
+        return self.__false_positive_rate
+
+    def get_items_count(self) -> int:
+        """
+        Gets the number of distinct values added to the filter. Values that were reported as already added are not
+        counted, so it can be slightly lower than the actual number of distinct values.
+        :return: The number of distinct values added.
+        :rtype: int
+        """
+        return self.__items_count
+
+    def get_size_bytes(self) -> int:
+        """
+        Gets the size of the bit array of the filter.
+        :return: The size of the bit array in bytes.
+        :rtype: int
+        """
+        return len(self.__bits)
+
+    def is_full(self) -> bool:
+        """
+        Checks if the filter holds as many values as its capacity.
+        :return: True if the filter is full, False otherwise.
+        :rtype: bool
+        """
+        return self.__items_count >= self.__capacity
+
+    def add(self, value: str) -> bool:
+        """
+        Adds a value to the filter.
+        :raises TypeError if value is not of type 'str'.
+        :param value: The value to add.
+        :type value: str
+        :return: True if the value was not in the filter, False if it was (or if it is a false positive).
+        :rtype: bool
+        """
+        if not isinstance(value, str):
+            raise TypeError(expected_type_but_received_message.format("value", "str", value))
+
+        is_new_value = False
+        for bit_index in self.__get_bit_indexes(value):
+            byte_index, bit_mask = bit_index >> 3, 1 << (bit_index & 7)
+            if not self.__bits[byte_index] & bit_mask:
+                is_new_value = True
+                self.__bits[byte_index] |= bit_mask
+        if is_new_value:
+            self.__items_count += 1
+        return is_new_value
+
+    def __contains__(self, value: str) -> bool:
+        """
+        Checks if a value has been added to the filter.
+        :param value: The value to check.
+        :type value: str
+        :return: True if the value has probably been added, False if it has certainly not been added.
+        :rtype: bool
+        """
+        return all(self.__bits[bit_index >> 3] & (1 << (bit_index & 7)) for bit_index in self.__get_bit_indexes(value))
+
+    def __get_bit_indexes(self, value: str) -> list:
+        """
+        Gets the bits of the filter that represent a value. They are derived from two 64-bit hashes of the value
+        (double hashing).
+        :param value: The value to hash.
+        :type value: str
+        :return: The indexes of the bits that represent the value.
+        :rtype: list
+        """
+        digest = hashlib.blake2b(value.encode("utf-8", "surrogateescape"), digest_size=16).digest()
+        first_hash = int.from_bytes(digest[:8], "little")
+        second_hash = int.from_bytes(digest[8:], "little") | 1
+        return [(first_hash + index * second_hash) % self.__bits_count for index in range(self.__hashes_count)]
+
+    def dict_format(self) -> dict:
+        """
+        Converts the filter into a json-serializable dictionary.
+        Format:
+            {
+                capacity: 100000,
+                false_positive_rate: 0.001,
+                items_count: 2345,
+                bits: "AAAIAAAAAEA...",
+            }
+        The bits are encoded in base64.
+        :return: The filter as a dictionary.
+        :rtype: dict
+        """
+        return {
+            "capacity": self.__capacity,
+            "false_positive_rate": self.__false_positive_rate,
+            "items_count": self.__items_count,
+            "bits": base64.b64encode(bytes(self.__bits)).decode("ascii")
+        }
+
+    def set_value_from_dict(self, bloom_filter_dict: dict) -> None:
+        """
+        Sets the values of this filter from a dictionary. Any old values will be lost.
+        :raises TypeError if bloom_filter_dict is not of type 'dict'.
+        :param bloom_filter_dict: The filter as a dictionary. For more info about the format: 'dict_format()'.
+        :type bloom_filter_dict: dict
+        """
+        if not isinstance(bloom_filter_dict, dict):
+            raise TypeError(expected_type_but_received_message.format("bloom_filter_dict", "dict", bloom_filter_dict))
+
+        self.__capacity = bloom_filter_dict["capacity"]
+        self.__false_positive_rate = bloom_filter_dict["false_positive_rate"]
+        self.__bits_count, self.__hashes_count = BloomFilter.__get_filter_dimensions(self.__capacity,
+                                                                                     self.__false_positive_rate)
+        self.__items_count = bloom_filter_dict["items_count"]
+        self.__bits = bytearray(base64.b64decode(bloom_filter_dict["bits"]))
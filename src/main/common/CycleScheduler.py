@@ -0,0 +1,292 @@
+import datetime
+import math
+import random
+import socket
+import time
+import zlib
+from collections import deque
+from typing import Callable, List, Union
+
+import wades_config
+from src.main.common.enum.OverrunPolicy import OverrunPolicy
+from src.utils.error_messages import expected_type_but_received_message, expected_value_but_received_message
+
+
+class CycleScheduler:
+    # Number of recent cycle timings kept.
+    max_cycle_timings_count = 100
+
+    def __init__(self, period_sec: float, overrun_policy: OverrunPolicy = OverrunPolicy.skip,
+                 phase_offset_sec: float = 0.0, max_period_sec: Union[float, None] = None,
+                 max_jitter_sec: float = 0.0, max_catch_up_cycles_count: Union[int, None] = None,
+                 clock: Callable[[], float] = time.monotonic, sleep: Callable[[float], None] = time.sleep,
+                 get_random_number: Callable[[], float] = random.random) -> None:
+        """
+        Starts cycles at fixed deadlines of a monotonic clock: phase_offset_sec after the scheduler is created, and
+        then every period_sec. Since the deadlines don't depend on how long the cycles take, the schedule doesn't drift.
+        Each cycle starts a random jitter in [0, max_jitter_sec) after its deadline. The jitter is drawn again for every
+        cycle and doesn't shift the following deadlines.
+        A cycle that starts after its deadline means that the previous cycle overran. The overrun is recorded and
+        handled according to the overrun policy:
+        * OverrunPolicy.skip: the missed deadlines are skipped and the cycle starts at the next deadline.
+        * OverrunPolicy.catch_up: the cycle starts right away, and so do the following ones until they are on time, or
+            until max_catch_up_cycles_count cycles in a row have started late. The remaining missed deadlines are then
+            skipped.
+        * OverrunPolicy.degrade: the cycle starts right away and the period doubles, up to max_period_sec. Each cycle
+            that starts on time halves it back, down to period_sec.
+        :raises TypeError if period_sec, phase_offset_sec, max_period_sec or max_jitter_sec are not numbers,
+                if overrun_policy is not of type 'OverrunPolicy',
+                or if max_catch_up_cycles_count is not of type 'Union[int, None]'.
+        :raises ValueError if period_sec is not positive, if phase_offset_sec or max_jitter_sec are negative,
+                if max_jitter_sec is not smaller than period_sec, if max_period_sec is smaller than period_sec,
+                or if max_catch_up_cycles_count is not positive.
+        :param period_sec: The number of seconds between two deadlines.
+        :type period_sec: float
+        :param overrun_policy: What happens when a cycle starts after its deadline.
+        :type overrun_policy: OverrunPolicy
+        :param phase_offset_sec: The number of seconds before the first deadline.
+        :type phase_offset_sec: float
+        :param max_period_sec: The maximum period with OverrunPolicy.degrade. If None, 8 times period_sec.
+        :type max_period_sec: Union[float, None]
+        :param max_jitter_sec: The upper bound of the jitter of each cycle.
+        :type max_jitter_sec: float
+        :param max_catch_up_cycles_count: The maximum number of cycles in a row started late with
+                OverrunPolicy.catch_up. If None, all the missed deadlines are caught up.
+        :type max_catch_up_cycles_count: Union[int, None]
+        :param clock: Gets the current time of a monotonic clock, in seconds.
+        :type clock: Callable[[], float]
+        :param sleep: Sleeps for a number of seconds.
+        :type sleep: Callable[[float], None]
+        :param get_random_number: Gets a random number in [0, 1), to draw the jitter of each cycle.
+        :type get_random_number: Callable[[], float]
+        """
+        if not isinstance(period_sec, (int, float)):
+            raise TypeError(expected_type_but_received_message.format("period_sec", "float", period_sec))
+        if period_sec <= 0:
+            raise ValueError(expected_value_but_received_message.format("period_sec", "larger than 0", period_sec))
+        if not isinstance(overrun_policy, OverrunPolicy):
+            raise TypeError(expected_type_but_received_message.format("overrun_policy", "OverrunPolicy",
+                                                                      overrun_policy))
+        if not isinstance(phase_offset_sec, (int, float)):
+            raise TypeError(expected_type_but_received_message.format("phase_offset_sec", "float", phase_offset_sec))
+        if phase_offset_sec < 0:
+            raise ValueError(expected_value_but_received_message.format("phase_offset_sec", "0 or larger",
+                                                                        phase_offset_sec))
+        if max_period_sec is None:
+            max_period_sec = 8 * period_sec
+        CycleScheduler.__validate_overrun_limits(period_sec, max_period_sec, max_jitter_sec, max_catch_up_cycles_count)
+
+        self.__base_period_sec = period_sec
+        self.__period_sec = period_sec
+        self.__max_period_sec = max_period_sec
+        self.__overrun_policy = overrun_policy
+        self.__phase_offset_sec = phase_offset_sec
+        self.__max_jitter_sec = max_jitter_sec
+        self.__max_catch_up_cycles_count = max_catch_up_cycles_count
+        self.__clock = clock
+        self.__sleep = sleep
+        self.__get_random_number = get_random_number
+        self.__next_deadline = clock() + phase_offset_sec
+        self.__cycles_count = 0
+        self.__overruns_count = 0
+        # Number of cycles in a row started late with OverrunPolicy.catch_up.
+        self.__catch_up_cycles_count = 0
+        self.__skipped_cycles_count = 0
+        self.__max_lateness_sec = 0.0
+        self.__cycle_timings = deque(maxlen=CycleScheduler.max_cycle_timings_count)
+
+    @staticmethod
+    def __validate_overrun_limits(period_sec: float, max_period_sec: float, max_jitter_sec: float,
+                                  max_catch_up_cycles_count: Union[int, None]) -> None:
+        """
+        Validates the limits that bound how the cycles drift from the period.
+        :raises TypeError if max_period_sec or max_jitter_sec are not numbers,
+                or if max_catch_up_cycles_count is not of type 'Union[int, None]'.
+        :raises ValueError if max_jitter_sec is negative or not smaller than period_sec,
+                if max_period_sec is smaller than period_sec, or if max_catch_up_cycles_count is not positive.
+        :param period_sec: The number of seconds between two deadlines.
+        :type period_sec: float
+        :param max_period_sec: The maximum period with OverrunPolicy.degrade.
+        :type max_period_sec: float
+        :param max_jitter_sec: The upper bound of the jitter of each cycle.
+        :type max_jitter_sec: float
+        :param max_catch_up_cycles_count: The maximum number of cycles in a row started late with
+                OverrunPolicy.catch_up.
+        :type max_catch_up_cycles_count: Union[int, None]
+        """
+        if not isinstance(max_period_sec, (int, float)):
+            raise TypeError(expected_type_but_received_message.format("max_period_sec", "Union[float, None]",
+                                                                      max_period_sec))
+        if max_period_sec < period_sec:
+            raise ValueError(expected_value_but_received_message.format("max_period_sec", "period_sec or larger",
+                                                                        max_period_sec))
+        if not isinstance(max_jitter_sec, (int, float)):
+            raise TypeError(expected_type_but_received_message.format("max_jitter_sec", "float", max_jitter_sec))
+        if not 0 <= max_jitter_sec < period_sec:
+            raise ValueError(expected_value_but_received_message.format("max_jitter_sec",
+                                                                        "in [0, period_sec)", max_jitter_sec))
+        if max_catch_up_cycles_count is not None and (not isinstance(max_catch_up_cycles_count, int) or
+                                                      isinstance(max_catch_up_cycles_count, bool)):
+            raise TypeError(expected_type_but_received_message.format("max_catch_up_cycles_count",
+                                                                      "Union[int, None]", max_catch_up_cycles_count))
+        if max_catch_up_cycles_count is not None and max_catch_up_cycles_count <= 0:
+            raise ValueError(expected_value_but_received_message.format("max_catch_up_cycles_count", "larger than 0",
+                                                                        max_catch_up_cycles_count))
+
+    @staticmethod
+    def get_host_phase_offset(max_phase_offset_sec: float, host_name: Union[str, None] = None) -> float:
+        """
+        Gets the phase offset of a host, spread evenly over [0, max_phase_offset_sec) by a hash of its name. The offset
+        is the same every time the host starts, while hosts with different names collect at different moments.
+        :raises TypeError if max_phase_offset_sec is not a number, or if host_name is not of type 'Union[str, None]'.
+        :param max_phase_offset_sec: The upper bound of the offsets.
+        :type max_phase_offset_sec: float
+        :param host_name: The name of the host. If None, the name of this host.
+        :type host_name: Union[str, None]
+        :return: The phase offset of the host, in seconds.
+        :rtype: float
+        """
+        if not isinstance(max_phase_offset_sec, (int, float)):
+            raise TypeError(expected_type_but_received_message.format("max_phase_offset_sec", "float",
+                                                                      max_phase_offset_sec))
+        if host_name is None:
+            host_name = socket.gethostname()
+        if not isinstance(host_name, str):
+            raise TypeError(expected_type_but_received_message.format("host_name", "Union[str, None]", host_name))
+        return zlib.crc32(host_name.encode()) / 2 ** 32 * max_phase_offset_sec
+
+    def get_period_sec(self) -> float:
+        """
+        Gets the current number of seconds between two deadlines. It is only larger than the configured period while
+        the scheduler is degraded.
+        :return: The current period.
+        :rtype: float
+        """
+        return self.__period_sec
+
+    def get_overruns_count(self) -> int:
+        """
+        Gets the number of cycles that started after their deadline.
+        :return: The number of overruns.
+        :rtype: int
+        """
+        return self.__overruns_count
+
+    def get_skipped_cycles_count(self) -> int:
+        """
+        Gets the number of deadlines skipped after overruns with OverrunPolicy.skip.
+        :return: The number of skipped cycles.
+        :rtype: int
+        """
+        return self.__skipped_cycles_count
+
+    def get_cycle_timings(self) -> List[dict]:
+        """
+        Gets the timings of the most recent cycles, oldest first. For more info about the format:
+        'wait_for_next_cycle()'.
+        :return: The timings of up to 'CycleScheduler.max_cycle_timings_count' cycles.
+        :rtype: List[dict]
+        """
+        return [dict(cycle_timing) for cycle_timing in self.__cycle_timings]
+
+    def get_metrics(self) -> dict:
+        """
+        Gets the state of the schedule.
+        Format:
+            {
+                overrun_policy: "skip",
+                base_period_sec: 90,
+                period_sec: 90,
+                phase_offset_sec: 12.3,
+                max_jitter_sec: 5,
+                cycles_count: 1203,
+                overruns_count: 2,
+                skipped_cycles_count: 2,
+                max_lateness_sec: 20.4,
+                latest_cycle_timing: {...}
+            }
+        :return: The state of the schedule.
+        :rtype: dict
+        """
+        return {
+            "overrun_policy": self.__overrun_policy.name,
+            "base_period_sec": self.__base_period_sec,
+            "period_sec": self.__period_sec,
+            "phase_offset_sec": self.__phase_offset_sec,
+            "max_jitter_sec": self.__max_jitter_sec,
+            "cycles_count": self.__cycles_count,
+            "overruns_count": self.__overruns_count,
+            "skipped_cycles_count": self.__skipped_cycles_count,
+            "max_lateness_sec": self.__max_lateness_sec,
+            "latest_cycle_timing": dict(self.__cycle_timings[-1]) if len(self.__cycle_timings) > 0 else None
+        }
+
+    def wait_for_next_cycle(self) -> dict:
+        """
+        Waits until the next cycle must start.
+        :return: The timing of the cycle.
+            Format:
+                {
+                    cycle_index: 12,
+                    intended_timestamp: "2021-01-31 20:09:03:771116",
+                    actual_timestamp: "2021-01-31 20:09:03:772001",
+                    lateness_sec: 0.0009,
+                    jitter_sec: 2.4,
+                    is_overrun: False,
+                    skipped_cycles_count: 0
+                }
+            The timestamps are wall clock times in the format of wades_config.datetime_format. The intended timestamp is
+            the deadline of the cycle plus its jitter, and skipped_cycles_count the number of deadlines skipped before
+            it.
+        :rtype: dict
+        """
+        now = self.__clock()
+        jitter_sec = self.__get_random_number() * self.__max_jitter_sec if self.__max_jitter_sec > 0 else 0.0
+        deadline = self.__next_deadline
+        is_overrun = now > deadline + jitter_sec
+        skipped_cycles_count = 0
+        next_deadline = deadline + self.__period_sec
+        if is_overrun:
+            self.__overruns_count += 1
+            self.__max_lateness_sec = max(self.__max_lateness_sec, now - deadline - jitter_sec)
+            is_catch_up_limit_reached = self.__overrun_policy is OverrunPolicy.catch_up and \
+                self.__max_catch_up_cycles_count is not None and \
+                self.__catch_up_cycles_count >= self.__max_catch_up_cycles_count
+            if self.__overrun_policy is OverrunPolicy.skip or is_catch_up_limit_reached:
+                skipped_cycles_count = math.floor((now - deadline) / self.__period_sec) + 1
+                deadline += skipped_cycles_count * self.__period_sec
+                next_deadline = deadline + self.__period_sec
+                self.__skipped_cycles_count += skipped_cycles_count
+                self.__catch_up_cycles_count = 0
+            elif self.__overrun_policy is OverrunPolicy.catch_up:
+                self.__catch_up_cycles_count += 1
+            elif self.__overrun_policy is OverrunPolicy.degrade:
+                self.__period_sec = min(self.__period_sec * 2, self.__max_period_sec)
+                # The schedule restarts from now, so the missed deadlines are not caught up.
+                next_deadline = now + self.__period_sec
+        else:
+            self.__catch_up_cycles_count = 0
+            if self.__overrun_policy is OverrunPolicy.degrade and self.__period_sec > self.__base_period_sec:
+                self.__period_sec = max(self.__period_sec / 2, self.__base_period_sec)
+                next_deadline = deadline + self.__period_sec
+
+        deadline += jitter_sec
+        if now < deadline:
+            self.__sleep(deadline - now)
+            now = self.__clock()
+        self.__next_deadline = next_deadline
+
+        wall_clock_now = datetime.datetime.now()
+        cycle_timing = {
+            "cycle_index": self.__cycles_count,
+            "intended_timestamp": (wall_clock_now - datetime.timedelta(seconds=now - deadline)).strftime(
+                wades_config.datetime_format),
+            "actual_timestamp": wall_clock_now.strftime(wades_config.datetime_format),
+            "lateness_sec": now - deadline,
+            "jitter_sec": jitter_sec,
+            "is_overrun": is_overrun,
+            "skipped_cycles_count": skipped_cycles_count
+        }
+        self.__cycles_count += 1
+        self.__cycle_timings.append(cycle_timing)
+        return dict(cycle_timing)
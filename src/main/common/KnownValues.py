@@ -0,0 +1,187 @@
+import copy
+from typing import Set, Union, List
+
+import wades_config
+from src.main.common.BloomFilter import BloomFilter
+from src.utils.error_messages import expected_type_but_received_message
+
+
+class KnownValues:
+    # Each new Bloom filter is twice as large as the previous one and has half its false positive rate, so the
+    # overall false positive rate stays below twice the configured one.
+    __growth_factor = 2
+
+    def __init__(self, bloom_filter_threshold: Union[int, None] = None,
+                 false_positive_rate: float = wades_config.known_values_false_positive_rate) -> None:
+        """
+        Abstracts the values that are known behaviour for an application, such as its opened files or users.
+        Values are added incrementally and checked in O(number of checked values). The values are kept in a set until
+        there are more than bloom_filter_threshold of them; then they are moved to Bloom filters, which use bounded
+        memory but may report unknown values as known with a probability close to false_positive_rate.
+        :raises TypeError if bloom_filter_threshold is not of type 'Union[int, None]',
+                or if false_positive_rate is not of type 'float'.
+        :param bloom_filter_threshold: The number of distinct values above which Bloom filters are used. If None, the
+                values are always kept in a set.
+        :type bloom_filter_threshold: Union[int, None]
+        :param false_positive_rate: The false positive rate of the Bloom filters.
+        :type false_positive_rate: float
+        """
+        if bloom_filter_threshold is not None and not isinstance(bloom_filter_threshold, int):
+            raise TypeError(expected_type_but_received_message.format("bloom_filter_threshold", "Union[int, None]",
+                                                                      bloom_filter_threshold))
+        if not isinstance(false_positive_rate, float):
+            raise TypeError(expected_type_but_received_message.format("false_positive_rate", "float",
+                                                                      false_positive_rate))
+
+        self.__bloom_filter_threshold = bloom_filter_threshold
+        self.__false_positive_rate = false_positive_rate
+        self.__values = set()
+        self.__bloom_filters = list()
+        # Number of values added, with repetitions. Whitelisting needs enough of them to be meaningful.
+        self.__observations_count = 0
+
+    def get_observations_count(self) -> int:
+        """
+        Gets the number of values added, with repetitions.
+        :return: The number of values added.
+        :rtype: int
+        """
+        return self.__observations_count
+
+    def get_values_count(self) -> int:
+        """
+        Gets the number of distinct values added. It is approximate once Bloom filters are used.
+        :return: The number of distinct values.
+        :rtype: int
+        """
+        return len(self.__values) + sum(bloom_filter.get_items_count() for bloom_filter in self.__bloom_filters)
+
+    def is_exact(self) -> bool:
+        """
+        Checks if the values are kept in a set, so that membership checks are exact.
+        :return: True if the values are kept in a set, False if they are kept in Bloom filters.
+        :rtype: bool
+        """
+        return len(self.__bloom_filters) == 0
+
+    def get_values(self) -> Set[str]:
+        """
+        Gets the known values.
+        :raises ValueError if the values are kept in Bloom filters.
+        :return: The known values.
+        :rtype: Set[str]
+        """
+        if not self.is_exact():
+            raise ValueError("The known values are kept in Bloom filters and can't be listed.")
+        return copy.deepcopy(self.__values)
+
+    def add_values(self, values: List[str]) -> None:
+        """
+        Adds values to the known values.
+        :raises TypeError if values is not of type 'List[str]'.
+        :param values: The values to add.
+        :type values: List[str]
+        """
+        if not isinstance(values, list):
+            raise TypeError(expected_type_but_received_message.format("values", "List[str]", values))
+
+        self.__observations_count += len(values)
+        if self.is_exact():
+            self.__values.update(values)
+            if self.__bloom_filter_threshold is not None and len(self.__values) > self.__bloom_filter_threshold:
+                self.__move_values_to_bloom_filter()
+            return
+
+        for value in values:
+            if value in self:
+                continue
+            if self.__bloom_filters[-1].is_full():
+                last_bloom_filter = self.__bloom_filters[-1]
+                self.__bloom_filters.append(BloomFilter(
+                    capacity=last_bloom_filter.get_capacity() * KnownValues.__growth_factor,
+                    false_positive_rate=last_bloom_filter.get_false_positive_rate() / KnownValues.__growth_factor))
+            self.__bloom_filters[-1].add(value)
+
+    def __move_values_to_bloom_filter(self) -> None:
+        """
+        Moves the values of the set to a Bloom filter. The filter is sized for more values than the set holds, so it
+        doesn't start full when many values were added at once.
+        """
+        capacity = max(self.__bloom_filter_threshold, len(self.__values), 1) * KnownValues.__growth_factor
+        bloom_filter = BloomFilter(capacity=capacity,
+                                   false_positive_rate=self.__false_positive_rate / KnownValues.__growth_factor)
+        for value in self.__values:
+            bloom_filter.add(value)
+        self.__bloom_filters = [bloom_filter]
+        self.__values = set()
+
+    def __contains__(self, value: str) -> bool:
+        """
+        Checks if a value is known.
+        :param value: The value to check.
+        :type value: str
+        :return: True if the value is known (or a false positive of the Bloom filters), False otherwise.
+        :rtype: bool
+        """
+        if self.is_exact():
+            return value in self.__values
+        return any(value in bloom_filter for bloom_filter in self.__bloom_filters)
+
+    def get_unknown_values(self, values: List[str]) -> Set[str]:
+        """
+        Gets the values that are not known.
+        :raises TypeError if values is not of type 'List[str]'.
+        :param values: The values to check.
+        :type values: List[str]
+        :return: The values that are not known.
+        :rtype: Set[str]
+        """
+        if not isinstance(values, list):
+            raise TypeError(expected_type_but_received_message.format("values", "List[str]", values))
+        if self.is_exact():
+            return set(values).difference(self.__values)
+        return {value for value in set(values) if value not in self}
+
+    def dict_format(self) -> dict:
+        """
+        Converts the known values into a json-serializable dictionary.
+        Format:
+            {
+                bloom_filter_threshold: 100000,
+                false_positive_rate: 0.001,
+                observations_count: 5320,
+                values: [value_1, value_2, ...],
+                bloom_filters: [{...}, ...]
+            }
+        For more info about the Bloom filters format: 'src.main.common.BloomFilter.BloomFilter.dict_format'.
+        :return: The known values as a dictionary.
+        :rtype: dict
+        """
+        return {
+            "bloom_filter_threshold": self.__bloom_filter_threshold,
+            "false_positive_rate": self.__false_positive_rate,
+            "observations_count": self.__observations_count,
+            "values": sorted(self.__values),
+            "bloom_filters": [bloom_filter.dict_format() for bloom_filter in self.__bloom_filters]
+        }
+
+    def set_value_from_dict(self, known_values_dict: dict) -> None:
+        """
+        Sets the known values from a dictionary. Any old values will be lost.
+        :raises TypeError if known_values_dict is not of type 'dict'.
+        :param known_values_dict: The known values as a dictionary. For more info about the format: 'dict_format()'.
+        :type known_values_dict: dict
+        """
+        if not isinstance(known_values_dict, dict):
+            raise TypeError(expected_type_but_received_message.format("known_values_dict", "dict", known_values_dict))
+
+        self.__bloom_filter_threshold = known_values_dict["bloom_filter_threshold"]
+        self.__false_positive_rate = known_values_dict["false_positive_rate"]
+        self.__observations_count = known_values_dict["observations_count"]
+        self.__values = set(known_values_dict["values"])
+        bloom_filters = list()
+        for bloom_filter_dict in known_values_dict["bloom_filters"]:
+            bloom_filter = BloomFilter(capacity=1, false_positive_rate=0.5)
+            bloom_filter.set_value_from_dict(bloom_filter_dict)
+            bloom_filters.append(bloom_filter)
+        self.__bloom_filters = bloom_filters
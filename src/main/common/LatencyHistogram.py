@@ -0,0 +1,103 @@
+from bisect import bisect_left
+from typing import List, Union
+
+from src.utils.error_messages import expected_type_but_received_message, expected_value_but_received_message
+
+
+class LatencyHistogram:
+
+    def __init__(self, upper_bounds_sec: List[float]) -> None:
+        """
+        Counts durations in fixed buckets, as the histograms of the Prometheus text format: each bucket counts the
+        durations up to its upper bound, and an extra bucket counts the ones above the largest bound. Adding a duration
+        is a binary search and an increment, so it can be done on every cycle without keeping the durations.
+        The histogram is not thread-safe. For more info: 'src.main.common.MetricsRegistry.MetricsRegistry'.
+        :raises TypeError if upper_bounds_sec is not of type 'List[float]'.
+        :raises ValueError if upper_bounds_sec is empty, or is not made of increasing positive numbers.
+        :param upper_bounds_sec: The upper bounds of the buckets, in seconds.
+        :type upper_bounds_sec: List[float]
+        """
+        if not isinstance(upper_bounds_sec, list) or \
+                not all(isinstance(upper_bound, (int, float)) for upper_bound in upper_bounds_sec):
+            raise TypeError(expected_type_but_received_message.format("upper_bounds_sec", "List[float]",
+                                                                      upper_bounds_sec))
+        if len(upper_bounds_sec) == 0 or upper_bounds_sec[0] <= 0 or \
+                any(upper_bound >= next_upper_bound
+                    for upper_bound, next_upper_bound in zip(upper_bounds_sec, upper_bounds_sec[1:])):
+            raise ValueError(expected_value_but_received_message.format("upper_bounds_sec",
+                                                                        "increasing positive numbers",
+                                                                        upper_bounds_sec))
+
+        self.__upper_bounds_sec = [float(upper_bound) for upper_bound in upper_bounds_sec]
+        # One count per bucket, not cumulative, and the count of the durations above the largest bound.
+        self.__bucket_counts = [0] * (len(upper_bounds_sec) + 1)
+        self.__sum_sec = 0.0
+        self.__count = 0
+
+    def observe(self, duration_sec: Union[int, float]) -> None:
+        """
+        Adds a duration to the histogram.
+        :param duration_sec: The duration, in seconds.
+        :type duration_sec: Union[int, float]
+        """
+        self.__bucket_counts[bisect_left(self.__upper_bounds_sec, duration_sec)] += 1
+        self.__sum_sec += duration_sec
+        self.__count += 1
+
+    def get_upper_bounds_sec(self) -> List[float]:
+        """
+        Gets the upper bounds of the buckets.
+        :return: The upper bounds of the buckets, in seconds, without the infinite one.
+        :rtype: List[float]
+        """
+        return list(self.__upper_bounds_sec)
+
+    def get_cumulative_counts(self) -> List[int]:
+        """
+        Gets the number of durations up to the upper bound of each bucket.
+        :return: The cumulative count of each bucket, in the order of the upper bounds, followed by the count of all
+                the durations.
+        :rtype: List[int]
+        """
+        cumulative_counts = list()
+        cumulative_count = 0
+        for bucket_count in self.__bucket_counts:
+            cumulative_count += bucket_count
+            cumulative_counts.append(cumulative_count)
+        return cumulative_counts
+
+    def get_sum_sec(self) -> float:
+        """
+        Gets the sum of the durations.
+        :return: The sum of the durations, in seconds.
+        :rtype: float
+        """
+        return self.__sum_sec
+
+    def get_count(self) -> int:
+        """
+        Gets the number of durations added to the histogram.
+        :return: The number of durations.
+        :rtype: int
+        """
+        return self.__count
+
+    def dict_format(self) -> dict:
+        """
+        Converts the histogram into a json-serializable dictionary.
+        Format:
+            {
+                buckets: {"0.005": 3, "0.01": 10, ..., "+Inf": 12},
+                sum_sec: 0.42,
+                count: 12
+            }
+        The buckets are cumulative and keyed by their upper bound.
+        :return: The histogram as a dictionary.
+        :rtype: dict
+        """
+        upper_bounds = [repr(upper_bound) for upper_bound in self.__upper_bounds_sec] + ["+Inf"]
+        return {
+            "buckets": dict(zip(upper_bounds, self.get_cumulative_counts())),
+            "sum_sec": self.__sum_sec,
+            "count": self.__count
+        }
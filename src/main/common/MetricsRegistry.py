@@ -0,0 +1,273 @@
+import re
+import threading
+from typing import Dict, List, Tuple, Union
+
+import wades_config
+from src.main.common.LatencyHistogram import LatencyHistogram
+from src.utils.error_messages import expected_type_but_received_message, expected_value_but_received_message
+
+
+class MetricsRegistry:
+    # Kinds of metrics, as named by the Prometheus text format.
+    counter_type = "counter"
+    gauge_type = "gauge"
+    histogram_type = "histogram"
+    __metric_name_pattern = re.compile(r"[a-zA-Z_:][a-zA-Z0-9_:]*")
+    __label_name_pattern = re.compile(r"[a-zA-Z_][a-zA-Z0-9_]*")
+
+    def __init__(self, name_prefix: str = wades_config.metrics_name_prefix,
+                 latency_buckets_sec: List[float] = wades_config.metrics_latency_buckets_sec) -> None:
+        """
+        Keeps the metrics of the daemon: counters, gauges and latency histograms, each identified by its name and
+        optional labels, e.g. processes_skipped_total{reason="AccessDenied"}. Updating a metric takes a lock and a
+        dictionary lookup, so it can be done on the hot path from any thread. The metrics are read as a dictionary or in
+        the Prometheus text format, so that scrapers can read them.
+        :raises TypeError if name_prefix is not of type 'str', or if latency_buckets_sec is not of type 'List[float]'.
+        :raises ValueError if latency_buckets_sec is empty, or is not made of increasing positive numbers.
+        :param name_prefix: The prefix of the names of the metrics in the text format.
+        :type name_prefix: str
+        :param latency_buckets_sec: The upper bounds of the buckets of the latency histograms, in seconds.
+        :type latency_buckets_sec: List[float]
+        """
+        if not isinstance(name_prefix, str):
+            raise TypeError(expected_type_but_received_message.format("name_prefix", "str", name_prefix))
+        # Validates the buckets once, rather than on each new histogram.
+        LatencyHistogram(latency_buckets_sec)
+
+        self.__name_prefix = name_prefix
+        self.__latency_buckets_sec = list(latency_buckets_sec)
+        self.__lock = threading.Lock()
+        self.__metric_types: Dict[str, str] = dict()
+        # Values of each metric mapped by name and then by the sorted (name, value) pairs of their labels.
+        self.__metric_values: Dict[str, Dict[Tuple[Tuple[str, str], ...], Union[int, float, LatencyHistogram]]] = \
+            dict()
+
+    def increment(self, name: str, value: Union[int, float] = 1, labels: Union[Dict[str, str], None] = None) -> None:
+        """
+        Increments a counter, creating it at 0 if it doesn't exist.
+        :raises TypeError if name is not of type 'str', if value is not a number, or if labels is not of type
+                'Union[Dict[str, str], None]'.
+        :raises ValueError if value is negative, if name or a label name is not a valid metric or label name, or if
+                name is used by another kind of metric.
+        :param name: The name of the counter. By convention, it ends with '_total'.
+        :type name: str
+        :param value: The amount to add.
+        :type value: Union[int, float]
+        :param labels: The labels of the counter.
+        :type labels: Union[Dict[str, str], None]
+        """
+        if not isinstance(value, (int, float)):
+            raise TypeError(expected_type_but_received_message.format("value", "Union[int, float]", value))
+        if value < 0:
+            raise ValueError(expected_value_but_received_message.format("value", "0 or larger", value))
+        label_pairs = MetricsRegistry.__get_label_pairs(labels)
+        with self.__lock:
+            values = self.__get_values(name, MetricsRegistry.counter_type)
+            values[label_pairs] = values.get(label_pairs, 0) + value
+
+    def set_gauge(self, name: str, value: Union[int, float], labels: Union[Dict[str, str], None] = None) -> None:
+        """
+        Sets the value of a gauge.
+        :raises TypeError if name is not of type 'str', if value is not a number, or if labels is not of type
+                'Union[Dict[str, str], None]'.
+        :raises ValueError if name or a label name is not a valid metric or label name, or if name is used by another
+                kind of metric.
+        :param name: The name of the gauge.
+        :type name: str
+        :param value: The new value.
+        :type value: Union[int, float]
+        :param labels: The labels of the gauge.
+        :type labels: Union[Dict[str, str], None]
+        """
+        if not isinstance(value, (int, float)):
+            raise TypeError(expected_type_but_received_message.format("value", "Union[int, float]", value))
+        label_pairs = MetricsRegistry.__get_label_pairs(labels)
+        with self.__lock:
+            self.__get_values(name, MetricsRegistry.gauge_type)[label_pairs] = value
+
+    def observe(self, name: str, duration_sec: Union[int, float], labels: Union[Dict[str, str], None] = None) -> None:
+        """
+        Adds a duration to a latency histogram, creating it with the buckets of the registry if it doesn't exist.
+        :raises TypeError if name is not of type 'str', if duration_sec is not a number, or if labels is not of type
+                'Union[Dict[str, str], None]'.
+        :raises ValueError if name or a label name is not a valid metric or label name, or if name is used by another
+                kind of metric.
+        :param name: The name of the histogram. By convention, it ends with '_seconds'.
+        :type name: str
+        :param duration_sec: The duration, in seconds.
+        :type duration_sec: Union[int, float]
+        :param labels: The labels of the histogram.
+        :type labels: Union[Dict[str, str], None]
+        """
+        if not isinstance(duration_sec, (int, float)):
+            raise TypeError(expected_type_but_received_message.format("duration_sec", "Union[int, float]",
+                                                                      duration_sec))
+        label_pairs = MetricsRegistry.__get_label_pairs(labels)
+        with self.__lock:
+            values = self.__get_values(name, MetricsRegistry.histogram_type)
+            latency_histogram = values.get(label_pairs)
+            if latency_histogram is None:
+                latency_histogram = LatencyHistogram(self.__latency_buckets_sec)
+                values[label_pairs] = latency_histogram
+            latency_histogram.observe(duration_sec)
+
+    def get_value(self, name: str, labels: Union[Dict[str, str], None] = None) -> Union[int, float, dict, None]:
+        """
+        Gets the value of a metric.
+        :raises TypeError if labels is not of type 'Union[Dict[str, str], None]'.
+        :param name: The name of the metric.
+        :type name: str
+        :param labels: The labels of the metric.
+        :type labels: Union[Dict[str, str], None]
+        :return: The value of a counter or a gauge, or a histogram as a dictionary. For more info about the format:
+                'src.main.common.LatencyHistogram.LatencyHistogram.dict_format'. None if the metric doesn't exist.
+        :rtype: Union[int, float, dict, None]
+        """
+        label_pairs = MetricsRegistry.__get_label_pairs(labels)
+        with self.__lock:
+            value = self.__metric_values.get(name, dict()).get(label_pairs)
+            return value.dict_format() if isinstance(value, LatencyHistogram) else value
+
+    def get_metrics(self) -> dict:
+        """
+        Gets the value of every metric.
+        Format:
+            {
+                counters: {
+                    processes_seen_total: 2400,
+                    processes_skipped_total{reason="AccessDenied"}: 35,
+                    ...
+                },
+                gauges: {
+                    daemon_resident_memory_bytes: 73400320,
+                    ...
+                },
+                histograms: {
+                    collection_duration_seconds: {...},
+                    ...
+                }
+            }
+        For more info about the format of the histograms:
+        'src.main.common.LatencyHistogram.LatencyHistogram.dict_format'
+        :return: The value of every metric, keyed by its name and labels.
+        :rtype: dict
+        """
+        metrics = {"counters": dict(), "gauges": dict(), "histograms": dict()}
+        metrics_keys = {MetricsRegistry.counter_type: "counters", MetricsRegistry.gauge_type: "gauges",
+                        MetricsRegistry.histogram_type: "histograms"}
+        with self.__lock:
+            for name, values in self.__metric_values.items():
+                metric_values = metrics[metrics_keys[self.__metric_types[name]]]
+                for label_pairs, value in sorted(values.items()):
+                    series_name = name + MetricsRegistry.__format_labels(label_pairs)
+                    metric_values[series_name] = value.dict_format() if isinstance(value, LatencyHistogram) else value
+        return metrics
+
+    def get_text_exposition(self) -> str:
+        """
+        Gets the value of every metric in the Prometheus text format, with the prefix of the registry in their names.
+        Histograms are exposed as their cumulative buckets, with an 'le' label, followed by their sum and count.
+        :return: The metrics in the text format.
+        :rtype: str
+        """
+        lines = list()
+        with self.__lock:
+            for name, values in self.__metric_values.items():
+                metric_type = self.__metric_types[name]
+                prefixed_name = self.__name_prefix + name
+                lines.append("# TYPE {} {}".format(prefixed_name, metric_type))
+                for label_pairs, value in sorted(values.items()):
+                    if metric_type != MetricsRegistry.histogram_type:
+                        lines.append("{}{} {}".format(prefixed_name, MetricsRegistry.__format_labels(label_pairs),
+                                                      MetricsRegistry.__format_value(value)))
+                        continue
+                    upper_bounds = [MetricsRegistry.__format_value(upper_bound)
+                                    for upper_bound in value.get_upper_bounds_sec()] + ["+Inf"]
+                    for upper_bound, cumulative_count in zip(upper_bounds, value.get_cumulative_counts()):
+                        lines.append("{}_bucket{} {}".format(
+                            prefixed_name, MetricsRegistry.__format_labels(label_pairs + (("le", upper_bound),)),
+                            cumulative_count))
+                    formatted_labels = MetricsRegistry.__format_labels(label_pairs)
+                    lines.append("{}_sum{} {}".format(prefixed_name, formatted_labels,
+                                                      MetricsRegistry.__format_value(value.get_sum_sec())))
+                    lines.append("{}_count{} {}".format(prefixed_name, formatted_labels, value.get_count()))
+        return "\n".join(lines) + "\n" if len(lines) > 0 else ""
+
+    def __get_values(self, name: str, metric_type: str) \
+            -> Dict[Tuple[Tuple[str, str], ...], Union[int, float, LatencyHistogram]]:
+        """
+        Gets the values of a metric, registering it if it doesn't exist. It must be called with the lock held.
+        :raises TypeError if name is not of type 'str'.
+        :raises ValueError if name is not a valid metric name, or if it is used by another kind of metric.
+        :param name: The name of the metric.
+        :type name: str
+        :param metric_type: The kind of the metric.
+        :type metric_type: str
+        :return: The values of the metric mapped by their labels.
+        :rtype: Dict[Tuple[Tuple[str, str], ...], Union[int, float, LatencyHistogram]]
+        """
+        registered_metric_type = self.__metric_types.get(name)
+        if registered_metric_type is None:
+            if not isinstance(name, str):
+                raise TypeError(expected_type_but_received_message.format("name", "str", name))
+            if MetricsRegistry.__metric_name_pattern.fullmatch(name) is None:
+                raise ValueError(expected_value_but_received_message.format("name", "a valid metric name", name))
+            self.__metric_types[name] = metric_type
+            self.__metric_values[name] = dict()
+        elif registered_metric_type != metric_type:
+            raise ValueError(expected_value_but_received_message.format("name", "a {}".format(registered_metric_type),
+                                                                        name))
+        return self.__metric_values[name]
+
+    @staticmethod
+    def __get_label_pairs(labels: Union[Dict[str, str], None]) -> Tuple[Tuple[str, str], ...]:
+        """
+        Gets the labels of a metric as a hashable key.
+        :raises TypeError if labels is not of type 'Union[Dict[str, str], None]'.
+        :raises ValueError if a label name is not valid, or is 'le', which is used by the histogram buckets.
+        :param labels: The labels of the metric.
+        :type labels: Union[Dict[str, str], None]
+        :return: The sorted (name, value) pairs of the labels.
+        :rtype: Tuple[Tuple[str, str], ...]
+        """
+        if labels is None:
+            return tuple()
+        if not isinstance(labels, dict):
+            raise TypeError(expected_type_but_received_message.format("labels", "Union[Dict[str, str], None]", labels))
+        for label_name in labels.keys():
+            if not isinstance(label_name, str) or MetricsRegistry.__label_name_pattern.fullmatch(label_name) is None \
+                    or label_name == "le":
+                raise ValueError(expected_value_but_received_message.format("label name", "a valid label name",
+                                                                            label_name))
+        return tuple(sorted((label_name, str(label_value)) for label_name, label_value in labels.items()))
+
+    @staticmethod
+    def __format_labels(label_pairs: Tuple[Tuple[str, str], ...]) -> str:
+        """
+        Formats the labels of a metric as in the Prometheus text format, e.g. {reason="AccessDenied"}.
+        :param label_pairs: The (name, value) pairs of the labels.
+        :type label_pairs: Tuple[Tuple[str, str], ...]
+        :return: The formatted labels, empty if there are none.
+        :rtype: str
+        """
+        if len(label_pairs) == 0:
+            return ""
+        return "{" + ",".join('{}="{}"'.format(
+            label_name, label_value.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n"))
+            for label_name, label_value in label_pairs) + "}"
+
+    @staticmethod
+    def __format_value(value: Union[int, float]) -> str:
+        """
+        Formats the value of a metric as in the Prometheus text format.
+        :param value: The value.
+        :type value: Union[int, float]
+        :return: The formatted value.
+        :rtype: str
+        """
+        if isinstance(value, float):
+            if value != value:
+                return "NaN"
+            if value in (float("inf"), float("-inf")):
+                return "+Inf" if value > 0 else "-Inf"
+        return repr(value)
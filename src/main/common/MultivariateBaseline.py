@@ -0,0 +1,236 @@
+import datetime
+from bisect import bisect_right
+from typing import List, Union
+
+import numpy
+
+import wades_config
+from src.main.common.enum.AppProfileAttribute import AppProfileAttribute
+from src.utils.error_messages import expected_type_but_received_message
+
+
+class MultivariateBaseline:
+    # Lower bound of the standard deviation of each attribute, relative to its mean, so that constant attributes
+    # don't make the covariance singular.
+    minimum_relative_standard_deviation = 0.01
+
+    def __init__(self, attribute_names: List[str]) -> None:
+        """
+        Abstracts the joint distribution of the numeric attributes of an application: the mean vector and covariance
+        matrix of its samples, each sample being the vector of its numeric values. The new samples of the application
+        are merged into the mean and covariance in one matrix operation, so they never need to be recomputed from the
+        whole history.
+        Samples are scored by their Mahalanobis distance, which catches combinations of values that are unusual even
+        if each value on its own is not.
+        :raises TypeError if attribute_names is not of type 'List[str]'.
+        :param attribute_names: The names of the numeric attributes, in the order of the vector dimensions.
+        :type attribute_names: List[str]
+        """
+        if not isinstance(attribute_names, list):
+            raise TypeError(expected_type_but_received_message.format("attribute_names", "List[str]",
+                                                                      attribute_names))
+
+        self.__attribute_names = list(attribute_names)
+        self.__samples_count = 0
+        self.__mean = numpy.zeros(len(attribute_names))
+        # Sum of the outer products of the deviations from the mean: the covariance times the number of samples.
+        self.__co_moment = numpy.zeros((len(attribute_names), len(attribute_names)))
+        self.__last_seen_timestamp = None
+
+    def get_attribute_names(self) -> List[str]:
+        """
+        Gets the names of the numeric attributes, in the order of the vector dimensions.
+        :return: The names of the numeric attributes.
+        :rtype: List[str]
+        """
+        return list(self.__attribute_names)
+
+    def get_samples_count(self) -> int:
+        """
+        Gets the number of samples merged into the baseline.
+        :return: The number of samples merged.
+        :rtype: int
+        """
+        return self.__samples_count
+
+    def get_mean(self) -> numpy.ndarray:
+        """
+        Gets the mean vector of the samples.
+        :return: The mean of each attribute.
+        :rtype: numpy.ndarray
+        """
+        return self.__mean.copy()
+
+    def get_covariance(self) -> numpy.ndarray:
+        """
+        Gets the covariance matrix of the samples.
+        :return: The covariance matrix, zeros if no sample has been merged.
+        :rtype: numpy.ndarray
+        """
+        if self.__samples_count == 0:
+            return self.__co_moment.copy()
+        return self.__co_moment / self.__samples_count
+
+    def get_last_seen_timestamp(self) -> Union[datetime.datetime, None]:
+        """
+        Gets the retrieval timestamp of the newest sample seen, merged or not.
+        :return: The retrieval timestamp of the newest sample, None if no sample has been seen.
+        :rtype: Union[datetime.datetime, None]
+        """
+        return self.__last_seen_timestamp
+
+    def __get_samples_matrix(self, app_profile_data: dict, first_sample_index: int = 0) -> numpy.ndarray:
+        """
+        Gets the samples of the data as vectors.
+        :param app_profile_data: The data of the application. For more info about the format:
+                'src.main.common.AppProfile.AppProfile.get_previously_retrieved_data'
+        :type app_profile_data: dict
+        :param first_sample_index: The index of the first sample to get.
+        :type first_sample_index: int
+        :return: One row per sample and one column per attribute.
+        :rtype: numpy.ndarray
+        """
+        columns = [numpy.asarray(app_profile_data.get(attribute_name, list())[first_sample_index:], dtype=float)
+                   for attribute_name in self.__attribute_names]
+        samples_count = min((len(column) for column in columns), default=0)
+        return numpy.column_stack([column[:samples_count] for column in columns]) if len(columns) > 0 \
+            else numpy.zeros((0, 0))
+
+    def __get_distances(self, samples: numpy.ndarray) -> numpy.ndarray:
+        """
+        Gets the Mahalanobis distance of each sample to the mean.
+        :param samples: One row per sample and one column per attribute.
+        :type samples: numpy.ndarray
+        :return: The distance of each sample.
+        :rtype: numpy.ndarray
+        """
+        covariance = self.get_covariance()
+        minimum_variances = numpy.maximum(
+            (numpy.abs(self.__mean) * MultivariateBaseline.minimum_relative_standard_deviation) ** 2,
+            numpy.finfo(float).eps)
+        covariance[numpy.diag_indices_from(covariance)] += minimum_variances
+        deviations = samples - self.__mean
+        precision = numpy.linalg.pinv(covariance)
+        squared_distances = numpy.einsum("ij,jk,ik->i", deviations, precision, deviations)
+        return numpy.sqrt(numpy.maximum(squared_distances, 0))
+
+    def get_distances(self, app_profile_data: dict, minimum_samples_count: int) -> numpy.ndarray:
+        """
+        Gets the Mahalanobis distance of each sample of the data to the baseline, in one matrix operation.
+        :raises TypeError if app_profile_data is not of type 'dict'.
+        :param app_profile_data: The data to score. For more info about the format:
+                'src.main.common.AppProfile.AppProfile.get_latest_retrieved_data'
+        :type app_profile_data: dict
+        :param minimum_samples_count: The number of merged samples the baseline needs to score the data.
+        :type minimum_samples_count: int
+        :return: The distance of each sample. NaN for all the samples if the baseline can't score them yet.
+        :rtype: numpy.ndarray
+        """
+        if not isinstance(app_profile_data, dict):
+            raise TypeError(expected_type_but_received_message.format("app_profile_data", "dict", app_profile_data))
+
+        samples = self.__get_samples_matrix(app_profile_data)
+        if self.__samples_count < max(minimum_samples_count, 2):
+            return numpy.full(len(samples), numpy.nan)
+        return self.__get_distances(samples)
+
+    def add_samples(self, app_profile_data: dict, minimum_samples_count: int,
+                    maximum_distance: Union[float, None] = None) -> None:
+        """
+        Merges the samples that haven't been seen yet into the mean and covariance.
+        Once the baseline has enough samples, the samples further than maximum_distance from it are left out, so that
+        anomalies don't become part of the baseline they are detected against.
+        :raises TypeError if app_profile_data is not of type 'dict'.
+        :param app_profile_data: The data to merge. Only the samples retrieved after the last seen timestamp are merged.
+                For more info about the format: 'src.main.common.AppProfile.AppProfile.get_previously_retrieved_data'
+        :type app_profile_data: dict
+        :param minimum_samples_count: The number of merged samples the baseline needs to leave out distant samples.
+        :type minimum_samples_count: int
+        :param maximum_distance: The distance above which samples are left out. If None, every sample is merged.
+        :type maximum_distance: Union[float, None]
+        """
+        if not isinstance(app_profile_data, dict):
+            raise TypeError(expected_type_but_received_message.format("app_profile_data", "dict", app_profile_data))
+
+        retrieval_timestamps = app_profile_data.get(AppProfileAttribute.data_retrieval_timestamps.name, list())
+        first_new_sample_index = 0
+        if self.__last_seen_timestamp is not None:
+            # The timestamp format sorts like the timestamps themselves.
+            first_new_sample_index = bisect_right(retrieval_timestamps,
+                                                  self.__last_seen_timestamp.strftime(wades_config.datetime_format))
+        if first_new_sample_index >= len(retrieval_timestamps):
+            return
+
+        new_samples = self.__get_samples_matrix(app_profile_data, first_new_sample_index)
+        if maximum_distance is not None and self.__samples_count >= max(minimum_samples_count, 2) and \
+                len(new_samples) > 0:
+            new_samples = new_samples[self.__get_distances(new_samples) <= maximum_distance]
+        self.__merge_samples(new_samples)
+        self.__last_seen_timestamp = datetime.datetime.strptime(retrieval_timestamps[-1],
+                                                                wades_config.datetime_format)
+
+    def __merge_samples(self, samples: numpy.ndarray) -> None:
+        """
+        Merges a batch of samples into the mean and co-moment with the pairwise update of Chan et al.
+        :param samples: One row per sample and one column per attribute.
+        :type samples: numpy.ndarray
+        """
+        new_samples_count = len(samples)
+        if new_samples_count == 0:
+            return
+        new_mean = samples.mean(axis=0)
+        new_deviations = samples - new_mean
+        new_co_moment = new_deviations.T @ new_deviations
+
+        samples_count = self.__samples_count + new_samples_count
+        mean_difference = new_mean - self.__mean
+        self.__co_moment = self.__co_moment + new_co_moment + numpy.outer(mean_difference, mean_difference) * \
+            self.__samples_count * new_samples_count / samples_count
+        self.__mean = self.__mean + mean_difference * new_samples_count / samples_count
+        self.__samples_count = samples_count
+
+    def dict_format(self) -> dict:
+        """
+        Converts the baseline into a json-serializable dictionary.
+        Format:
+            {
+                attribute_names: [memory_infos, cpu_percents, ...],
+                samples_count: 5230,
+                mean: [2342.4, 0.4, ...],
+                co_moment: [[...], [...], ...],
+                last_seen_timestamp: "2020-12-13 14:30:32:34.232"
+            }
+        :return: The baseline as a dictionary.
+        :rtype: dict
+        """
+        last_seen_timestamp = self.__last_seen_timestamp.strftime(wades_config.datetime_format) \
+            if self.__last_seen_timestamp is not None else None
+        return {
+            "attribute_names": list(self.__attribute_names),
+            "samples_count": self.__samples_count,
+            "mean": self.__mean.tolist(),
+            "co_moment": self.__co_moment.tolist(),
+            "last_seen_timestamp": last_seen_timestamp
+        }
+
+    def set_value_from_dict(self, multivariate_baseline_dict: dict) -> None:
+        """
+        Sets the values of this baseline from a dictionary. Any old values will be lost.
+        :raises TypeError if multivariate_baseline_dict is not of type 'dict'.
+        :param multivariate_baseline_dict: The baseline as a dictionary. For more info about the format:
+                'dict_format()'.
+        :type multivariate_baseline_dict: dict
+        """
+        if not isinstance(multivariate_baseline_dict, dict):
+            raise TypeError(expected_type_but_received_message.format("multivariate_baseline_dict", "dict",
+                                                                      multivariate_baseline_dict))
+
+        self.__attribute_names = list(multivariate_baseline_dict["attribute_names"])
+        self.__samples_count = multivariate_baseline_dict["samples_count"]
+        attributes_count = len(self.__attribute_names)
+        self.__mean = numpy.array(multivariate_baseline_dict["mean"], dtype=float).reshape(attributes_count)
+        self.__co_moment = numpy.array(multivariate_baseline_dict["co_moment"], dtype=float).reshape(
+            (attributes_count, attributes_count))
+        last_seen_timestamp = multivariate_baseline_dict["last_seen_timestamp"]
+        self.__last_seen_timestamp = datetime.datetime.strptime(last_seen_timestamp, wades_config.datetime_format) \
+            if last_seen_timestamp is not None else None
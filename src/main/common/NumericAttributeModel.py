@@ -0,0 +1,171 @@
+from typing import List, Union, Tuple
+
+import numpy
+
+from src.utils.error_messages import expected_type_but_received_message
+
+
+class NumericAttributeModel:
+
+    def __init__(self) -> None:
+        """
+        Abstracts the fitted frequency model of a numeric attribute: the Freedman–Diaconis histogram of the modelled
+        data along with its quartiles and extremes. It is everything needed to score new data points, so the modelled
+        data doesn't need to be read again until the model is refitted.
+        """
+        self.__bin_edges = list()
+        self.__bin_counts = list()
+        self.__q1 = None
+        self.__q3 = None
+        self.__lowest_point = None
+        self.__highest_point = None
+        self.__fitted_samples_count = 0
+
+    def get_bin_edges(self) -> List[float]:
+        """
+        Gets the edges of the bins of the histogram.
+        :return: The edges of the bins. It has one more item than the bin counts.
+        :rtype: List[float]
+        """
+        return list(self.__bin_edges)
+
+    def get_bin_counts(self) -> List[int]:
+        """
+        Gets the number of data points in each bin of the histogram.
+        :return: The number of data points in each bin.
+        :rtype: List[int]
+        """
+        return list(self.__bin_counts)
+
+    def get_quartiles(self) -> Tuple[Union[float, None], Union[float, None]]:
+        """
+        Gets the first and third quartiles of the modelled data.
+        :return: The first and third quartiles, None if the model is not fitted.
+        :rtype: Tuple[Union[float, None], Union[float, None]]
+        """
+        return self.__q1, self.__q3
+
+    def get_lowest_point(self) -> Union[int, float, None]:
+        """
+        Gets the lowest point of the modelled data.
+        :return: The lowest point, None if the model is not fitted.
+        :rtype: Union[int, float, None]
+        """
+        return self.__lowest_point
+
+    def get_highest_point(self) -> Union[int, float, None]:
+        """
+        Gets the highest point of the modelled data.
+        :return: The highest point, None if the model is not fitted.
+        :rtype: Union[int, float, None]
+        """
+        return self.__highest_point
+
+    def get_fitted_samples_count(self) -> int:
+        """
+        Gets the number of data points used to fit the model.
+        :return: The number of data points used to fit the model.
+        :rtype: int
+        """
+        return self.__fitted_samples_count
+
+    def get_outlier_fences(self) -> Tuple[float, float]:
+        """
+        Gets the lower and upper outlier fences of the model (1.5 times the interquartile range away from the
+        quartiles).
+        :raises ValueError if the model is not fitted.
+        :return: The lower and upper outlier fences.
+        :rtype: Tuple[float, float]
+        """
+        if self.__fitted_samples_count == 0:
+            raise ValueError("The numeric attribute model is not fitted.")
+        iqr = self.__q3 - self.__q1
+        return self.__q1 - (1.5 * iqr), self.__q3 + (1.5 * iqr)
+
+    def count_outliers(self, values: List[Union[int, float]]) -> int:
+        """
+        Counts the values that are outside the outlier fences of the model.
+        :raises TypeError if values is not of type 'List[Union[int, float]]'.
+        :param values: The values to check.
+        :type values: List[Union[int, float]]
+        :return: The number of values outside the outlier fences, 0 if the model is not fitted.
+        :rtype: int
+        """
+        if not isinstance(values, list):
+            raise TypeError(expected_type_but_received_message.format("values", "List[Union[int, float]]", values))
+        if self.__fitted_samples_count == 0 or len(values) == 0:
+            return 0
+        lower_outlier, upper_outlier = self.get_outlier_fences()
+        values_array = numpy.asarray(values)
+        return int(numpy.count_nonzero((values_array < lower_outlier) | (values_array > upper_outlier)))
+
+    def fit(self, data: List[Union[int, float]]) -> None:
+        """
+        Fits the model to the provided data. Any old values will be lost.
+        The histogram uses the Freedman–Diaconis rule, like the frequency technique does.
+        :raises TypeError if data is not of type 'List[Union[int, float]]'.
+        :param data: The data to model.
+        :type data: List[Union[int, float]]
+        """
+        if not isinstance(data, list):
+            raise TypeError(expected_type_but_received_message.format("data", "List[Union[int, float]]", data))
+
+        self.__fitted_samples_count = len(data)
+        if len(data) == 0:
+            self.__bin_edges = list()
+            self.__bin_counts = list()
+            self.__q1 = self.__q3 = self.__lowest_point = self.__highest_point = None
+            return
+
+        data_count_in_bins, raw_bin_edges = numpy.histogram(data, bins='fd')
+        q1, q3 = numpy.percentile(data, [25, 75])
+        self.__bin_edges = raw_bin_edges.tolist()
+        self.__bin_counts = data_count_in_bins.tolist()
+        self.__q1 = float(q1)
+        self.__q3 = float(q3)
+        self.__lowest_point = min(data)
+        self.__highest_point = max(data)
+
+    def dict_format(self) -> dict:
+        """
+        Converts the model into a json-serializable dictionary.
+        Format:
+            {
+                bin_edges: [0.0, 1.3, 2.6, ...],
+                bin_counts: [12, 3, ...],
+                q1: 0.4,
+                q3: 2.1,
+                lowest_point: 0.0,
+                highest_point: 13.4,
+                fitted_samples_count: 120
+            }
+        :return: The model as a dictionary.
+        :rtype: dict
+        """
+        return {
+            "bin_edges": list(self.__bin_edges),
+            "bin_counts": list(self.__bin_counts),
+            "q1": self.__q1,
+            "q3": self.__q3,
+            "lowest_point": self.__lowest_point,
+            "highest_point": self.__highest_point,
+            "fitted_samples_count": self.__fitted_samples_count
+        }
+
+    def set_value_from_dict(self, model_dict: dict) -> None:
+        """
+        Sets the values of this model from a dictionary. Any old values will be lost.
+        :raises TypeError if model_dict is not of type 'dict'.
+        :param model_dict: The model as a dictionary. For more info about the format: 'dict_format()'.
+        :type model_dict: dict
+        """
+        if not isinstance(model_dict, dict):
+            raise TypeError(expected_type_but_received_message.format("model_dict", "dict", model_dict))
+
+        self.__bin_edges = list(model_dict["bin_edges"])
+        self.__bin_counts = list(model_dict["bin_counts"])
+        self.__q1 = model_dict["q1"]
+        self.__q3 = model_dict["q3"]
+        self.__lowest_point = model_dict["lowest_point"]
+        self.__highest_point = model_dict["highest_point"]
+        self.__fitted_samples_count = model_dict["fitted_samples_count"]
@@ -0,0 +1,123 @@
+import fnmatch
+import re
+from typing import Set, List, Dict, FrozenSet
+
+from src.utils.error_messages import expected_type_but_received_message
+
+
+class PathMatcher:
+    # Glob characters supported by fnmatch.
+    __glob_characters = set("*?[")
+    # Matchers already compiled, mapped by their patterns.
+    __compiled_matchers: Dict[FrozenSet[str], "PathMatcher"] = dict()
+
+    def __init__(self, patterns: Set[str]) -> None:
+        """
+        Compiles path patterns so that paths can be checked against all of them at once. Patterns can be:
+        * Exact paths: '/etc/passwd'.
+        * Directory prefixes, ending with '/': '/root/.ssh/' matches every path under '/root/.ssh'.
+        * Globs, as supported by fnmatch: '/home/*/.ssh/id_*'. As in fnmatch, '*' also matches '/'.
+        Exact paths cost one set lookup, prefixes O(path depth) and globs one match of a single compiled regex.
+        :raises TypeError if patterns is not of type 'Set[str]'.
+        :param patterns: The path patterns.
+        :type patterns: Set[str]
+        """
+        if not isinstance(patterns, (set, frozenset)):
+            raise TypeError(expected_type_but_received_message.format("patterns", "Set[str]", patterns))
+
+        self.__patterns = frozenset(patterns)
+        self.__exact_paths = set()
+        self.__directory_prefixes = set()
+        # Part of each glob before its first glob character.
+        self.__glob_literal_prefixes = set()
+        glob_patterns = list()
+        for pattern in sorted(patterns):
+            if not PathMatcher.__glob_characters.isdisjoint(pattern):
+                glob_patterns.append(fnmatch.translate(pattern))
+                self.__glob_literal_prefixes.add(
+                    pattern[:min(pattern.find(character) for character in PathMatcher.__glob_characters
+                                 if character in pattern)])
+            elif pattern.endswith("/"):
+                self.__directory_prefixes.add(pattern.rstrip("/"))
+            else:
+                self.__exact_paths.add(pattern)
+        self.__glob_regex = re.compile("|".join(glob_patterns)) if len(glob_patterns) > 0 else None
+
+    @staticmethod
+    def get_compiled_matcher(patterns: Set[str]) -> "PathMatcher":
+        """
+        Gets the matcher of the provided patterns, compiling it only the first time it is requested.
+        :raises TypeError if patterns is not of type 'Set[str]'.
+        :param patterns: The path patterns. For more info about the supported patterns: '__init__'.
+        :type patterns: Set[str]
+        :return: The compiled matcher.
+        :rtype: PathMatcher
+        """
+        if not isinstance(patterns, (set, frozenset)):
+            raise TypeError(expected_type_but_received_message.format("patterns", "Set[str]", patterns))
+
+        frozen_patterns = frozenset(patterns)
+        if frozen_patterns not in PathMatcher.__compiled_matchers:
+            PathMatcher.__compiled_matchers[frozen_patterns] = PathMatcher(patterns)
+        return PathMatcher.__compiled_matchers[frozen_patterns]
+
+    def get_patterns(self) -> Set[str]:
+        """
+        Gets the path patterns of the matcher.
+        :return: The path patterns.
+        :rtype: Set[str]
+        """
+        return set(self.__patterns)
+
+    def __contains__(self, path: str) -> bool:
+        """
+        Checks if a path matches any of the patterns.
+        :param path: The path to check.
+        :type path: str
+        :return: True if the path matches a pattern, False otherwise.
+        :rtype: bool
+        """
+        if path in self.__exact_paths:
+            return True
+        if len(self.__directory_prefixes) > 0:
+            separator_index = path.find("/", 1)
+            while separator_index != -1:
+                if path[:separator_index] in self.__directory_prefixes:
+                    return True
+                separator_index = path.find("/", separator_index + 1)
+        return self.__glob_regex is not None and self.__glob_regex.match(path) is not None
+
+    def may_match_under(self, directory: str) -> bool:
+        """
+        Checks if a path under a directory can match any of the patterns. Globs are checked on their part before the
+        first glob character, so directories without any matching path can be reported too.
+        :raises TypeError if directory is not of type 'str'.
+        :param directory: The directory to check.
+        :type directory: str
+        :return: True if a path under the directory can match a pattern, False otherwise.
+        :rtype: bool
+        """
+        if not isinstance(directory, str):
+            raise TypeError(expected_type_but_received_message.format("directory", "str", directory))
+
+        directory_prefix = directory.rstrip("/") + "/"
+        if any(exact_path.startswith(directory_prefix) for exact_path in self.__exact_paths):
+            return True
+        if any((prefix + "/").startswith(directory_prefix) or directory_prefix.startswith(prefix + "/")
+               for prefix in self.__directory_prefixes):
+            return True
+        return any(literal_prefix.startswith(directory_prefix) or directory_prefix.startswith(literal_prefix)
+                   for literal_prefix in self.__glob_literal_prefixes)
+
+    def get_matching_paths(self, paths: List[str]) -> Set[str]:
+        """
+        Gets the paths that match any of the patterns.
+        :raises TypeError if paths is not of type 'List[str]'.
+        :param paths: The paths to check.
+        :type paths: List[str]
+        :return: The paths that match a pattern.
+        :rtype: Set[str]
+        """
+        if not isinstance(paths, list):
+            raise TypeError(expected_type_but_received_message.format("paths", "List[str]", paths))
+        return {path for path in set(paths) if path in self}
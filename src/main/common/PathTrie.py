@@ -0,0 +1,226 @@
+import copy
+from typing import Set, List
+
+import wades_config
+from src.main.common.PathMatcher import PathMatcher
+from src.utils.error_messages import expected_type_but_received_message, expected_value_but_received_message
+
+
+class PathTrie:
+    # Keys of the trie nodes.
+    __children_key = "children"
+    __is_path_key = "is_path"
+    __is_generalized_key = "is_generalized"
+
+    def __init__(self, generalization_threshold: int = 1000,
+                 prohibited_files: Set[str] = wades_config.prohibited_files) -> None:
+        """
+        Abstracts the opened files that are known behaviour for an application as a trie of path components.
+        When a directory has more than generalization_threshold distinct entries, it is generalized: every path under
+        it becomes known and its subtree is dropped. Apps that write rotating logs or temp files (/tmp/xyz123) then stop
+        reporting new paths, and the trie doesn't grow with them. Checking a path costs O(path depth).
+        The root directory, and the directories that can hold a prohibited file, are never generalized, so a prohibited
+        file is only known if it was added.
+        :raises TypeError if generalization_threshold is not of type 'int',
+                or if prohibited_files is not of type 'Set[str]'.
+        :raises ValueError if generalization_threshold is lower than 1.
+        :param generalization_threshold: The number of distinct entries of a directory above which it is generalized.
+        :type generalization_threshold: int
+        :param prohibited_files: The patterns of the prohibited files. For more info about the supported patterns:
+                'src.main.common.PathMatcher.PathMatcher.__init__'.
+        :type prohibited_files: Set[str]
+        """
+        if not isinstance(generalization_threshold, int):
+            raise TypeError(expected_type_but_received_message.format("generalization_threshold", "int",
+                                                                      generalization_threshold))
+        if generalization_threshold < 1:
+            raise ValueError(expected_value_but_received_message.format("generalization_threshold", "1 or larger",
+                                                                        generalization_threshold))
+
+        self.__generalization_threshold = generalization_threshold
+        self.__prohibited_files_matcher = PathMatcher.get_compiled_matcher(prohibited_files)
+        self.__root = PathTrie.__build_node()
+        # Number of paths added, with repetitions. Whitelisting needs enough of them to be meaningful.
+        self.__observations_count = 0
+
+    @staticmethod
+    def __build_node() -> dict:
+        """
+        Builds an empty trie node.
+        :return: The trie node.
+        :rtype: dict
+        """
+        return {PathTrie.__children_key: dict(), PathTrie.__is_path_key: False, PathTrie.__is_generalized_key: False}
+
+    @staticmethod
+    def __split_path(path: str) -> List[str]:
+        """
+        Splits a path into its components. Empty components (leading, trailing or repeated '/') are ignored.
+        :param path: The path to split.
+        :type path: str
+        :return: The components of the path.
+        :rtype: List[str]
+        """
+        return [component for component in path.split("/") if component != ""]
+
+    def get_generalization_threshold(self) -> int:
+        """
+        Gets the number of distinct entries of a directory above which it is generalized.
+        :return: The generalization threshold.
+        :rtype: int
+        """
+        return self.__generalization_threshold
+
+    def get_observations_count(self) -> int:
+        """
+        Gets the number of paths added, with repetitions.
+        :return: The number of paths added.
+        :rtype: int
+        """
+        return self.__observations_count
+
+    def get_values(self) -> Set[str]:
+        """
+        Gets the known paths. Generalized directories are returned with a trailing '/*'.
+        :return: The known paths.
+        :rtype: Set[str]
+        """
+        values = set()
+        nodes_to_visit = [("", self.__root)]
+        while len(nodes_to_visit) > 0:
+            node_path, node = nodes_to_visit.pop()
+            if node[PathTrie.__is_generalized_key]:
+                values.add(node_path + "/*")
+                continue
+            if node[PathTrie.__is_path_key]:
+                values.add(node_path)
+            for component, child_node in node[PathTrie.__children_key].items():
+                nodes_to_visit.append((node_path + "/" + component, child_node))
+        return values
+
+    def get_generalized_directories(self) -> Set[str]:
+        """
+        Gets the directories whose paths are all known.
+        :return: The generalized directories.
+        :rtype: Set[str]
+        """
+        return {value[:-len("/*")] for value in self.get_values() if value.endswith("/*")}
+
+    def add_values(self, paths: List[str]) -> None:
+        """
+        Adds paths to the known paths, generalizing the directories that get too many distinct entries.
+        :raises TypeError if paths is not of type 'List[str]'.
+        :param paths: The paths to add.
+        :type paths: List[str]
+        """
+        if not isinstance(paths, list):
+            raise TypeError(expected_type_but_received_message.format("paths", "List[str]", paths))
+
+        self.__observations_count += len(paths)
+        for path in paths:
+            node = self.__root
+            components = PathTrie.__split_path(path)
+            for component_index, component in enumerate(components):
+                if node[PathTrie.__is_generalized_key]:
+                    break
+                children = node[PathTrie.__children_key]
+                if component not in children:
+                    if node is not self.__root and len(children) >= self.__generalization_threshold and \
+                            not self.__prohibited_files_matcher.may_match_under(
+                                "/" + "/".join(components[:component_index])):
+                        node[PathTrie.__is_generalized_key] = True
+                        node[PathTrie.__children_key] = dict()
+                        break
+                    children[component] = PathTrie.__build_node()
+                node = children[component]
+            else:
+                node[PathTrie.__is_path_key] = True
+
+    def __contains__(self, path: str) -> bool:
+        """
+        Checks if a path is known.
+        :param path: The path to check.
+        :type path: str
+        :return: True if the path was added or is under a generalized directory, False otherwise.
+        :rtype: bool
+        """
+        node = self.__root
+        for component in PathTrie.__split_path(path):
+            if node[PathTrie.__is_generalized_key]:
+                return True
+            node = node[PathTrie.__children_key].get(component)
+            if node is None:
+                return False
+        return node[PathTrie.__is_path_key] or node[PathTrie.__is_generalized_key]
+
+    def get_unknown_values(self, paths: List[str]) -> Set[str]:
+        """
+        Gets the paths that are not known.
+        :raises TypeError if paths is not of type 'List[str]'.
+        :param paths: The paths to check.
+        :type paths: List[str]
+        :return: The paths that are not known.
+        :rtype: Set[str]
+        """
+        if not isinstance(paths, list):
+            raise TypeError(expected_type_but_received_message.format("paths", "List[str]", paths))
+        return {path for path in set(paths) if path not in self}
+
+    def dict_format(self) -> dict:
+        """
+        Converts the trie into a json-serializable dictionary.
+        Format:
+            {
+                generalization_threshold: 1000,
+                observations_count: 5320,
+                root: {
+                    children: {
+                        tmp: {children: {}, is_path: False, is_generalized: True},
+                        etc: {children: {hosts: {...}}, is_path: False, is_generalized: False},
+                        ...
+                    },
+                    is_path: False,
+                    is_generalized: False
+                }
+            }
+        :return: The trie as a dictionary.
+        :rtype: dict
+        """
+        return {
+            "generalization_threshold": self.__generalization_threshold,
+            "observations_count": self.__observations_count,
+            "root": copy.deepcopy(self.__root)
+        }
+
+    def set_value_from_dict(self, path_trie_dict: dict) -> None:
+        """
+        Sets the values of this trie from a dictionary. Any old values will be lost. The directories of the dictionary
+        that can hold a prohibited file are not generalized anymore: the paths under them become unknown again.
+        :raises TypeError if path_trie_dict is not of type 'dict'.
+        :param path_trie_dict: The trie as a dictionary. For more info about the format: 'dict_format()'.
+        :type path_trie_dict: dict
+        """
+        if not isinstance(path_trie_dict, dict):
+            raise TypeError(expected_type_but_received_message.format("path_trie_dict", "dict", path_trie_dict))
+
+        self.__generalization_threshold = path_trie_dict["generalization_threshold"]
+        self.__observations_count = path_trie_dict["observations_count"]
+        self.__root = copy.deepcopy(path_trie_dict["root"])
+        nodes_to_visit = [("", self.__root)]
+        while len(nodes_to_visit) > 0:
+            node_path, node = nodes_to_visit.pop()
+            if node[PathTrie.__is_generalized_key] and self.__prohibited_files_matcher.may_match_under(node_path):
+                node[PathTrie.__is_generalized_key] = False
+            for component, child_node in node[PathTrie.__children_key].items():
+                nodes_to_visit.append((node_path + "/" + component, child_node))
+
+    @staticmethod
+    def is_path_trie_dict(known_values_dict: dict) -> bool:
+        """
+        Checks if a dictionary of known values was created by 'PathTrie.dict_format'.
+        :param known_values_dict: The known values as a dictionary.
+        :type known_values_dict: dict
+        :return: True if the dictionary represents a PathTrie, False otherwise.
+        :rtype: bool
+        """
+        return "root" in known_values_dict and "generalization_threshold" in known_values_dict
@@ -0,0 +1,266 @@
+import logging
+import queue
+import threading
+import time
+import traceback
+from typing import Any, Callable, Union
+
+from src.main.common.MetricsRegistry import MetricsRegistry
+from src.main.common.enum.OverflowPolicy import OverflowPolicy
+from src.utils.error_messages import expected_type_but_received_message, expected_value_but_received_message
+
+
+class PipelineStage:
+    # Seconds a stage waits for an item before checking whether it was stopped.
+    stop_check_interval_sec = 0.1
+
+    def __init__(self, name: str, handler: Callable[[Any], Any], queue_size: int,
+                 overflow_policy: OverflowPolicy = OverflowPolicy.block,
+                 merge_items: Union[Callable[[Any, Any], Any], None] = None,
+                 metrics_registry: Union[MetricsRegistry, None] = None, logger_name: str = "PipelineStage") -> None:
+        """
+        Abstracts a stage of a pipeline. The stage takes items from a bounded queue and passes them to its handler in
+        its own thread; what the handler returns is put in the queue of the next stage, unless it is None.
+        When the queue is full, the overflow policy decides what happens to a new item:
+        * OverflowPolicy.block: the producer waits until the stage takes an item, which slows the upstream stages down.
+        * OverflowPolicy.drop_oldest: the oldest queued item is dropped, so the stage always works on the newest data.
+            If merge_items is provided, the oldest item is merged into the new one instead of being lost.
+        :raises TypeError if name is not of type 'str', if handler or merge_items are not callable,
+                if queue_size is not of type 'int', if overflow_policy is not of type 'OverflowPolicy', or if
+                metrics_registry is not of type 'Union[MetricsRegistry, None]'.
+        :raises ValueError if queue_size is smaller than 1.
+        :param name: The name of the stage.
+        :type name: str
+        :param handler: Processes an item and returns the item for the next stage, or None.
+        :type handler: Callable[[Any], Any]
+        :param queue_size: The maximum number of items waiting for the stage.
+        :type queue_size: int
+        :param overflow_policy: What happens to new items when the queue is full.
+        :type overflow_policy: OverflowPolicy
+        :param merge_items: Merges the oldest queued item into the new item, as merge_items(oldest_item, new_item).
+                Only used with OverflowPolicy.drop_oldest.
+        :type merge_items: Union[Callable[[Any, Any], Any], None]
+        :param metrics_registry: The registry where the time spent on each item is added, to the
+                pipeline_stage_duration_seconds histogram of the stage. If None, it is only added to the busy time.
+        :type metrics_registry: Union[MetricsRegistry, None]
+        :param logger_name: The name of the logger.
+        :type logger_name: str
+        """
+        if not isinstance(name, str):
+            raise TypeError(expected_type_but_received_message.format("name", "str", name))
+        if not callable(handler):
+            raise TypeError(expected_type_but_received_message.format("handler", "Callable[[Any], Any]", handler))
+        if not isinstance(queue_size, int):
+            raise TypeError(expected_type_but_received_message.format("queue_size", "int", queue_size))
+        if queue_size < 1:
+            raise ValueError(expected_value_but_received_message.format("queue_size", "larger than 0", queue_size))
+        if not isinstance(overflow_policy, OverflowPolicy):
+            raise TypeError(expected_type_but_received_message.format("overflow_policy", "OverflowPolicy",
+                                                                      overflow_policy))
+        if merge_items is not None and not callable(merge_items):
+            raise TypeError(expected_type_but_received_message.format("merge_items",
+                                                                      "Union[Callable[[Any, Any], Any], None]",
+                                                                      merge_items))
+        if metrics_registry is not None and not isinstance(metrics_registry, MetricsRegistry):
+            raise TypeError(expected_type_but_received_message.format("metrics_registry",
+                                                                      "Union[MetricsRegistry, None]",
+                                                                      metrics_registry))
+
+        self.__name = name
+        self.__handler = handler
+        self.__queue = queue.Queue(maxsize=queue_size)
+        self.__overflow_policy = overflow_policy
+        self.__merge_items = merge_items
+        self.__metrics_registry = metrics_registry
+        self.__logger_name = logger_name
+        self.__next_stage = None
+        self.__thread = None
+        self.__stop_event = threading.Event()
+        # Guards the metrics and makes dropping the oldest item and putting the new one a single step.
+        self.__lock = threading.Lock()
+        self.__started_time = None
+        self.__received_items_count = 0
+        self.__processed_items_count = 0
+        self.__failed_items_count = 0
+        self.__dropped_items_count = 0
+        self.__merged_items_count = 0
+        self.__max_queue_depth = 0
+        self.__busy_time_sec = 0.0
+        self.__blocked_time_sec = 0.0
+
+    def get_name(self) -> str:
+        """
+        Gets the name of the stage.
+        :return: The name of the stage.
+        :rtype: str
+        """
+        return self.__name
+
+    def get_queue_depth(self) -> int:
+        """
+        Gets the number of items waiting for the stage.
+        :return: The number of queued items.
+        :rtype: int
+        """
+        return self.__queue.qsize()
+
+    def set_next_stage(self, next_stage: Union['PipelineStage', None]) -> None:
+        """
+        Sets the stage that receives the items returned by the handler.
+        :raises TypeError if next_stage is not of type 'Union[PipelineStage, None]'.
+        :param next_stage: The next stage. If None, the items returned by the handler are discarded.
+        :type next_stage: Union[PipelineStage, None]
+        """
+        if next_stage is not None and not isinstance(next_stage, PipelineStage):
+            raise TypeError(expected_type_but_received_message.format("next_stage", "Union[PipelineStage, None]",
+                                                                      next_stage))
+        self.__next_stage = next_stage
+
+    def put(self, item: Any) -> bool:
+        """
+        Adds an item to the queue of the stage, following its overflow policy when the queue is full.
+        :param item: The item to add.
+        :type item: Any
+        :return: True if no queued item was dropped or merged to make room, False otherwise.
+        :rtype: bool
+        """
+        with self.__lock:
+            self.__received_items_count += 1
+        if self.__overflow_policy is OverflowPolicy.block:
+            start_time = time.perf_counter()
+            self.__queue.put(item)
+            with self.__lock:
+                self.__blocked_time_sec += time.perf_counter() - start_time
+                self.__max_queue_depth = max(self.__max_queue_depth, self.__queue.qsize())
+            return True
+
+        with self.__lock:
+            is_item_dropped = False
+            while True:
+                try:
+                    self.__queue.put_nowait(item)
+                    break
+                except queue.Full:
+                    pass
+                try:
+                    oldest_item = self.__queue.get_nowait()
+                except queue.Empty:
+                    continue
+                is_item_dropped = True
+                if self.__merge_items is not None:
+                    item = self.__merge_items(oldest_item, item)
+                    self.__merged_items_count += 1
+                else:
+                    self.__dropped_items_count += 1
+            self.__max_queue_depth = max(self.__max_queue_depth, self.__queue.qsize())
+        return not is_item_dropped
+
+    def process_next_item(self, timeout_sec: Union[float, None] = None) -> bool:
+        """
+        Takes the next item from the queue, passes it to the handler and sends the result to the next stage.
+        Errors raised by the handler are logged and counted, so they don't stop the stage.
+        :param timeout_sec: The maximum number of seconds to wait for an item. If None, waits until there is one.
+        :type timeout_sec: Union[float, None]
+        :return: True if an item was processed, False if the queue stayed empty.
+        :rtype: bool
+        """
+        try:
+            item = self.__queue.get(timeout=timeout_sec)
+        except queue.Empty:
+            return False
+
+        start_time = time.perf_counter()
+        if self.__started_time is None:
+            # The stage is run by the caller rather than by its own thread.
+            self.__started_time = start_time
+        result = None
+        is_failed = False
+        # noinspection PyBroadException
+        try:
+            result = self.__handler(item)
+        except Exception:
+            is_failed = True
+            logging.getLogger(self.__logger_name).error(
+                "Stage {} failed: {}".format(self.__name, traceback.format_exc()))
+        busy_time_sec = time.perf_counter() - start_time
+        if self.__metrics_registry is not None:
+            self.__metrics_registry.observe("pipeline_stage_duration_seconds", busy_time_sec, {"stage": self.__name})
+        with self.__lock:
+            self.__busy_time_sec += busy_time_sec
+            self.__processed_items_count += 1
+            if is_failed:
+                self.__failed_items_count += 1
+
+        if result is not None and self.__next_stage is not None:
+            self.__next_stage.put(result)
+        return True
+
+    def start(self) -> None:
+        """
+        Starts processing items in a daemon thread. Does nothing if the stage is already running.
+        """
+        if self.__thread is not None and self.__thread.is_alive():
+            return
+        self.__stop_event.clear()
+        self.__started_time = time.perf_counter()
+        self.__thread = threading.Thread(target=self.__run, name=self.__name)
+        self.__thread.daemon = True
+        self.__thread.start()
+
+    def stop(self, timeout_sec: Union[float, None] = None) -> None:
+        """
+        Stops processing items once the current item is processed. The queued items are kept.
+        :param timeout_sec: The maximum number of seconds to wait for the thread to stop. If None, waits until it stops.
+        :type timeout_sec: Union[float, None]
+        """
+        self.__stop_event.set()
+        if self.__thread is not None:
+            self.__thread.join(timeout_sec)
+
+    def __run(self) -> None:
+        """
+        Processes items until the stage is stopped.
+        """
+        while not self.__stop_event.is_set():
+            self.process_next_item(timeout_sec=PipelineStage.stop_check_interval_sec)
+
+    def get_metrics(self) -> dict:
+        """
+        Gets the throughput and queue metrics of the stage.
+        Format:
+            {
+                name: "modelling",
+                received_items_count: 120,
+                processed_items_count: 118,
+                failed_items_count: 0,
+                dropped_items_count: 1,
+                merged_items_count: 0,
+                queue_depth: 1,
+                max_queue_depth: 1,
+                busy_time_sec: 540.2,
+                blocked_time_sec: 0.0,
+                items_per_second: 0.011,
+                utilization: 0.5
+            }
+        blocked_time_sec is the time producers waited for room in the queue. items_per_second and utilization, the
+        fraction of the time the handler was running, are measured since the stage started, or since it processed its
+        first item if it is run by the caller, and are 0 before.
+        :return: The metrics of the stage.
+        :rtype: dict
+        """
+        with self.__lock:
+            running_time_sec = time.perf_counter() - self.__started_time if self.__started_time is not None else 0.0
+            return {
+                "name": self.__name,
+                "received_items_count": self.__received_items_count,
+                "processed_items_count": self.__processed_items_count,
+                "failed_items_count": self.__failed_items_count,
+                "dropped_items_count": self.__dropped_items_count,
+                "merged_items_count": self.__merged_items_count,
+                "queue_depth": self.__queue.qsize(),
+                "max_queue_depth": self.__max_queue_depth,
+                "busy_time_sec": self.__busy_time_sec,
+                "blocked_time_sec": self.__blocked_time_sec,
+                "items_per_second": self.__processed_items_count / running_time_sec if running_time_sec > 0 else 0.0,
+                "utilization": min(self.__busy_time_sec / running_time_sec, 1.0) if running_time_sec > 0 else 0.0
+            }
@@ -0,0 +1,250 @@
+import copy
+import math
+from typing import List, Union, Tuple
+
+import numpy
+
+from src.utils.error_messages import expected_type_but_received_message, expected_value_but_received_message, \
+    empty_collection_message
+
+
+class QuantileSketch:
+    # Capacity decay between two consecutive compactors (KLL sketch).
+    __capacity_decay = 2 / 3
+    __min_compactor_capacity = 2
+
+    def __init__(self, k: int = 200) -> None:
+        """
+        Creates a streaming quantile sketch (KLL). It keeps a bounded number of items, so it can summarize any number of
+        values with bounded memory. The rank error of a quantile is approximately 1.65 / k of the number of values.
+        While the number of values is lower than k, every value is kept and the quantiles are exact.
+        :raises TypeError if k is not of type 'int'.
+        :raises ValueError if k is lower than 8.
+        :param k: The accuracy parameter. Larger values use more memory and give a lower error.
+        :type k: int
+        """
+        if not isinstance(k, int):
+            raise TypeError(expected_type_but_received_message.format("k", "int", k))
+        if k < 8:
+            raise ValueError(expected_value_but_received_message.format("k", "8 or larger", k))
+
+        self.__k = k
+        self.__count = 0
+        self.__min = None
+        self.__max = None
+        self.__compactors = [list()]
+        # Alternates which half of a compactor is promoted, so the rank error doesn't accumulate in one direction.
+        self.__compaction_offsets = [0]
+        self.__sorted_values = None
+        self.__sorted_weights = None
+
+    def get_k(self) -> int:
+        """
+        Gets the accuracy parameter of the sketch.
+        :return: The accuracy parameter.
+        :rtype: int
+        """
+        return self.__k
+
+    def get_count(self) -> int:
+        """
+        Gets the number of values added to the sketch.
+        :return: The number of values added to the sketch.
+        :rtype: int
+        """
+        return self.__count
+
+    def get_min(self) -> Union[int, float, None]:
+        """
+        Gets the lowest value added to the sketch. This value is exact.
+        :return: The lowest value added to the sketch, None if the sketch is empty.
+        :rtype: Union[int, float, None]
+        """
+        return self.__min
+
+    def get_max(self) -> Union[int, float, None]:
+        """
+        Gets the highest value added to the sketch. This value is exact.
+        :return: The highest value added to the sketch, None if the sketch is empty.
+        :rtype: Union[int, float, None]
+        """
+        return self.__max
+
+    def get_retained_items_count(self) -> int:
+        """
+        Gets the number of items kept by the sketch.
+        :return: The number of items kept by the sketch.
+        :rtype: int
+        """
+        return sum(len(compactor) for compactor in self.__compactors)
+
+    def add_values(self, values: List[Union[int, float]]) -> None:
+        """
+        Adds values to the sketch.
+        :raises TypeError if values is not of type 'List[Union[int, float]]'.
+        :param values: The values to add.
+        :type values: List[Union[int, float]]
+        """
+        if not isinstance(values, list):
+            raise TypeError(expected_type_but_received_message.format("values", "List[Union[int, float]]", values))
+        if len(values) == 0:
+            return
+
+        values_min = min(values)
+        values_max = max(values)
+        self.__min = values_min if self.__min is None else min(self.__min, values_min)
+        self.__max = values_max if self.__max is None else max(self.__max, values_max)
+        self.__count += len(values)
+        self.__sorted_values = None
+        self.__sorted_weights = None
+
+        for value in values:
+            self.__compactors[0].append(value)
+            if len(self.__compactors[0]) >= self.__get_compactor_capacity(0):
+                self.__compress()
+
+    def __get_compactor_capacity(self, level: int) -> int:
+        """
+        Gets the number of items a compactor can hold before it is compacted.
+        :param level: The level of the compactor.
+        :type level: int
+        :return: The capacity of the compactor.
+        :rtype: int
+        """
+        height = len(self.__compactors) - level - 1
+        return max(QuantileSketch.__min_compactor_capacity,
+                   int(math.ceil(self.__k * QuantileSketch.__capacity_decay ** height)))
+
+    def __compress(self) -> None:
+        """
+        Compacts every full compactor. Half of the items of a full compactor are promoted to the next level with twice
+        the weight, the other half is discarded.
+        """
+        for level in range(len(self.__compactors)):
+            compactor = self.__compactors[level]
+            if len(compactor) < self.__get_compactor_capacity(level):
+                continue
+            if level + 1 == len(self.__compactors):
+                self.__compactors.append(list())
+                self.__compaction_offsets.append(0)
+
+            compactor.sort()
+            # An odd item stays in this level so no weight is lost.
+            kept_items = [compactor.pop()] if len(compactor) % 2 == 1 else list()
+            offset = self.__compaction_offsets[level]
+            self.__compaction_offsets[level] = 1 - offset
+            self.__compactors[level + 1].extend(compactor[offset::2])
+            self.__compactors[level] = kept_items
+
+    def __get_sorted_items(self) -> Tuple[numpy.ndarray, numpy.ndarray]:
+        """
+        Gets the items kept by the sketch sorted by value along with their weights. The result is cached until new
+        values are added.
+        :return: The sorted values and their respective weights.
+        :rtype: Tuple[numpy.ndarray, numpy.ndarray]
+        """
+        if self.__sorted_values is None:
+            values = list()
+            weights = list()
+            for level, compactor in enumerate(self.__compactors):
+                values.extend(compactor)
+                weights.extend([2 ** level] * len(compactor))
+            values = numpy.asarray(values, dtype=float)
+            weights = numpy.asarray(weights, dtype=float)
+            order = numpy.argsort(values, kind="stable")
+            self.__sorted_values = values[order]
+            self.__sorted_weights = weights[order]
+        return self.__sorted_values, self.__sorted_weights
+
+    def get_quantiles(self, quantiles: List[float]) -> List[float]:
+        """
+        Gets the approximate values at the provided quantiles. Each item represents a run of 'weight' consecutive
+        values; the quantiles are linearly interpolated between the center of those runs. When every item has weight 1,
+        the result is the same as 'numpy.percentile' with linear interpolation.
+        :raises TypeError if quantiles is not of type 'List[float]'.
+        :raises ValueError if the sketch is empty or if a quantile is not between 0 and 1.
+        :param quantiles: The quantiles to get, between 0 and 1.
+        :type quantiles: List[float]
+        :return: The approximate values at the provided quantiles.
+        :rtype: List[float]
+        """
+        if not isinstance(quantiles, list):
+            raise TypeError(expected_type_but_received_message.format("quantiles", "List[float]", quantiles))
+        if self.__count == 0:
+            raise ValueError(empty_collection_message.format("QuantileSketch"))
+        if any(quantile < 0 or quantile > 1 for quantile in quantiles):
+            raise ValueError(expected_value_but_received_message.format("quantiles", "between 0 and 1", quantiles))
+
+        values, weights = self.__get_sorted_items()
+        first_ranks = numpy.cumsum(weights) - weights
+        positions = first_ranks + (weights - 1) / 2
+        total_weight = first_ranks[-1] + weights[-1]
+        target_ranks = numpy.asarray(quantiles, dtype=float) * (total_weight - 1)
+        quantile_values = numpy.interp(target_ranks, positions, values)
+        # The extremes are known exactly.
+        quantile_values = numpy.clip(quantile_values, self.__min, self.__max)
+        return quantile_values.tolist()
+
+    def get_bin_counts(self, bin_edges: numpy.ndarray) -> numpy.ndarray:
+        """
+        Gets the approximate number of values in each bin, following 'numpy.histogram' conventions: every bin is
+        half-open ([lower, upper)) except the last one, which includes its upper edge.
+        :raises TypeError if bin_edges is not of type 'numpy.ndarray'.
+        :param bin_edges: The sorted edges of the bins.
+        :type bin_edges: numpy.ndarray
+        :return: The approximate number of values in each bin.
+        :rtype: numpy.ndarray
+        """
+        if not isinstance(bin_edges, numpy.ndarray):
+            raise TypeError(expected_type_but_received_message.format("bin_edges", "numpy.ndarray", bin_edges))
+        if len(bin_edges) < 2 or self.__count == 0:
+            return numpy.zeros(max(len(bin_edges) - 1, 0), dtype=int)
+
+        values, weights = self.__get_sorted_items()
+        cumulative_weights = numpy.concatenate(([0], numpy.cumsum(weights)))
+        ranks_below_edges = cumulative_weights[numpy.searchsorted(values, bin_edges, side="left")]
+        ranks_below_edges[-1] = cumulative_weights[numpy.searchsorted(values, bin_edges[-1], side="right")]
+        return numpy.diff(ranks_below_edges).astype(int)
+
+    def dict_format(self) -> dict:
+        """
+        Converts the sketch into a json-serializable dictionary.
+        Format:
+            {
+                k: 200,
+                count: 34209,
+                min: 0.0,
+                max: 13.4,
+                compactors: [[0.3, 1.2, ...], [...], ...],
+                compaction_offsets: [0, 1, ...]
+            }
+        :return: The sketch as a dictionary.
+        :rtype: dict
+        """
+        return {
+            "k": self.__k,
+            "count": self.__count,
+            "min": self.__min,
+            "max": self.__max,
+            "compactors": copy.deepcopy(self.__compactors),
+            "compaction_offsets": copy.deepcopy(self.__compaction_offsets)
+        }
+
+    def set_value_from_dict(self, sketch_dict: dict) -> None:
+        """
+        Sets the values of this sketch from a dictionary. Any old values will be lost.
+        :raises TypeError if sketch_dict is not of type 'dict'.
+        :param sketch_dict: The sketch as a dictionary. For more info about the format: 'dict_format()'.
+        :type sketch_dict: dict
+        """
+        if not isinstance(sketch_dict, dict):
+            raise TypeError(expected_type_but_received_message.format("sketch_dict", "dict", sketch_dict))
+
+        self.__k = sketch_dict["k"]
+        self.__count = sketch_dict["count"]
+        self.__min = sketch_dict["min"]
+        self.__max = sketch_dict["max"]
+        self.__compactors = copy.deepcopy(sketch_dict["compactors"])
+        self.__compaction_offsets = copy.deepcopy(sketch_dict["compaction_offsets"])
+        self.__sorted_values = None
+        self.__sorted_weights = None
@@ -1,7 +1,11 @@
 import copy
-from typing import Tuple, Any, Union, KeysView, ValuesView, ItemsView, Dict, Iterator
+from bisect import bisect_right
+from typing import Tuple, Any, Union, KeysView, ValuesView, ItemsView, Dict, Iterator, List
 
 import idna
+import numpy
+
+from src.utils.error_messages import expected_type_but_received_message
 
 
 class RangeKeyDict:
@@ -9,8 +13,19 @@ class RangeKeyDict:
     def __init__(self) -> None:
         """
         Creates an instance of a dictionary with range as keys.
+        The ranges are also indexed by their lower edge, so a key is found with a binary search as long as the ranges
+        don't overlap (they may share an edge, like the bins of an histogram). Otherwise, the ranges are scanned in
+        insertion order.
         """
         self.__range_key_dict = dict()
+        self.__insertion_indexes = dict()
+        self.__next_insertion_index = 0
+        self.__lower_edges = list()
+        self.__sorted_keys = list()
+        self.__are_ranges_disjoint = True
+        self.__lower_edges_array = None
+        self.__upper_edges_array = None
+        self.__insertion_indexes_array = None
 
     def __getitem__(self, key: Union[float, int, Tuple[Union[float, int], Union[float, int]]]) -> Any:
         """
@@ -20,10 +35,12 @@ class RangeKeyDict:
         :return: The value associated to the key provided.
         :rtype: Any
         """
-        for found_key, value in self.__range_key_dict.items():
-            if (isinstance(key, tuple) and key == found_key) or (
-                    isinstance(key, (int, float)) and self.__key(key) == found_key):
-                return value
+        if isinstance(key, tuple):
+            return self.__range_key_dict.get(key)
+        if isinstance(key, (int, float)):
+            found_key = self.__key(key)
+            if found_key is not None:
+                return self.__range_key_dict[found_key]
         return None
 
     def __setitem__(self, key: Union[float, int, Tuple[Union[float, int], Union[float, int]]], value: Any) -> None:
@@ -43,14 +60,58 @@ class RangeKeyDict:
             if key[0] > key[1]:
                 raise ValueError("Second item in key tuple should be larger than first item.")
 
-            self.__range_key_dict[key] = value
+            self.__add_range(key, value)
 
         else:
             key_found = self.__key(key)
             if key_found is None:
                 # noinspection PyArgumentList
                 key_found = (value, value + 1)
-            self.__range_key_dict[key_found] = value
+            self.__add_range(key_found, value)
+
+    def __add_range(self, key: Tuple[Union[float, int], Union[float, int]], value: Any) -> None:
+        """
+        Sets the value of a range and indexes the range if it is new.
+        :param key: The range to set the value.
+        :type key: Tuple[Union[float, int], Union[float, int]]
+        :param value: The new value of the range.
+        :type value: Any
+        """
+        if key not in self.__range_key_dict:
+            self.__insertion_indexes[key] = self.__next_insertion_index
+            self.__next_insertion_index += 1
+            self.__index_range(key)
+        self.__range_key_dict[key] = value
+
+    def __index_range(self, key: Tuple[Union[float, int], Union[float, int]]) -> None:
+        """
+        Adds a range to the sorted index. If it overlaps its neighbours, the lookups go back to the insertion order
+        scan.
+        :param key: The range to index.
+        :type key: Tuple[Union[float, int], Union[float, int]]
+        """
+        position = bisect_right(self.__lower_edges, key[0])
+        previous_key = self.__sorted_keys[position - 1] if position > 0 else None
+        next_key = self.__sorted_keys[position] if position < len(self.__sorted_keys) else None
+        if (previous_key is not None and (previous_key[0] == key[0] or previous_key[1] > key[0])) or \
+                (next_key is not None and next_key[0] < key[1]):
+            self.__are_ranges_disjoint = False
+
+        self.__lower_edges.insert(position, key[0])
+        self.__sorted_keys.insert(position, key)
+        self.__lower_edges_array = None
+        self.__upper_edges_array = None
+        self.__insertion_indexes_array = None
+
+    def __rebuild_index(self) -> None:
+        """
+        Rebuilds the sorted index from the ranges in the dictionary.
+        """
+        self.__lower_edges = list()
+        self.__sorted_keys = list()
+        self.__are_ranges_disjoint = True
+        for key in self.__range_key_dict:
+            self.__index_range(key)
 
     def keys(self) -> KeysView:
         """
@@ -78,10 +139,61 @@ class RangeKeyDict:
         """
         assert isinstance(key_item, (float, int))
 
-        for key, value in self.__range_key_dict.items():
-            if key[0] <= key_item <= key[1]:
-                return key
-        return None
+        if not self.__are_ranges_disjoint:
+            for key in self.__range_key_dict:
+                if key[0] <= key_item <= key[1]:
+                    return key
+            return None
+
+        position = bisect_right(self.__lower_edges, key_item) - 1
+        if position < 0 or key_item > self.__sorted_keys[position][1]:
+            return None
+        found_key = self.__sorted_keys[position]
+        # On a shared edge, the range inserted first wins.
+        if position > 0 and found_key[0] == key_item:
+            previous_key = self.__sorted_keys[position - 1]
+            if previous_key[1] == key_item and \
+                    self.__insertion_indexes[previous_key] < self.__insertion_indexes[found_key]:
+                return previous_key
+        return found_key
+
+    def get_values(self, key_items: Union[List[Union[float, int]], numpy.ndarray]) -> List[Any]:
+        """
+        Retrieves the values associated to many keys at once. It is the same as calling '__getitem__' for each key,
+        but the ranges are searched with 'numpy.searchsorted' for all the keys together.
+        :raises TypeError if key_items is not of type 'Union[List[Union[float, int]], numpy.ndarray]'.
+        :param key_items: The keys used to retrieve the values.
+        :type key_items: Union[List[Union[float, int]], numpy.ndarray]
+        :return: The values associated to each key, None for the keys that don't belong in any key range.
+        :rtype: List[Any]
+        """
+        if not isinstance(key_items, (list, numpy.ndarray)):
+            raise TypeError(expected_type_but_received_message.format("key_items",
+                                                                      "Union[List[Union[float, int]], numpy.ndarray]",
+                                                                      key_items))
+        if not self.__are_ranges_disjoint or len(self.__sorted_keys) == 0:
+            return [self[key_item] for key_item in key_items]
+
+        if self.__lower_edges_array is None:
+            self.__lower_edges_array = numpy.asarray(self.__lower_edges)
+            self.__upper_edges_array = numpy.asarray([key[1] for key in self.__sorted_keys])
+            self.__insertion_indexes_array = numpy.asarray([self.__insertion_indexes[key]
+                                                            for key in self.__sorted_keys])
+
+        key_items = numpy.asarray(key_items)
+        positions = numpy.searchsorted(self.__lower_edges_array, key_items, side="right") - 1
+        clipped_positions = numpy.maximum(positions, 0)
+        previous_positions = numpy.maximum(clipped_positions - 1, 0)
+        # On a shared edge, the range inserted first wins.
+        is_previous_range = (positions > 0) \
+            & (self.__lower_edges_array[clipped_positions] == key_items) \
+            & (self.__upper_edges_array[previous_positions] == key_items) \
+            & (self.__insertion_indexes_array[previous_positions] < self.__insertion_indexes_array[clipped_positions])
+        positions = numpy.where(is_previous_range, previous_positions, positions)
+        is_found = (positions >= 0) & (key_items <= self.__upper_edges_array[numpy.maximum(positions, 0)])
+
+        return [self.__range_key_dict[self.__sorted_keys[position]] if found else None
+                for position, found in zip(positions.tolist(), is_found.tolist())]
 
     def items(self) -> ItemsView:
         """
@@ -113,13 +225,18 @@ class RangeKeyDict:
         :param key: The key to delete.
         :type key: Union[float, int, Tuple[Union[float, int], Union[float, int]]]
         """
-        del self.__range_key_dict[self.__key(key)]
+        found_key = self.__key(key)
+        del self.__range_key_dict[found_key]
+        del self.__insertion_indexes[found_key]
+        self.__rebuild_index()
 
     def clear(self) -> None:
         """
         Clears the dictionary.
         """
-        return self.__range_key_dict.clear()
+        self.__range_key_dict.clear()
+        self.__insertion_indexes.clear()
+        self.__rebuild_index()
 
     def copy(self) -> Dict[Union[int, float, Tuple[Union[int, float], Union[int, float]]], Any]:
         """
@@ -0,0 +1,326 @@
+import datetime
+from bisect import bisect_right
+from typing import List, Dict, Union, Tuple
+
+import numpy
+
+import wades_config
+from src.main.common.enum.AppProfileAttribute import AppProfileAttribute
+from src.utils.error_messages import expected_type_but_received_message, expected_value_but_received_message
+
+
+class StreamingBaseline:
+    # Number of seasonal buckets: one per hour of the week.
+    hours_of_week_count = 7 * 24
+    # Lower bound of the standard deviation, relative to the mean, so that constant attributes don't turn any change
+    # into an infinite deviation.
+    minimum_relative_standard_deviation = 0.01
+
+    def __init__(self, attribute_names: List[str], alpha: float, seasonal_alpha: float) -> None:
+        """
+        Abstracts the running statistics of the numeric attributes of an application: an exponentially weighted mean
+        and variance of each attribute, overall and per hour of the week. Each sample is folded into the statistics in
+        constant time, and the memory used doesn't depend on the length of the history.
+        Until 1 / alpha samples have been folded, the statistics are the plain mean and variance of the samples, so
+        the first samples don't weight more than the following ones.
+        :raises TypeError if attribute_names is not of type 'List[str]',
+                or if alpha or seasonal_alpha are not of type 'float'.
+        :raises ValueError if alpha or seasonal_alpha are not between 0 and 1.
+        :param attribute_names: The names of the numeric attributes.
+        :type attribute_names: List[str]
+        :param alpha: The weight of a new sample in the overall statistics.
+        :type alpha: float
+        :param seasonal_alpha: The weight of a new sample in the statistics of its hour of the week.
+        :type seasonal_alpha: float
+        """
+        if not isinstance(attribute_names, list):
+            raise TypeError(expected_type_but_received_message.format("attribute_names", "List[str]",
+                                                                      attribute_names))
+        for parameter_name, parameter_value in (("alpha", alpha), ("seasonal_alpha", seasonal_alpha)):
+            if not isinstance(parameter_value, float):
+                raise TypeError(expected_type_but_received_message.format(parameter_name, "float", parameter_value))
+            if not 0 < parameter_value <= 1:
+                raise ValueError(expected_value_but_received_message.format(parameter_name, "between 0 and 1",
+                                                                            parameter_value))
+
+        self.__attribute_names = list(attribute_names)
+        self.__alpha = alpha
+        self.__seasonal_alpha = seasonal_alpha
+        attributes_count = len(attribute_names)
+        self.__means = numpy.zeros(attributes_count)
+        self.__variances = numpy.zeros(attributes_count)
+        self.__samples_counts = numpy.zeros(attributes_count, dtype=int)
+        self.__seasonal_means = numpy.zeros((attributes_count, StreamingBaseline.hours_of_week_count))
+        self.__seasonal_variances = numpy.zeros((attributes_count, StreamingBaseline.hours_of_week_count))
+        self.__seasonal_samples_counts = numpy.zeros((attributes_count, StreamingBaseline.hours_of_week_count),
+                                                     dtype=int)
+        self.__last_seen_timestamp = None
+
+    @staticmethod
+    def get_hour_of_week(timestamp: datetime.datetime) -> int:
+        """
+        Gets the seasonal bucket of a timestamp.
+        :param timestamp: The timestamp.
+        :type timestamp: datetime.datetime
+        :return: The hour of the week, from 0 (Monday, 00:00 to 00:59) to 167 (Sunday, 23:00 to 23:59).
+        :rtype: int
+        """
+        return timestamp.weekday() * 24 + timestamp.hour
+
+    def get_attribute_names(self) -> List[str]:
+        """
+        Gets the names of the numeric attributes.
+        :return: The names of the numeric attributes.
+        :rtype: List[str]
+        """
+        return list(self.__attribute_names)
+
+    def get_last_seen_timestamp(self) -> Union[datetime.datetime, None]:
+        """
+        Gets the retrieval timestamp of the newest sample folded into the statistics.
+        :return: The retrieval timestamp of the newest sample, None if no sample has been folded.
+        :rtype: Union[datetime.datetime, None]
+        """
+        return self.__last_seen_timestamp
+
+    def get_samples_count(self, attribute_name: str, hour_of_week: Union[int, None] = None) -> int:
+        """
+        Gets the number of values of an attribute folded into the statistics.
+        :param attribute_name: The name of the attribute.
+        :type attribute_name: str
+        :param hour_of_week: The seasonal bucket. If None, the overall count.
+        :type hour_of_week: Union[int, None]
+        :return: The number of values folded.
+        :rtype: int
+        """
+        attribute_index = self.__attribute_names.index(attribute_name)
+        if hour_of_week is None:
+            return int(self.__samples_counts[attribute_index])
+        return int(self.__seasonal_samples_counts[attribute_index, hour_of_week])
+
+    def get_mean(self, attribute_name: str, hour_of_week: Union[int, None] = None) -> float:
+        """
+        Gets the exponentially weighted mean of an attribute.
+        :param attribute_name: The name of the attribute.
+        :type attribute_name: str
+        :param hour_of_week: The seasonal bucket. If None, the overall mean.
+        :type hour_of_week: Union[int, None]
+        :return: The mean of the attribute.
+        :rtype: float
+        """
+        attribute_index = self.__attribute_names.index(attribute_name)
+        if hour_of_week is None:
+            return float(self.__means[attribute_index])
+        return float(self.__seasonal_means[attribute_index, hour_of_week])
+
+    def get_variance(self, attribute_name: str, hour_of_week: Union[int, None] = None) -> float:
+        """
+        Gets the exponentially weighted variance of an attribute.
+        :param attribute_name: The name of the attribute.
+        :type attribute_name: str
+        :param hour_of_week: The seasonal bucket. If None, the overall variance.
+        :type hour_of_week: Union[int, None]
+        :return: The variance of the attribute.
+        :rtype: float
+        """
+        attribute_index = self.__attribute_names.index(attribute_name)
+        if hour_of_week is None:
+            return float(self.__variances[attribute_index])
+        return float(self.__seasonal_variances[attribute_index, hour_of_week])
+
+    @staticmethod
+    def __get_new_samples_start(retrieval_timestamps: List[str],
+                                last_seen_timestamp: Union[datetime.datetime, None]) -> int:
+        """
+        Gets the index of the first sample retrieved after the last seen timestamp.
+        :param retrieval_timestamps: The retrieval timestamps of the samples, sorted.
+        :type retrieval_timestamps: List[str]
+        :param last_seen_timestamp: The last seen timestamp, None if no sample has been seen.
+        :type last_seen_timestamp: Union[datetime.datetime, None]
+        :return: The index of the first new sample.
+        :rtype: int
+        """
+        if last_seen_timestamp is None:
+            return 0
+        # The timestamp format sorts like the timestamps themselves.
+        return bisect_right(retrieval_timestamps, last_seen_timestamp.strftime(wades_config.datetime_format))
+
+    @staticmethod
+    def __get_hours_of_week(retrieval_timestamps: List[str]) -> List[int]:
+        """
+        Gets the seasonal bucket of each sample. Each distinct timestamp is only parsed once.
+        :param retrieval_timestamps: The retrieval timestamps of the samples.
+        :type retrieval_timestamps: List[str]
+        :return: The hour of the week of each sample.
+        :rtype: List[int]
+        """
+        hours_of_week = dict()
+        for retrieval_timestamp in retrieval_timestamps:
+            if retrieval_timestamp not in hours_of_week:
+                hours_of_week[retrieval_timestamp] = StreamingBaseline.get_hour_of_week(
+                    datetime.datetime.strptime(retrieval_timestamp, wades_config.datetime_format))
+        return [hours_of_week[retrieval_timestamp] for retrieval_timestamp in retrieval_timestamps]
+
+    def add_samples(self, app_profile_data: dict) -> None:
+        """
+        Folds the samples that haven't been folded yet into the statistics.
+        :raises TypeError if app_profile_data is not of type 'dict'.
+        :param app_profile_data: The data to fold. Only the samples retrieved after the last seen timestamp are folded.
+                For more info about the format: 'src.main.common.AppProfile.AppProfile.get_previously_retrieved_data'
+        :type app_profile_data: dict
+        """
+        if not isinstance(app_profile_data, dict):
+            raise TypeError(expected_type_but_received_message.format("app_profile_data", "dict", app_profile_data))
+
+        retrieval_timestamps = app_profile_data.get(AppProfileAttribute.data_retrieval_timestamps.name, list())
+        first_new_sample_index = StreamingBaseline.__get_new_samples_start(retrieval_timestamps,
+                                                                           self.__last_seen_timestamp)
+        if first_new_sample_index >= len(retrieval_timestamps):
+            return
+
+        hours_of_week = StreamingBaseline.__get_hours_of_week(retrieval_timestamps[first_new_sample_index:])
+        for attribute_index, attribute_name in enumerate(self.__attribute_names):
+            values = app_profile_data.get(attribute_name, list())[first_new_sample_index:]
+            mean, variance = float(self.__means[attribute_index]), float(self.__variances[attribute_index])
+            samples_count = int(self.__samples_counts[attribute_index])
+            for value, hour_of_week in zip(values, hours_of_week):
+                mean, variance = StreamingBaseline.__fold_value(mean, variance, samples_count, float(value),
+                                                                self.__alpha)
+                samples_count += 1
+                self.__seasonal_means[attribute_index, hour_of_week], \
+                    self.__seasonal_variances[attribute_index, hour_of_week] = StreamingBaseline.__fold_value(
+                        float(self.__seasonal_means[attribute_index, hour_of_week]),
+                        float(self.__seasonal_variances[attribute_index, hour_of_week]),
+                        int(self.__seasonal_samples_counts[attribute_index, hour_of_week]), float(value),
+                        self.__seasonal_alpha)
+                self.__seasonal_samples_counts[attribute_index, hour_of_week] += 1
+            self.__means[attribute_index], self.__variances[attribute_index] = mean, variance
+            self.__samples_counts[attribute_index] = samples_count
+        self.__last_seen_timestamp = datetime.datetime.strptime(retrieval_timestamps[-1],
+                                                                wades_config.datetime_format)
+
+    @staticmethod
+    def __fold_value(mean: float, variance: float, samples_count: int, value: float, alpha: float) \
+            -> Tuple[float, float]:
+        """
+        Folds a value into an exponentially weighted mean and variance.
+        :param mean: The current mean.
+        :type mean: float
+        :param variance: The current variance.
+        :type variance: float
+        :param samples_count: The number of values already folded.
+        :type samples_count: int
+        :param value: The value to fold.
+        :type value: float
+        :param alpha: The weight of the new value, once enough values have been folded.
+        :type alpha: float
+        :return: The new mean and variance.
+        :rtype: Tuple[float, float]
+        """
+        weight = max(alpha, 1 / (samples_count + 1))
+        difference = value - mean
+        increment = weight * difference
+        return mean + increment, (1 - weight) * (variance + difference * increment)
+
+    def get_z_scores(self, app_profile_data: dict, minimum_samples_count: int,
+                     seasonal_minimum_samples_count: int) -> Dict[str, numpy.ndarray]:
+        """
+        Gets how many standard deviations each value is away from the mean of its attribute. The statistics of the
+        sample's hour of the week are used if they have folded enough values, the overall statistics otherwise.
+        :raises TypeError if app_profile_data is not of type 'dict'.
+        :param app_profile_data: The data to score. For more info about the format:
+                'src.main.common.AppProfile.AppProfile.get_latest_retrieved_data'
+        :type app_profile_data: dict
+        :param minimum_samples_count: The number of values the overall statistics need to score a value.
+        :type minimum_samples_count: int
+        :param seasonal_minimum_samples_count: The number of values the statistics of an hour of the week need to be
+                used instead of the overall statistics.
+        :type seasonal_minimum_samples_count: int
+        :return: The z-scores of the values of each attribute, mapped by attribute name. Values that can't be scored
+                yet have a NaN z-score.
+        :rtype: Dict[str, numpy.ndarray]
+        """
+        if not isinstance(app_profile_data, dict):
+            raise TypeError(expected_type_but_received_message.format("app_profile_data", "dict", app_profile_data))
+
+        retrieval_timestamps = app_profile_data.get(AppProfileAttribute.data_retrieval_timestamps.name, list())
+        hours_of_week = numpy.array(StreamingBaseline.__get_hours_of_week(retrieval_timestamps), dtype=int)
+        z_scores = dict()
+        for attribute_index, attribute_name in enumerate(self.__attribute_names):
+            values = numpy.asarray(app_profile_data.get(attribute_name, list()), dtype=float)
+            if self.__samples_counts[attribute_index] < minimum_samples_count:
+                z_scores[attribute_name] = numpy.full(len(values), numpy.nan)
+                continue
+            value_hours_of_week = hours_of_week[:len(values)]
+            is_seasonal = self.__seasonal_samples_counts[attribute_index, value_hours_of_week] >= \
+                seasonal_minimum_samples_count
+            means = numpy.where(is_seasonal, self.__seasonal_means[attribute_index, value_hours_of_week],
+                                self.__means[attribute_index])
+            variances = numpy.where(is_seasonal, self.__seasonal_variances[attribute_index, value_hours_of_week],
+                                    self.__variances[attribute_index])
+            standard_deviations = numpy.maximum(
+                numpy.sqrt(variances),
+                numpy.maximum(numpy.abs(means) * StreamingBaseline.minimum_relative_standard_deviation,
+                              numpy.finfo(float).eps))
+            z_scores[attribute_name] = (values - means) / standard_deviations
+        return z_scores
+
+    def dict_format(self) -> dict:
+        """
+        Converts the statistics into a json-serializable dictionary.
+        Format:
+            {
+                attribute_names: [memory_infos, cpu_percents, ...],
+                alpha: 0.05,
+                seasonal_alpha: 0.1,
+                means: [2342.4, 0.4, ...],
+                variances: [...],
+                samples_counts: [5230, 5230, ...],
+                seasonal_means: [[...168 values...], ...],
+                seasonal_variances: [[...], ...],
+                seasonal_samples_counts: [[...], ...],
+                last_seen_timestamp: "2020-12-13 14:30:32:34.232"
+            }
+        The statistics are listed in the order of attribute_names; the seasonal ones by hour of the week.
+        :return: The statistics as a dictionary.
+        :rtype: dict
+        """
+        last_seen_timestamp = self.__last_seen_timestamp.strftime(wades_config.datetime_format) \
+            if self.__last_seen_timestamp is not None else None
+        return {
+            "attribute_names": list(self.__attribute_names),
+            "alpha": self.__alpha,
+            "seasonal_alpha": self.__seasonal_alpha,
+            "means": self.__means.tolist(),
+            "variances": self.__variances.tolist(),
+            "samples_counts": self.__samples_counts.tolist(),
+            "seasonal_means": self.__seasonal_means.tolist(),
+            "seasonal_variances": self.__seasonal_variances.tolist(),
+            "seasonal_samples_counts": self.__seasonal_samples_counts.tolist(),
+            "last_seen_timestamp": last_seen_timestamp
+        }
+
+    def set_value_from_dict(self, streaming_baseline_dict: dict) -> None:
+        """
+        Sets the values of these statistics from a dictionary. Any old values will be lost.
+        :raises TypeError if streaming_baseline_dict is not of type 'dict'.
+        :param streaming_baseline_dict: The statistics as a dictionary. For more info about the format:
+                'dict_format()'.
+        :type streaming_baseline_dict: dict
+        """
+        if not isinstance(streaming_baseline_dict, dict):
+            raise TypeError(expected_type_but_received_message.format("streaming_baseline_dict", "dict",
+                                                                      streaming_baseline_dict))
+
+        self.__attribute_names = list(streaming_baseline_dict["attribute_names"])
+        self.__alpha = streaming_baseline_dict["alpha"]
+        self.__seasonal_alpha = streaming_baseline_dict["seasonal_alpha"]
+        self.__means = numpy.array(streaming_baseline_dict["means"], dtype=float)
+        self.__variances = numpy.array(streaming_baseline_dict["variances"], dtype=float)
+        self.__samples_counts = numpy.array(streaming_baseline_dict["samples_counts"], dtype=int)
+        self.__seasonal_means = numpy.array(streaming_baseline_dict["seasonal_means"], dtype=float)
+        self.__seasonal_variances = numpy.array(streaming_baseline_dict["seasonal_variances"], dtype=float)
+        self.__seasonal_samples_counts = numpy.array(streaming_baseline_dict["seasonal_samples_counts"], dtype=int)
+        last_seen_timestamp = streaming_baseline_dict["last_seen_timestamp"]
+        self.__last_seen_timestamp = datetime.datetime.strptime(last_seen_timestamp, wades_config.datetime_format) \
+            if last_seen_timestamp is not None else None
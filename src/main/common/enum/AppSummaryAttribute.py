@@ -8,3 +8,5 @@ class AppSummaryAttribute(Enum):
     abnormal_attributes = auto()
     latest_retrieved_app_details = auto()
     modelled_app_details = auto()
+    anomalous_points_count = auto()
+    worst_point = auto()
@@ -0,0 +1,8 @@
+from enum import Enum
+
+
+class OverflowPolicy(Enum):
+    # The producer waits until the queue has room.
+    block = 1
+    # The oldest queued item is dropped, or merged into the new one if the stage can merge items.
+    drop_oldest = 2
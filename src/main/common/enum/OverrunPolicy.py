@@ -0,0 +1,10 @@
+from enum import Enum
+
+
+class OverrunPolicy(Enum):
+    # The missed deadlines are skipped, and the next cycle starts at the next deadline.
+    skip = 1
+    # The missed cycles start right away, one after the other, until the schedule is caught up.
+    catch_up = 2
+    # The cycle starts right away and the period doubles, up to a maximum, until the cycles fit in it again.
+    degrade = 3
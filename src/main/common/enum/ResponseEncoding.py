@@ -0,0 +1,8 @@
+from enum import Enum
+
+
+class ResponseEncoding(Enum):
+    # The response is sent as a utf-8 json string.
+    json = 0
+    # The json string is compressed with zlib, for bulk data.
+    compressed_json = 1
@@ -0,0 +1,145 @@
+from abc import ABC, abstractmethod
+from typing import List, Union, Dict, Set, Tuple
+
+import numpy
+
+from src.main.common.AppModelCache import AppModelCache
+from src.main.common.AppProfile import AppProfile
+from src.main.common.AppProfileBaseline import AppProfileBaseline
+from src.main.common.AppSummary import AppSummary
+from src.main.common.enum.AppProfileAttribute import AppProfileAttribute
+from src.main.common.enum.RiskLevel import RiskLevel
+from src.utils.error_messages import expected_type_but_received_message, expected_value_but_received_message
+
+
+class DetectionTechnique(ABC):
+    # Name under which the joint anomalies of the numeric attributes are reported.
+    joint_numeric_attribute_name = "joint_numeric_attributes"
+    # Attributes that the detection techniques can model. Techniques that can't model an attribute ignore it.
+    modelled_attribute_names = AppProfileBaseline.numeric_attribute_names + [AppProfileAttribute.usernames.name,
+                                                                             AppProfileAttribute.opened_files.name,
+                                                                             joint_numeric_attribute_name]
+
+    def __init__(self, attribute_names: Union[Set[str], None] = None) -> None:
+        """
+        Abstracts an anomaly detection technique. A technique models a list of application profiles and returns one
+        AppSummary per profile. It only reports anomalies in the attributes it is assigned to, so that different
+        techniques can model different attributes of the same application.
+        :raises TypeError if attribute_names is not of type 'Union[Set[str], None]'.
+        :raises ValueError if an attribute name is not in modelled_attribute_names.
+        :param attribute_names: The attributes modelled by the technique. If None, all the modelled attributes.
+        :type attribute_names: Union[Set[str], None]
+        """
+        if attribute_names is None:
+            attribute_names = set(DetectionTechnique.modelled_attribute_names)
+        if not isinstance(attribute_names, set):
+            raise TypeError(expected_type_but_received_message.format("attribute_names", "Union[Set[str], None]",
+                                                                      attribute_names))
+        if not attribute_names.issubset(DetectionTechnique.modelled_attribute_names):
+            raise ValueError(expected_value_but_received_message.format("attribute_names",
+                                                                        DetectionTechnique.modelled_attribute_names,
+                                                                        attribute_names))
+        self.__attribute_names = set(attribute_names)
+
+    def get_attribute_names(self) -> Set[str]:
+        """
+        Gets the attributes modelled by the technique.
+        :return: The modelled attributes.
+        :rtype: Set[str]
+        """
+        return set(self.__attribute_names)
+
+    @staticmethod
+    def get_anomalous_points_summary(latest_app_profile_data: dict,
+                                     point_risk_levels: Dict[str, numpy.ndarray]) -> Tuple[int, Union[dict, None]]:
+        """
+        Gets the number of anomalous latest samples and the worst point among the numeric attributes.
+        A sample is anomalous if any of its numeric values is an outlier.
+        :param latest_app_profile_data: The latest retrieved data of the application. For more info about the format:
+                'src.main.common.AppProfile.AppProfile.get_latest_retrieved_data'
+        :type latest_app_profile_data: dict
+        :param point_risk_levels: The risk level of each latest point, mapped by attribute name.
+        :type point_risk_levels: Dict[str, numpy.ndarray]
+        :return: The number of anomalous samples and the worst point, None if there are no anomalous points.
+                For more info about the format of the worst point:
+                'src.main.common.AppSummary.AppSummary.get_worst_point'
+        :rtype: Tuple[int, Union[dict, None]]
+        """
+        samples_count = max((len(risk_levels) for risk_levels in point_risk_levels.values()), default=0)
+        is_anomalous_sample = numpy.zeros(samples_count, dtype=bool)
+        worst_point = None
+        for attribute_name in sorted(point_risk_levels.keys()):
+            risk_levels = point_risk_levels[attribute_name]
+            if len(risk_levels) == 0:
+                continue
+            is_anomalous_sample[:len(risk_levels)] |= risk_levels > RiskLevel.none.value
+            worst_point_index = int(numpy.argmax(risk_levels))
+            worst_risk_level = RiskLevel(int(risk_levels[worst_point_index]))
+            if worst_risk_level > RiskLevel.none and (worst_point is None or worst_risk_level > worst_point["risk"]):
+                worst_point = {
+                    "attribute_name": attribute_name,
+                    "index": worst_point_index,
+                    "value": latest_app_profile_data[attribute_name][worst_point_index],
+                    "risk": worst_risk_level
+                }
+        return int(is_anomalous_sample.sum()), worst_point
+
+    @staticmethod
+    def get_unscored_data(app_profile: AppProfile, model_cache: AppModelCache) -> dict:
+        """
+        Gets the data of an application that hasn't been added to its model cache yet: every sample retrieved since the
+        application was last modelled, including the ones of the cycles where it was skipped. They are the samples to
+        score, before they are added to the cache.
+        A cache that has never seen a sample first gets the previously retrieved data, with the users and opened files
+        of the samples evicted from the sliding window, so that only the latest retrieved data is scored.
+        If every sample is already in the cache, the latest retrieved data is scored again.
+        Only the samples that are returned are copied, so the cost doesn't depend on the length of the history.
+        :raises TypeError if app_profile is not of type 'AppProfile',
+                or if model_cache is not of type 'AppModelCache'.
+        :param app_profile: The application to model.
+        :type app_profile: AppProfile
+        :param model_cache: The fitted models of the application.
+        :type model_cache: AppModelCache
+        :return: The data to score. For more info about the format:
+                'src.main.common.AppProfile.AppProfile.get_latest_retrieved_data'
+        :rtype: dict
+        """
+        if not isinstance(app_profile, AppProfile):
+            raise TypeError(expected_type_but_received_message.format("app_profile", "AppProfile", app_profile))
+        if not isinstance(model_cache, AppModelCache):
+            raise TypeError(expected_type_but_received_message.format("model_cache", "AppModelCache", model_cache))
+
+        if model_cache.get_last_seen_timestamp() is None:
+            previous_app_profile_data = app_profile.get_previously_retrieved_data()
+            # Users and files seen in samples evicted from the sliding window are still known behaviour.
+            if app_profile.get_evicted_samples_count() > 0 and len(previous_app_profile_data) > 0:
+                baseline = app_profile.get_baseline()
+                previous_app_profile_data[AppProfileAttribute.usernames.name].extend(baseline.get_users())
+                previous_app_profile_data[AppProfileAttribute.opened_files.name].append(
+                    list(baseline.get_opened_files()))
+            model_cache.add_new_samples(previous_app_profile_data)
+
+        unscored_app_profile_data = app_profile.get_retrieved_data(
+            since_timestamp=model_cache.get_last_seen_timestamp())
+        if len(unscored_app_profile_data[AppProfileAttribute.data_retrieval_timestamps.name]) == 0:
+            return app_profile.get_latest_retrieved_data()
+        return unscored_app_profile_data
+
+    @abstractmethod
+    def __call__(self, data: List[AppProfile], model_caches: Union[Dict[str, AppModelCache], None] = None,
+                 update_model_caches: bool = True) -> List[AppSummary]:
+        """
+        Models the list of AppProfiles.
+        :param data: The list of AppProfiles to model.
+        :type data: List[AppProfile]
+        :param model_caches: The fitted models of the applications mapped by application name. Techniques that don't
+                use them ignore them.
+        :type model_caches: Union[Dict[str, AppModelCache], None]
+        :param update_model_caches: If True, the scored samples are added to the model caches. If False, they are left
+                out, so that other techniques modelling other attributes of the same applications score them too. The
+                caller then adds them with 'get_unscored_data()'.
+        :type update_model_caches: bool
+        :return: A list of modelled AppProfiles in the form of AppSummary objects, in the order of data.
+        :rtype: List[AppSummary]
+        """
+        pass
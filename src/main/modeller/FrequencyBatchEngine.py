@@ -0,0 +1,426 @@
+import itertools
+from typing import List, Union, Tuple
+
+import numpy
+
+import wades_config
+from src.main.common.NumericAttributeModel import NumericAttributeModel
+from src.main.common.enum.RiskLevel import RiskLevel
+from src.utils.error_messages import expected_type_but_received_message, collection_length_mismatch_message
+
+
+class FrequencyBatchEngine:
+
+    def __init__(self, min_number_count_non_anomalous: int = 5) -> None:
+        """
+        Models many numeric series at once (for example, every numeric attribute of every running application).
+        It gives the same results as 'src.main.modeller.FrequencyTechnique.FrequencyTechnique' does for each series,
+        but the quartiles, outlier fences, Freedman–Diaconis bins, bin counts and risk levels are computed with grouped
+        numpy operations over the concatenated series, so the cost per series is not dominated by Python overhead.
+        The series are called segments: each one has previous values, used to create the model, and latest values,
+        which are investigated.
+        :raises TypeError if min_number_count_non_anomalous is not of type 'int'.
+        :param min_number_count_non_anomalous: The minimum number of data points in the same bin as the 'anomalous'
+            point so as to not consider it a high risk anomaly.
+        :type min_number_count_non_anomalous: int
+        """
+        if not isinstance(min_number_count_non_anomalous, int):
+            raise TypeError(expected_type_but_received_message.format("min_number_count_non_anomalous", "int",
+                                                                      min_number_count_non_anomalous))
+        self.__min_count_non_anomalous = min_number_count_non_anomalous
+
+    def detect_anomalies(self, previous_segments: List[List[Union[int, float]]],
+                         latest_segments: List[List[Union[int, float]]]) -> \
+            Tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray]:
+        """
+        Detects anomalies in the latest values of each segment and then assigns them a risk level. Every latest value
+        is scored, and the risk level of a segment is the highest risk level of its values.
+        For more info about the risk level:
+        'src.main.modeller.FrequencyTechnique.FrequencyTechnique.__detect_anomalies_in_numeric_attribute'.
+        :raises TypeError if previous_segments or latest_segments are not of type 'List[List[Union[int, float]]]'.
+        :raises ValueError if previous_segments and latest_segments don't have the same length.
+        :param previous_segments: The values used to create the model of each segment.
+        :type previous_segments: List[List[Union[int, float]]]
+        :param latest_segments: The values to investigate in each segment.
+        :type latest_segments: List[List[Union[int, float]]]
+        :return: A tuple with an array of flags for the segments where an anomaly has been found, an array with
+            the risk level (as 'int') of each segment and an array with the risk level of each latest value, in the
+            order of the concatenated latest segments.
+        :rtype: Tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray]
+        """
+        if not isinstance(previous_segments, list):
+            raise TypeError(expected_type_but_received_message.format("previous_segments",
+                                                                      "List[List[Union[int, float]]]",
+                                                                      previous_segments))
+        if not isinstance(latest_segments, list):
+            raise TypeError(expected_type_but_received_message.format("latest_segments",
+                                                                      "List[List[Union[int, float]]]",
+                                                                      latest_segments))
+        if len(previous_segments) != len(latest_segments):
+            raise ValueError(collection_length_mismatch_message.format("latest_segments", len(previous_segments),
+                                                                       len(latest_segments)))
+
+        segments_count = len(previous_segments)
+        anomalies_found = numpy.zeros(segments_count, dtype=bool)
+        risk_levels = numpy.full(segments_count, RiskLevel.none.value, dtype=int)
+        if segments_count == 0:
+            return anomalies_found, risk_levels, numpy.zeros(0, dtype=int)
+
+        previous_values, previous_segment_ids, previous_lengths = \
+            FrequencyBatchEngine.__concatenate_segments(previous_segments)
+        latest_values, latest_segment_ids, _ = FrequencyBatchEngine.__concatenate_segments(latest_segments)
+        all_point_risk_levels = numpy.full(len(latest_values), RiskLevel.none.value, dtype=int)
+
+        # Only the latest values of the segments with enough previous values are investigated.
+        is_modelled_segment = previous_lengths >= max(wades_config.minimum_retrieval_size_for_modelling, 1)
+        is_modelled_point = is_modelled_segment[latest_segment_ids]
+        latest_values = latest_values[is_modelled_point]
+        latest_segment_ids = latest_segment_ids[is_modelled_point]
+        if len(latest_values) == 0:
+            return anomalies_found, risk_levels, all_point_risk_levels
+
+        # Sorted values of each segment, one after another.
+        sorting_order = numpy.lexsort((previous_values, previous_segment_ids))
+        sorted_values = previous_values[sorting_order]
+        segment_starts = numpy.concatenate(([0], numpy.cumsum(previous_lengths)[:-1]))
+        safe_lengths = numpy.maximum(previous_lengths, 1)
+
+        q1 = FrequencyBatchEngine.__get_segment_quantiles(sorted_values, segment_starts, safe_lengths, 0.25)
+        q3 = FrequencyBatchEngine.__get_segment_quantiles(sorted_values, segment_starts, safe_lengths, 0.75)
+        lowest_points = sorted_values[numpy.minimum(segment_starts, len(sorted_values) - 1)]
+        highest_points = sorted_values[numpy.minimum(segment_starts + safe_lengths - 1, len(sorted_values) - 1)]
+
+        first_edges, last_edges, bins_counts, steps = \
+            FrequencyBatchEngine.__get_segment_bins(q1, q3, lowest_points, highest_points, safe_lengths)
+
+        # Values and models of the segment each latest point belongs to.
+        point_q1 = q1[latest_segment_ids]
+        point_q3 = q3[latest_segment_ids]
+        point_lowest_points = lowest_points[latest_segment_ids]
+        point_highest_points = highest_points[latest_segment_ids]
+
+        bin_counts, is_in_range = FrequencyBatchEngine.__get_bin_counts_of_points(
+            latest_values=latest_values, latest_segment_ids=latest_segment_ids, sorted_values=sorted_values,
+            segment_starts=segment_starts, previous_segment_ids=previous_segment_ids[sorting_order],
+            first_edges=first_edges, last_edges=last_edges, bins_counts=bins_counts, steps=steps)
+
+        point_risk_levels = self.score_points(latest_values=latest_values, q1=point_q1, q3=point_q3,
+                                              lowest_points=point_lowest_points,
+                                              highest_points=point_highest_points,
+                                              bin_counts=numpy.where(is_in_range, bin_counts, -1))
+        numpy.maximum.at(risk_levels, latest_segment_ids, point_risk_levels)
+        anomalies_found = risk_levels > RiskLevel.none.value
+        all_point_risk_levels[is_modelled_point] = point_risk_levels
+
+        return anomalies_found, risk_levels, all_point_risk_levels
+
+    def detect_anomalies_with_models(self, attribute_models: List[Union[NumericAttributeModel, None]],
+                                     latest_segments: List[List[Union[int, float]]]) -> \
+            Tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray]:
+        """
+        Detects anomalies in the values of each segment against the fitted model of the segment, and then assigns them
+        a risk level. It gives the same results as scoring each segment with its model in
+        'src.main.modeller.FrequencyTechnique.FrequencyTechnique', but every point is scored in one numpy pass.
+        The segments without a model, or with a model fitted with too few samples, are not investigated.
+        :raises TypeError if attribute_models is not of type 'List[Union[NumericAttributeModel, None]]',
+                or if latest_segments is not of type 'List[List[Union[int, float]]]'.
+        :raises ValueError if attribute_models and latest_segments don't have the same length.
+        :param attribute_models: The fitted model of each segment.
+        :type attribute_models: List[Union[NumericAttributeModel, None]]
+        :param latest_segments: The values to investigate in each segment.
+        :type latest_segments: List[List[Union[int, float]]]
+        :return: The same as 'detect_anomalies()'.
+        :rtype: Tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray]
+        """
+        if not isinstance(attribute_models, list):
+            raise TypeError(expected_type_but_received_message.format("attribute_models",
+                                                                      "List[Union[NumericAttributeModel, None]]",
+                                                                      attribute_models))
+        if not isinstance(latest_segments, list):
+            raise TypeError(expected_type_but_received_message.format("latest_segments",
+                                                                      "List[List[Union[int, float]]]",
+                                                                      latest_segments))
+        if len(attribute_models) != len(latest_segments):
+            raise ValueError(collection_length_mismatch_message.format("latest_segments", len(attribute_models),
+                                                                       len(latest_segments)))
+
+        segments_count = len(attribute_models)
+        anomalies_found = numpy.zeros(segments_count, dtype=bool)
+        risk_levels = numpy.full(segments_count, RiskLevel.none.value, dtype=int)
+        if segments_count == 0:
+            return anomalies_found, risk_levels, numpy.zeros(0, dtype=int)
+
+        latest_values, latest_segment_ids, latest_lengths = FrequencyBatchEngine.__concatenate_segments(latest_segments)
+        all_point_risk_levels = numpy.full(len(latest_values), RiskLevel.none.value, dtype=int)
+        segment_ends = numpy.cumsum(latest_lengths)
+        is_modelled_segment = numpy.zeros(segments_count, dtype=bool)
+        q1, q3, lowest_points, highest_points = (numpy.zeros(segments_count) for _ in range(4))
+        bin_counts = numpy.full(len(latest_values), -1, dtype=int)
+        for segment_index, attribute_model in enumerate(attribute_models):
+            if attribute_model is None or attribute_model.get_fitted_samples_count() < \
+                    max(wades_config.minimum_retrieval_size_for_modelling, 1):
+                continue
+            is_modelled_segment[segment_index] = True
+            q1[segment_index], q3[segment_index] = attribute_model.get_quartiles()
+            lowest_points[segment_index] = attribute_model.get_lowest_point()
+            highest_points[segment_index] = attribute_model.get_highest_point()
+            segment_values = latest_values[segment_ends[segment_index] - latest_lengths[segment_index]:
+                                           segment_ends[segment_index]]
+            bin_counts[segment_ends[segment_index] - latest_lengths[segment_index]:segment_ends[segment_index]] = \
+                FrequencyBatchEngine.__get_bin_counts_of_points_with_model(segment_values, attribute_model)
+
+        is_modelled_point = is_modelled_segment[latest_segment_ids]
+        latest_segment_ids = latest_segment_ids[is_modelled_point]
+        if len(latest_segment_ids) == 0:
+            return anomalies_found, risk_levels, all_point_risk_levels
+        point_risk_levels = self.score_points(latest_values=latest_values[is_modelled_point],
+                                              q1=q1[latest_segment_ids], q3=q3[latest_segment_ids],
+                                              lowest_points=lowest_points[latest_segment_ids],
+                                              highest_points=highest_points[latest_segment_ids],
+                                              bin_counts=bin_counts[is_modelled_point])
+        numpy.maximum.at(risk_levels, latest_segment_ids, point_risk_levels)
+        anomalies_found = risk_levels > RiskLevel.none.value
+        all_point_risk_levels[is_modelled_point] = point_risk_levels
+
+        return anomalies_found, risk_levels, all_point_risk_levels
+
+    def score_points(self, latest_values: numpy.ndarray, q1: Union[float, numpy.ndarray],
+                     q3: Union[float, numpy.ndarray], lowest_points: Union[float, numpy.ndarray],
+                     highest_points: Union[float, numpy.ndarray], bin_counts: numpy.ndarray) -> numpy.ndarray:
+        """
+        Assigns a risk level to each latest point, in one numpy pass. The models can be the same for every point
+        (scalars) or one per point (arrays). For more info about the risk level:
+        'src.main.modeller.FrequencyTechnique.FrequencyTechnique.__detect_anomalies_in_numeric_attribute'.
+        :param latest_values: The points to investigate.
+        :type latest_values: numpy.ndarray
+        :param q1: The first quartile of the previous data.
+        :type q1: Union[float, numpy.ndarray]
+        :param q3: The third quartile of the previous data.
+        :type q3: Union[float, numpy.ndarray]
+        :param lowest_points: The lowest point of the previous data.
+        :type lowest_points: Union[float, numpy.ndarray]
+        :param highest_points: The highest point of the previous data.
+        :type highest_points: Union[float, numpy.ndarray]
+        :param bin_counts: The number of previous points in the bin of each point, -1 for the points outside the bins.
+        :type bin_counts: numpy.ndarray
+        :return: The risk level (as 'int') of each point, RiskLevel.none for the points that are not outliers.
+        :rtype: numpy.ndarray
+        """
+        iqr = q3 - q1
+        lower_outliers = q1 - (1.5 * iqr)
+        upper_outliers = q3 + (1.5 * iqr)
+        is_lower_outlier = latest_values < lower_outliers
+        is_upper_outlier = ~is_lower_outlier & (latest_values > upper_outliers)
+
+        point_risk_levels = numpy.where(is_lower_outlier, RiskLevel.medium.value, RiskLevel.high.value)
+        distance_to_lowest_points = latest_values - lowest_points
+        is_closer_to_lower_outlier = (lower_outliers > lowest_points) \
+            & (distance_to_lowest_points > 0) \
+            & ((lower_outliers - latest_values) < distance_to_lowest_points)
+        distance_to_highest_points = highest_points - latest_values
+        is_closer_to_upper_outlier = (upper_outliers < highest_points) \
+            & (distance_to_highest_points > 0) \
+            & ((latest_values - upper_outliers) < distance_to_highest_points)
+        point_risk_levels -= (is_lower_outlier & is_closer_to_lower_outlier) \
+            | (is_upper_outlier & is_closer_to_upper_outlier)
+        point_risk_levels -= (bin_counts >= 0) \
+            & (bin_counts > self.__min_count_non_anomalous) \
+            & (point_risk_levels > RiskLevel.low.value)
+
+        return numpy.where(is_lower_outlier | is_upper_outlier, point_risk_levels, RiskLevel.none.value)
+
+    @staticmethod
+    def __concatenate_segments(segments: List[List[Union[int, float]]]) -> \
+            Tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray]:
+        """
+        Concatenates the values of the segments.
+        :param segments: The values of each segment.
+        :type segments: List[List[Union[int, float]]]
+        :return: The concatenated values, the segment id of each value and the length of each segment.
+        :rtype: Tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray]
+        """
+        lengths = numpy.fromiter((len(segment) for segment in segments), dtype=int, count=len(segments))
+        values = numpy.fromiter(itertools.chain.from_iterable(segments), dtype=float, count=int(lengths.sum()))
+        segment_ids = numpy.repeat(numpy.arange(len(segments)), lengths)
+        return values, segment_ids, lengths
+
+    @staticmethod
+    def __get_segment_quantiles(sorted_values: numpy.ndarray, segment_starts: numpy.ndarray,
+                                segment_lengths: numpy.ndarray, quantile: float) -> numpy.ndarray:
+        """
+        Gets a quantile of each segment. It interpolates the same way 'numpy.percentile' does (linear method), so the
+        results are identical.
+        :param sorted_values: The sorted values of each segment, one after another.
+        :type sorted_values: numpy.ndarray
+        :param segment_starts: The index of the first value of each segment.
+        :type segment_starts: numpy.ndarray
+        :param segment_lengths: The number of values of each segment. They should be at least 1.
+        :type segment_lengths: numpy.ndarray
+        :param quantile: The quantile to get, between 0 and 1.
+        :type quantile: float
+        :return: The quantile of each segment.
+        :rtype: numpy.ndarray
+        """
+        virtual_indexes = (segment_lengths - 1) * quantile
+        previous_indexes = numpy.floor(virtual_indexes).astype(int)
+        next_indexes = numpy.minimum(previous_indexes + 1, segment_lengths - 1)
+        gammas = virtual_indexes - previous_indexes
+        last_index = len(sorted_values) - 1
+        previous_values = sorted_values[numpy.minimum(segment_starts + previous_indexes, last_index)]
+        next_values = sorted_values[numpy.minimum(segment_starts + next_indexes, last_index)]
+
+        differences = next_values - previous_values
+        return numpy.where(gammas >= 0.5, next_values - differences * (1 - gammas),
+                           previous_values + differences * gammas)
+
+    @staticmethod
+    def __get_segment_bins(q1: numpy.ndarray, q3: numpy.ndarray, lowest_points: numpy.ndarray,
+                           highest_points: numpy.ndarray, segment_lengths: numpy.ndarray) -> \
+            Tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray, numpy.ndarray]:
+        """
+        Gets the Freedman–Diaconis bins of each segment, the same way 'numpy.histogram' does.
+        :param q1: The first quartile of each segment.
+        :type q1: numpy.ndarray
+        :param q3: The third quartile of each segment.
+        :type q3: numpy.ndarray
+        :param lowest_points: The lowest value of each segment.
+        :type lowest_points: numpy.ndarray
+        :param highest_points: The highest value of each segment.
+        :type highest_points: numpy.ndarray
+        :param segment_lengths: The number of values of each segment.
+        :type segment_lengths: numpy.ndarray
+        :return: The first edge, last edge, number of bins and width of the bins of each segment.
+        :rtype: Tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray, numpy.ndarray]
+        """
+        is_constant = lowest_points == highest_points
+        first_edges = numpy.where(is_constant, lowest_points - 0.5, lowest_points)
+        last_edges = numpy.where(is_constant, highest_points + 0.5, highest_points)
+
+        # The power is computed by Python, like numpy.histogram does, so the widths are identical.
+        length_factors = numpy.asarray([length ** (-1.0 / 3.0) for length in segment_lengths.tolist()])
+        widths = 2.0 * (q3 - q1) * length_factors
+        has_width = widths != 0
+        bins_counts = numpy.ones(len(widths), dtype=int)
+        bins_counts[has_width] = numpy.ceil((last_edges[has_width] - first_edges[has_width]) / widths[has_width])
+        steps = (last_edges - first_edges) / bins_counts
+        return first_edges, last_edges, bins_counts, steps
+
+    @staticmethod
+    def __get_bin_edges(bin_indexes: numpy.ndarray, first_edges: numpy.ndarray, last_edges: numpy.ndarray,
+                        bins_counts: numpy.ndarray, steps: numpy.ndarray) -> numpy.ndarray:
+        """
+        Gets bin edges, computed the same way 'numpy.linspace' does.
+        :param bin_indexes: The index of each edge, from 0 to the number of bins.
+        :type bin_indexes: numpy.ndarray
+        :param first_edges: The first edge of the bins each edge belongs to.
+        :type first_edges: numpy.ndarray
+        :param last_edges: The last edge of the bins each edge belongs to.
+        :type last_edges: numpy.ndarray
+        :param bins_counts: The number of bins each edge belongs to.
+        :type bins_counts: numpy.ndarray
+        :param steps: The width of the bins each edge belongs to.
+        :type steps: numpy.ndarray
+        :return: The bin edges.
+        :rtype: numpy.ndarray
+        """
+        float_indexes = bin_indexes.astype(float)
+        edges = numpy.where(steps == 0, float_indexes / bins_counts * (last_edges - first_edges),
+                            float_indexes * steps) + first_edges
+        return numpy.where(bin_indexes == bins_counts, last_edges, edges)
+
+    @staticmethod
+    def __get_bin_counts_of_points_with_model(latest_values: numpy.ndarray,
+                                              attribute_model: NumericAttributeModel) -> numpy.ndarray:
+        """
+        Gets the number of modelled values in the bin each latest point belongs to. The bins include both edges and,
+        on a shared edge, the lower bin is used, like 'src.main.common.RangeKeyDict.RangeKeyDict' does.
+        :param latest_values: The latest points.
+        :type latest_values: numpy.ndarray
+        :param attribute_model: The fitted model with the bins.
+        :type attribute_model: NumericAttributeModel
+        :return: The bin count of each latest point, -1 for the points outside the bins.
+        :rtype: numpy.ndarray
+        """
+        bin_edges = numpy.asarray(attribute_model.get_bin_edges(), dtype=float)
+        model_bin_counts = numpy.asarray(attribute_model.get_bin_counts(), dtype=int)
+        bin_indexes = numpy.clip(numpy.searchsorted(bin_edges, latest_values, side="left") - 1, 0,
+                                 len(model_bin_counts) - 1)
+        is_in_range = (latest_values >= bin_edges[0]) & (latest_values <= bin_edges[-1])
+        return numpy.where(is_in_range, model_bin_counts[bin_indexes], -1)
+
+    @staticmethod
+    def __get_bin_counts_of_points(latest_values: numpy.ndarray, latest_segment_ids: numpy.ndarray,
+                                   sorted_values: numpy.ndarray, segment_starts: numpy.ndarray,
+                                   previous_segment_ids: numpy.ndarray, first_edges: numpy.ndarray,
+                                   last_edges: numpy.ndarray, bins_counts: numpy.ndarray, steps: numpy.ndarray) -> \
+            Tuple[numpy.ndarray, numpy.ndarray]:
+        """
+        Gets the number of previous values in the bin each latest point belongs to. The bins include both edges and,
+        on a shared edge, the lower bin is used, like 'src.main.common.RangeKeyDict.RangeKeyDict' does. The previous
+        values are counted like 'numpy.histogram' does: each bin is half-open except the last one.
+        :param latest_values: The latest points.
+        :type latest_values: numpy.ndarray
+        :param latest_segment_ids: The segment of each latest point.
+        :type latest_segment_ids: numpy.ndarray
+        :param sorted_values: The sorted previous values of each segment, one after another.
+        :type sorted_values: numpy.ndarray
+        :param segment_starts: The index of the first previous value of each segment.
+        :type segment_starts: numpy.ndarray
+        :param previous_segment_ids: The segment of each sorted previous value.
+        :type previous_segment_ids: numpy.ndarray
+        :param first_edges: The first bin edge of each segment.
+        :type first_edges: numpy.ndarray
+        :param last_edges: The last bin edge of each segment.
+        :type last_edges: numpy.ndarray
+        :param bins_counts: The number of bins of each segment.
+        :type bins_counts: numpy.ndarray
+        :param steps: The width of the bins of each segment.
+        :type steps: numpy.ndarray
+        :return: The bin count of each latest point and flags for the points that are inside the bins.
+        :rtype: Tuple[numpy.ndarray, numpy.ndarray]
+        """
+        point_first_edges = first_edges[latest_segment_ids]
+        point_last_edges = last_edges[latest_segment_ids]
+        point_bins_counts = bins_counts[latest_segment_ids]
+        point_steps = steps[latest_segment_ids]
+        is_in_range = (latest_values >= point_first_edges) & (latest_values <= point_last_edges)
+
+        def get_edges(indexes: numpy.ndarray) -> numpy.ndarray:
+            return FrequencyBatchEngine.__get_bin_edges(indexes, point_first_edges, point_last_edges,
+                                                        point_bins_counts, point_steps)
+
+        # Estimate the bin of each point, then correct the rounding errors against the actual edges.
+        with numpy.errstate(divide="ignore", invalid="ignore"):
+            estimated_bins = numpy.floor((latest_values - point_first_edges) / point_steps)
+        estimated_bins = numpy.nan_to_num(estimated_bins, nan=0, posinf=0, neginf=0)
+        bin_indexes = numpy.clip(estimated_bins, 0, point_bins_counts - 1).astype(int)
+        while True:
+            is_lower_bin = (bin_indexes > 0) & (latest_values <= get_edges(bin_indexes))
+            is_upper_bin = ~is_lower_bin & (bin_indexes < point_bins_counts - 1) \
+                & (latest_values > get_edges(bin_indexes + 1))
+            if not (is_lower_bin.any() or is_upper_bin.any()):
+                break
+            bin_indexes = bin_indexes - is_lower_bin + is_upper_bin
+
+        lower_edges = get_edges(bin_indexes)
+        upper_edges = get_edges(bin_indexes + 1)
+        is_last_bin = bin_indexes == point_bins_counts - 1
+
+        # Ranks of the edges among the previous values of their segment, found by sorting the edges together with the
+        # previous values. Edges sorted before equal values give 'lower than' ranks; after, 'lower or equal' ranks.
+        queries_count = len(latest_values)
+        values_count = len(sorted_values)
+        merged_segment_ids = numpy.concatenate((previous_segment_ids, latest_segment_ids, latest_segment_ids))
+        merged_values = numpy.concatenate((sorted_values, lower_edges, upper_edges))
+        merged_tie_breakers = numpy.concatenate((numpy.ones(values_count, dtype=int),
+                                                 numpy.zeros(queries_count, dtype=int),
+                                                 numpy.where(is_last_bin, 2, 0)))
+        merged_order = numpy.lexsort((merged_tie_breakers, merged_values, merged_segment_ids))
+        is_previous_value = merged_order < values_count
+        values_before = numpy.cumsum(is_previous_value) - is_previous_value
+        ranks = numpy.empty(len(merged_order), dtype=int)
+        ranks[merged_order] = values_before
+        ranks = ranks[values_count:] - numpy.tile(segment_starts[latest_segment_ids], 2)
+
+        bin_counts = ranks[queries_count:] - ranks[:queries_count]
+        return bin_counts, is_in_range
@@ -1,27 +1,43 @@
-from typing import List, Union, Tuple, Set
+import copy
+from typing import List, Union, Tuple, Set, Dict
 
 import numpy
 
 import wades_config
+from src.main.common.AppModelCache import AppModelCache
 from src.main.common.AppProfile import AppProfile
+from src.main.common.AppProfileBaseline import AppProfileBaseline
 from src.main.common.enum.AppProfileAttribute import AppProfileAttribute
 from src.main.common.AppSummary import AppSummary
+from src.main.common.MultivariateBaseline import MultivariateBaseline
+from src.main.common.NumericAttributeModel import NumericAttributeModel
+from src.main.common.PathMatcher import PathMatcher
+from src.main.common.QuantileSketch import QuantileSketch
 from src.main.common.RangeKeyDict import RangeKeyDict
 from src.main.common.enum.RiskLevel import RiskLevel
+from src.main.modeller.DetectionTechnique import DetectionTechnique
+from src.main.modeller.FrequencyBatchEngine import FrequencyBatchEngine
+from src.utils.BenchmarkingUtils import BenchmarkingUtils
 from src.utils.error_messages import anomaly_range_percent_not_in_range, expected_type_but_received_message
 
 
-class FrequencyTechnique:
+class FrequencyTechnique(DetectionTechnique):
 
-    def __init__(self, min_number_count_non_anomalous: int = 5) -> None:
+    def __init__(self, min_number_count_non_anomalous: int = 5,
+                 attribute_names: Union[Set[str], None] = None) -> None:
         """
         Initializes this class.
-        :raises TypeError if min_number_count_non_anomalous is not of type 'int'.
-        :raises ValueError if min_number_count_non_anomalous is less than 0.
+        :raises TypeError if min_number_count_non_anomalous is not of type 'int',
+                or if attribute_names is not of type 'Union[Set[str], None]'.
+        :raises ValueError if min_number_count_non_anomalous is less than 0,
+                or if an attribute name is not in 'DetectionTechnique.modelled_attribute_names'.
         :param min_number_count_non_anomalous: The minimum number of data points in the same bin as the 'anomalous'
             point so as to not consider it a high risk anomaly.
         :type min_number_count_non_anomalous: int
+        :param attribute_names: The attributes modelled by the technique. If None, all the modelled attributes.
+        :type attribute_names: Union[Set[str], None]
         """
+        super().__init__(attribute_names=attribute_names)
 
         if not isinstance(min_number_count_non_anomalous, int):
             raise TypeError(
@@ -72,13 +88,33 @@ class FrequencyTechnique:
             raise ValueError(anomaly_range_percent_not_in_range.format(0, new_value))
         self.__min_count_non_anomalous = new_value
 
+    def __get_numeric_attribute_names(self) -> List[str]:
+        """
+        Gets the numeric attributes modelled by the technique.
+        :return: The modelled numeric attributes, in the order of 'AppProfileBaseline.numeric_attribute_names'.
+        :rtype: List[str]
+        """
+        attribute_names = self.get_attribute_names()
+        return [attribute_name for attribute_name in AppProfileBaseline.numeric_attribute_names
+                if attribute_name in attribute_names]
+
     # Should be a callable technique
-    def __call__(self, data: List[AppProfile]) -> List[AppSummary]:
+    @BenchmarkingUtils.traced()
+    def __call__(self, data: List[AppProfile], model_caches: Union[Dict[str, AppModelCache], None] = None,
+                 update_model_caches: bool = True) -> List[AppSummary]:
         """
         Models the list of AppProfiles.
-        :raises TypeError if data is not of type List[AppProfile].
+        :raises TypeError if data is not of type List[AppProfile],
+                or if model_caches is not of type 'Dict[str, AppModelCache]'.
         :param data: The list of AppProfiles to model.
         :type data: List[AppProfile]
+        :param model_caches: The fitted models of the applications mapped by application name. If provided, the new
+                data is scored against the cached models, which are only refitted when needed. The caches are updated
+                in place, and a cache is added for each application that doesn't have one.
+        :type model_caches: Union[Dict[str, AppModelCache], None]
+        :param update_model_caches: If True, the scored samples are added to the model caches. If False, the caller
+                adds them once every technique has scored them.
+        :type update_model_caches: bool
         :return: A list of modelled AppProfiles in the form of AppSummary objects.
         :rtype: List[AppSummary]
         """
@@ -92,28 +128,118 @@ class FrequencyTechnique:
                 )
             )
 
+        if model_caches is not None and not isinstance(model_caches, dict):
+            raise TypeError(
+                expected_type_but_received_message.format(
+                    "model_caches",
+                    "Dict[str, AppModelCache]",
+                    model_caches
+                )
+            )
+
+        if wades_config.is_modelling and model_caches is not None:
+            return self.__frequency_modelling_apps_with_model_caches(data=data, model_caches=model_caches,
+                                                                     update_model_caches=update_model_caches)
+        if wades_config.is_modelling and wades_config.use_batch_modelling and not wades_config.use_quantile_sketches:
+            return self.__frequency_modelling_apps_batch(data=data)
+        return self.__frequency_modelling_apps(data=data)
+
+    def __frequency_modelling_apps_with_model_caches(self, data: List[AppProfile],
+                                                     model_caches: Dict[str, AppModelCache],
+                                                     update_model_caches: bool) -> List[AppSummary]:
+        """
+        Models the list of AppProfiles by scoring their new data against the fitted models of the applications.
+        :raises TypeError if one of the items of data is not of type 'AppProfile'.
+        :param data: The list of AppProfiles to model.
+        :type data: List[AppProfile]
+        :param model_caches: The fitted models of the applications mapped by application name. A cache is added for
+                each application that doesn't have one.
+        :type model_caches: Dict[str, AppModelCache]
+        :param update_model_caches: If True, the scored samples are added to the model caches.
+        :type update_model_caches: bool
+        :return: A list of modelled AppProfiles in the form of AppSummary objects.
+        :rtype: List[AppSummary]
+        """
+        apps_model_caches = list()
+        for app_profile in data:
+            if not isinstance(app_profile, AppProfile):
+                raise TypeError(expected_type_but_received_message.format("app_profile", "AppProfile",
+                                                                          app_profile))
+            app_name = app_profile.get_application_name()
+            if app_name not in model_caches:
+                model_caches[app_name] = AppModelCache(application_name=app_name)
+            apps_model_caches.append(model_caches[app_name])
+        apps_data = [self.__get_app_profile_data_with_model_cache(app_profile=app_profile, model_cache=model_cache)
+                     for app_profile, model_cache in zip(data, apps_model_caches)]
+        numeric_detection_results = self.__detect_anomalies_in_numeric_attributes_with_models(
+            apps_model_caches=apps_model_caches,
+            apps_unscored_data=[unscored_app_profile_data for _, unscored_app_profile_data in apps_data])
+        modelled_apps = list()
+        for app_profile, model_cache, app_data, numeric_detection_result in \
+                zip(data, apps_model_caches, apps_data, numeric_detection_results):
+            known_app_profile_data, unscored_app_profile_data = app_data
+            app_summary = self.__frequency_modelling_app(app_profile=app_profile,
+                                                         normalized_app_profile_data=known_app_profile_data,
+                                                         latest_app_profile_data=unscored_app_profile_data,
+                                                         numeric_detection_result=numeric_detection_result,
+                                                         model_cache=model_cache)
+            # The scored data is only added once it is scored.
+            if update_model_caches:
+                model_cache.add_new_samples(unscored_app_profile_data)
+            modelled_apps.append(app_summary)
+        return modelled_apps
+
+    def __frequency_modelling_apps_batch(self, data: List[AppProfile]) -> List[AppSummary]:
+        """
+        Models the list of AppProfiles, detecting the anomalies in the numeric attributes of all of them at once.
+        :param data: The list of AppProfiles to model.
+        :type data: List[AppProfile]
+        :return: A list of modelled AppProfiles in the form of AppSummary objects.
+        :rtype: List[AppSummary]
+        """
+        apps_data = [FrequencyTechnique.__get_app_profile_data(app_profile=app_profile) for app_profile in data]
+        numeric_detection_results = self.__detect_anomalies_in_numeric_attributes_batch(apps_data=apps_data)
         modelled_apps = list()
+        for app_profile, app_data, numeric_detection_result in zip(data, apps_data, numeric_detection_results):
+            normalized_app_profile_data, latest_app_profile_data = app_data
+            app_summary = self.__frequency_modelling_app(app_profile=app_profile,
+                                                         normalized_app_profile_data=normalized_app_profile_data,
+                                                         latest_app_profile_data=latest_app_profile_data,
+                                                         numeric_detection_result=numeric_detection_result)
+            modelled_apps.append(app_summary)
+        return modelled_apps
 
+    def __frequency_modelling_apps(self, data: List[AppProfile]) -> List[AppSummary]:
+        """
+        Models the list of AppProfiles one application at a time.
+        :param data: The list of AppProfiles to model.
+        :type data: List[AppProfile]
+        :return: A list of modelled AppProfiles in the form of AppSummary objects.
+        :rtype: List[AppSummary]
+        """
+        modelled_apps = list()
         for app_profile in data:
-            app_summary = self.__frequency_modelling_app(app_profile=app_profile)
+            normalized_app_profile_data, latest_app_profile_data = \
+                FrequencyTechnique.__get_app_profile_data(app_profile=app_profile)
+            app_summary = self.__frequency_modelling_app(app_profile=app_profile,
+                                                         normalized_app_profile_data=normalized_app_profile_data,
+                                                         latest_app_profile_data=latest_app_profile_data)
             modelled_apps.append(app_summary)
 
         return modelled_apps
 
-    def __frequency_modelling_app(self, app_profile: AppProfile) -> AppSummary:
+    @staticmethod
+    @BenchmarkingUtils.traced()
+    def __get_app_profile_data(app_profile: AppProfile) -> Tuple[dict, dict]:
         """
-        Create the frequency model for each attribute in AppProfile. The following attributes are modelled:
-        - __memory_usages
-        - __cpu_percent_usages
-        - __open_files
-        - __data_retrieval_timestamp
-        - __child_processes_count
-        - __users
+        Gets the data of an application profile that is modelled: the normalized data and the latest retrieved data.
+        The users and files of the samples evicted from the profile's sliding window are added to the normalized data.
         :raises TypeError if app_profile is not an instance of 'AppProfile'.
         :param app_profile: The application to model.
         :type app_profile: AppProfile
-        :return: the modelled application as an AppSummary instance.
-        :rtype: AppSummary
+        :return: The normalized data and the latest retrieved data of the application profile.
+                For more info about the format: 'src.main.common.AppProfile.AppProfile.get_previously_retrieved_data'
+        :rtype: Tuple[dict, dict]
         """
         if not isinstance(app_profile, AppProfile):
             raise TypeError(
@@ -124,49 +250,330 @@ class FrequencyTechnique:
                 )
             )
 
-        numeric_attribute_names = {AppProfileAttribute.memory_infos.name, AppProfileAttribute.cpu_percents.name,
-                                   AppProfileAttribute.children_counts.name, AppProfileAttribute.threads_numbers.name,
-                                   AppProfileAttribute.connections_numbers.name}
+        normalized_app_profile_data = app_profile.get_previously_retrieved_data()
+        latest_app_profile_data = app_profile.get_latest_retrieved_data()
+
+        # Users and files seen in samples evicted from the sliding window are still known behaviour.
+        if app_profile.get_evicted_samples_count() > 0 and len(normalized_app_profile_data) > 0:
+            baseline = app_profile.get_baseline()
+            normalized_app_profile_data[AppProfileAttribute.usernames.name].extend(baseline.get_users())
+            normalized_app_profile_data[AppProfileAttribute.opened_files.name].append(
+                list(baseline.get_opened_files()))
+
+        return normalized_app_profile_data, latest_app_profile_data
+
+    @BenchmarkingUtils.traced()
+    def __frequency_modelling_app(self, app_profile: AppProfile, normalized_app_profile_data: Union[dict, None],
+                                  latest_app_profile_data: dict,
+                                  numeric_detection_result: Union[
+                                      Tuple[bool, RiskLevel, Set[str], Dict[str, numpy.ndarray]], None] = None,
+                                  model_cache: Union[AppModelCache, None] = None) -> AppSummary:
+        """
+        Create the frequency model for each attribute in AppProfile. The following attributes are modelled:
+        - __memory_usages
+        - __cpu_percent_usages
+        - __open_files
+        - __data_retrieval_timestamp
+        - __child_processes_count
+        - __users
+        :param app_profile: The application to model.
+        :type app_profile: AppProfile
+        :param normalized_app_profile_data: The normalized data of the application. With a model cache, it is only read
+                to build a multivariate baseline that the cache doesn't have, and can be None otherwise. For more info
+                about the format: 'src.main.common.AppProfile.AppProfile.get_previously_retrieved_data'
+        :type normalized_app_profile_data: Union[dict, None]
+        :param latest_app_profile_data: The latest retrieved data of the application. For more info about the format:
+                'src.main.common.AppProfile.AppProfile.get_latest_retrieved_data'
+        :type latest_app_profile_data: dict
+        :param numeric_detection_result: The result of the anomaly detection in the numeric attributes, if it was
+                already computed for many applications at once. For more info about the format:
+                '__detect_anomalies_in_numeric_attributes'.
+        :type numeric_detection_result: Union[Tuple[bool, RiskLevel, Set[str], Dict[str, numpy.ndarray]], None]
+        :param model_cache: The fitted models of the application. If provided, its known users and opened files, and its
+                multivariate baseline, are used instead of the ones in normalized_app_profile_data.
+        :type model_cache: Union[AppModelCache, None]
+        :return: the modelled application as an AppSummary instance.
+        :rtype: AppSummary
+        """
+        numeric_attribute_names = set(self.__get_numeric_attribute_names())
         error_message = None
         max_risk_level = RiskLevel.none
         anomalous_attrs = set()
-
-        normalized_app_profile_data = app_profile.get_previously_retrieved_data()
-        latest_app_profile_data = app_profile.get_latest_retrieved_data()
+        anomalous_points_count = 0
+        worst_point = None
 
         if wades_config.is_modelling:
 
             # Numeric data
-            is_anomalous_numeric, numeric_max_risk_level, anomalous_attrs = \
-                self.__detect_anomalies_in_numeric_attributes(normal_app_profile_data=normalized_app_profile_data,
-                                                              latest_app_profile_data=latest_app_profile_data,
-                                                              numeric_attribute_names=numeric_attribute_names)
+            if numeric_detection_result is None:
+                quantile_sketches = None
+                if wades_config.use_quantile_sketches:
+                    # The profile may be shared with the ingestion stage, so the pending data is folded into a copy.
+                    app_profile_copy = copy.copy(app_profile)
+                    app_profile_copy.update_quantile_sketches()
+                    quantile_sketches = app_profile_copy.get_quantile_sketches()
+
+                numeric_detection_result = self.__detect_anomalies_in_numeric_attributes(
+                    normal_app_profile_data=normalized_app_profile_data,
+                    latest_app_profile_data=latest_app_profile_data,
+                    numeric_attribute_names=numeric_attribute_names,
+                    quantile_sketches=quantile_sketches)
+            is_anomalous_numeric, numeric_max_risk_level, anomalous_attrs, point_risk_levels = numeric_detection_result
+            anomalous_points_count, worst_point = DetectionTechnique.get_anomalous_points_summary(
+                latest_app_profile_data=latest_app_profile_data, point_risk_levels=point_risk_levels)
             # Non-numeric data
             is_anomalous_non_numeric, non_numeric_max_risk_level, non_numeric_anomalous_attrs = \
                 FrequencyTechnique.__detect_anomalies_in_non_numeric_attributes(
                     normalized_app_profile_data=normalized_app_profile_data,
-                    latest_app_profile_data=latest_app_profile_data)
+                    latest_app_profile_data=latest_app_profile_data, model_cache=model_cache,
+                    attribute_names=self.get_attribute_names())
+
+            # Numeric data, as one vector per sample
+            is_anomalous_joint, joint_max_risk_level = False, RiskLevel.none
+            if wades_config.use_multivariate_scoring and \
+                    DetectionTechnique.joint_numeric_attribute_name in self.get_attribute_names():
+                is_anomalous_joint, joint_max_risk_level = \
+                    FrequencyTechnique.__detect_joint_anomalies_in_numeric_attributes(
+                        normalized_app_profile_data=normalized_app_profile_data,
+                        latest_app_profile_data=latest_app_profile_data, model_cache=model_cache)
+                if is_anomalous_joint:
+                    anomalous_attrs.add(DetectionTechnique.joint_numeric_attribute_name)
 
             # Prepare data to convert it into an AppSummary object.
-            max_risk_level = max(numeric_max_risk_level, non_numeric_max_risk_level)
+            max_risk_level = max(numeric_max_risk_level, non_numeric_max_risk_level, joint_max_risk_level)
             anomalous_attrs.update(non_numeric_anomalous_attrs)
 
-            if is_anomalous_non_numeric or is_anomalous_numeric:
+            if is_anomalous_non_numeric or is_anomalous_numeric or is_anomalous_joint:
                 error_message = wades_config.anomaly_detected_message
         app_summary = AppSummary(app_name=app_profile.get_application_name(),
                                  error_message=error_message,
                                  risk=max_risk_level,
                                  abnormal_attrs=anomalous_attrs,
                                  latest_retrieved_app_details=latest_app_profile_data,
-                                 modelled_app_details=latest_app_profile_data)
+                                 modelled_app_details=latest_app_profile_data,
+                                 anomalous_points_count=anomalous_points_count,
+                                 worst_point=worst_point)
         return app_summary
 
+    @staticmethod
+    def __detect_joint_anomalies_in_numeric_attributes(normalized_app_profile_data: Union[dict, None],
+                                                       latest_app_profile_data: dict,
+                                                       model_cache: Union[AppModelCache, None] = None) \
+            -> Tuple[bool, RiskLevel]:
+        """
+        Detects anomalies in the numeric attributes of an application taken together. The latest samples of the
+        application are scored, in one matrix operation, by their Mahalanobis distance to the mean and covariance of
+        the normalized samples. Samples further than wades_config.multivariate_distance_threshold are medium risk, and
+        high risk beyond twice the threshold.
+        :param normalized_app_profile_data: The normalized data of the application. With a model cache, it is only
+                read if the cache has no multivariate baseline, because it has never been built or the numeric models
+                were refitted, and can be None otherwise. All of its samples are merged into the new baseline. For more
+                info about the format: 'src.main.common.AppProfile.AppProfile.get_previously_retrieved_data'
+        :type normalized_app_profile_data: Union[dict, None]
+        :param latest_app_profile_data: The latest retrieved data of the application. For more info about the format:
+                'src.main.common.AppProfile.AppProfile.get_latest_retrieved_data'
+        :type latest_app_profile_data: dict
+        :param model_cache: The fitted models of the application. If provided, the mean and covariance are kept in it
+                and updated with the new samples, leaving the anomalous ones out until the baseline is rebuilt with the
+                numeric models. Otherwise, they are computed from all the normalized samples.
+        :type model_cache: Union[AppModelCache, None]
+        :return: Flag for if an anomaly has been found, and the max risk level found.
+        :rtype: Tuple[bool, RiskLevel]
+        """
+        multivariate_baseline = model_cache.get_multivariate_baseline() if model_cache is not None else None
+        if multivariate_baseline is None:
+            multivariate_baseline = MultivariateBaseline(attribute_names=AppProfileBaseline.numeric_attribute_names)
+        maximum_distance = wades_config.multivariate_distance_threshold if model_cache is not None else None
+        # Like the numeric models, a rebuilt baseline is fitted to all the samples, so a lasting change of behaviour
+        # that was left out as anomalous becomes part of it.
+        if normalized_app_profile_data is not None:
+            multivariate_baseline.add_samples(normalized_app_profile_data,
+                                              minimum_samples_count=wades_config.minimum_retrieval_size_for_modelling)
+        distances = multivariate_baseline.get_distances(
+            latest_app_profile_data, minimum_samples_count=wades_config.minimum_retrieval_size_for_modelling)
+        if model_cache is not None:
+            multivariate_baseline.add_samples(latest_app_profile_data,
+                                              minimum_samples_count=wades_config.minimum_retrieval_size_for_modelling,
+                                              maximum_distance=maximum_distance)
+            model_cache.set_multivariate_baseline(multivariate_baseline)
+
+        # NaN distances, for samples that can't be scored yet, are not anomalous.
+        max_distance = numpy.nanmax(distances, initial=0.0)
+        if max_distance >= 2 * wades_config.multivariate_distance_threshold:
+            return True, RiskLevel.high
+        if max_distance >= wades_config.multivariate_distance_threshold:
+            return True, RiskLevel.medium
+        return False, RiskLevel.none
+
+    @BenchmarkingUtils.traced()
+    def __get_app_profile_data_with_model_cache(self, app_profile: AppProfile,
+                                                model_cache: AppModelCache) -> Tuple[Union[dict, None], dict]:
+        """
+        Gets the data of an application that is scored against its cached models. Every sample retrieved since the
+        application was last modelled is scored, so the spikes and the new users and opened files of the cycles where
+        it was skipped are not missed. The models are refitted first if they are stale or drifting, with the samples
+        already in the cache, which are only read again when they are needed.
+        :param app_profile: The application to model.
+        :type app_profile: AppProfile
+        :param model_cache: The fitted models of the application.
+        :type model_cache: AppModelCache
+        :return: The samples already in the cache, None if they were not needed, and the samples to score.
+                For more info about the format: 'src.main.common.AppProfile.AppProfile.get_previously_retrieved_data'
+        :rtype: Tuple[Union[dict, None], dict]
+        """
+        unscored_app_profile_data = DetectionTechnique.get_unscored_data(app_profile=app_profile,
+                                                                         model_cache=model_cache)
+        known_app_profile_data = None
+        if model_cache.is_refit_needed():
+            known_app_profile_data = FrequencyTechnique.__get_known_data(app_profile=app_profile,
+                                                                         model_cache=model_cache)
+            model_cache.fit(known_app_profile_data)
+        # The samples already in the cache are only read again to build a missing multivariate baseline.
+        if known_app_profile_data is None and wades_config.use_multivariate_scoring and \
+                DetectionTechnique.joint_numeric_attribute_name in self.get_attribute_names() and \
+                model_cache.get_multivariate_baseline() is None:
+            known_app_profile_data = FrequencyTechnique.__get_known_data(app_profile=app_profile,
+                                                                         model_cache=model_cache)
+        return known_app_profile_data, unscored_app_profile_data
+
+    @BenchmarkingUtils.traced()
+    def __detect_anomalies_in_numeric_attributes_with_models(self, apps_model_caches: List[AppModelCache],
+                                                             apps_unscored_data: List[dict]) -> \
+            List[Tuple[bool, RiskLevel, Set[str], Dict[str, numpy.ndarray]]]:
+        """
+        Detects the anomalies for all numeric attributes of many applications against their cached models. If
+        wades_config.use_batch_modelling is True, they are all scored with a single
+        'src.main.modeller.FrequencyBatchEngine.FrequencyBatchEngine' pass, with the same results.
+        :param apps_model_caches: The fitted models of each application.
+        :type apps_model_caches: List[AppModelCache]
+        :param apps_unscored_data: The data to score of each application. For more info about the format:
+                'src.main.common.AppProfile.AppProfile.get_latest_retrieved_data'
+        :type apps_unscored_data: List[dict]
+        :return: The results of the anomaly detection for all numeric attributes of each application.
+                For more info about the format: '__detect_anomalies_in_numeric_attributes'
+        :rtype: List[Tuple[bool, RiskLevel, Set[str], Dict[str, numpy.ndarray]]]
+        """
+        numeric_attribute_names = self.__get_numeric_attribute_names()
+        if wades_config.use_batch_modelling:
+            attribute_models = list()
+            latest_segments = list()
+            for model_cache, unscored_app_profile_data in zip(apps_model_caches, apps_unscored_data):
+                for numeric_attribute_name in numeric_attribute_names:
+                    attribute_models.append(model_cache.get_numeric_model(numeric_attribute_name))
+                    latest_segments.append(unscored_app_profile_data.get(numeric_attribute_name, list()))
+            batch_engine = FrequencyBatchEngine(min_number_count_non_anomalous=self.__min_count_non_anomalous)
+            return FrequencyTechnique.__get_numeric_detection_results(
+                batch_engine.detect_anomalies_with_models(attribute_models=attribute_models,
+                                                          latest_segments=latest_segments),
+                latest_segments=latest_segments, numeric_attribute_names=numeric_attribute_names,
+                apps_count=len(apps_model_caches))
+
+        numeric_detection_results = list()
+        for model_cache, unscored_app_profile_data in zip(apps_model_caches, apps_unscored_data):
+            risk_levels = set()
+            anomalous_attrs = set()
+            point_risk_levels = dict()
+            for numeric_attribute_name in numeric_attribute_names:
+                anomaly_found, risk_level, point_risk_levels[numeric_attribute_name] = \
+                    self.__detect_anomalies_in_numeric_attribute_with_model(
+                        attribute_model=model_cache.get_numeric_model(numeric_attribute_name),
+                        latest_attribute_data=unscored_app_profile_data.get(numeric_attribute_name, list()))
+                risk_levels.add(risk_level)
+                if anomaly_found:
+                    anomalous_attrs.add(numeric_attribute_name)
+            numeric_detection_results.append((len(anomalous_attrs) > 0, max(risk_levels, default=RiskLevel.none),
+                                              anomalous_attrs, point_risk_levels))
+        return numeric_detection_results
+
+    @staticmethod
+    def __get_known_data(app_profile: AppProfile, model_cache: AppModelCache) -> dict:
+        """
+        Gets the samples of an application that were already added to its model cache and are still in its profile.
+        :param app_profile: The application to model.
+        :type app_profile: AppProfile
+        :param model_cache: The fitted models of the application.
+        :type model_cache: AppModelCache
+        :return: The known samples, an empty dictionary if the cache has never seen a sample. For more info about the
+                format: 'src.main.common.AppProfile.AppProfile.get_previously_retrieved_data'
+        :rtype: dict
+        """
+        if model_cache.get_last_seen_timestamp() is None:
+            return dict()
+        return app_profile.get_retrieved_data(until_timestamp=model_cache.get_last_seen_timestamp())
+
+    @BenchmarkingUtils.traced()
+    def __detect_anomalies_in_numeric_attributes_batch(self, apps_data: List[Tuple[dict, dict]]) -> \
+            List[Tuple[bool, RiskLevel, Set[str], Dict[str, numpy.ndarray]]]:
+        """
+        Detects the anomalies for all numeric attributes of many applications at once, with a single
+        'src.main.modeller.FrequencyBatchEngine.FrequencyBatchEngine' pass. The results are the same as calling
+        '__detect_anomalies_in_numeric_attributes' for each application.
+        :param apps_data: The normalized data and the latest retrieved data of each application.
+                For more info about the format: '__get_app_profile_data'
+        :type apps_data: List[Tuple[dict, dict]]
+        :return: The results of the anomaly detection for all numeric attributes of each application.
+                For more info about the format: '__detect_anomalies_in_numeric_attributes'
+        :rtype: List[Tuple[bool, RiskLevel, Set[str], Dict[str, numpy.ndarray]]]
+        """
+        numeric_attribute_names = self.__get_numeric_attribute_names()
+        previous_segments = list()
+        latest_segments = list()
+        for normalized_app_profile_data, latest_app_profile_data in apps_data:
+            for numeric_attribute_name in numeric_attribute_names:
+                previous_segments.append(normalized_app_profile_data[numeric_attribute_name])
+                latest_segments.append(latest_app_profile_data[numeric_attribute_name])
+
+        batch_engine = FrequencyBatchEngine(min_number_count_non_anomalous=self.__min_count_non_anomalous)
+        return FrequencyTechnique.__get_numeric_detection_results(
+            batch_engine.detect_anomalies(previous_segments=previous_segments, latest_segments=latest_segments),
+            latest_segments=latest_segments, numeric_attribute_names=numeric_attribute_names, apps_count=len(apps_data))
+
+    @staticmethod
+    def __get_numeric_detection_results(batch_detection_result: Tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray],
+                                        latest_segments: List[List[Union[int, float]]],
+                                        numeric_attribute_names: List[str], apps_count: int) -> \
+            List[Tuple[bool, RiskLevel, Set[str], Dict[str, numpy.ndarray]]]:
+        """
+        Splits the result of a 'src.main.modeller.FrequencyBatchEngine.FrequencyBatchEngine' pass into the result of
+        each application. The segments are the numeric attributes of each application, one application after another.
+        :param batch_detection_result: The result of the batch engine. For more info about the format:
+                'src.main.modeller.FrequencyBatchEngine.FrequencyBatchEngine.detect_anomalies'
+        :type batch_detection_result: Tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray]
+        :param latest_segments: The investigated values of each segment.
+        :type latest_segments: List[List[Union[int, float]]]
+        :param numeric_attribute_names: The numeric attributes of each application, in the order of the segments.
+        :type numeric_attribute_names: List[str]
+        :param apps_count: The number of applications.
+        :type apps_count: int
+        :return: The results of the anomaly detection for all numeric attributes of each application.
+                For more info about the format: '__detect_anomalies_in_numeric_attributes'
+        :rtype: List[Tuple[bool, RiskLevel, Set[str], Dict[str, numpy.ndarray]]]
+        """
+        anomalies_found, risk_levels, all_point_risk_levels = batch_detection_result
+        latest_segments_ends = numpy.cumsum([len(latest_segment) for latest_segment in latest_segments])
+        segments_point_risk_levels = numpy.split(all_point_risk_levels, latest_segments_ends[:-1])
+
+        numeric_detection_results = list()
+        attributes_count = len(numeric_attribute_names)
+        for app_index in range(apps_count):
+            app_segments = slice(app_index * attributes_count, (app_index + 1) * attributes_count)
+            anomalous_attrs = {attribute_name for attribute_name, anomaly_found
+                               in zip(numeric_attribute_names, anomalies_found[app_segments]) if anomaly_found}
+            max_risk_level = RiskLevel(int(risk_levels[app_segments].max(initial=RiskLevel.none.value)))
+            point_risk_levels = dict(zip(numeric_attribute_names, segments_point_risk_levels[app_segments]))
+            numeric_detection_results.append((len(anomalous_attrs) > 0, max_risk_level, anomalous_attrs,
+                                              point_risk_levels))
+        return numeric_detection_results
+
     def __detect_anomalies_in_numeric_attributes(self, normal_app_profile_data: dict, latest_app_profile_data: dict,
-                                                 numeric_attribute_names: Set[str]) -> Tuple[bool, RiskLevel, Set[str]]:
+                                                 numeric_attribute_names: Set[str],
+                                                 quantile_sketches: Union[Dict[str, QuantileSketch], None] = None) \
+            -> Tuple[bool, RiskLevel, Set[str], Dict[str, numpy.ndarray]]:
         """
         Detects the anomalies for all numeric attributes.
         :raises TypeError if normal_app_profile_data or latest_app_profile_data are not of type 'dict',
-                or if numeric_attribute_names is not of type 'Set[str]'.
+                or if numeric_attribute_names is not of type 'Set[str]',
+                or if quantile_sketches is not of type 'Dict[str, QuantileSketch]'.
         :param normal_app_profile_data: The normalized application profile data as a dictionary.
                 For more info about the format: 'src.main.common.AppProfile.AppProfile.get_previously_retrieved_data'
         :type normal_app_profile_data: dict
@@ -175,9 +582,12 @@ class FrequencyTechnique:
         :type latest_app_profile_data: dict
         :param numeric_attribute_names: The numeric attribute names.
         :type numeric_attribute_names: numeric_attribute_names: Set[str]
+        :param quantile_sketches: The quantile sketches of the normalized data mapped by attribute name. If provided,
+                they are used instead of normal_app_profile_data to model the numeric attributes.
+        :type quantile_sketches: Union[Dict[str, QuantileSketch], None]
         :return: A tuple with the values of the anomaly detection for all numeric attributes along with the maximum
-                risk level found.
-        :rtype: Tuple[bool, RiskLevel, Set[str]]
+                risk level found and the risk level of each latest point, mapped by attribute name.
+        :rtype: Tuple[bool, RiskLevel, Set[str], Dict[str, numpy.ndarray]]
         """
 
         # Input Validation
@@ -208,43 +618,71 @@ class FrequencyTechnique:
                 )
             )
 
+        if quantile_sketches is not None and not isinstance(quantile_sketches, dict):
+            raise TypeError(
+                expected_type_but_received_message.format(
+                    "quantile_sketches",
+                    "Dict[str, QuantileSketch]",
+                    quantile_sketches
+                )
+            )
+
         risk_levels = set()
         anomalous_attrs = set()
+        point_risk_levels = dict()
         for numeric_attribute_name in numeric_attribute_names:
-            normal_attribute_values = normal_app_profile_data[numeric_attribute_name]
             latest_attribute_values = latest_app_profile_data[numeric_attribute_name]
 
-            anomaly_found, risk_level = self.__detect_anomalies_in_numeric_attribute(
-                previous_attribute_data=normal_attribute_values, latest_attribute_data=latest_attribute_values)
+            if quantile_sketches is not None:
+                anomaly_found, risk_level, point_risk_levels[numeric_attribute_name] = \
+                    self.__detect_anomalies_in_numeric_attribute_with_sketch(
+                        attribute_sketch=quantile_sketches.get(numeric_attribute_name, QuantileSketch()),
+                        latest_attribute_data=latest_attribute_values)
+            else:
+                normal_attribute_values = normal_app_profile_data[numeric_attribute_name]
+                anomaly_found, risk_level, point_risk_levels[numeric_attribute_name] = \
+                    self.__detect_anomalies_in_numeric_attribute(previous_attribute_data=normal_attribute_values,
+                                                                 latest_attribute_data=latest_attribute_values)
             risk_levels.add(risk_level)
             if anomaly_found:
                 anomalous_attrs.add(numeric_attribute_name)
 
         anomaly = len(anomalous_attrs) > 0
-        max_risk_level = max(risk_levels)
+        max_risk_level = max(risk_levels, default=RiskLevel.none)
 
-        return anomaly, max_risk_level, anomalous_attrs
+        return anomaly, max_risk_level, anomalous_attrs, point_risk_levels
 
     @staticmethod
-    def __detect_anomalies_in_non_numeric_attributes(normalized_app_profile_data: dict,
-                                                     latest_app_profile_data: dict) \
+    @BenchmarkingUtils.traced()
+    def __detect_anomalies_in_non_numeric_attributes(normalized_app_profile_data: Union[dict, None],
+                                                     latest_app_profile_data: dict,
+                                                     model_cache: Union[AppModelCache, None] = None,
+                                                     attribute_names: Union[Set[str], None] = None) \
             -> Tuple[bool, RiskLevel, Set[str]]:
         """
         Detects anomalies in non numeric attributes. Currently it only checks 'users' and 'opened_files' attributes.
-        :raises TypeError if normalized_app_profile_data or latest_app_profile_data are not of type 'dict'.
-        :param normalized_app_profile_data: The normalized application profile data as a dictionary.
-                For more info about the format: 'src.main.common.AppProfile.AppProfile.get_previously_retrieved_data'
-        :type normalized_app_profile_data: dict
+        :raises TypeError if normalized_app_profile_data is not of type 'dict' and there is no model cache,
+                or if latest_app_profile_data is not of type 'dict'.
+        :param normalized_app_profile_data: The normalized application profile data as a dictionary. It is not read if
+                model_cache is provided. For more info about the format:
+                'src.main.common.AppProfile.AppProfile.get_previously_retrieved_data'
+        :type normalized_app_profile_data: Union[dict, None]
         :param latest_app_profile_data: The latest application profile data as a dictionary.
                 For more info about the format: 'src.main.common.AppProfile.AppProfile.get_latest_retrieved_data'
         :type latest_app_profile_data: dict
+        :param model_cache: The fitted models of the application. If provided, its known users and opened files are
+                used instead of the ones in normalized_app_profile_data.
+        :type model_cache: Union[AppModelCache, None]
+        :param attribute_names: The modelled attributes. Anomalies in other attributes are not reported. If None, all
+                the non-numeric attributes are modelled.
+        :type attribute_names: Union[Set[str], None]
         :return: A tuple with the values of the anomaly detection for all non-numeric attributes along with
                 the max risk level found.
         :rtype: Tuple[bool, RiskLevel, Set[str]]
         """
 
         # Input Validation
-        if not isinstance(normalized_app_profile_data, dict):
+        if model_cache is None and not isinstance(normalized_app_profile_data, dict):
             raise TypeError(
                 expected_type_but_received_message.format(
                     "normalized_app_profile_data",
@@ -262,36 +700,57 @@ class FrequencyTechnique:
                 )
             )
 
-        normalized_users = normalized_app_profile_data[AppProfileAttribute.usernames.name]
         last_retrieved_users = latest_app_profile_data[AppProfileAttribute.usernames.name]
-
-        is_user_attr_anomalous, user_attr_risk_level, anomalous_users = \
-            FrequencyTechnique.__detect_anomalies_in_non_numeric_attribute_with_whitelisting(
-                normalized_attribute_data=normalized_users, last_retrieved_attribute_data=last_retrieved_users)
-        non_numeric_anomalous_attrs = {AppProfileAttribute.usernames.name} if is_user_attr_anomalous else set()
-
-        # Get opened files info and parse it into appropriate format
-        normalized_files = normalized_app_profile_data[AppProfileAttribute.opened_files.name]
-        normalized_files_flat = list()
-        for files in normalized_files:
-            normalized_files_flat.extend(files)
-
         last_retrieved_files = latest_app_profile_data[AppProfileAttribute.opened_files.name]
         last_retrieved_files_flat = list()
         for files in last_retrieved_files:
             last_retrieved_files_flat.extend(files)
 
-        is_files_anomalous_whitelist, files_whitelist_risk_level, anomalous_file_whitelist = \
-            FrequencyTechnique.__detect_anomalies_in_non_numeric_attribute_with_whitelisting(
-                normalized_attribute_data=normalized_files_flat,
-                last_retrieved_attribute_data=last_retrieved_files_flat)
-
-        is_files_anomalous_blacklist, files_blacklist_risk_level, anomalous_file_blacklist = \
-            FrequencyTechnique.__detect_anomalies_in_non_numeric_attribute_with_blacklisting(
-                normalized_attribute_data=normalized_files_flat,
-                last_retrieved_attribute_data=last_retrieved_files_flat,
-                blacklisted_values=wades_config.prohibited_files)
+        if model_cache is not None:
+            is_user_attr_anomalous, user_attr_risk_level, anomalous_users = \
+                FrequencyTechnique.__detect_anomalies_in_non_numeric_attribute_with_known_values(
+                    unknown_values=model_cache.get_unknown_users(last_retrieved_users),
+                    observations_count=model_cache.get_known_users_observations_count())
+            is_files_anomalous_whitelist, files_whitelist_risk_level, anomalous_file_whitelist = \
+                FrequencyTechnique.__detect_anomalies_in_non_numeric_attribute_with_known_values(
+                    unknown_values=model_cache.get_unknown_files(last_retrieved_files_flat),
+                    observations_count=model_cache.get_known_files_observations_count())
+            # Prohibited files that are known behaviour are not anomalous.
+            is_files_anomalous_blacklist, files_blacklist_risk_level, anomalous_file_blacklist = \
+                FrequencyTechnique.__detect_anomalies_in_non_numeric_attribute_with_blacklisting(
+                    normalized_attribute_data=list(model_cache.get_accessed_prohibited_files()),
+                    last_retrieved_attribute_data=last_retrieved_files_flat,
+                    blacklisted_values=PathMatcher.get_compiled_matcher(wades_config.prohibited_files))
+        else:
+            normalized_users = normalized_app_profile_data[AppProfileAttribute.usernames.name]
+            is_user_attr_anomalous, user_attr_risk_level, anomalous_users = \
+                FrequencyTechnique.__detect_anomalies_in_non_numeric_attribute_with_whitelisting(
+                    normalized_attribute_data=normalized_users, last_retrieved_attribute_data=last_retrieved_users)
+
+            # Get opened files info and parse it into appropriate format
+            normalized_files = normalized_app_profile_data[AppProfileAttribute.opened_files.name]
+            normalized_files_flat = list()
+            for files in normalized_files:
+                normalized_files_flat.extend(files)
+
+            is_files_anomalous_whitelist, files_whitelist_risk_level, anomalous_file_whitelist = \
+                FrequencyTechnique.__detect_anomalies_in_non_numeric_attribute_with_whitelisting(
+                    normalized_attribute_data=normalized_files_flat,
+                    last_retrieved_attribute_data=last_retrieved_files_flat)
+
+            is_files_anomalous_blacklist, files_blacklist_risk_level, anomalous_file_blacklist = \
+                FrequencyTechnique.__detect_anomalies_in_non_numeric_attribute_with_blacklisting(
+                    normalized_attribute_data=normalized_files_flat,
+                    last_retrieved_attribute_data=last_retrieved_files_flat,
+                    blacklisted_values=PathMatcher.get_compiled_matcher(wades_config.prohibited_files))
+
+        if attribute_names is not None and AppProfileAttribute.usernames.name not in attribute_names:
+            is_user_attr_anomalous, user_attr_risk_level = False, RiskLevel.none
+        if attribute_names is not None and AppProfileAttribute.opened_files.name not in attribute_names:
+            is_files_anomalous_whitelist, files_whitelist_risk_level = False, RiskLevel.none
+            is_files_anomalous_blacklist, files_blacklist_risk_level = False, RiskLevel.none
 
+        non_numeric_anomalous_attrs = {AppProfileAttribute.usernames.name} if is_user_attr_anomalous else set()
         if is_files_anomalous_blacklist or is_files_anomalous_whitelist:
             non_numeric_anomalous_attrs.add(AppProfileAttribute.opened_files.name)
 
@@ -320,8 +779,46 @@ class FrequencyTechnique:
                 )
             )
 
-        frequency_model = RangeKeyDict()
         data_count_in_bins, raw_bin_edges = numpy.histogram(data, bins='fd')
+        return FrequencyTechnique.__build_range_key_dict(data_count_in_bins, raw_bin_edges)
+
+    @staticmethod
+    def __build_dict_frequency_from_sketch(sketch: QuantileSketch) -> RangeKeyDict:
+        """
+        Creates the frequency model as a dictionary from a quantile sketch. It uses Freedman–Diaconis rule, computing
+        the bin edges the same way 'numpy.histogram' does, and approximates the bin counts from the sketch.
+        :param sketch: The quantile sketch of the data to model.
+        :type sketch: QuantileSketch
+        :return: The frequency model as a dictionary.
+        :rtype Dict[range, int]
+        """
+        if sketch.get_count() == 0:
+            return RangeKeyDict()
+
+        q1, q3 = sketch.get_quantiles([0.25, 0.75])
+        first_edge = sketch.get_min()
+        last_edge = sketch.get_max()
+        if first_edge == last_edge:
+            first_edge -= 0.5
+            last_edge += 0.5
+        bin_width = 2.0 * (q3 - q1) * sketch.get_count() ** (-1.0 / 3.0)
+        bins_count = int(numpy.ceil((last_edge - first_edge) / bin_width)) if bin_width else 1
+        raw_bin_edges = numpy.linspace(first_edge, last_edge, bins_count + 1)
+
+        return FrequencyTechnique.__build_range_key_dict(sketch.get_bin_counts(raw_bin_edges), raw_bin_edges)
+
+    @staticmethod
+    def __build_range_key_dict(data_count_in_bins: numpy.ndarray, raw_bin_edges: numpy.ndarray) -> RangeKeyDict:
+        """
+        Creates the frequency model as a dictionary from the bin counts and edges of an histogram.
+        :param data_count_in_bins: The number of data points in each bin.
+        :type data_count_in_bins: numpy.ndarray
+        :param raw_bin_edges: The edges of the bins. It has one more item than data_count_in_bins.
+        :type raw_bin_edges: numpy.ndarray
+        :return: The frequency model as a dictionary.
+        :rtype Dict[range, int]
+        """
+        frequency_model = RangeKeyDict()
         if len(raw_bin_edges) == 0:
             return frequency_model
         initial_range = raw_bin_edges[0]
@@ -337,7 +834,7 @@ class FrequencyTechnique:
     # noinspection DuplicatedCode
     def __detect_anomalies_in_numeric_attribute(self, previous_attribute_data: List[Union[int, float]],
                                                 latest_attribute_data: List[Union[int, float]]) -> \
-            Tuple[bool, RiskLevel]:
+            Tuple[bool, RiskLevel, numpy.ndarray]:
         """
         Detect anomalies in numeric data and then assigns it a risk level.
         The risk level assigned depends on the following criteria:
@@ -348,14 +845,15 @@ class FrequencyTechnique:
             a specified number of points (min_count_non_anomalous), its risk level lowers
             by 1 (unless it is in the low category).
         * Only if there are no anomalies found, the risk_level assigned is none.
+        Every new data point is scored, and the highest risk level is the risk level of the attribute.
         :raises TypeError if previous_attribute_data or latest_attribute_data are not of type 'List[Union[int, float]]'.
         :param previous_attribute_data: The numeric data used to create the normalized model.
         :type previous_attribute_data: List[Union[int, float]]
         :param latest_attribute_data: The numeric data to investigate.
         :type latest_attribute_data: List[Union[int, float]]
-        :return: A tuple with the values of the anomaly detection along with the risk level
-            associated to the anomaly found.
-        :rtype: Tuple[bool, RiskLevel]
+        :return: A tuple with the values of the anomaly detection along with the highest risk level found and the
+            risk level (as 'int') of each new data point.
+        :rtype: Tuple[bool, RiskLevel, numpy.ndarray]
         """
 
         # Input Validation
@@ -377,55 +875,140 @@ class FrequencyTechnique:
                 )
             )
         if len(previous_attribute_data) < wades_config.minimum_retrieval_size_for_modelling:
-            return False, RiskLevel.none
+            return False, RiskLevel.none, numpy.full(len(latest_attribute_data), RiskLevel.none.value, dtype=int)
         attribute_model = FrequencyTechnique.__build_dict_frequency(data=previous_attribute_data)
 
         q1, q3 = numpy.percentile(previous_attribute_data, [25, 75])
-        iqr = q3 - q1
-
-        lower_outlier = q1 - (1.5 * iqr)
-        upper_outlier = q3 + (1.5 * iqr)
         lowest_point = min(previous_attribute_data)
         highest_point = max(previous_attribute_data)
 
-        for new_point in latest_attribute_data:
-            bin_count = attribute_model[new_point]
-            if new_point < lower_outlier:
-
-                risk_level = RiskLevel.medium
-                distance_to_lowest_point = new_point - lowest_point
-                distance_to_outlier = lower_outlier - new_point
-                # If distance_to_lowest point is negative, the new point is lesser than the recorded lowest point.
-                if lower_outlier > lowest_point \
-                        and distance_to_lowest_point > 0 \
-                        and distance_to_outlier < distance_to_lowest_point:
-                    risk_level -= 1
-
-                if bin_count is not None \
-                        and bin_count > self.__min_count_non_anomalous \
-                        and risk_level > risk_level.low:
-                    risk_level -= 1
-                return True, risk_level
-
-            elif new_point > upper_outlier:
-                risk_level = RiskLevel.high
-                distance_to_highest_point = highest_point - new_point
-                distance_to_outlier = new_point - upper_outlier
-                # If the distance_to_highest_point is negative, the new point is greater than the recorded highest point
-                if upper_outlier < highest_point \
-                        and distance_to_highest_point > 0 \
-                        and distance_to_outlier < distance_to_highest_point:
-
-                    risk_level -= 1
-
-                if bin_count is not None \
-                        and bin_count > self.__min_count_non_anomalous \
-                        and risk_level > risk_level.low:
-                    risk_level -= 1
-
-                return True, risk_level
+        return self.__score_numeric_attribute(attribute_model=attribute_model, q1=q1, q3=q3,
+                                              lowest_point=lowest_point, highest_point=highest_point,
+                                              latest_attribute_data=latest_attribute_data)
 
-        return False, RiskLevel.none
+    def __detect_anomalies_in_numeric_attribute_with_sketch(self, attribute_sketch: QuantileSketch,
+                                                            latest_attribute_data: List[Union[int, float]]) -> \
+            Tuple[bool, RiskLevel, numpy.ndarray]:
+        """
+        Detect anomalies in numeric data using a quantile sketch of the previous data, and then assigns it a risk
+        level. The quartiles, extremes and bin counts are read from the sketch, so the cost doesn't depend on the
+        length of the history. For more info about the risk level: '__detect_anomalies_in_numeric_attribute'.
+        :raises TypeError if attribute_sketch is not of type 'QuantileSketch',
+                or if latest_attribute_data is not of type 'List[Union[int, float]]'.
+        :param attribute_sketch: The quantile sketch of the data used to create the normalized model.
+        :type attribute_sketch: QuantileSketch
+        :param latest_attribute_data: The numeric data to investigate.
+        :type latest_attribute_data: List[Union[int, float]]
+        :return: A tuple with the values of the anomaly detection along with the highest risk level found and the
+            risk level (as 'int') of each new data point.
+        :rtype: Tuple[bool, RiskLevel, numpy.ndarray]
+        """
+        if not isinstance(attribute_sketch, QuantileSketch):
+            raise TypeError(
+                expected_type_but_received_message.format(
+                    "attribute_sketch",
+                    "QuantileSketch",
+                    attribute_sketch
+                )
+            )
+
+        if not isinstance(latest_attribute_data, list):
+            raise TypeError(
+                expected_type_but_received_message.format(
+                    "latest_attribute_data",
+                    "List[Union[int, float]]",
+                    latest_attribute_data
+                )
+            )
+        if attribute_sketch.get_count() < wades_config.minimum_retrieval_size_for_modelling:
+            return False, RiskLevel.none, numpy.full(len(latest_attribute_data), RiskLevel.none.value, dtype=int)
+        attribute_model = FrequencyTechnique.__build_dict_frequency_from_sketch(sketch=attribute_sketch)
+        q1, q3 = attribute_sketch.get_quantiles([0.25, 0.75])
+
+        return self.__score_numeric_attribute(attribute_model=attribute_model, q1=q1, q3=q3,
+                                              lowest_point=attribute_sketch.get_min(),
+                                              highest_point=attribute_sketch.get_max(),
+                                              latest_attribute_data=latest_attribute_data)
+
+    def __detect_anomalies_in_numeric_attribute_with_model(self,
+                                                           attribute_model: Union[NumericAttributeModel, None],
+                                                           latest_attribute_data: List[Union[int, float]]) -> \
+            Tuple[bool, RiskLevel, numpy.ndarray]:
+        """
+        Detect anomalies in numeric data using a fitted model of the previous data, and then assigns it a risk level.
+        For more info about the risk level: '__detect_anomalies_in_numeric_attribute'.
+        :raises TypeError if attribute_model is not of type 'NumericAttributeModel',
+                or if latest_attribute_data is not of type 'List[Union[int, float]]'.
+        :param attribute_model: The fitted model of the previous data.
+        :type attribute_model: Union[NumericAttributeModel, None]
+        :param latest_attribute_data: The numeric data to investigate.
+        :type latest_attribute_data: List[Union[int, float]]
+        :return: A tuple with the values of the anomaly detection along with the highest risk level found and the
+            risk level (as 'int') of each new data point.
+        :rtype: Tuple[bool, RiskLevel, numpy.ndarray]
+        """
+        if attribute_model is not None and not isinstance(attribute_model, NumericAttributeModel):
+            raise TypeError(
+                expected_type_but_received_message.format(
+                    "attribute_model",
+                    "NumericAttributeModel",
+                    attribute_model
+                )
+            )
+
+        if not isinstance(latest_attribute_data, list):
+            raise TypeError(
+                expected_type_but_received_message.format(
+                    "latest_attribute_data",
+                    "List[Union[int, float]]",
+                    latest_attribute_data
+                )
+            )
+        if attribute_model is None or \
+                attribute_model.get_fitted_samples_count() < wades_config.minimum_retrieval_size_for_modelling:
+            return False, RiskLevel.none, numpy.full(len(latest_attribute_data), RiskLevel.none.value, dtype=int)
+        frequency_model = FrequencyTechnique.__build_range_key_dict(
+            data_count_in_bins=numpy.asarray(attribute_model.get_bin_counts()),
+            raw_bin_edges=numpy.asarray(attribute_model.get_bin_edges()))
+        q1, q3 = attribute_model.get_quartiles()
+
+        return self.__score_numeric_attribute(attribute_model=frequency_model, q1=q1, q3=q3,
+                                              lowest_point=attribute_model.get_lowest_point(),
+                                              highest_point=attribute_model.get_highest_point(),
+                                              latest_attribute_data=latest_attribute_data)
+
+    def __score_numeric_attribute(self, attribute_model: RangeKeyDict, q1: float, q3: float,
+                                  lowest_point: Union[int, float], highest_point: Union[int, float],
+                                  latest_attribute_data: List[Union[int, float]]) -> \
+            Tuple[bool, RiskLevel, numpy.ndarray]:
+        """
+        Scores the new data points against a fitted model. For more info about the risk level:
+        '__detect_anomalies_in_numeric_attribute'.
+        :param attribute_model: The frequency model of the previous data.
+        :type attribute_model: RangeKeyDict
+        :param q1: The first quartile of the previous data.
+        :type q1: float
+        :param q3: The third quartile of the previous data.
+        :type q3: float
+        :param lowest_point: The lowest point of the previous data.
+        :type lowest_point: Union[int, float]
+        :param highest_point: The highest point of the previous data.
+        :type highest_point: Union[int, float]
+        :param latest_attribute_data: The numeric data to investigate.
+        :type latest_attribute_data: List[Union[int, float]]
+        :return: A tuple with the values of the anomaly detection along with the highest risk level found and the
+            risk level (as 'int') of each new data point.
+        :rtype: Tuple[bool, RiskLevel, numpy.ndarray]
+        """
+        bin_counts = numpy.asarray([bin_count if bin_count is not None else -1
+                                    for bin_count in attribute_model.get_values(latest_attribute_data)], dtype=int)
+        batch_engine = FrequencyBatchEngine(min_number_count_non_anomalous=self.__min_count_non_anomalous)
+        point_risk_levels = batch_engine.score_points(latest_values=numpy.asarray(latest_attribute_data, dtype=float),
+                                                      q1=q1, q3=q3, lowest_points=lowest_point,
+                                                      highest_points=highest_point, bin_counts=bin_counts)
+        max_risk_level = RiskLevel(int(point_risk_levels.max(initial=RiskLevel.none.value)))
+
+        return max_risk_level > RiskLevel.none, max_risk_level, point_risk_levels
 
     @staticmethod
     def __detect_anomalies_in_non_numeric_attribute_with_whitelisting(normalized_attribute_data: List[str],
@@ -480,21 +1063,45 @@ class FrequencyTechnique:
 
         return anomaly_found, risk_level, new_data_accessed
 
+    @staticmethod
+    def __detect_anomalies_in_non_numeric_attribute_with_known_values(unknown_values: Set[str],
+                                                                      observations_count: int) -> \
+            Tuple[bool, RiskLevel, Set[str]]:
+        """
+        Detects anomalies by using a whitelist of known values. It is the same as
+        '__detect_anomalies_in_non_numeric_attribute_with_whitelisting' but the latest retrieved values have already
+        been checked against the known values, so the normalized data doesn't need to be read.
+        :param unknown_values: The latest retrieved values that are not known.
+        :type unknown_values: Set[str]
+        :param observations_count: The number of known values seen, with repetitions.
+        :type observations_count: int
+        :return: The results of the anomaly detection through whitelisting. For more info about the format:
+                '__detect_anomalies_in_non_numeric_attribute_with_whitelisting'
+        :rtype: Tuple[bool, RiskLevel, Set[str]]
+        """
+        # when there is not enough data
+        if observations_count < wades_config.minimum_retrieval_size_for_modelling:
+            return False, RiskLevel.none, set()
+
+        if len(unknown_values) > 0:
+            return True, RiskLevel.medium, unknown_values
+        return False, RiskLevel.none, unknown_values
+
     @staticmethod
     def __detect_anomalies_in_non_numeric_attribute_with_blacklisting(normalized_attribute_data: List[str],
                                                                       last_retrieved_attribute_data: List[str],
-                                                                      blacklisted_values: Set[str]) \
+                                                                      blacklisted_values: PathMatcher) \
             -> Tuple[bool, RiskLevel, Set[str]]:
         """
         Detects anomalies by using blacklisting approach.
         :raises TypeError if normalized_attribute_data or last_retrieved_attribute_data are not of type 'List[str]',
-                or if blacklisted_values is not of type 'Set[str]'
+                or if blacklisted_values is not of type 'PathMatcher'
         :param normalized_attribute_data: The normalized attribute data.
         :type normalized_attribute_data: List[str]
         :param last_retrieved_attribute_data: The latest retrieved data.
         :type last_retrieved_attribute_data: List[str]
-        :param blacklisted_values: The blacklisted values.
-        :type blacklisted_values: Set[str]
+        :param blacklisted_values: The compiled patterns of the blacklisted values.
+        :type blacklisted_values: PathMatcher
         :return: The results of the anomaly detection through whitelisting.
             If a blacklisted value has been accessed before, it is not considered an anomaly if it is accessed again.
             The result is in the following format:
@@ -516,11 +1123,11 @@ class FrequencyTechnique:
                 )
             )
 
-        if not isinstance(blacklisted_values, set):
+        if not isinstance(blacklisted_values, PathMatcher):
             raise TypeError(
                 expected_type_but_received_message.format(
                     "blacklisted_values",
-                    "Set[str]",
+                    "PathMatcher",
                     blacklisted_values
                 )
             )
@@ -536,13 +1143,11 @@ class FrequencyTechnique:
         anomaly_found = False
         risk_level = RiskLevel.none
 
-        normalized_attribute_data_set = set(normalized_attribute_data)
-        previously_accessed_blacklisted_values = normalized_attribute_data_set.intersection(blacklisted_values)
-        # Get the blacklisted data that haven't been accessed before.
-        not_previously_accessed_blacklisted_values = \
-            blacklisted_values.difference(previously_accessed_blacklisted_values)
-        recently_accessed_blacklisted_values = not_previously_accessed_blacklisted_values.intersection(
-            last_retrieved_attribute_data)
+        # The latest data is checked first, since the normalized data is only needed when a blacklisted value is found.
+        recently_accessed_blacklisted_values = blacklisted_values.get_matching_paths(last_retrieved_attribute_data)
+        if len(recently_accessed_blacklisted_values) > 0:
+            # Get the blacklisted data that haven't been accessed before.
+            recently_accessed_blacklisted_values.difference_update(normalized_attribute_data)
         if len(recently_accessed_blacklisted_values) > 0:
             anomaly_found = True
             risk_level = RiskLevel.high
@@ -1,39 +1,309 @@
 import copy
 import json
 import logging
-from typing import List
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Union, Dict, Tuple, FrozenSet, Set
 
+import wades_config
+from src.main.common.AppModelCache import AppModelCache
 from src.main.common.AppProfile import AppProfile
 from src.main.common.AppSummary import AppSummary
+from src.main.common.MetricsRegistry import MetricsRegistry
+from src.main.common.enum.AppSummaryAttribute import AppSummaryAttribute
 from src.main.common.enum.RiskLevel import RiskLevel
-from src.main.modeller.FrequencyTechnique import FrequencyTechnique
+from src.main.modeller.DetectionTechnique import DetectionTechnique
+from src.main.modeller.ModellingScheduler import ModellingScheduler
+from src.main.modeller.TechniqueRegistry import TechniqueRegistry
+from src.main.psHandler.AppProfileCache import AppProfileCache
 from src.main.psHandler.AppProfileDataManager import AppProfileDataManager
 from src.main.psHandler.ProcessHandler import ProcessHandler
+from src.main.server.VersionedResponse import VersionedResponse
+from src.utils.BenchmarkingUtils import BenchmarkingUtils
+from src.utils.error_messages import expected_type_but_received_message
 
 
 class Modeller:
 
-    def __init__(self, logger_name: str = "Modeller") -> None:
+    def __init__(self, logger_name: str = "Modeller", app_profile_cache: Union[AppProfileCache, None] = None,
+                 metrics_registry: Union[MetricsRegistry, None] = None) -> None:
         """
         Abstracts the daemon that models the collected process information.
+        :raises TypeError if app_profile_cache is not of type 'Union[AppProfileCache, None]',
+                or if metrics_registry is not of type 'Union[MetricsRegistry, None]'.
         :param logger_name: The name of the logger.
         :type logger_name: str
+        :param app_profile_cache: The in-memory application profiles, shared with the process handler. If None, the
+                profiles are loaded from disk.
+        :type app_profile_cache: Union[AppProfileCache, None]
+        :param metrics_registry: The registry of the modelling durations and of the profiles loaded. If None, they are
+                not measured.
+        :type metrics_registry: Union[MetricsRegistry, None]
         """
+        if app_profile_cache is not None and not isinstance(app_profile_cache, AppProfileCache):
+            raise TypeError(expected_type_but_received_message.format("app_profile_cache",
+                                                                      "Union[AppProfileCache, None]",
+                                                                      app_profile_cache))
+        if metrics_registry is not None and not isinstance(metrics_registry, MetricsRegistry):
+            raise TypeError(expected_type_but_received_message.format("metrics_registry",
+                                                                      "Union[MetricsRegistry, None]",
+                                                                      metrics_registry))
         self.__logger_name = logger_name
+        self.__app_profile_cache = app_profile_cache
+        self.__metrics_registry = metrics_registry
         self.__modelled_applications = list()  # Doesn't store non-running applications.
+        self.__modelled_applications_response = VersionedResponse(json.dumps(list()))
+        self.__abnormal_applications_response = VersionedResponse(json.dumps(list()))
+        self.__scheduler = ModellingScheduler()
+        self.__latest_cycle_timing = None
+        self.__executor = None
+        self.__executor_workers_count = 0
 
     @staticmethod
-    def model_application_profiles(application_profiles: List[AppProfile]) -> List[AppSummary]:
+    def model_application_profiles(application_profiles: List[AppProfile],
+                                   model_caches: Union[Dict[str, AppModelCache], None] = None,
+                                   metrics_registry: Union[MetricsRegistry, None] = None) -> List[AppSummary]:
         """
-        Create the frequency model for a list of AppProfiles. This is the main method of this class.
+        Create the model for a list of AppProfiles. This is the main method of this class.
+        Each attribute of each application is modelled by the technique selected in wades_config (detection_technique,
+        app_detection_techniques and attribute_detection_techniques). The applications that use the same techniques
+        for the same attributes are modelled together, and the summaries of the techniques of an application are
+        merged.
         :param application_profiles: the application profiles to model.
         :type application_profiles: List[AppProfile]
+        :param model_caches: The fitted models of the applications mapped by application name. They are updated in
+            place. For more info: 'src.main.modeller.FrequencyTechnique.FrequencyTechnique.__call__'. The new samples
+            are only added once every technique has scored them, so that no technique scores them against a cache
+            that already knows them.
+        :type model_caches: Union[Dict[str, AppModelCache], None]
+        :param metrics_registry: The registry where the time spent by each technique is added, to the
+            modelling_technique_duration_seconds histogram of the technique. If None, it is not measured.
+        :type metrics_registry: Union[MetricsRegistry, None]
         :return: the model of the provided application profiles.
         :rtype List[AppSummary]
         """
-        frequency_technique = FrequencyTechnique()
+        technique_groups: Dict[Tuple[str, FrozenSet[str]], List[int]] = dict()
+        for app_index, app_profile in enumerate(application_profiles):
+            technique_attribute_names = dict()
+            for attribute_name in DetectionTechnique.modelled_attribute_names:
+                technique_name = TechniqueRegistry.get_technique_name_of_attribute(
+                    app_name=app_profile.get_application_name(), attribute_name=attribute_name,
+                    app_techniques=wades_config.app_detection_techniques,
+                    attribute_techniques=wades_config.attribute_detection_techniques,
+                    default_technique_name=wades_config.detection_technique)
+                technique_attribute_names.setdefault(technique_name, set()).add(attribute_name)
+            for technique_name, attribute_names in technique_attribute_names.items():
+                technique_groups.setdefault((technique_name, frozenset(attribute_names)), list()).append(app_index)
 
-        return frequency_technique(application_profiles)
+        app_summaries: List[Union[AppSummary, None]] = [None] * len(application_profiles)
+        for (technique_name, attribute_names), app_indexes in technique_groups.items():
+            start_time = time.perf_counter()
+            technique = TechniqueRegistry.create_technique(technique_name, attribute_names=set(attribute_names))
+            group_app_summaries = technique([application_profiles[app_index] for app_index in app_indexes],
+                                            model_caches=model_caches, update_model_caches=False)
+            if metrics_registry is not None:
+                metrics_registry.observe("modelling_technique_duration_seconds", time.perf_counter() - start_time,
+                                         {"technique": technique_name})
+            for app_index, app_summary in zip(app_indexes, group_app_summaries):
+                app_summaries[app_index] = app_summary if app_summaries[app_index] is None \
+                    else Modeller.__merge_app_summaries(app_summaries[app_index], app_summary)
+
+        if model_caches is not None and wades_config.is_modelling:
+            for app_profile in application_profiles:
+                app_name = app_profile.get_application_name()
+                if app_name not in model_caches:
+                    model_caches[app_name] = AppModelCache(application_name=app_name)
+                model_caches[app_name].add_new_samples(
+                    DetectionTechnique.get_unscored_data(app_profile=app_profile, model_cache=model_caches[app_name]))
+        return app_summaries
+
+    def __schedule_applications(self, modelled_apps: List[AppSummary], app_names: List[str],
+                                modelled_app_names: List[str]) -> List[AppSummary]:
+        """
+        Updates the modelling scheduler with the applications modelled in this cycle, and completes their summaries
+        with the last summaries of the applications that were skipped.
+        :param modelled_apps: The summaries of the applications modelled in this cycle.
+        :type modelled_apps: List[AppSummary]
+        :param app_names: The names of all the applications that could be modelled, sorted.
+        :type app_names: List[str]
+        :param modelled_app_names: The names of the applications that were due in this cycle.
+        :type modelled_app_names: List[str]
+        :return: The summaries of the modelled and skipped applications, in the order of app_names.
+        :rtype: List[AppSummary]
+        """
+        self.__scheduler.update(modelled_apps)
+        app_summaries = {app_summary.get_app_name(): app_summary for app_summary in modelled_apps}
+        # The due applications without a summary were not recently retrieved.
+        for app_name in set(modelled_app_names).difference(app_summaries.keys()):
+            self.__scheduler.remove(app_name)
+
+        skipped_app_names = set(app_names).difference(modelled_app_names)
+        for app_summary in self.__modelled_applications:
+            if app_summary.get_app_name() in skipped_app_names:
+                app_summaries[app_summary.get_app_name()] = app_summary
+        return [app_summaries[app_name] for app_name in app_names if app_name in app_summaries]
+
+    @staticmethod
+    def __merge_app_summaries(first_app_summary: AppSummary, second_app_summary: AppSummary) -> AppSummary:
+        """
+        Merges the summaries of an application made by two techniques that model different attributes.
+        :param first_app_summary: The summary made by the first technique.
+        :type first_app_summary: AppSummary
+        :param second_app_summary: The summary made by the second technique.
+        :type second_app_summary: AppSummary
+        :return: The merged summary, with the highest risk level and all the anomalous attributes.
+        :rtype: AppSummary
+        """
+        first_worst_point = first_app_summary.get_worst_point()
+        second_worst_point = second_app_summary.get_worst_point()
+        worst_point = first_worst_point
+        if second_worst_point is not None and \
+                (first_worst_point is None or second_worst_point["risk"] > first_worst_point["risk"]):
+            worst_point = second_worst_point
+        error_message = first_app_summary.get_error_message()
+        if error_message is None:
+            error_message = second_app_summary.get_error_message()
+        abnormal_attrs = first_app_summary.get_abnormal_attrs()
+        abnormal_attrs.update(second_app_summary.get_abnormal_attrs())
+
+        return AppSummary(app_name=first_app_summary.get_app_name(), error_message=error_message,
+                          risk=max(first_app_summary.get_risk_level(), second_app_summary.get_risk_level()),
+                          abnormal_attrs=abnormal_attrs,
+                          latest_retrieved_app_details=first_app_summary.get_latest_retrieved_app_details(),
+                          modelled_app_details=first_app_summary.get_modelled_app_details(),
+                          anomalous_points_count=max(first_app_summary.get_anomalous_points_count(),
+                                                     second_app_summary.get_anomalous_points_count()),
+                          worst_point=worst_point)
+
+    @staticmethod
+    def __get_running_application_profiles(app_profile_names: List[str],
+                                           app_profile_cache: Union[AppProfileCache, None] = None,
+                                           metrics_registry: Union[MetricsRegistry, None] = None) -> List[AppProfile]:
+        """
+        Gets the saved application profiles that were recently retrieved.
+        :param app_profile_names: The names of the saved application profiles.
+        :type app_profile_names: List[str]
+        :param app_profile_cache: The in-memory application profiles. If None, the profiles are loaded from disk.
+        :type app_profile_cache: Union[AppProfileCache, None]
+        :param metrics_registry: The registry of the profiles loaded from disk, the ones found in app_profile_cache
+                are not counted. If None, they are not counted.
+        :type metrics_registry: Union[MetricsRegistry, None]
+        :return: The recently retrieved application profiles, in the order of app_profile_names.
+        :rtype: List[AppProfile]
+        """
+        running_app_profiles = list()
+        loaded_app_profiles_count = 0
+        for app_profile_name in app_profile_names:
+            if app_profile_cache is None or not app_profile_cache.is_cached(app_profile_name):
+                loaded_app_profiles_count += 1
+            app_profile = app_profile_cache.get(app_profile_name) if app_profile_cache is not None \
+                else AppProfileDataManager.get_saved_profile(app_profile_name)
+            if ProcessHandler.is_application_recently_retrieved(app_profile):
+                running_app_profiles.append(app_profile)
+        if metrics_registry is not None:
+            metrics_registry.increment("app_profiles_loaded_total", loaded_app_profiles_count)
+        return running_app_profiles
+
+    @staticmethod
+    def __get_saved_model_caches(application_profiles: List[AppProfile], logger_name: str = "Modeller") \
+            -> Union[Dict[str, AppModelCache], None]:
+        """
+        Loads the saved fitted models of the applications, if wades_config.use_model_cache is True.
+        The fitted models that can't be read are logged and left out, so the application is fitted again and its
+        fitted models are saved over the unreadable ones.
+        :param application_profiles: The application profiles to model.
+        :type application_profiles: List[AppProfile]
+        :param logger_name: The name of the logger of the unreadable fitted models.
+        :type logger_name: str
+        :return: The saved fitted models mapped by application name, None if wades_config.use_model_cache is False.
+        :rtype: Union[Dict[str, AppModelCache], None]
+        """
+        if not wades_config.use_model_cache:
+            return None
+        model_caches = dict()
+        for app_profile in application_profiles:
+            try:
+                model_cache = AppProfileDataManager.get_saved_model_cache(app_profile.get_application_name())
+            except ValueError as error:
+                logging.getLogger(logger_name).warning("{} They will be fitted again.".format(error))
+                continue
+            if model_cache is not None:
+                model_caches[app_profile.get_application_name()] = model_cache
+        return model_caches
+
+    @staticmethod
+    def model_saved_application_profiles(app_profile_names: List[str],
+                                         app_profile_cache: Union[AppProfileCache, None] = None,
+                                         metrics_registry: Union[MetricsRegistry, None] = None,
+                                         logger_name: str = "Modeller") -> List[AppSummary]:
+        """
+        Loads the saved application profiles and models the ones that were recently retrieved.
+        If wades_config.use_model_cache is True, their fitted models are loaded and saved back.
+        :param app_profile_names: The names of the saved application profiles.
+        :type app_profile_names: List[str]
+        :param app_profile_cache: The in-memory application profiles. If None, the profiles are loaded from disk.
+        :type app_profile_cache: Union[AppProfileCache, None]
+        :param metrics_registry: The registry of the profiles loaded from disk, the ones found in app_profile_cache
+                are not counted, and of the time spent by each technique. If None, they are not measured.
+        :type metrics_registry: Union[MetricsRegistry, None]
+        :param logger_name: The name of the logger of the fitted models that can't be read.
+        :type logger_name: str
+        :return: The model of the recently retrieved application profiles, in the order of app_profile_names.
+        :rtype: List[AppSummary]
+        """
+        running_app_profiles = Modeller.__get_running_application_profiles(
+            app_profile_names, app_profile_cache=app_profile_cache, metrics_registry=metrics_registry)
+        model_caches = Modeller.__get_saved_model_caches(running_app_profiles, logger_name=logger_name)
+
+        # All the running applications are modelled together, so their numeric attributes are modelled in one pass.
+        modelled_apps = Modeller.model_application_profiles(running_app_profiles, model_caches=model_caches,
+                                                            metrics_registry=metrics_registry)
+        if model_caches is not None:
+            for model_cache in model_caches.values():
+                AppProfileDataManager.save_model_cache(model_cache)
+        return modelled_apps
+
+    @staticmethod
+    def model_application_profiles_chunk(application_profiles: List[AppProfile],
+                                         model_caches: Union[Dict[str, AppModelCache], None] = None) -> \
+            Tuple[List[AppSummary], Union[Dict[str, AppModelCache], None]]:
+        """
+        Models a chunk of application profiles in a modelling worker. The profiles and their fitted models are sent by
+        the modelling process, so the worker doesn't read the saved data, and the updated models are sent back.
+        :param application_profiles: The application profiles to model.
+        :type application_profiles: List[AppProfile]
+        :param model_caches: The fitted models of the applications mapped by application name.
+        :type model_caches: Union[Dict[str, AppModelCache], None]
+        :return: The model of the application profiles, in their order, and the updated fitted models.
+        :rtype: Tuple[List[AppSummary], Union[Dict[str, AppModelCache], None]]
+        """
+        return Modeller.model_application_profiles(application_profiles, model_caches=model_caches), model_caches
+
+    def __get_executor(self) -> ProcessPoolExecutor:
+        """
+        Gets the pool of modelling workers. It is created on first use and kept for the next cycles, with
+        wades_config.modelling_workers_count workers. The workers are started by a fork server, or spawned where it
+        isn't available, so they never inherit the threads and locks of the daemon.
+        :return: The pool of modelling workers.
+        :rtype: ProcessPoolExecutor
+        """
+        if self.__executor is None or self.__executor_workers_count != wades_config.modelling_workers_count:
+            self.shutdown()
+            start_method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+            self.__executor = ProcessPoolExecutor(max_workers=wades_config.modelling_workers_count,
+                                                  mp_context=multiprocessing.get_context(start_method))
+            self.__executor_workers_count = wades_config.modelling_workers_count
+        return self.__executor
+
+    def shutdown(self) -> None:
+        """
+        Stops the pool of modelling workers, if it was started.
+        """
+        if self.__executor is not None:
+            self.__executor.shutdown(wait=True)
+            self.__executor = None
+            self.__executor_workers_count = 0
 
     def get_modelled_applications(self) -> List[AppSummary]:
         """
@@ -64,27 +334,195 @@ class Modeller:
         :return: The modelled apps as a json object.
         :rtype: str
         """
-        modelled_apps_dict = [str(modelled_app) for modelled_app in self.__modelled_applications]
-        return json.dumps(modelled_apps_dict)
+        return str(self.__modelled_applications_response)
+
+    def get_modelled_applications_response(self) -> VersionedResponse:
+        """
+        Gets the modelled apps as a response for the connected clients. It is encoded once per modelling cycle, and
+        served as is until the next one.
+        :return: The modelled apps as a json object. For more info about the format:
+                'get_modelled_application_as_json()'.
+        :rtype: VersionedResponse
+        """
+        return self.__modelled_applications_response
+
+    def get_abnormal_applications_response(self) -> VersionedResponse:
+        """
+        Gets the abnormal apps as a response for the connected clients. It is encoded once per modelling cycle, and
+        served as is until the next one.
+        :return: The abnormal apps as a json object, in the format of 'get_modelled_application_as_json()'.
+        :rtype: VersionedResponse
+        """
+        return self.__abnormal_applications_response
+
+    def __set_modelled_applications(self, modelled_applications: List[AppSummary]) -> None:
+        """
+        Replaces the modelled apps, and encodes them for the connected clients. Each application is converted to
+        json once, for both responses.
+        :param modelled_applications: The modelled apps.
+        :type modelled_applications: List[AppSummary]
+        """
+        modelled_apps_json = [str(modelled_app) for modelled_app in modelled_applications]
+        abnormal_apps_json = [modelled_app_json for modelled_app, modelled_app_json
+                              in zip(modelled_applications, modelled_apps_json)
+                              if modelled_app.get_risk_level() is not RiskLevel.none]
+        # Each attribute is replaced as a whole, so the clients never see a list or a response being built.
+        self.__modelled_applications = modelled_applications
+        self.__modelled_applications_response = VersionedResponse(json.dumps(modelled_apps_json))
+        self.__abnormal_applications_response = VersionedResponse(json.dumps(abnormal_apps_json))
 
-    def model_running_applications(self) -> None:
+    def get_scheduler(self) -> ModellingScheduler:
+        """
+        Gets the scheduler that decides which applications are modelled in each cycle.
+        :return: The modelling scheduler.
+        :rtype: ModellingScheduler
+        """
+        return self.__scheduler
+
+    def dict_format(self) -> dict:
+        """
+        Converts the in-memory state of the modeller into a json-serializable dictionary, so that a restarted daemon
+        can serve the latest summaries before its first modelling.
+        Format:
+            {
+                modelled_applications: [{...}, {...}, ...],
+                scheduler: {...}
+            }
+        For more info about the format of the summaries: 'src.main.common.AppSummary.AppSummary.dict_format'. Their
+        abnormal attributes are sorted lists.
+        :return: The state of the modeller as a dictionary.
+        :rtype: dict
+        """
+        modelled_applications = list()
+        for app_summary in self.__modelled_applications:
+            app_summary_dict = app_summary.dict_format()
+            app_summary_dict[AppSummaryAttribute.abnormal_attributes.name] = sorted(
+                app_summary_dict[AppSummaryAttribute.abnormal_attributes.name])
+            modelled_applications.append(app_summary_dict)
+        return {
+            "modelled_applications": modelled_applications,
+            "scheduler": self.__scheduler.dict_format()
+        }
+
+    def set_value_from_dict(self, modeller_dict: dict) -> None:
+        """
+        Sets the in-memory state of the modeller from a dictionary. Any old state will be lost.
+        :raises TypeError if modeller_dict is not of type 'dict'.
+        :param modeller_dict: The state of the modeller as a dictionary. For more info about the format:
+                'dict_format()'.
+        :type modeller_dict: dict
+        """
+        if not isinstance(modeller_dict, dict):
+            raise TypeError(expected_type_but_received_message.format("modeller_dict", "dict", modeller_dict))
+
+        modelled_applications = list()
+        for app_summary_dict in modeller_dict["modelled_applications"]:
+            app_summary = AppSummary(app_name=app_summary_dict[AppSummaryAttribute.app_name.name], error_message=None,
+                                     risk=RiskLevel.none, abnormal_attrs=set(), latest_retrieved_app_details=dict(),
+                                     modelled_app_details=dict())
+            app_summary.set_value_from_dict(app_summary_dict)
+            modelled_applications.append(app_summary)
+        self.__set_modelled_applications(modelled_applications)
+        self.__scheduler.set_value_from_dict(modeller_dict["scheduler"])
+
+    def get_latest_cycle_timing(self) -> Union[dict, None]:
+        """
+        Gets the timing of the collection cycle of the latest modelling: when the collection was intended to start and
+        when it started. For more info about the format:
+        'src.main.common.CycleScheduler.CycleScheduler.wait_for_next_cycle'.
+        :return: The timing of the collection cycle. None if it wasn't provided.
+        :rtype: Union[dict, None]
+        """
+        return copy.deepcopy(self.__latest_cycle_timing)
+
+    @BenchmarkingUtils.traced()
+    def model_running_applications(self, running_app_names: Union[Set[str], None] = None,
+                                   forced_app_names: Union[Set[str], None] = None,
+                                   cycle_timing: Union[dict, None] = None) -> List[AppSummary]:
         """
         Models running applications.
+        If wades_config.use_adaptive_modelling and wades_config.use_model_cache are True, only the applications that
+        are due according to the modelling scheduler are modelled; the others keep the summary of their last modelling.
+        The samples of the skipped cycles are scored against the model caches the next time an application is
+        modelled, so adaptive modelling needs them.
+        If wades_config.modelling_workers_count is larger than 1, the applications are split in chunks of
+        wades_config.modelling_chunk_size applications that are modelled by a pool of processes, kept from one cycle to
+        the next. The profiles, read from the application profile cache when there is one, and their fitted models are
+        sent to the workers, which send back the AppSummary objects and the updated models. The results are in the same
+        order as when the applications are modelled by a single process.
+        The time spent on the whole modelling is added to the modelling_duration_seconds histogram of the metrics
+        registry. The time spent by each technique is only measured when the applications are modelled by this process.
+        :param running_app_names: The names of the applications retrieved in the latest retrieval. If None, every
+                saved application is checked.
+        :type running_app_names: Union[Set[str], None]
+        :param forced_app_names: The names of the applications that must be modelled in this cycle, such as the ones
+                that opened a prohibited file. Only used with adaptive modelling.
+        :type forced_app_names: Union[Set[str], None]
+        :param cycle_timing: The timing of the collection cycle of the latest retrieval. For more info about the
+                format: 'src.main.common.CycleScheduler.CycleScheduler.wait_for_next_cycle'.
+        :type cycle_timing: Union[dict, None]
+        :return: The summaries of the applications modelled in this cycle. The abnormal ones are saved. The summaries
+                kept from previous cycles for the skipped applications are not part of them.
+        :rtype: List[AppSummary]
         """
         logger = logging.getLogger(self.__logger_name)
+        start_time = time.perf_counter()
         modelled_apps = list()
 
-        saved_application_profile_names = AppProfileDataManager.get_saved_app_profiles_names()
-        logger.info("Starting to model running applications.")
+        saved_application_profile_names = sorted(AppProfileDataManager.get_saved_app_profiles_names())
+        if running_app_names is not None:
+            saved_application_profile_names = [app_name for app_name in saved_application_profile_names
+                                               if app_name in running_app_names]
+        app_profile_names_to_model = saved_application_profile_names
+        is_adaptive_modelling = wades_config.use_adaptive_modelling and wades_config.use_model_cache
+        if is_adaptive_modelling:
+            app_profile_names_to_model = self.__scheduler.get_app_names_to_model(
+                saved_application_profile_names, forced_app_names=forced_app_names)
+        self.__latest_cycle_timing = copy.deepcopy(cycle_timing)
+        if cycle_timing is None:
+            logger.info("Starting to model running applications.")
+        else:
+            logger.info("Starting to model running applications of collection cycle {}, intended at {} and started at "
+                        "{}.".format(cycle_timing["cycle_index"], cycle_timing["intended_timestamp"],
+                                     cycle_timing["actual_timestamp"]))
 
-        for saved_app_profile_name in saved_application_profile_names:
-            app_profile = AppProfileDataManager.get_saved_profile(saved_app_profile_name)
-            if ProcessHandler.is_application_recently_retrieved(app_profile):
-                modelled_app = Modeller.model_application_profiles([app_profile])
-                modelled_apps.extend(modelled_app)
+        if min(wades_config.modelling_workers_count, len(app_profile_names_to_model)) > 1:
+            running_app_profiles = Modeller.__get_running_application_profiles(
+                app_profile_names_to_model, app_profile_cache=self.__app_profile_cache,
+                metrics_registry=self.__metrics_registry)
+            model_caches = Modeller.__get_saved_model_caches(running_app_profiles, logger_name=self.__logger_name)
+            chunk_size = wades_config.modelling_chunk_size
+            app_profiles_chunks = [running_app_profiles[index:index + chunk_size]
+                                   for index in range(0, len(running_app_profiles), chunk_size)]
+            model_caches_chunks = [None if model_caches is None else
+                                   {app_profile.get_application_name(): model_caches[app_profile.get_application_name()]
+                                    for app_profile in app_profiles_chunk
+                                    if app_profile.get_application_name() in model_caches}
+                                   for app_profiles_chunk in app_profiles_chunks]
+            for modelled_apps_chunk, model_caches_chunk in self.__get_executor().map(
+                    Modeller.model_application_profiles_chunk, app_profiles_chunks, model_caches_chunks):
+                modelled_apps.extend(modelled_apps_chunk)
+                if model_caches_chunk is not None:
+                    for model_cache in model_caches_chunk.values():
+                        AppProfileDataManager.save_model_cache(model_cache)
+        else:
+            modelled_apps.extend(Modeller.model_saved_application_profiles(
+                app_profile_names_to_model, app_profile_cache=self.__app_profile_cache,
+                metrics_registry=self.__metrics_registry, logger_name=self.__logger_name))
 
-        self.__modelled_applications = modelled_apps
+        all_modelled_apps = modelled_apps
+        if is_adaptive_modelling:
+            all_modelled_apps = self.__schedule_applications(modelled_apps=modelled_apps,
+                                                             app_names=saved_application_profile_names,
+                                                             modelled_app_names=app_profile_names_to_model)
+            logger.info("Skipped {} stable application profiles.".format(
+                len(saved_application_profile_names) - len(app_profile_names_to_model)))
+        self.__set_modelled_applications(all_modelled_apps)
         logger.info("Finished modelling {} application profiles.".format(len(modelled_apps)))
-        # Save data
-        abnormal_applications = self.get_abnormal_applications()
+        # Save data. The summaries kept for the skipped applications were already saved when they were modelled.
+        abnormal_applications = [app_summary for app_summary in modelled_apps
+                                 if app_summary.get_risk_level() is not RiskLevel.none]
         AppProfileDataManager.save_abnormal_apps(abnormal_applications)
+        if self.__metrics_registry is not None:
+            self.__metrics_registry.observe("modelling_duration_seconds", time.perf_counter() - start_time)
+        return modelled_apps
@@ -0,0 +1,229 @@
+from typing import List, Set, Dict, Union
+
+import numpy
+
+import wades_config
+from src.main.common.AppProfileBaseline import AppProfileBaseline
+from src.main.common.AppSummary import AppSummary
+from src.main.common.enum.RiskLevel import RiskLevel
+from src.utils.error_messages import expected_type_but_received_message
+
+
+class ModellingScheduler:
+    # Keys of the state of each application.
+    __interval_key = "interval"
+    __skipped_cycles_key = "skipped_cycles"
+    __samples_count_key = "samples_count"
+    __means_key = "means"
+    __variances_key = "variances"
+    # Lower bound of the standard deviation, relative to the mean, so that constant attributes don't make any change
+    # look infinitely far from the baseline.
+    minimum_relative_standard_deviation = 0.01
+
+    def __init__(self) -> None:
+        """
+        Decides which applications are modelled in each cycle. Each application is modelled every 'interval' cycles.
+        After each modelling, the deviation of its latest samples from the running mean of its numeric attributes is
+        measured:
+        * If it is anomalous or its deviation is above wades_config.modelling_volatile_deviation, its interval goes
+            back to one cycle.
+        * If its deviation is below wades_config.modelling_stable_deviation, its interval doubles, up to
+            wades_config.modelling_max_interval_cycles.
+        New applications, and applications that opened a prohibited file, are always modelled.
+        """
+        self.__app_states: Dict[str, dict] = dict()
+
+    def get_modelling_interval(self, app_name: str) -> int:
+        """
+        Gets the number of cycles between two modellings of an application.
+        :param app_name: The name of the application.
+        :type app_name: str
+        :return: The modelling interval in cycles. 1 for applications that haven't been modelled.
+        :rtype: int
+        """
+        app_state = self.__app_states.get(app_name)
+        return app_state[ModellingScheduler.__interval_key] if app_state is not None else 1
+
+    def get_app_names_to_model(self, app_names: List[str], forced_app_names: Union[Set[str], None] = None) \
+            -> List[str]:
+        """
+        Starts a new cycle and gets the applications that must be modelled in it.
+        :raises TypeError if app_names is not of type 'List[str]',
+                or if forced_app_names is not of type 'Union[Set[str], None]'.
+        :param app_names: The names of the applications that can be modelled.
+        :type app_names: List[str]
+        :param forced_app_names: The names of the applications that must be modelled regardless of their interval,
+                such as the ones that opened a prohibited file.
+        :type forced_app_names: Union[Set[str], None]
+        :return: The names of the applications to model, in the order of app_names.
+        :rtype: List[str]
+        """
+        if not isinstance(app_names, list):
+            raise TypeError(expected_type_but_received_message.format("app_names", "List[str]", app_names))
+        if forced_app_names is None:
+            forced_app_names = set()
+        if not isinstance(forced_app_names, set):
+            raise TypeError(expected_type_but_received_message.format("forced_app_names", "Union[Set[str], None]",
+                                                                      forced_app_names))
+
+        app_names_to_model = list()
+        for app_name in app_names:
+            app_state = self.__app_states.get(app_name)
+            if app_state is None or app_name in forced_app_names:
+                app_names_to_model.append(app_name)
+                continue
+            app_state[ModellingScheduler.__skipped_cycles_key] += 1
+            if app_state[ModellingScheduler.__skipped_cycles_key] >= app_state[ModellingScheduler.__interval_key]:
+                app_names_to_model.append(app_name)
+        return app_names_to_model
+
+    def update(self, app_summaries: List[AppSummary]) -> None:
+        """
+        Updates the intervals of the modelled applications from their summaries, and folds their latest samples into
+        their running means.
+        :raises TypeError if app_summaries is not of type 'List[AppSummary]'.
+        :param app_summaries: The summaries of the applications modelled in this cycle.
+        :type app_summaries: List[AppSummary]
+        """
+        if not isinstance(app_summaries, list):
+            raise TypeError(expected_type_but_received_message.format("app_summaries", "List[AppSummary]",
+                                                                      app_summaries))
+
+        for app_summary in app_summaries:
+            app_name = app_summary.get_app_name()
+            if app_name not in self.__app_states:
+                attributes_count = len(AppProfileBaseline.numeric_attribute_names)
+                self.__app_states[app_name] = {
+                    ModellingScheduler.__interval_key: 1,
+                    ModellingScheduler.__skipped_cycles_key: 0,
+                    ModellingScheduler.__samples_count_key: 0,
+                    ModellingScheduler.__means_key: numpy.zeros(attributes_count),
+                    ModellingScheduler.__variances_key: numpy.zeros(attributes_count)
+                }
+            app_state = self.__app_states[app_name]
+            latest_values = ModellingScheduler.__get_latest_values(app_summary)
+            deviation = self.__get_deviation(app_state, latest_values)
+            ModellingScheduler.__fold_values(app_state, latest_values)
+
+            interval = app_state[ModellingScheduler.__interval_key]
+            if app_summary.get_risk_level() > RiskLevel.none or deviation > wades_config.modelling_volatile_deviation:
+                interval = 1
+            elif deviation <= wades_config.modelling_stable_deviation:
+                interval = min(interval * 2, wades_config.modelling_max_interval_cycles)
+            app_state[ModellingScheduler.__interval_key] = max(interval, 1)
+            app_state[ModellingScheduler.__skipped_cycles_key] = 0
+
+    def remove(self, app_name: str) -> None:
+        """
+        Forgets an application, for instance when it is no longer running. It is modelled in the next cycle it runs.
+        :param app_name: The name of the application.
+        :type app_name: str
+        """
+        self.__app_states.pop(app_name, None)
+
+    def dict_format(self) -> dict:
+        """
+        Converts the state of the scheduler into a json-serializable dictionary.
+        Format:
+            {
+                app_name: {
+                    interval: 4,
+                    skipped_cycles: 1,
+                    samples_count: 320,
+                    means: [2342.4, 0.4, ...],
+                    variances: [...]
+                },
+                ...
+            }
+        The means and variances are listed in the order of 'AppProfileBaseline.numeric_attribute_names'.
+        :return: The state of the scheduler as a dictionary.
+        :rtype: dict
+        """
+        return {app_name: {key: value.tolist() if isinstance(value, numpy.ndarray) else value
+                           for key, value in app_state.items()}
+                for app_name, app_state in self.__app_states.items()}
+
+    def set_value_from_dict(self, modelling_scheduler_dict: dict) -> None:
+        """
+        Sets the state of the scheduler from a dictionary. Any old state will be lost.
+        :raises TypeError if modelling_scheduler_dict is not of type 'dict'.
+        :param modelling_scheduler_dict: The state of the scheduler as a dictionary. For more info about the format:
+                'dict_format()'.
+        :type modelling_scheduler_dict: dict
+        """
+        if not isinstance(modelling_scheduler_dict, dict):
+            raise TypeError(expected_type_but_received_message.format("modelling_scheduler_dict", "dict",
+                                                                      modelling_scheduler_dict))
+
+        self.__app_states = dict()
+        for app_name, app_state in modelling_scheduler_dict.items():
+            self.__app_states[app_name] = {
+                ModellingScheduler.__interval_key: app_state[ModellingScheduler.__interval_key],
+                ModellingScheduler.__skipped_cycles_key: app_state[ModellingScheduler.__skipped_cycles_key],
+                ModellingScheduler.__samples_count_key: app_state[ModellingScheduler.__samples_count_key],
+                ModellingScheduler.__means_key: numpy.array(app_state[ModellingScheduler.__means_key], dtype=float),
+                ModellingScheduler.__variances_key: numpy.array(app_state[ModellingScheduler.__variances_key],
+                                                                dtype=float)
+            }
+
+    @staticmethod
+    def __get_latest_values(app_summary: AppSummary) -> numpy.ndarray:
+        """
+        Gets the latest values of the numeric attributes of an application, one row per sample.
+        :param app_summary: The summary of the application.
+        :type app_summary: AppSummary
+        :return: One row per latest sample and one column per numeric attribute.
+        :rtype: numpy.ndarray
+        """
+        latest_app_details = app_summary.get_latest_retrieved_app_details()
+        columns = [numpy.asarray(latest_app_details.get(attribute_name, list()), dtype=float)
+                   for attribute_name in AppProfileBaseline.numeric_attribute_names]
+        samples_count = min(len(column) for column in columns)
+        return numpy.column_stack([column[:samples_count] for column in columns])
+
+    def __get_deviation(self, app_state: dict, latest_values: numpy.ndarray) -> float:
+        """
+        Gets how far the latest samples of an application are from its running means: the largest number of standard
+        deviations between a latest value and the mean of its attribute.
+        :param app_state: The state of the application.
+        :type app_state: dict
+        :param latest_values: One row per latest sample and one column per numeric attribute.
+        :type latest_values: numpy.ndarray
+        :return: The deviation. Infinite while the application has too few samples to tell, so that it is treated as
+                volatile; 0 if there are no latest samples.
+        :rtype: float
+        """
+        if len(latest_values) == 0:
+            return 0.0
+        if app_state[ModellingScheduler.__samples_count_key] < wades_config.minimum_retrieval_size_for_modelling:
+            return float("inf")
+        means = app_state[ModellingScheduler.__means_key]
+        standard_deviations = numpy.maximum(
+            numpy.sqrt(app_state[ModellingScheduler.__variances_key]),
+            numpy.maximum(numpy.abs(means) * ModellingScheduler.minimum_relative_standard_deviation,
+                          numpy.finfo(float).eps))
+        return float(numpy.max(numpy.abs(latest_values - means) / standard_deviations))
+
+    @staticmethod
+    def __fold_values(app_state: dict, latest_values: numpy.ndarray) -> None:
+        """
+        Folds the latest samples into the exponentially weighted means and variances of the application. Until
+        1 / wades_config.modelling_stability_alpha samples have been folded, they are the plain means and variances.
+        :param app_state: The state of the application.
+        :type app_state: dict
+        :param latest_values: One row per latest sample and one column per numeric attribute.
+        :type latest_values: numpy.ndarray
+        """
+        means = app_state[ModellingScheduler.__means_key]
+        variances = app_state[ModellingScheduler.__variances_key]
+        samples_count = app_state[ModellingScheduler.__samples_count_key]
+        for values in latest_values:
+            weight = max(wades_config.modelling_stability_alpha, 1 / (samples_count + 1))
+            differences = values - means
+            increments = weight * differences
+            means = means + increments
+            variances = (1 - weight) * (variances + differences * increments)
+            samples_count += 1
+        app_state[ModellingScheduler.__means_key] = means
+        app_state[ModellingScheduler.__variances_key] = variances
+        app_state[ModellingScheduler.__samples_count_key] = samples_count
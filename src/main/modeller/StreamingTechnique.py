@@ -0,0 +1,216 @@
+from typing import List, Union, Dict, Set, Tuple
+
+import numpy
+
+import wades_config
+from src.main.common.AppModelCache import AppModelCache
+from src.main.common.AppProfile import AppProfile
+from src.main.common.AppProfileBaseline import AppProfileBaseline
+from src.main.common.AppSummary import AppSummary
+from src.main.common.PathMatcher import PathMatcher
+from src.main.common.enum.AppProfileAttribute import AppProfileAttribute
+from src.main.common.enum.RiskLevel import RiskLevel
+from src.main.modeller.DetectionTechnique import DetectionTechnique
+from src.utils.error_messages import expected_type_but_received_message
+
+
+class StreamingTechnique(DetectionTechnique):
+
+    def __init__(self, attribute_names: Union[Set[str], None] = None) -> None:
+        """
+        Detects anomalies against running statistics instead of the whole history. Each numeric value is scored by
+        how many standard deviations it is away from the exponentially weighted mean of its attribute, for its hour
+        of the week once that hour has enough samples, and is then folded into the statistics. Users and opened files
+        are checked against the known values of the application. Scoring a retrieval costs the same whatever the
+        length of the history.
+        The statistics are kept in the application's model cache. When no model caches are provided, the technique
+        keeps its own, so an instance can be reused to stream the retrievals of the same applications.
+        :raises TypeError if attribute_names is not of type 'Union[Set[str], None]'.
+        :raises ValueError if an attribute name is not in 'DetectionTechnique.modelled_attribute_names'.
+        :param attribute_names: The attributes modelled by the technique. If None, all the modelled attributes.
+        :type attribute_names: Union[Set[str], None]
+        """
+        super().__init__(attribute_names=attribute_names)
+        self.__model_caches = dict()
+
+    def __call__(self, data: List[AppProfile], model_caches: Union[Dict[str, AppModelCache], None] = None,
+                 update_model_caches: bool = True) -> List[AppSummary]:
+        """
+        Models the list of AppProfiles.
+        :raises TypeError if data is not of type List[AppProfile],
+                or if model_caches is not of type 'Dict[str, AppModelCache]'.
+        :param data: The list of AppProfiles to model.
+        :type data: List[AppProfile]
+        :param model_caches: The fitted models of the applications mapped by application name. The running statistics
+                are updated in place, and a cache is added for each application that doesn't have one.
+        :type model_caches: Union[Dict[str, AppModelCache], None]
+        :param update_model_caches: If True, the scored samples are added to the model caches. If False, only the
+                running statistics are updated, and the caller adds the samples once every technique has scored them.
+        :type update_model_caches: bool
+        :return: A list of modelled AppProfiles in the form of AppSummary objects.
+        :rtype: List[AppSummary]
+        """
+        if not isinstance(data, list):
+            raise TypeError(expected_type_but_received_message.format("data", "List[AppProfile]", data))
+        if model_caches is not None and not isinstance(model_caches, dict):
+            raise TypeError(expected_type_but_received_message.format("model_caches", "Dict[str, AppModelCache]",
+                                                                      model_caches))
+        if model_caches is None:
+            model_caches = self.__model_caches
+
+        modelled_apps = list()
+        for app_profile in data:
+            if not isinstance(app_profile, AppProfile):
+                raise TypeError(expected_type_but_received_message.format("app_profile", "AppProfile", app_profile))
+            app_name = app_profile.get_application_name()
+            if app_name not in model_caches:
+                model_caches[app_name] = AppModelCache(application_name=app_name)
+            modelled_apps.append(self.__streaming_modelling_app(app_profile=app_profile,
+                                                                model_cache=model_caches[app_name],
+                                                                update_model_cache=update_model_caches))
+        return modelled_apps
+
+    def __streaming_modelling_app(self, app_profile: AppProfile, model_cache: AppModelCache,
+                                  update_model_cache: bool) -> AppSummary:
+        """
+        Scores the data of an application that hasn't been added to its model cache against its running statistics and
+        known values. The older samples that were never folded into the statistics are folded first, and the scored
+        data is folded once it is scored. Only those samples are read, and the statistics are updated in place.
+        :param app_profile: The application to model.
+        :type app_profile: AppProfile
+        :param model_cache: The fitted models of the application, with its running statistics.
+        :type model_cache: AppModelCache
+        :param update_model_cache: If True, the scored data is also added to the model cache.
+        :type update_model_cache: bool
+        :return: the modelled application as an AppSummary instance.
+        :rtype: AppSummary
+        """
+        if not wades_config.is_modelling:
+            latest_app_profile_data = app_profile.get_latest_retrieved_data()
+            return AppSummary(app_name=app_profile.get_application_name(), error_message=None, risk=RiskLevel.none,
+                              abnormal_attrs=set(), latest_retrieved_app_details=latest_app_profile_data,
+                              modelled_app_details=latest_app_profile_data)
+
+        unscored_app_profile_data = DetectionTechnique.get_unscored_data(app_profile=app_profile,
+                                                                         model_cache=model_cache)
+        StreamingTechnique.__fold_unfolded_known_data(app_profile=app_profile, model_cache=model_cache)
+        error_message = None
+        max_risk_level = RiskLevel.none
+        anomalous_attrs = set()
+
+        z_scores = model_cache.get_streaming_z_scores(
+            unscored_app_profile_data, minimum_samples_count=wades_config.minimum_retrieval_size_for_modelling,
+            seasonal_minimum_samples_count=wades_config.streaming_seasonal_minimum_samples_count)
+        point_risk_levels = {attribute_name: StreamingTechnique.__get_point_risk_levels(z_scores[attribute_name])
+                             for attribute_name in AppProfileBaseline.numeric_attribute_names
+                             if attribute_name in self.get_attribute_names()}
+        for attribute_name, risk_levels in point_risk_levels.items():
+            attribute_risk_level = RiskLevel(int(risk_levels.max(initial=RiskLevel.none.value)))
+            if attribute_risk_level > RiskLevel.none:
+                anomalous_attrs.add(attribute_name)
+                max_risk_level = max(max_risk_level, attribute_risk_level)
+        anomalous_points_count, worst_point = DetectionTechnique.get_anomalous_points_summary(
+            latest_app_profile_data=unscored_app_profile_data, point_risk_levels=point_risk_levels)
+
+        non_numeric_risk_level, non_numeric_anomalous_attrs = self.__detect_anomalies_in_non_numeric_attributes(
+            latest_app_profile_data=unscored_app_profile_data, model_cache=model_cache)
+        max_risk_level = max(max_risk_level, non_numeric_risk_level)
+        anomalous_attrs.update(non_numeric_anomalous_attrs)
+        if len(anomalous_attrs) > 0:
+            error_message = wades_config.anomaly_detected_message
+
+        model_cache.add_streaming_samples(unscored_app_profile_data)
+        if update_model_cache:
+            model_cache.add_new_samples(unscored_app_profile_data)
+
+        return AppSummary(app_name=app_profile.get_application_name(), error_message=error_message,
+                          risk=max_risk_level, abnormal_attrs=anomalous_attrs,
+                          latest_retrieved_app_details=unscored_app_profile_data,
+                          modelled_app_details=unscored_app_profile_data,
+                          anomalous_points_count=anomalous_points_count, worst_point=worst_point)
+
+    @staticmethod
+    def __fold_unfolded_known_data(app_profile: AppProfile, model_cache: AppModelCache) -> None:
+        """
+        Folds into the running statistics the samples already added to the model cache that were never folded, e.g.
+        the history of an application modelled for the first time, or the samples modelled by another technique
+        before this one was selected. Nothing is read when the statistics are up to date.
+        :param app_profile: The application to model.
+        :type app_profile: AppProfile
+        :param model_cache: The fitted models of the application, with its running statistics.
+        :type model_cache: AppModelCache
+        """
+        last_seen_timestamp = model_cache.get_last_seen_timestamp()
+        previous_retrieval_timestamp = app_profile.get_previous_retrieval_timestamp()
+        if last_seen_timestamp is None or previous_retrieval_timestamp is None:
+            return
+        # The latest retrieved data is scored again when every sample is already in the cache, so it is never folded
+        # before being scored.
+        known_data_end_timestamp = min(last_seen_timestamp, previous_retrieval_timestamp)
+        streaming_last_seen_timestamp = model_cache.get_streaming_last_seen_timestamp()
+        if streaming_last_seen_timestamp is not None and streaming_last_seen_timestamp >= known_data_end_timestamp:
+            return
+        model_cache.add_streaming_samples(app_profile.get_retrieved_data(since_timestamp=streaming_last_seen_timestamp,
+                                                                         until_timestamp=known_data_end_timestamp))
+
+    @staticmethod
+    def __get_point_risk_levels(z_scores: numpy.ndarray) -> numpy.ndarray:
+        """
+        Gets the risk level of each value from its z-score. As in FrequencyTechnique, values above the mean start at
+        high risk and values below it at medium risk, and the risk is lowered by one level for values that are less
+        than twice wades_config.streaming_anomaly_z_score standard deviations away from the mean.
+        :param z_scores: The z-scores of the values. NaN for values that can't be scored.
+        :type z_scores: numpy.ndarray
+        :return: The risk level of each value, as RiskLevel values.
+        :rtype: numpy.ndarray
+        """
+        threshold = wades_config.streaming_anomaly_z_score
+        risk_levels = numpy.full(len(z_scores), RiskLevel.none.value, dtype=int)
+        # NaN compares as False, so the values that can't be scored stay at no risk.
+        risk_levels[z_scores >= threshold] = RiskLevel.medium.value
+        risk_levels[z_scores >= 2 * threshold] = RiskLevel.high.value
+        risk_levels[z_scores <= -threshold] = RiskLevel.low.value
+        risk_levels[z_scores <= -2 * threshold] = RiskLevel.medium.value
+        return risk_levels
+
+    def __detect_anomalies_in_non_numeric_attributes(self, latest_app_profile_data: dict,
+                                                     model_cache: AppModelCache) -> Tuple[RiskLevel, Set[str]]:
+        """
+        Detects anomalies in the users and opened files, as FrequencyTechnique does with a model cache: unknown values
+        are medium risk once enough values are known, and prohibited files that the application never opened before
+        are high risk.
+        :param latest_app_profile_data: The latest retrieved data of the application. For more info about the format:
+                'src.main.common.AppProfile.AppProfile.get_latest_retrieved_data'
+        :type latest_app_profile_data: dict
+        :param model_cache: The fitted models of the application, with its known values.
+        :type model_cache: AppModelCache
+        :return: The max risk level found and the anomalous attributes.
+        :rtype: Tuple[RiskLevel, Set[str]]
+        """
+        attribute_names = self.get_attribute_names()
+        max_risk_level = RiskLevel.none
+        anomalous_attrs = set()
+
+        latest_users = latest_app_profile_data.get(AppProfileAttribute.usernames.name, list())
+        if AppProfileAttribute.usernames.name in attribute_names and \
+                model_cache.get_known_users_observations_count() >= wades_config.minimum_retrieval_size_for_modelling \
+                and len(model_cache.get_unknown_users(latest_users)) > 0:
+            max_risk_level = RiskLevel.medium
+            anomalous_attrs.add(AppProfileAttribute.usernames.name)
+
+        if AppProfileAttribute.opened_files.name in attribute_names:
+            latest_files_flat = list()
+            for opened_files in latest_app_profile_data.get(AppProfileAttribute.opened_files.name, list()):
+                latest_files_flat.extend(opened_files)
+            if model_cache.get_known_files_observations_count() >= wades_config.minimum_retrieval_size_for_modelling \
+                    and len(model_cache.get_unknown_files(latest_files_flat)) > 0:
+                max_risk_level = max(max_risk_level, RiskLevel.medium)
+                anomalous_attrs.add(AppProfileAttribute.opened_files.name)
+            prohibited_files_matcher = PathMatcher.get_compiled_matcher(wades_config.prohibited_files)
+            newly_accessed_prohibited_files = prohibited_files_matcher.get_matching_paths(latest_files_flat)
+            newly_accessed_prohibited_files.difference_update(model_cache.get_accessed_prohibited_files())
+            if len(newly_accessed_prohibited_files) > 0:
+                max_risk_level = RiskLevel.high
+                anomalous_attrs.add(AppProfileAttribute.opened_files.name)
+
+        return max_risk_level, anomalous_attrs
@@ -0,0 +1,82 @@
+from typing import Dict, List, Set, Union, Type
+
+from src.main.modeller.DetectionTechnique import DetectionTechnique
+from src.main.modeller.FrequencyTechnique import FrequencyTechnique
+from src.main.modeller.StreamingTechnique import StreamingTechnique
+from src.utils.error_messages import expected_type_but_received_message, expected_value_but_received_message
+
+
+class TechniqueRegistry:
+    # Registered detection techniques mapped by name.
+    __techniques: Dict[str, Type[DetectionTechnique]] = {"frequency": FrequencyTechnique,
+                                                         "streaming": StreamingTechnique}
+
+    @staticmethod
+    def register(technique_name: str, technique_class: Type[DetectionTechnique]) -> None:
+        """
+        Registers a detection technique, so that it can be selected in wades_config. A technique registered with
+        the name of another one replaces it.
+        :raises TypeError if technique_name is not of type 'str',
+                or if technique_class is not a subclass of 'DetectionTechnique'.
+        :param technique_name: The name of the technique.
+        :type technique_name: str
+        :param technique_class: The class of the technique. It is instantiated with the attribute names it models.
+        :type technique_class: Type[DetectionTechnique]
+        """
+        if not isinstance(technique_name, str):
+            raise TypeError(expected_type_but_received_message.format("technique_name", "str", technique_name))
+        if not (isinstance(technique_class, type) and issubclass(technique_class, DetectionTechnique)):
+            raise TypeError(expected_type_but_received_message.format("technique_class", "Type[DetectionTechnique]",
+                                                                      technique_class))
+        TechniqueRegistry.__techniques[technique_name] = technique_class
+
+    @staticmethod
+    def get_technique_names() -> List[str]:
+        """
+        Gets the names of the registered techniques.
+        :return: The names of the registered techniques, sorted.
+        :rtype: List[str]
+        """
+        return sorted(TechniqueRegistry.__techniques.keys())
+
+    @staticmethod
+    def create_technique(technique_name: str, attribute_names: Union[Set[str], None] = None) -> DetectionTechnique:
+        """
+        Creates an instance of a registered technique.
+        :raises ValueError if technique_name is not registered.
+        :param technique_name: The name of the technique.
+        :type technique_name: str
+        :param attribute_names: The attributes modelled by the technique. If None, all the modelled attributes.
+        :type attribute_names: Union[Set[str], None]
+        :return: The technique.
+        :rtype: DetectionTechnique
+        """
+        if technique_name not in TechniqueRegistry.__techniques:
+            raise ValueError(expected_value_but_received_message.format("technique_name",
+                                                                        TechniqueRegistry.get_technique_names(),
+                                                                        technique_name))
+        return TechniqueRegistry.__techniques[technique_name](attribute_names=attribute_names)
+
+    @staticmethod
+    def get_technique_name_of_attribute(app_name: str, attribute_name: str,
+                                        app_techniques: Dict[str, str], attribute_techniques: Dict[str, str],
+                                        default_technique_name: str) -> str:
+        """
+        Gets the name of the technique that models an attribute of an application. A technique selected for the
+        application wins over one selected for the attribute, which wins over the default technique.
+        :param app_name: The name of the application.
+        :type app_name: str
+        :param attribute_name: The name of the attribute.
+        :type attribute_name: str
+        :param app_techniques: The technique names mapped by application name.
+        :type app_techniques: Dict[str, str]
+        :param attribute_techniques: The technique names mapped by attribute name.
+        :type attribute_techniques: Dict[str, str]
+        :param default_technique_name: The name of the technique used when none is selected.
+        :type default_technique_name: str
+        :return: The name of the technique.
+        :rtype: str
+        """
+        if app_name in app_techniques:
+            return app_techniques[app_name]
+        return attribute_techniques.get(attribute_name, default_technique_name)
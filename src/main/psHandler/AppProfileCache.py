@@ -0,0 +1,165 @@
+import copy
+import threading
+from collections import OrderedDict
+from typing import List, Union
+
+import wades_config
+from src.main.common.AppProfile import AppProfile
+from src.main.psHandler.AppProfileDataManager import AppProfileDataManager
+from src.utils.error_messages import expected_type_but_received_message, expected_value_but_received_message
+
+
+class AppProfileCache:
+
+    def __init__(self, max_entries_count: int = wades_config.app_profile_cache_max_entries_count) -> None:
+        """
+        Keeps the application profiles in memory, so the process handler and the modeller don't parse them from disk
+        on every cycle. Profiles are written through to disk when they are put in the cache, so the saved profiles
+        are only read on a cache miss, such as after a restart. When the cache is full, the least recently used
+        profile is evicted.
+        Cached profiles are shared between threads: they must not be changed once they are in the cache. Writers get
+        a copy with 'get_copy()' and put it back with 'put()'.
+        :raises TypeError if max_entries_count is not of type 'int'.
+        :raises ValueError if max_entries_count is smaller than 1.
+        :param max_entries_count: The maximum number of cached application profiles.
+        :type max_entries_count: int
+        """
+        if not isinstance(max_entries_count, int):
+            raise TypeError(expected_type_but_received_message.format("max_entries_count", "int", max_entries_count))
+        if max_entries_count < 1:
+            raise ValueError(expected_value_but_received_message.format("max_entries_count", "larger than 0",
+                                                                        max_entries_count))
+
+        self.__max_entries_count = max_entries_count
+        self.__app_profiles = OrderedDict()  # Least recently used profiles first.
+        self.__lock = threading.Lock()
+        self.__hits_count = 0
+        self.__misses_count = 0
+        self.__evictions_count = 0
+
+    def get_cached_application_names(self) -> List[str]:
+        """
+        Gets the names of the cached application profiles, from the least to the most recently used.
+        :return: The names of the cached application profiles.
+        :rtype: List[str]
+        """
+        with self.__lock:
+            return list(self.__app_profiles.keys())
+
+    def is_cached(self, app_name: str) -> bool:
+        """
+        Checks if an application profile is cached, so getting it doesn't load it from disk.
+        :param app_name: The name of the application.
+        :type app_name: str
+        :return: True if the profile is cached, False otherwise.
+        :rtype: bool
+        """
+        with self.__lock:
+            return app_name in self.__app_profiles
+
+    def get(self, app_name: str) -> Union[AppProfile, None]:
+        """
+        Gets an application profile, loading it from disk if it isn't cached.
+        The profile is shared with the other users of the cache, so it must not be changed.
+        :raises TypeError if app_name is not of type 'str'.
+        :param app_name: The name of the application.
+        :type app_name: str
+        :return: The application profile. None if it is neither cached nor saved.
+        :rtype: Union[AppProfile, None]
+        """
+        if not isinstance(app_name, str):
+            raise TypeError(expected_type_but_received_message.format("app_name", "str", app_name))
+
+        with self.__lock:
+            app_profile = self.__app_profiles.get(app_name)
+            if app_profile is not None:
+                self.__app_profiles.move_to_end(app_name)
+                self.__hits_count += 1
+                return app_profile
+            self.__misses_count += 1
+
+        app_profile = AppProfileDataManager.get_saved_profile(app_name)
+        if app_profile is not None:
+            with self.__lock:
+                # Another thread may have put a newer profile while this one was being loaded.
+                if app_name not in self.__app_profiles:
+                    self.__add(app_profile)
+                app_profile = self.__app_profiles[app_name]
+        return app_profile
+
+    def get_copy(self, app_name: str) -> Union[AppProfile, None]:
+        """
+        Gets a copy of an application profile that can be changed and then put back in the cache. The samples are
+        shared with the cached profile, only the lists that hold them are copied (see 'AppProfile.__copy__()').
+        :raises TypeError if app_name is not of type 'str'.
+        :param app_name: The name of the application.
+        :type app_name: str
+        :return: A copy of the application profile. None if it is neither cached nor saved.
+        :rtype: Union[AppProfile, None]
+        """
+        app_profile = self.get(app_name)
+        return copy.copy(app_profile) if app_profile is not None else None
+
+    def put(self, app_profile: AppProfile) -> int:
+        """
+        Saves an application profile to disk and caches it as the most recently used profile. The profile must not be
+        changed afterwards.
+        :raises TypeError if app_profile is not of type 'AppProfile'.
+        :param app_profile: The application profile.
+        :type app_profile: AppProfile
+        :return: The number of bytes written to disk.
+        :rtype: int
+        """
+        if not isinstance(app_profile, AppProfile):
+            raise TypeError(expected_type_but_received_message.format("app_profile", "AppProfile", app_profile))
+
+        written_bytes_count = AppProfileDataManager.save_app_profile(app_profile)
+        with self.__lock:
+            self.__add(app_profile)
+        return written_bytes_count
+
+    def remove(self, app_name: str) -> None:
+        """
+        Removes an application profile from the cache. Its saved profile is kept.
+        :param app_name: The name of the application.
+        :type app_name: str
+        """
+        with self.__lock:
+            self.__app_profiles.pop(app_name, None)
+
+    def __add(self, app_profile: AppProfile) -> None:
+        """
+        Caches an application profile as the most recently used one, and evicts the least recently used profiles
+        that don't fit. It must be called with the lock held.
+        :param app_profile: The application profile.
+        :type app_profile: AppProfile
+        """
+        app_name = app_profile.get_application_name()
+        self.__app_profiles[app_name] = app_profile
+        self.__app_profiles.move_to_end(app_name)
+        while len(self.__app_profiles) > self.__max_entries_count:
+            self.__app_profiles.popitem(last=False)
+            self.__evictions_count += 1
+
+    def get_metrics(self) -> dict:
+        """
+        Gets the usage of the cache.
+        Format:
+            {
+                entries_count: 240,
+                max_entries_count: 1024,
+                hits_count: 5320,
+                misses_count: 240,
+                evictions_count: 0
+            }
+        :return: The usage of the cache.
+        :rtype: dict
+        """
+        with self.__lock:
+            return {
+                "entries_count": len(self.__app_profiles),
+                "max_entries_count": self.__max_entries_count,
+                "hits_count": self.__hits_count,
+                "misses_count": self.__misses_count,
+                "evictions_count": self.__evictions_count
+            }
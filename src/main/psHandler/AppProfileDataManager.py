@@ -1,19 +1,26 @@
 import ast
+import csv
 import json
+import os
+import uuid
+import zlib
 from datetime import datetime
 from pathlib import Path
-from typing import List, Dict, Union, Any, Set
+from typing import List, Dict, Union, Any, Set, Callable, BinaryIO, Iterator
 
 import pandas
 from pandas import DataFrame
 
 import paths
 import wades_config
+from src.main.common.AbnormalAppsQuery import AbnormalAppsQuery
+from src.main.common.AppModelCache import AppModelCache
 from src.main.common.AppProfile import AppProfile
 from src.main.common.AppSummary import AppSummary
 from src.main.common.enum.AppProfileAttribute import AppProfileAttribute
 from src.main.common.enum.AppSummaryAttribute import AppSummaryAttribute
-from src.utils.error_messages import expected_type_but_received_message
+from src.utils.BenchmarkingUtils import BenchmarkingUtils
+from src.utils.error_messages import expected_type_but_received_message, expected_value_but_received_message
 from wades_config import app_profile_retrieval_chunk_size, datetime_format
 
 
@@ -23,8 +30,10 @@ class AppProfileDataManager:
     __column_names = [attr.name for attr in AppProfileAttribute]  # Order is important
     __default_retrieval_timestamp_file = __path_to_use / wades_config.retrieval_timestamp_file_name
     __default_abnormal_apps_file = __path_to_use / wades_config.abnormal_apps_file_name
+    __default_daemon_snapshot_file = __path_to_use / wades_config.daemon_snapshot_file_name
 
     @staticmethod
+    @BenchmarkingUtils.traced()
     def get_saved_profile(app_profile_name: str, base_path: Path = __path_to_use) -> Union[AppProfile, None]:
         """
         Retrieves the saved profiles from the provided app_profile_file.
@@ -44,12 +53,18 @@ class AppProfileDataManager:
         app_profile = AppProfile(application_name=app_profile_name)
         app_profile.set_value_from_dict(app_profile_dict=app_profile_dict)
 
+        app_profile_file_path = AppProfileDataManager.__get_app_profile_file_path(app_profile_name, base_path)
+        app_profile_state_file_path = AppProfileDataManager.__get_app_profile_state_file_path(app_profile_file_path)
+        if app_profile_state_file_path.exists():
+            with open(app_profile_state_file_path, "r") as file:
+                app_profile.set_state_from_dict(json.load(file))
+
         return app_profile
 
     @staticmethod
     def save_app_profiles(app_profiles: List[AppProfile], retrieval_timestamp: datetime,
                           app_profile_base_dir: Path = __path_to_use,
-                          retrieval_timestamp_file_path: Path = __default_retrieval_timestamp_file) -> None:
+                          retrieval_timestamp_file_path: Path = __default_retrieval_timestamp_file) -> int:
         """
         Saves the appProfiles in the file specified by app_profile_file.
         If no app_profile_file value is provided, it uses the default file, defined in `paths.py`
@@ -64,6 +79,8 @@ class AppProfileDataManager:
         :type app_profile_base_dir: pathlib.Path
         :param retrieval_timestamp_file_path: The path of the file to save the retrieval timestamp.
         :type retrieval_timestamp_file_path: Union[str, pathlib.Path]
+        :return: The number of bytes written in the files of the application profiles.
+        :rtype: int
         """
         if not isinstance(app_profiles, list):
             raise TypeError(expected_type_but_received_message.format("app_profiles", "List[AppProfile]", app_profiles))
@@ -82,16 +99,19 @@ class AppProfileDataManager:
                                                                       "pathlib.Path",
                                                                       retrieval_timestamp_file_path))
 
+        written_bytes_count = 0
         for app_profile in app_profiles:
-            AppProfileDataManager.save_app_profile(app_profile, app_profile_base_dir)
+            written_bytes_count += AppProfileDataManager.save_app_profile(app_profile, app_profile_base_dir)
             if not isinstance(app_profile, AppProfile):
                 raise TypeError(
                     expected_type_but_received_message.format("app_profiles", "List[AppProfile]", app_profiles))
 
         AppProfileDataManager.save_last_retrieved_data_timestamp(retrieval_timestamp, retrieval_timestamp_file_path)
+        return written_bytes_count
 
     @staticmethod
-    def save_app_profile(app_profile: AppProfile, base_path: Path = __path_to_use) -> None:
+    @BenchmarkingUtils.traced()
+    def save_app_profile(app_profile: AppProfile, base_path: Path = __path_to_use) -> int:
         """
         Save an application profile in the specified base directory.
         :raises TypeError if app_profile is not of type 'AppProfile',
@@ -102,6 +122,8 @@ class AppProfileDataManager:
             It defaults to values paths.APP_PROF_DATA_DIR_PATH if is not running as a test and to
             paths.TEST_APP_PROF_DATA_DIR_PATH if it is.
         :type base_path: pathlib.Path
+        :return: The number of bytes written.
+        :rtype: int
         """
         if not isinstance(app_profile, AppProfile):
             raise TypeError(expected_type_but_received_message.format("app_profile", "AppProfile", app_profile))
@@ -114,7 +136,97 @@ class AppProfileDataManager:
 
         app_profile_dict = app_profile.dict_format()
         data_frame = pandas.DataFrame([app_profile_dict], columns=AppProfileDataManager.__column_names)
-        data_frame.to_csv(app_profile_file_path, index=False)
+        written_bytes_count = AppProfileDataManager.__write_file_atomically(
+            app_profile_file_path, lambda file_path: data_frame.to_csv(file_path, index=False))
+
+        # The state is only written once there is something to keep, so most profiles only have one file.
+        if app_profile.has_state():
+            app_profile_state_file_path = AppProfileDataManager.__get_app_profile_state_file_path(
+                app_profile_file_path)
+            app_profile_state_json = json.dumps(app_profile.state_dict_format())
+            written_bytes_count += AppProfileDataManager.__write_file_atomically(
+                app_profile_state_file_path, lambda file_path: file_path.write_text(app_profile_state_json))
+        return written_bytes_count
+
+    @staticmethod
+    def __write_file_atomically(file_path: Path, write_file: Callable[[Path], Any]) -> int:
+        """
+        Writes a file next to its final path and then moves it over it, so that the modelling stage of the daemon never
+        reads a file that the ingestion stage is still writing.
+        Each write uses its own temporary file, so that concurrent writers of the same file, such as the publishing
+        stage and the exit handler saving the daemon snapshot, never write over each other's temporary file.
+        :param file_path: The final path of the file.
+        :type file_path: pathlib.Path
+        :param write_file: Writes the file at the path it receives.
+        :type write_file: Callable[[pathlib.Path], Any]
+        :return: The size of the written file, in bytes.
+        :rtype: int
+        """
+        temporary_file_path = file_path.with_name("{}.{}.tmp".format(file_path.name, uuid.uuid4().hex))
+        try:
+            write_file(temporary_file_path)
+            written_bytes_count = temporary_file_path.stat().st_size
+            os.replace(temporary_file_path, file_path)
+        except BaseException:
+            temporary_file_path.unlink(missing_ok=True)
+            raise
+        return written_bytes_count
+
+    @staticmethod
+    @BenchmarkingUtils.traced()
+    def get_saved_model_cache(app_profile_name: str, base_path: Path = __path_to_use) -> Union[AppModelCache, None]:
+        """
+        Retrieves the fitted models of an application. They are saved next to the application profile.
+        :raises TypeError if app_profile_name is not of type 'str',
+            or if base_path is not of type 'pathlib.Path'.
+        :raises ValueError if the saved fitted models can't be read, such as when their file is truncated.
+        :param app_profile_name: The name of the application.
+        :type app_profile_name: str
+        :param base_path: The base path to get the fitted models from.
+        :type base_path: pathlib.Path
+        :return: The fitted models of the application, None if they have not been saved.
+        :rtype: Union[AppModelCache, None]
+        """
+        if not isinstance(app_profile_name, str):
+            raise TypeError(expected_type_but_received_message.format("app_profile_name", "str", app_profile_name))
+
+        app_profile_file_path = AppProfileDataManager.__get_app_profile_file_path(app_profile_name, base_path)
+        model_cache_file_path = AppProfileDataManager.__get_model_cache_file_path(app_profile_file_path)
+        if not model_cache_file_path.exists():
+            return None
+        model_cache = AppModelCache(application_name=app_profile_name)
+        try:
+            with open(model_cache_file_path, "r") as file:
+                model_cache.set_value_from_dict(json.load(file))
+        except (ValueError, TypeError, KeyError, AttributeError) as error:
+            raise ValueError("The saved fitted models of {} can't be read: {}".format(app_profile_name,
+                                                                                      repr(error))) from error
+        return model_cache
+
+    @staticmethod
+    @BenchmarkingUtils.traced()
+    def save_model_cache(model_cache: AppModelCache, base_path: Path = __path_to_use) -> None:
+        """
+        Saves the fitted models of an application next to its application profile. The file is written next to its
+        final path and then moved over it, so a crash while saving never leaves truncated fitted models.
+        :raises TypeError if model_cache is not of type 'AppModelCache',
+            or if base_path is not of type 'pathlib.Path'.
+        :param model_cache: The fitted models to save.
+        :type model_cache: AppModelCache
+        :param base_path: The base path to save the fitted models.
+            It defaults to values paths.APP_PROF_DATA_DIR_PATH if is not running as a test and to
+            paths.TEST_APP_PROF_DATA_DIR_PATH if it is.
+        :type base_path: pathlib.Path
+        """
+        if not isinstance(model_cache, AppModelCache):
+            raise TypeError(expected_type_but_received_message.format("model_cache", "AppModelCache", model_cache))
+
+        app_profile_file_path = AppProfileDataManager.__get_app_profile_file_path(
+            app_profile_name=model_cache.get_application_name(), base_path=base_path)
+        model_cache_file_path = AppProfileDataManager.__get_model_cache_file_path(app_profile_file_path)
+        model_cache_json = json.dumps(model_cache.dict_format())
+        AppProfileDataManager.__write_file_atomically(
+            model_cache_file_path, lambda file_path: file_path.write_text(model_cache_json))
 
     @staticmethod
     def __get_app_profile_file_path(app_profile_name: str, base_path: Path = __path_to_use) -> Path:
@@ -137,12 +249,34 @@ class AppProfileDataManager:
         matching_index = data_frame.index[data_frame[AppProfileAttribute.app_name.name] == app_profile_name].tolist()
         if len(matching_index) == 0:
             data_frame = data_frame.append({AppProfileAttribute.app_name.name: app_profile_name}, ignore_index=True)
-            data_frame.to_csv(mapping_path)
+            AppProfileDataManager.__write_file_atomically(mapping_path, data_frame.to_csv)
         matching_index = data_frame.index[data_frame[AppProfileAttribute.app_name.name] == app_profile_name].tolist()
         index = matching_index[0]
         file_name = f"{index}.csv"
         return base_path / file_name
 
+    @staticmethod
+    def __get_app_profile_state_file_path(app_profile_file_path: Path) -> Path:
+        """
+        Gets the file path of the App Profile state. The state is saved next to the App Profile file.
+        :param app_profile_file_path: The file path of the App profile.
+        :type app_profile_file_path: pathlib.Path
+        :return: The file path of the App profile state.
+        :rtype: pathlib.Path
+        """
+        return app_profile_file_path.with_name(app_profile_file_path.stem + wades_config.app_profile_state_file_suffix)
+
+    @staticmethod
+    def __get_model_cache_file_path(app_profile_file_path: Path) -> Path:
+        """
+        Gets the file path of the fitted models of an application. They are saved next to the App Profile file.
+        :param app_profile_file_path: The file path of the App profile.
+        :type app_profile_file_path: pathlib.Path
+        :return: The file path of the fitted models.
+        :rtype: pathlib.Path
+        """
+        return app_profile_file_path.with_name(app_profile_file_path.stem + wades_config.app_model_cache_file_suffix)
+
     @staticmethod
     def __get_saved_app_profiles_file_names_mapping_dataframe(base_path: Path = __path_to_use) -> DataFrame:
         """
@@ -161,10 +295,12 @@ class AppProfileDataManager:
         mapping_path = base_path / wades_config.app_profile_file_names_map
         if not mapping_path.exists():
             data_frame = pandas.DataFrame(columns=[AppProfileAttribute.app_name.name])
-            data_frame.to_csv(mapping_path, index=True)
+            AppProfileDataManager.__write_file_atomically(
+                mapping_path, lambda file_path: data_frame.to_csv(file_path, index=True))
         return pandas.read_csv(mapping_path, index_col=0)
 
     @staticmethod
+    @BenchmarkingUtils.traced()
     def get_saved_app_profiles_names(base_path: Path = __path_to_use) -> Set[str]:
         """
         Gets the names of the saved application profiles.
@@ -217,6 +353,7 @@ class AppProfileDataManager:
             return
 
     @staticmethod
+    @BenchmarkingUtils.traced()
     def save_last_retrieved_data_timestamp(retrieval_timestamp: datetime,
                                            retrieval_timestamp_file_path: Path = __default_retrieval_timestamp_file) \
             -> None:
@@ -261,6 +398,7 @@ class AppProfileDataManager:
             return None
 
     @staticmethod
+    @BenchmarkingUtils.traced()
     def save_abnormal_apps(abnormal_apps: List[AppSummary],
                            abnormal_apps_file_path: Path = __default_abnormal_apps_file) -> None:
         """
@@ -292,6 +430,8 @@ class AppProfileDataManager:
         abnormal_app_columns = [enum.name for enum in AppSummaryAttribute]
         abnormal_app_columns.remove(AppSummaryAttribute.modelled_app_details.name)
         abnormal_app_columns.remove(AppSummaryAttribute.latest_retrieved_app_details.name)
+        abnormal_app_columns.remove(AppSummaryAttribute.anomalous_points_count.name)
+        abnormal_app_columns.remove(AppSummaryAttribute.worst_point.name)
         abnormal_app_columns.append(data_retrieval_timestamp_name)
 
         abnormal_apps_parsed = list()
@@ -351,6 +491,8 @@ class AppProfileDataManager:
         abnormal_app_columns = [enum.name for enum in AppSummaryAttribute]
         abnormal_app_columns.remove(AppSummaryAttribute.modelled_app_details.name)
         abnormal_app_columns.remove(AppSummaryAttribute.latest_retrieved_app_details.name)
+        abnormal_app_columns.remove(AppSummaryAttribute.anomalous_points_count.name)
+        abnormal_app_columns.remove(AppSummaryAttribute.worst_point.name)
         abnormal_app_columns.append(data_retrieval_timestamp_name)
 
         try:
@@ -368,3 +510,187 @@ class AppProfileDataManager:
             pass
 
         return abnormal_apps_dict
+
+    @staticmethod
+    @BenchmarkingUtils.traced()
+    def get_saved_abnormal_apps_page(abnormal_apps_query: AbnormalAppsQuery,
+                                     abnormal_apps_file_path: Path = __default_abnormal_apps_file) -> dict:
+        """
+        Retrieves a page of the saved abnormal apps that match a query. The file is read record by record from the
+        cursor of the query, so the memory used is bounded by the size of the page, whatever the size of the file.
+        Records are parsed by csv.reader, so quoted values can span several lines. A page
+        ends once it has the limit of the query, at the end of the file, or after
+        wades_config.history_query_max_scanned_records records; the next one starts at the cursor it returns.
+        :raises TypeError if abnormal_apps_query is not of type 'AbnormalAppsQuery',
+                or if abnormal_apps_file_path is not of type 'pathlib.Path'.
+        :raises ValueError if the cursor of the query is not the start of a record.
+        :param abnormal_apps_query: The filters, cursor and limit of the page.
+        :type abnormal_apps_query: AbnormalAppsQuery
+        :param abnormal_apps_file_path: The file path of the saved abnormal apps.
+        :type abnormal_apps_file_path: pathlib.Path
+        :return: The page. The records are in the order they were saved. If the file doesn't exist, the page is empty.
+            Format:
+                {
+                    "abnormal_apps": [
+                        {
+                            "app_name": "Some name",
+                            "error_message": "Some error message",
+                            "risk": "high",
+                            "abnormal_attributes": [],
+                            "data_retrieval_timestamps": "2021-01-31 20:09:03:771116"
+                        }, ...
+                    ],
+                    "next_cursor": 34502,
+                    "has_more": true
+                }
+            Once has_more is false, next_cursor is the end of the file, where the records saved later will start.
+        :rtype: dict
+        """
+        if not isinstance(abnormal_apps_query, AbnormalAppsQuery):
+            raise TypeError(expected_type_but_received_message.format("abnormal_apps_query", "AbnormalAppsQuery",
+                                                                      abnormal_apps_query))
+        if not isinstance(abnormal_apps_file_path, Path):
+            raise TypeError(expected_type_but_received_message.format("abnormal_apps_file_path", "pathlib.Path",
+                                                                      abnormal_apps_file_path))
+
+        abnormal_apps = list()
+        cursor = abnormal_apps_query.get_cursor()
+        has_more = False
+        try:
+            with open(abnormal_apps_file_path, "rb") as abnormal_apps_file:
+                read_state = {"is_incomplete": False}
+                # The position of the file is the end of the latest record read.
+                records_reader = csv.reader(AppProfileDataManager.__read_saved_lines(abnormal_apps_file, read_state))
+                column_names = next(records_reader, list())
+                cursor = AppProfileDataManager.__seek_abnormal_apps_cursor(abnormal_apps_file, cursor)
+                scanned_records_count = 0
+                while True:
+                    if len(abnormal_apps) >= abnormal_apps_query.get_limit() or \
+                            scanned_records_count >= wades_config.history_query_max_scanned_records:
+                        has_more = len(abnormal_apps_file.readline().rstrip(b"\r\n")) > 0
+                        break
+                    values = next(records_reader, None)
+                    # A record that reaches the end of the file is still being saved, so it belongs to the next page.
+                    if values is None or read_state["is_incomplete"]:
+                        break
+                    cursor = abnormal_apps_file.tell()
+                    scanned_records_count += 1
+                    record = AppProfileDataManager.__get_matching_abnormal_app(dict(zip(column_names, values)),
+                                                                               abnormal_apps_query)
+                    if record is not None:
+                        abnormal_apps.append(record)
+        except FileNotFoundError:
+            pass
+
+        return {"abnormal_apps": abnormal_apps, "next_cursor": cursor, "has_more": has_more}
+
+    @staticmethod
+    def __seek_abnormal_apps_cursor(abnormal_apps_file: BinaryIO, cursor: int) -> int:
+        """
+        Moves a file of saved abnormal apps, whose header was just read, to the cursor of a query.
+        :raises ValueError if the cursor is not the start of a record.
+        :param abnormal_apps_file: The file of saved abnormal apps, opened in binary mode.
+        :type abnormal_apps_file: BinaryIO
+        :param cursor: The cursor of the query. 0 is the first record.
+        :type cursor: int
+        :return: The position of the first record to read.
+        :rtype: int
+        """
+        if cursor == 0:
+            return abnormal_apps_file.tell()
+        if cursor < abnormal_apps_file.tell():
+            raise ValueError(expected_value_but_received_message.format("cursor", "the start of a record", cursor))
+        abnormal_apps_file.seek(cursor - 1)
+        if abnormal_apps_file.read(1) != b"\n":
+            raise ValueError(expected_value_but_received_message.format("cursor", "the start of a record", cursor))
+        return cursor
+
+    @staticmethod
+    def __get_matching_abnormal_app(record: Dict[str, str], abnormal_apps_query: AbnormalAppsQuery) \
+            -> Union[dict, None]:
+        """
+        Converts a saved abnormal app record if it matches the filters of a query.
+        :param record: The saved values of the record mapped by column name.
+        :type record: Dict[str, str]
+        :param abnormal_apps_query: The query.
+        :type abnormal_apps_query: AbnormalAppsQuery
+        :return: The record, with its abnormal attributes as a list and an empty error message as None. None if it
+            doesn't match the query.
+        :rtype: Union[dict, None]
+        """
+        if not abnormal_apps_query.matches(
+                app_name=record.get(AppSummaryAttribute.app_name.name),
+                risk=record.get(AppSummaryAttribute.risk.name),
+                retrieval_timestamp=record.get(AppProfileAttribute.data_retrieval_timestamps.name, "")):
+            return None
+        record[AppSummaryAttribute.abnormal_attributes.name] = \
+            ast.literal_eval(record[AppSummaryAttribute.abnormal_attributes.name])
+        if not abnormal_apps_query.matches_abnormal_attributes(record[AppSummaryAttribute.abnormal_attributes.name]):
+            return None
+        if record.get(AppSummaryAttribute.error_message.name) == "":
+            record[AppSummaryAttribute.error_message.name] = None
+        return record
+
+    @staticmethod
+    def __read_saved_lines(binary_file: BinaryIO, read_state: dict) -> Iterator[str]:
+        """
+        Reads the lines of a binary file one at a time, as they are needed, so that the position of the file is the end
+        of the latest line read. It stops at the first line without its line end, which is still being saved, and sets
+        the 'is_incomplete' key of read_state to True.
+        :param binary_file: The file to read, opened in binary mode.
+        :type binary_file: BinaryIO
+        :param read_state: The state of the reading, updated by this generator.
+        :type read_state: dict
+        :return: The decoded lines, with their line ends.
+        :rtype: Iterator[str]
+        """
+        while True:
+            line = binary_file.readline()
+            if not line.endswith(b"\n"):
+                read_state["is_incomplete"] = True
+                return
+            yield line.decode()
+
+    @staticmethod
+    @BenchmarkingUtils.traced()
+    def save_daemon_snapshot(daemon_snapshot: dict, daemon_snapshot_file_path: Path = __default_daemon_snapshot_file) \
+            -> None:
+        """
+        Saves the state of the daemon in a single zlib-compressed json file. The file is written next to its final
+        path and then moved over it, so a crash while saving never leaves a partial snapshot.
+        :raises TypeError if daemon_snapshot is not of type 'dict',
+                or if daemon_snapshot_file_path is not of type 'pathlib.Path'.
+        :param daemon_snapshot: The json-serializable state of the daemon.
+        :type daemon_snapshot: dict
+        :param daemon_snapshot_file_path: The path of the snapshot file.
+        :type daemon_snapshot_file_path: pathlib.Path
+        """
+        if not isinstance(daemon_snapshot, dict):
+            raise TypeError(expected_type_but_received_message.format("daemon_snapshot", "dict", daemon_snapshot))
+        if not isinstance(daemon_snapshot_file_path, Path):
+            raise TypeError(expected_type_but_received_message.format("daemon_snapshot_file_path", "pathlib.Path",
+                                                                      daemon_snapshot_file_path))
+
+        compressed_daemon_snapshot = zlib.compress(json.dumps(daemon_snapshot).encode())
+        AppProfileDataManager.__write_file_atomically(
+            daemon_snapshot_file_path, lambda file_path: file_path.write_bytes(compressed_daemon_snapshot))
+
+    @staticmethod
+    def get_daemon_snapshot(daemon_snapshot_file_path: Path = __default_daemon_snapshot_file) -> Union[dict, None]:
+        """
+        Gets the state of the daemon saved by 'save_daemon_snapshot'.
+        :raises TypeError if daemon_snapshot_file_path is not of type 'pathlib.Path'.
+        :param daemon_snapshot_file_path: The path of the snapshot file.
+        :type daemon_snapshot_file_path: pathlib.Path
+        :return: The state of the daemon. None if the file doesn't exist or can't be read.
+        :rtype: Union[dict, None]
+        """
+        if not isinstance(daemon_snapshot_file_path, Path):
+            raise TypeError(expected_type_but_received_message.format("daemon_snapshot_file_path", "pathlib.Path",
+                                                                      daemon_snapshot_file_path))
+        try:
+            with open(daemon_snapshot_file_path, "rb") as file:
+                daemon_snapshot = json.loads(zlib.decompress(file.read()).decode())
+        except (FileNotFoundError, zlib.error, ValueError):
+            return None
+        return daemon_snapshot if isinstance(daemon_snapshot, dict) else None
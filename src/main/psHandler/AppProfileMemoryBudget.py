@@ -0,0 +1,141 @@
+from collections import OrderedDict
+from typing import List
+
+import wades_config
+from src.utils.error_messages import expected_type_but_received_message, expected_value_but_received_message
+
+
+class AppProfileMemoryBudget:
+
+    def __init__(self, budget_bytes: int = wades_config.app_profiles_memory_budget_bytes) -> None:
+        """
+        Keeps track of the estimated size of the application profiles, ordered from the least to the most recently
+        seen application, so the total can be kept under a memory budget.
+        :raises TypeError if budget_bytes is not of type 'int'.
+        :raises ValueError if budget_bytes is negative.
+        :param budget_bytes: The memory budget shared by all the application profiles in bytes.
+        :type budget_bytes: int
+        """
+        if not isinstance(budget_bytes, int):
+            raise TypeError(expected_type_but_received_message.format("budget_bytes", "int", budget_bytes))
+        if budget_bytes < 0:
+            raise ValueError(expected_value_but_received_message.format("budget_bytes", "non-negative", budget_bytes))
+
+        self.__budget_bytes = budget_bytes
+        self.__app_profile_sizes = OrderedDict()  # Least recently seen applications first.
+        self.__total_size_bytes = 0
+
+    def get_budget_bytes(self) -> int:
+        """
+        Gets the memory budget shared by all the application profiles.
+        :return: The memory budget in bytes.
+        :rtype: int
+        """
+        return self.__budget_bytes
+
+    def get_total_size_bytes(self) -> int:
+        """
+        Gets the estimated size of all the tracked application profiles.
+        :return: The estimated size of all the tracked application profiles in bytes.
+        :rtype: int
+        """
+        return self.__total_size_bytes
+
+    def get_tracked_application_names(self) -> List[str]:
+        """
+        Gets the names of the tracked applications, from the least to the most recently seen.
+        :return: The names of the tracked applications.
+        :rtype: List[str]
+        """
+        return list(self.__app_profile_sizes.keys())
+
+    def is_over_budget(self) -> bool:
+        """
+        Checks if the tracked application profiles use more memory than the budget.
+        :return: True if the budget is exceeded, False otherwise.
+        :rtype: bool
+        """
+        return self.__total_size_bytes > self.__budget_bytes
+
+    def mark_seen(self, app_name: str, size_bytes: int) -> None:
+        """
+        Registers the size of an application profile and marks it as the most recently seen application.
+        :raises TypeError if app_name is not of type 'str' or if size_bytes is not of type 'int'.
+        :param app_name: The name of the application.
+        :type app_name: str
+        :param size_bytes: The estimated size of the application profile in bytes.
+        :type size_bytes: int
+        """
+        self.resize(app_name=app_name, size_bytes=size_bytes)
+        self.__app_profile_sizes.move_to_end(app_name)
+
+    def resize(self, app_name: str, size_bytes: int) -> None:
+        """
+        Updates the size of an application profile without changing how recently it was seen.
+        :raises TypeError if app_name is not of type 'str' or if size_bytes is not of type 'int'.
+        :param app_name: The name of the application.
+        :type app_name: str
+        :param size_bytes: The estimated size of the application profile in bytes.
+        :type size_bytes: int
+        """
+        if not isinstance(app_name, str):
+            raise TypeError(expected_type_but_received_message.format("app_name", "str", app_name))
+        if not isinstance(size_bytes, int):
+            raise TypeError(expected_type_but_received_message.format("size_bytes", "int", size_bytes))
+
+        self.__total_size_bytes += size_bytes - self.__app_profile_sizes.get(app_name, 0)
+        self.__app_profile_sizes[app_name] = size_bytes
+
+    def remove(self, app_name: str) -> None:
+        """
+        Stops tracking an application profile.
+        :param app_name: The name of the application.
+        :type app_name: str
+        """
+        self.__total_size_bytes -= self.__app_profile_sizes.pop(app_name, 0)
+
+    def get_applications_to_compact(self) -> List[str]:
+        """
+        Gets the least recently seen applications whose profiles should be compacted to get back under the budget.
+        :return: The names of the applications to compact, from the least to the most recently seen.
+        :rtype: List[str]
+        """
+        bytes_to_free = self.__total_size_bytes - self.__budget_bytes
+        applications_to_compact = list()
+        for app_name, size_bytes in self.__app_profile_sizes.items():
+            if bytes_to_free <= 0:
+                break
+            applications_to_compact.append(app_name)
+            bytes_to_free -= size_bytes
+        return applications_to_compact
+
+    def dict_format(self) -> dict:
+        """
+        Converts the tracker into a json-serializable dictionary.
+        Format:
+            {
+                app_profile_sizes: [[app_name_1, 23424], [app_name_2, 2342], ...]
+            }
+        The application profiles are listed from the least to the most recently seen. The budget isn't part of the
+        dictionary, so that a changed configuration applies to a restored tracker.
+        :return: The tracker as a dictionary.
+        :rtype: dict
+        """
+        return {
+            "app_profile_sizes": [[app_name, size_bytes] for app_name, size_bytes in self.__app_profile_sizes.items()]
+        }
+
+    def set_value_from_dict(self, memory_budget_dict: dict) -> None:
+        """
+        Sets the tracked application profiles from a dictionary. Any old ones will be lost. The budget is kept.
+        :raises TypeError if memory_budget_dict is not of type 'dict'.
+        :param memory_budget_dict: The tracker as a dictionary. For more info about the format: 'dict_format()'.
+        :type memory_budget_dict: dict
+        """
+        if not isinstance(memory_budget_dict, dict):
+            raise TypeError(expected_type_but_received_message.format("memory_budget_dict", "dict",
+                                                                      memory_budget_dict))
+
+        self.__app_profile_sizes = OrderedDict(
+            (app_name, size_bytes) for app_name, size_bytes in memory_budget_dict["app_profile_sizes"])
+        self.__total_size_bytes = sum(self.__app_profile_sizes.values())
@@ -2,28 +2,62 @@ import copy
 import datetime
 import logging
 import time
-from typing import Dict, List, Union, Set
+from typing import Dict, List, Union, Set, Tuple
 
 import psutil
 
+import wades_config
 from src.main.common.AppProfile import AppProfile
+from src.main.common.MetricsRegistry import MetricsRegistry
+from src.main.common.PathMatcher import PathMatcher
 from src.main.common.enum.ProcessAttribute import ProcessAttribute
+from src.main.psHandler.AppProfileCache import AppProfileCache
 from src.main.psHandler.AppProfileDataManager import AppProfileDataManager
+from src.main.psHandler.AppProfileMemoryBudget import AppProfileMemoryBudget
+from src.utils.BenchmarkingUtils import BenchmarkingUtils
 from src.utils.error_messages import expected_type_but_received_message, expected_application_message
 
 
 class ProcessHandler:
 
-    def __init__(self, logger_name: str = "ProcessHandler"):
+    def __init__(self, logger_name: str = "ProcessHandler", app_profile_cache: Union[AppProfileCache, None] = None,
+                 metrics_registry: Union[MetricsRegistry, None] = None):
         """
         Abstracts the daemon that collects information about the running processes.
+        :raises TypeError if app_profile_cache is not of type 'Union[AppProfileCache, None]',
+                or if metrics_registry is not of type 'Union[MetricsRegistry, None]'.
         :param logger_name: The name of the logger.
         :type logger_name: str
+        :param app_profile_cache: The in-memory application profiles. If None, the profiles are loaded from disk.
+        :type app_profile_cache: Union[AppProfileCache, None]
+        :param metrics_registry: The registry of the collection duration, the processes seen and skipped, and the
+                bytes written. If None, they are not measured.
+        :type metrics_registry: Union[MetricsRegistry, None]
         """
+        if app_profile_cache is not None and not isinstance(app_profile_cache, AppProfileCache):
+            raise TypeError(expected_type_but_received_message.format("app_profile_cache",
+                                                                      "Union[AppProfileCache, None]",
+                                                                      app_profile_cache))
+        if metrics_registry is not None and not isinstance(metrics_registry, MetricsRegistry):
+            raise TypeError(expected_type_but_received_message.format("metrics_registry",
+                                                                      "Union[MetricsRegistry, None]",
+                                                                      metrics_registry))
+        self.__app_profile_cache = app_profile_cache
+        self.__metrics_registry = metrics_registry
         self.__detected_app_profile_names = set()
+        self.__prohibited_files_app_names = set()
         self.__logger_name = logger_name
         self.__latest_retrieval_time = None
         self.__attrs_to_retrieve = [enum.name for enum in ProcessAttribute if enum.name != 'children_count']
+        self.__memory_budget = AppProfileMemoryBudget()
+
+    def get_memory_budget(self) -> AppProfileMemoryBudget:
+        """
+        Gets the memory budget tracker of the application profiles handled by this instance.
+        :return: The memory budget tracker.
+        :rtype: AppProfileMemoryBudget
+        """
+        return self.__memory_budget
 
     def get_latest_retrieved_data_timestamp(self) -> Union[None, datetime.datetime]:
         """
@@ -41,20 +75,71 @@ class ProcessHandler:
         """
         return copy.deepcopy(self.__detected_app_profile_names)
 
-    def __collect_running_processes_and_group_by_application(self) -> Dict[str, list]:
+    def get_prohibited_files_app_names(self) -> Set[str]:
+        """
+        Gets the applications that had a prohibited file open in the latest retrieval.
+        :return: The names of the applications that had a prohibited file open.
+        :rtype: Set[str]
+        """
+        return copy.deepcopy(self.__prohibited_files_app_names)
+
+    def dict_format(self) -> dict:
+        """
+        Converts the in-memory state of the process handler into a json-serializable dictionary.
+        Format:
+            {
+                detected_app_profile_names: [app_name_1, app_name_2, ...],
+                prohibited_files_app_names: [app_name_2, ...],
+                latest_retrieval_time: "2020-12-13 14:30:32:34.232",
+                memory_budget: {...}
+            }
+        :return: The state of the process handler as a dictionary.
+        :rtype: dict
+        """
+        latest_retrieval_time = self.__latest_retrieval_time.strftime(wades_config.datetime_format) \
+            if self.__latest_retrieval_time is not None else None
+        return {
+            "detected_app_profile_names": sorted(self.__detected_app_profile_names),
+            "prohibited_files_app_names": sorted(self.__prohibited_files_app_names),
+            "latest_retrieval_time": latest_retrieval_time,
+            "memory_budget": self.__memory_budget.dict_format()
+        }
+
+    def set_value_from_dict(self, process_handler_dict: dict) -> None:
         """
-        Collect the running processes information and group them by application name.
-        :return: A map with the application name and its running processes.
-            Format:
+        Sets the in-memory state of the process handler from a dictionary. Any old state will be lost.
+        :raises TypeError if process_handler_dict is not of type 'dict'.
+        :param process_handler_dict: The state of the process handler as a dictionary. For more info about the format:
+                'dict_format()'.
+        :type process_handler_dict: dict
+        """
+        if not isinstance(process_handler_dict, dict):
+            raise TypeError(expected_type_but_received_message.format("process_handler_dict", "dict",
+                                                                      process_handler_dict))
+
+        self.__detected_app_profile_names = set(process_handler_dict["detected_app_profile_names"])
+        self.__prohibited_files_app_names = set(process_handler_dict["prohibited_files_app_names"])
+        latest_retrieval_time = process_handler_dict["latest_retrieval_time"]
+        self.__latest_retrieval_time = datetime.datetime.strptime(latest_retrieval_time, wades_config.datetime_format) \
+            if latest_retrieval_time is not None else None
+        self.__memory_budget.set_value_from_dict(process_handler_dict["memory_budget"])
+
+    @BenchmarkingUtils.traced()
+    def collect_running_processes(self) -> Tuple[datetime.datetime, Dict[str, list]]:
+        """
+        Collects the running processes information and groups it by application name, without saving it.
+        :return: The retrieval timestamp and a map with the application name and its running processes.
+            Format of the map:
                 {
                     application_name_1: [process_dict_1, process_dict_2],
                     application_name_2: [...],
                     ...
                 }
-        :rtype: Dict[str, Dict[int, psutil.Process]]
+        :rtype: Tuple[datetime.datetime, Dict[str, list]]
         """
+        start_time = time.perf_counter()
         application_name_to_processes_map = dict()
-        process_dicts = self.__get_process_info_as_list_of_dict()
+        retrieval_time, process_dicts = self.__get_process_info_as_list_of_dict()
         logger = logging.getLogger(self.__logger_name)
         for process_dict in process_dicts:
 
@@ -66,19 +151,22 @@ class ProcessHandler:
         logger.info(
             "Found processes for applications - {}".format(application_name_to_processes_map.keys())
         )
-        return application_name_to_processes_map
+        if self.__metrics_registry is not None:
+            self.__metrics_registry.observe("collection_duration_seconds", time.perf_counter() - start_time)
+        return retrieval_time, application_name_to_processes_map
 
-    def __get_process_info_as_list_of_dict(self) -> List[dict]:
+    @BenchmarkingUtils.traced()
+    def __get_process_info_as_list_of_dict(self) -> Tuple[datetime.datetime, List[dict]]:
         """
         Gets the process information as a list of dictionaries.
-        :return: A list of dictionaries that contains information about the processes.
-        :rtype: List[dict]
+        :return: The retrieval timestamp and a list of dictionaries that contains information about the processes.
+        :rtype: Tuple[datetime.datetime, List[dict]]
         """
         logger = logging.getLogger(self.__logger_name)
         logger.info("Retrieving running processes information.")
 
         processes_list = list()
-        self.__latest_retrieval_time = datetime.datetime.now()
+        retrieval_time = datetime.datetime.now()
         processes = list(psutil.process_iter())
         for process in processes:
             try:
@@ -99,13 +187,20 @@ class ProcessHandler:
 
             except (psutil.AccessDenied, psutil.NoSuchProcess, psutil.ZombieProcess) as psutil_error:
                 logger.exception(psutil_error)
+                if self.__metrics_registry is not None:
+                    self.__metrics_registry.increment("processes_skipped_total",
+                                                      labels={"reason": type(psutil_error).__name__})
 
         logger.info("Finished retrieving and handling {} processes.".format(len(processes_list)))
+        if self.__metrics_registry is not None:
+            self.__metrics_registry.increment("processes_seen_total", len(processes))
 
-        return processes_list
+        return retrieval_time, processes_list
 
+    @BenchmarkingUtils.traced()
     def __add_processes_to_application_profile_and_save(self, application_name: str,
-                                                        application_processes: List[dict]) -> None:
+                                                        application_processes: List[dict],
+                                                        retrieval_time: datetime.datetime) -> None:
         """
         Adds the process information to its respective application profile.
         :raises TypeError if application_name is not of type 'str' or application_processes is not pf type 'List[dict]'.
@@ -114,16 +209,25 @@ class ProcessHandler:
         :type application_name: str
         :param application_processes: The list of processes associated to the application.
         :type application_processes: List[dict]
+        :param retrieval_time: The timestamp of the retrieval of the processes.
+        :type retrieval_time: datetime.datetime
         """
         if not isinstance(application_name, str):
             raise TypeError(expected_type_but_received_message.format("application_name", 'str', application_name))
         if not isinstance(application_processes, list):
             raise TypeError(expected_type_but_received_message.format("application_processes", 'List[dict]',
                                                                       application_processes))
-        saved_app_profile = AppProfileDataManager.get_saved_profile(application_name)
+        saved_app_profile = self.__get_app_profile_to_update(application_name)
         if saved_app_profile is None:
             saved_app_profile = AppProfile(application_name=application_name)
 
+        memory_usages = list()
+        children_counts = list()
+        users = list()
+        open_files = list()
+        cpu_percentages = list()
+        threads_numbers = list()
+        connections_numbers = list()
         for process in application_processes:
             if not isinstance(process, dict):
                 raise TypeError(expected_type_but_received_message.format("application_processes", 'List[dict]',
@@ -132,34 +236,119 @@ class ProcessHandler:
             if process_name != application_name:
                 raise ValueError(expected_application_message.format(application_name, process_name))
 
-            rss_memory = process[ProcessAttribute.memory_info.name].rss
-            children_count = process[ProcessAttribute.children_count.name]
-            users = [process[ProcessAttribute.username.name]] if process[ProcessAttribute.username.name] is not None \
-                else list()
-            open_files = process.get(ProcessAttribute.open_files.name, list())
-            open_files = open_files if open_files is not None else list()
-            cpu_percentage = process[ProcessAttribute.cpu_percent.name]
-            num_threads = process[ProcessAttribute.num_threads.name]
-            connections_num = process[ProcessAttribute.connections.name]
-            saved_app_profile.add_new_information(memory_usage=rss_memory, child_processes_count=children_count,
-                                                  users=users,
-                                                  open_files=open_files, cpu_percentage=cpu_percentage,
-                                                  data_retrieval_timestamp=self.__latest_retrieval_time,
-                                                  threads_number=num_threads, connections_num=connections_num)
-        AppProfileDataManager.save_app_profile(saved_app_profile)
+            memory_usages.append(process[ProcessAttribute.memory_info.name].rss)
+            children_counts.append(process[ProcessAttribute.children_count.name])
+            if process[ProcessAttribute.username.name] is not None:
+                users.append(process[ProcessAttribute.username.name])
+            process_open_files = process.get(ProcessAttribute.open_files.name, list())
+            open_files.append(process_open_files if process_open_files is not None else list())
+            cpu_percentages.append(process[ProcessAttribute.cpu_percent.name])
+            threads_numbers.append(process[ProcessAttribute.num_threads.name])
+            connections_numbers.append(process[ProcessAttribute.connections.name])
 
-    def collect_running_processes_information(self) -> None:
+        prohibited_files_matcher = PathMatcher.get_compiled_matcher(wades_config.prohibited_files)
+        if any(open_file.path in prohibited_files_matcher
+               for process_open_files in open_files for open_file in process_open_files):
+            self.__prohibited_files_app_names.add(application_name)
+
+        saved_app_profile.add_new_information_batch(memory_usages=memory_usages,
+                                                    child_processes_counts=children_counts,
+                                                    users=users, open_files=open_files,
+                                                    cpu_percentages=cpu_percentages,
+                                                    data_retrieval_timestamp=retrieval_time,
+                                                    threads_numbers=threads_numbers,
+                                                    connections_numbers=connections_numbers)
+        if wades_config.use_quantile_sketches:
+            saved_app_profile.update_quantile_sketches()
+        saved_app_profile.apply_sliding_window(max_samples=wades_config.app_profile_max_samples,
+                                               max_time_span_sec=wades_config.app_profile_max_time_span_sec,
+                                               max_size_bytes=wades_config.app_profile_max_size_bytes)
+        self.__save_app_profile(saved_app_profile)
+        self.__memory_budget.mark_seen(application_name, saved_app_profile.get_estimated_size_bytes())
+
+    def __get_app_profile_to_update(self, app_name: str) -> Union[AppProfile, None]:
         """
-        Collects running process information. To get the information call get_registered_app_profiles_as_dict.
+        Gets an application profile that can be changed, from the profile cache if there is one.
+        :param app_name: The name of the application.
+        :type app_name: str
+        :return: The application profile. None if it isn't saved.
+        :rtype: Union[AppProfile, None]
+        """
+        if self.__app_profile_cache is not None:
+            return self.__app_profile_cache.get_copy(app_name)
+        return AppProfileDataManager.get_saved_profile(app_name)
+
+    def __save_app_profile(self, app_profile: AppProfile) -> None:
+        """
+        Saves an application profile, and puts it in the profile cache if there is one.
+        :param app_profile: The application profile.
+        :type app_profile: AppProfile
+        """
+        if self.__app_profile_cache is not None:
+            written_bytes_count = self.__app_profile_cache.put(app_profile)
+        else:
+            written_bytes_count = AppProfileDataManager.save_app_profile(app_profile)
+        if self.__metrics_registry is not None:
+            self.__metrics_registry.increment("app_profiles_saved_total")
+            self.__metrics_registry.increment("app_profile_written_bytes_total", written_bytes_count)
+
+    @BenchmarkingUtils.traced()
+    def __enforce_memory_budget(self) -> None:
+        """
+        Compacts the profiles of the least recently seen applications until all profiles fit in the memory budget.
+        A compacted profile only keeps its latest retrieved data, the rest is evicted into its baseline.
         """
         logger = logging.getLogger(self.__logger_name)
-        logger.info("Started retrieving running processes information.")
-        app_name_to_processes_map = self.__collect_running_processes_and_group_by_application()
+        for app_name in self.__memory_budget.get_applications_to_compact():
+            app_profile = self.__get_app_profile_to_update(app_name)
+            if app_profile is None:
+                self.__memory_budget.remove(app_name)
+                continue
+            evicted_samples_count = app_profile.evict_oldest_samples(app_profile.get_samples_count())
+            self.__save_app_profile(app_profile)
+            self.__memory_budget.resize(app_name, app_profile.get_estimated_size_bytes())
+            logger.info("Memory budget exceeded. Evicted {} samples from {}.".format(evicted_samples_count, app_name))
+
+    @BenchmarkingUtils.traced()
+    def save_running_processes(self, retrieval_time: datetime.datetime,
+                               app_name_to_processes_map: Dict[str, list]) -> None:
+        """
+        Adds the collected running processes information to the application profiles and saves them.
+        :raises TypeError if retrieval_time is not of type 'datetime.datetime',
+                or if app_name_to_processes_map is not of type 'Dict[str, list]'.
+        :param retrieval_time: The timestamp of the retrieval of the processes.
+        :type retrieval_time: datetime.datetime
+        :param app_name_to_processes_map: The running processes mapped by application name. For more info about the
+                format: 'collect_running_processes()'.
+        :type app_name_to_processes_map: Dict[str, list]
+        """
+        if not isinstance(retrieval_time, datetime.datetime):
+            raise TypeError(expected_type_but_received_message.format("retrieval_time", "datetime.datetime",
+                                                                      retrieval_time))
+        if not isinstance(app_name_to_processes_map, dict):
+            raise TypeError(expected_type_but_received_message.format("app_name_to_processes_map", "Dict[str, list]",
+                                                                      app_name_to_processes_map))
+
+        self.__latest_retrieval_time = retrieval_time
         self.__detected_app_profile_names = set(app_name_to_processes_map.keys())
+        self.__prohibited_files_app_names = set()
         for app_name, processes in app_name_to_processes_map.items():
             self.__add_processes_to_application_profile_and_save(application_name=app_name,
-                                                                 application_processes=processes)
-        AppProfileDataManager.save_last_retrieved_data_timestamp(self.__latest_retrieval_time)
+                                                                 application_processes=processes,
+                                                                 retrieval_time=retrieval_time)
+        if self.__memory_budget.is_over_budget():
+            self.__enforce_memory_budget()
+        AppProfileDataManager.save_last_retrieved_data_timestamp(retrieval_time)
+
+    def collect_running_processes_information(self) -> None:
+        """
+        Collects running process information and saves it. To get the information call
+        get_registered_app_profiles_as_dict.
+        """
+        logger = logging.getLogger(self.__logger_name)
+        logger.info("Started retrieving running processes information.")
+        retrieval_time, app_name_to_processes_map = self.collect_running_processes()
+        self.save_running_processes(retrieval_time, app_name_to_processes_map)
 
     @staticmethod
     def is_application_recently_retrieved(app_profile: AppProfile) -> bool:
@@ -0,0 +1,217 @@
+import json
+import socket
+from pathlib import Path
+from typing import Any, Iterator, Tuple, Union
+
+import wades_config
+from src.main.common.enum.ResponseEncoding import ResponseEncoding
+from src.main.server.ControlServer import ControlServer
+from src.main.server.FrameProtocol import FrameProtocol
+from src.utils.error_messages import expected_type_but_received_message
+
+
+class ControlClient:
+
+    def __init__(self, unix_socket_path: Union[Path, None] = None, host: str = wades_config.localhost_address,
+                 port: int = wades_config.modeller_thread_port, timeout_sec: Union[float, None] = None) -> None:
+        """
+        Sends commands to the control server over one persistent connection, with the framed protocol. For more info
+        about the format: 'src.main.server.FrameProtocol.FrameProtocol'
+        It connects to the Unix domain socket of the server if it can, and to its TCP port otherwise.
+        :raises TypeError if unix_socket_path is not of type 'Union[pathlib.Path, None]', if host is not of type
+                'str', or if port is not of type 'int'.
+        :param unix_socket_path: The path of the Unix domain socket of the server. If None, only TCP is used.
+        :type unix_socket_path: Union[pathlib.Path, None]
+        :param host: The address of the server.
+        :type host: str
+        :param port: The port of the server.
+        :type port: int
+        :param timeout_sec: The maximum number of seconds to wait for the server. If None, waits indefinitely.
+        :type timeout_sec: Union[float, None]
+        """
+        if unix_socket_path is not None and not isinstance(unix_socket_path, Path):
+            raise TypeError(expected_type_but_received_message.format("unix_socket_path", "Union[pathlib.Path, None]",
+                                                                      unix_socket_path))
+        if not isinstance(host, str):
+            raise TypeError(expected_type_but_received_message.format("host", "str", host))
+        if not isinstance(port, int):
+            raise TypeError(expected_type_but_received_message.format("port", "int", port))
+
+        self.__unix_socket_path = unix_socket_path
+        self.__host = host
+        self.__port = port
+        self.__timeout_sec = timeout_sec
+        self.__connection = None
+
+    def connect(self) -> None:
+        """
+        Opens the connection to the server, if it isn't open.
+        :raises OSError if the server can't be reached.
+        """
+        if self.__connection is not None:
+            return
+        connection = None
+        if self.__unix_socket_path is not None and hasattr(socket, "AF_UNIX"):
+            connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            connection.settimeout(self.__timeout_sec)
+            try:
+                connection.connect(str(self.__unix_socket_path))
+            except OSError:
+                # The daemon doesn't listen on the socket, or this user isn't allowed to use it.
+                connection.close()
+                connection = None
+        if connection is None:
+            connection = socket.create_connection((self.__host, self.__port), timeout=self.__timeout_sec)
+        connection.sendall(FrameProtocol.framed_connection_marker)
+        self.__connection = connection
+
+    def is_connected_to_unix_socket(self) -> bool:
+        """
+        Checks if the client is connected to the Unix domain socket of the server.
+        :return: True if the connection is open and uses the Unix domain socket, False otherwise.
+        :rtype: bool
+        """
+        return self.__connection is not None and self.__connection.family == getattr(socket, "AF_UNIX", None)
+
+    def send_request(self, command: str, response_encoding: ResponseEncoding = ResponseEncoding.json) -> Any:
+        """
+        Sends a command and waits for its response. The connection is opened if it isn't open.
+        :raises TypeError if command is not of type 'str', or if response_encoding is not of type 'ResponseEncoding'.
+        :raises OSError if the server can't be reached or closes the connection in the middle of the response.
+        :param command: The command.
+        :type command: str
+        :param response_encoding: The encoding the server must use for the response. Compressed json trades server
+                time for fewer bytes, which pays off for bulk data.
+        :type response_encoding: ResponseEncoding
+        :return: The response of the server, parsed from json.
+        :rtype: Any
+        """
+        _, _, response = self.__send(command, response_encoding)
+        return response
+
+    def send_conditional_request(self, command: str, etag: Union[str, None] = None,
+                                 response_encoding: ResponseEncoding = ResponseEncoding.json) \
+            -> Tuple[Union[str, None], Any]:
+        """
+        Sends a command, unless its response is versioned and the server still has the version of etag, in which case
+        the response isn't sent again.
+        :raises TypeError if command is not of type 'str', if etag is not of type 'Union[str, None]', or if
+                response_encoding is not of type 'ResponseEncoding'.
+        :raises OSError if the server can't be reached or closes the connection in the middle of the response.
+        :param command: The command.
+        :type command: str
+        :param etag: The ETag of the response the client already has. If None, the response is always sent.
+        :type etag: Union[str, None]
+        :param response_encoding: The encoding the server must use for the response.
+        :type response_encoding: ResponseEncoding
+        :return: The ETag of the current response, None if it isn't versioned, and the response parsed from json,
+                None if it wasn't modified.
+        :rtype: Tuple[Union[str, None], Any]
+        """
+        if etag is not None and not isinstance(etag, str):
+            raise TypeError(expected_type_but_received_message.format("etag", "Union[str, None]", etag))
+        if etag is not None:
+            command = "{} {} {}".format(command, ControlServer.if_none_match_option, etag)
+        response_etag, is_modified, response = self.__send(command, response_encoding)
+        return response_etag, response if is_modified else None
+
+    def subscribe(self, command: str, response_encoding: ResponseEncoding = ResponseEncoding.json) -> Iterator[Any]:
+        """
+        Sends a subscription command and gets its messages as they come. The connection is dedicated to the
+        subscription, so it is closed when the messages are no longer iterated, which ends the subscription.
+        :raises TypeError if command is not of type 'str', or if response_encoding is not of type 'ResponseEncoding'.
+        :raises OSError if the server can't be reached or closes the connection in the middle of a message.
+        :param command: The subscription command, with its arguments.
+        :type command: str
+        :param response_encoding: The encoding the server must use for each message.
+        :type response_encoding: ResponseEncoding
+        :return: The messages, parsed from json, until the server ends the subscription. If the server can't
+                subscribe the client, its error response is the only message.
+        :rtype: Iterator[Any]
+        """
+        request = FrameProtocol.encode_request(command, response_encoding)
+        self.connect()
+        try:
+            self.__connection.sendall(request)
+            self.__receive_exactly(self.__read_frame_size())
+            while True:
+                message = self.__receive_exactly(self.__read_frame_size())
+                if len(message) == 0:
+                    break
+                yield json.loads(FrameProtocol.decode_response(message, response_encoding))
+        finally:
+            self.close()
+
+    def __send(self, command: str, response_encoding: ResponseEncoding) -> Tuple[Union[str, None], bool, Any]:
+        """
+        Sends a command and waits for its response.
+        :param command: The command.
+        :type command: str
+        :param response_encoding: The encoding the server must use for the response.
+        :type response_encoding: ResponseEncoding
+        :return: The ETag of the response, whether it was modified, and the response parsed from json.
+        :rtype: Tuple[Union[str, None], bool, Any]
+        """
+        request = FrameProtocol.encode_request(command, response_encoding)
+        self.connect()
+        try:
+            self.__connection.sendall(request)
+            etag, is_modified = FrameProtocol.decode_response_header(self.__receive_exactly(self.__read_frame_size()))
+            encoded_response = bytearray()
+            while True:
+                chunk = self.__receive_exactly(self.__read_frame_size())
+                if len(chunk) == 0:
+                    break
+                encoded_response += chunk
+        except OSError:
+            self.close()
+            raise
+        return etag, is_modified, json.loads(FrameProtocol.decode_response(bytes(encoded_response), response_encoding))
+
+    def close(self) -> None:
+        """
+        Closes the connection to the server, if it is open.
+        """
+        if self.__connection is not None:
+            self.__connection.close()
+            self.__connection = None
+
+    def __read_frame_size(self) -> int:
+        """
+        Reads the header of the next frame.
+        :return: The size of the payload of the frame.
+        :rtype: int
+        """
+        return FrameProtocol.frame_header.unpack(self.__receive_exactly(FrameProtocol.frame_header.size))[0]
+
+    def __receive_exactly(self, size_bytes: int) -> bytes:
+        """
+        Receives an exact number of bytes from the server.
+        :raises ConnectionError if the server closes the connection before.
+        :param size_bytes: The number of bytes to receive.
+        :type size_bytes: int
+        :return: The bytes received.
+        :rtype: bytes
+        """
+        data = bytearray()
+        while len(data) < size_bytes:
+            received_data = self.__connection.recv(size_bytes - len(data))
+            if len(received_data) == 0:
+                raise ConnectionError("The server closed the connection.")
+            data += received_data
+        return bytes(data)
+
+    def __enter__(self) -> 'ControlClient':
+        """
+        Opens the connection to the server.
+        :return: The client.
+        :rtype: ControlClient
+        """
+        self.connect()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        """
+        Closes the connection to the server.
+        """
+        self.close()
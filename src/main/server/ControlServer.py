@@ -0,0 +1,677 @@
+import asyncio
+import json
+import logging
+import os
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Tuple, Union
+
+import wades_config
+from src.main.common.enum.ResponseEncoding import ResponseEncoding
+from src.main.server.FrameProtocol import FrameProtocol
+from src.main.server.Subscription import Subscription
+from src.main.server.VersionedResponse import VersionedResponse
+from src.utils.error_messages import expected_type_but_received_message, expected_value_but_received_message
+
+
+class ControlServer:
+    # Responses sent when a request can't be served.
+    unsupported_command_response = json.dumps(["Command not supported"])
+    too_many_connections_response = json.dumps(["Too many connections."])
+    request_timed_out_response = json.dumps(["Request timed out."])
+    request_failed_response = json.dumps(["Request failed."])
+    not_modified_response = json.dumps(["Not modified."])
+    framed_connection_required_response = json.dumps(["Command requires a framed connection."])
+    # Option appended to a command, followed by an ETag, to get the not modified response if the ETag of the
+    # response is still the same, e.g. "modelled apps --if-none-match 3f2a9c1d0b7e6a54".
+    if_none_match_option = "--if-none-match"
+    # Maximum size of a request, in bytes.
+    max_request_size_bytes = 1024
+    # One-shot requests starting with this method are served as HTTP requests, for the paths registered with
+    # 'register_http_path()'.
+    http_get_method = b"GET "
+
+    def __init__(self, host: str = wades_config.localhost_address, port: int = wades_config.modeller_thread_port,
+                 max_connections_count: int = wades_config.control_server_max_connections_count,
+                 request_timeout_sec: float = wades_config.control_server_request_timeout_sec,
+                 workers_count: int = wades_config.control_server_workers_count,
+                 unix_socket_path: Union[Path, None] = None,
+                 logger_name: str = "ControlServer") -> None:
+        """
+        Serves the commands sent by the clients of the daemon, such as wades.py. The response to a command is a json
+        string. Two kinds of clients are served, on TCP and, if unix_socket_path is set, on a Unix domain socket:
+        * One-shot clients send one command and read its response until the server closes the connection.
+        * Framed clients send the FrameProtocol marker and then any number of length-prefixed requests on the same
+            connection. Each response is streamed in chunks, optionally compressed. For more info about the format:
+            'src.main.server.FrameProtocol.FrameProtocol'
+        Handlers can return a VersionedResponse, which is sent as it was encoded, so responses that only change once
+        per modelling cycle are not converted to json for each client. Its ETag is sent to framed clients, and a
+        client that sends the same ETag with ControlServer.if_none_match_option gets the not modified response.
+        Framed clients can also send a subscription command, after which the connection streams the messages of the
+        subscription, one per frame, until the client closes it or the server stops.
+        A one-shot client can also send an HTTP GET request for a path registered with 'register_http_path()',
+        such as the metrics read by scrapers, and gets a plain text HTTP response.
+        The clients are served concurrently by an asyncio event loop. Blocking commands, such as the ones that read
+        files, run in a pool of threads so they don't hold up the other clients. Connections beyond
+        max_connections_count are refused, and requests that take longer than request_timeout_sec get a time out
+        response.
+        :raises TypeError if host is not of type 'str', or if port, max_connections_count or workers_count are not of
+                type 'int', or if request_timeout_sec is not a number, or if unix_socket_path is not of type
+                'Union[pathlib.Path, None]'.
+        :raises ValueError if max_connections_count, workers_count or request_timeout_sec are not positive.
+        :param host: The address the server listens on.
+        :type host: str
+        :param port: The port the server listens on.
+        :type port: int
+        :param max_connections_count: The maximum number of connections served at the same time.
+        :type max_connections_count: int
+        :param request_timeout_sec: The maximum number of seconds to receive and answer a request.
+        :type request_timeout_sec: float
+        :param workers_count: The number of threads that run blocking commands.
+        :type workers_count: int
+        :param unix_socket_path: The path of the Unix domain socket the server also listens on. Its permissions are
+                set to wades_config.control_unix_socket_permissions. If None, the server only listens on TCP.
+        :type unix_socket_path: Union[pathlib.Path, None]
+        :param logger_name: The name of the logger.
+        :type logger_name: str
+        """
+        if not isinstance(host, str):
+            raise TypeError(expected_type_but_received_message.format("host", "str", host))
+        if not isinstance(port, int):
+            raise TypeError(expected_type_but_received_message.format("port", "int", port))
+        for argument_name, argument_value in [("max_connections_count", max_connections_count),
+                                              ("workers_count", workers_count)]:
+            if not isinstance(argument_value, int):
+                raise TypeError(expected_type_but_received_message.format(argument_name, "int", argument_value))
+            if argument_value < 1:
+                raise ValueError(expected_value_but_received_message.format(argument_name, "larger than 0",
+                                                                            argument_value))
+        if not isinstance(request_timeout_sec, (int, float)):
+            raise TypeError(expected_type_but_received_message.format("request_timeout_sec", "float",
+                                                                      request_timeout_sec))
+        if request_timeout_sec <= 0:
+            raise ValueError(expected_value_but_received_message.format("request_timeout_sec", "larger than 0",
+                                                                        request_timeout_sec))
+        if unix_socket_path is not None and not isinstance(unix_socket_path, Path):
+            raise TypeError(expected_type_but_received_message.format("unix_socket_path", "Union[pathlib.Path, None]",
+                                                                      unix_socket_path))
+
+        self.__host = host
+        self.__port = port
+        self.__max_connections_count = max_connections_count
+        self.__request_timeout_sec = request_timeout_sec
+        self.__workers_count = workers_count
+        self.__unix_socket_path = unix_socket_path
+        self.__logger_name = logger_name
+        self.__command_handlers: Dict[str, Callable[..., Union[str, Iterable[str], VersionedResponse]]] = dict()
+        self.__blocking_commands = set()
+        self.__commands_with_arguments = set()
+        self.__subscription_handlers: Dict[str, Callable[[str], Subscription]] = dict()
+        self.__http_handlers: Dict[str, Callable[[], str]] = dict()
+        self.__connection_tasks = set()
+        self.__event_loop = None
+        self.__stop_event = None
+        self.__started_event = threading.Event()
+        self.__served_requests_count = 0
+        self.__refused_connections_count = 0
+        self.__timed_out_requests_count = 0
+        self.__failed_requests_count = 0
+        self.__not_modified_responses_count = 0
+        self.__sent_bytes_count = 0
+
+    def register_command(self, command: str, handler: Callable[..., Union[str, Iterable[str], VersionedResponse]],
+                         is_blocking: bool = False, has_arguments: bool = False) -> None:
+        """
+        Registers a command, replacing the handler of a command with the same name.
+        :raises TypeError if command is not of type 'str', if handler is not callable, or if is_blocking or
+                has_arguments are not of type 'bool'.
+        :param command: The command, as sent by the clients.
+        :type command: str
+        :param handler: Returns the response to the command as a json string, as an iterable of the pieces of a
+                json string, such as a generator, so that large responses are streamed without being built in memory,
+                or as a VersionedResponse. If the command has arguments, they are passed to the handler as a string.
+        :type handler: Callable[..., Union[str, Iterable[str], VersionedResponse]]
+        :param is_blocking: True if the handler reads files or takes long, so that it runs in the pool of threads.
+        :type is_blocking: bool
+        :param has_arguments: True if the command can be followed by arguments, separated by a space.
+        :type has_arguments: bool
+        """
+        if not isinstance(command, str):
+            raise TypeError(expected_type_but_received_message.format("command", "str", command))
+        if not callable(handler):
+            raise TypeError(expected_type_but_received_message.format(
+                "handler", "Callable[..., Union[str, Iterable[str], VersionedResponse]]", handler))
+        for argument_name, argument_value in [("is_blocking", is_blocking), ("has_arguments", has_arguments)]:
+            if not isinstance(argument_value, bool):
+                raise TypeError(expected_type_but_received_message.format(argument_name, "bool", argument_value))
+
+        self.__command_handlers[command] = handler
+        if is_blocking:
+            self.__blocking_commands.add(command)
+        else:
+            self.__blocking_commands.discard(command)
+        if has_arguments:
+            self.__commands_with_arguments.add(command)
+        else:
+            self.__commands_with_arguments.discard(command)
+
+    def register_subscription_command(self, command: str, handler: Callable[[str], Subscription]) -> None:
+        """
+        Registers a subscription command, replacing the handler of a subscription command with the same name. The
+        command can be followed by arguments, which are passed to the handler. It runs in the event loop, so it must
+        not block.
+        :raises TypeError if command is not of type 'str', or if handler is not callable.
+        :param command: The command, as sent by the clients.
+        :type command: str
+        :param handler: Subscribes the client with the arguments of the command, and returns the subscription. The
+                subscription is closed when the client disconnects.
+        :type handler: Callable[[str], Subscription]
+        """
+        if not isinstance(command, str):
+            raise TypeError(expected_type_but_received_message.format("command", "str", command))
+        if not callable(handler):
+            raise TypeError(expected_type_but_received_message.format("handler", "Callable[[str], Subscription]",
+                                                                      handler))
+
+        self.__subscription_handlers[command] = handler
+
+    def register_http_path(self, path: str, handler: Callable[[], str]) -> None:
+        """
+        Registers a path served to HTTP GET requests, replacing the handler of the same path. It runs in the event
+        loop, so it must not block.
+        :raises TypeError if path is not of type 'str', or if handler is not callable.
+        :param path: The path, e.g. "/metrics".
+        :type path: str
+        :param handler: Returns the body of the response, as plain text.
+        :type handler: Callable[[], str]
+        """
+        if not isinstance(path, str):
+            raise TypeError(expected_type_but_received_message.format("path", "str", path))
+        if not callable(handler):
+            raise TypeError(expected_type_but_received_message.format("handler", "Callable[[], str]", handler))
+
+        self.__http_handlers[path] = handler
+
+    def get_port(self) -> int:
+        """
+        Gets the port the server listens on. When the server was created with port 0, it is the port chosen by the
+        system once the server started.
+        :return: The port of the server.
+        :rtype: int
+        """
+        return self.__port
+
+    def get_unix_socket_path(self) -> Union[Path, None]:
+        """
+        Gets the path of the Unix domain socket the server listens on.
+        :return: The path of the socket, None if the server only listens on TCP.
+        :rtype: Union[pathlib.Path, None]
+        """
+        return self.__unix_socket_path
+
+    def get_commands(self) -> List[str]:
+        """
+        Gets the registered commands.
+        :return: The registered commands, in registration order, followed by the subscription commands.
+        :rtype: List[str]
+        """
+        return list(self.__command_handlers.keys()) + list(self.__subscription_handlers.keys())
+
+    def get_metrics(self) -> dict:
+        """
+        Gets the usage of the server.
+        Format:
+            {
+                active_connections_count: 2,
+                served_requests_count: 1200,
+                refused_connections_count: 0,
+                timed_out_requests_count: 1,
+                failed_requests_count: 0,
+                not_modified_responses_count: 310,
+                sent_bytes_count: 5023
+            }
+        :return: The usage of the server.
+        :rtype: dict
+        """
+        return {
+            "active_connections_count": len(self.__connection_tasks),
+            "served_requests_count": self.__served_requests_count,
+            "refused_connections_count": self.__refused_connections_count,
+            "timed_out_requests_count": self.__timed_out_requests_count,
+            "failed_requests_count": self.__failed_requests_count,
+            "not_modified_responses_count": self.__not_modified_responses_count,
+            "sent_bytes_count": self.__sent_bytes_count
+        }
+
+    def run(self) -> None:
+        """
+        Runs the server until 'stop()' is called. It blocks the calling thread.
+        """
+        asyncio.run(self.__serve())
+
+    def wait_until_started(self, timeout_sec: Union[float, None] = None) -> bool:
+        """
+        Waits until the server accepts connections.
+        :param timeout_sec: The maximum number of seconds to wait. If None, waits until the server starts.
+        :type timeout_sec: Union[float, None]
+        :return: True if the server started, False otherwise.
+        :rtype: bool
+        """
+        return self.__started_event.wait(timeout_sec)
+
+    def stop(self) -> None:
+        """
+        Stops the server gracefully: it stops accepting connections, waits up to
+        wades_config.control_server_shutdown_timeout_sec for the requests in progress and cancels the remaining ones.
+        It can be called from any thread.
+        """
+        event_loop = self.__event_loop
+        if event_loop is not None and not event_loop.is_closed():
+            try:
+                event_loop.call_soon_threadsafe(self.__stop_event.set)
+            except RuntimeError:
+                # The event loop was closed in the meantime.
+                pass
+
+    async def __serve(self) -> None:
+        """
+        Accepts connections until the server is stopped, and then shuts it down.
+        """
+        logger = logging.getLogger(self.__logger_name)
+        self.__event_loop = asyncio.get_running_loop()
+        self.__stop_event = asyncio.Event()
+        executor = ThreadPoolExecutor(max_workers=self.__workers_count, thread_name_prefix="ControlServerWorker")
+        servers = [await asyncio.start_server(lambda reader, writer: self.__accept(reader, writer, executor),
+                                              host=self.__host, port=self.__port)]
+        self.__port = servers[0].sockets[0].getsockname()[1]
+        logger.info("Control server listening on {}:{}.".format(self.__host, self.__port))
+        if self.__unix_socket_path is not None:
+            # A socket file left by a daemon that didn't exit cleanly would make the bind fail.
+            if self.__unix_socket_path.is_socket():
+                self.__unix_socket_path.unlink()
+            servers.append(await asyncio.start_unix_server(
+                lambda reader, writer: self.__accept(reader, writer, executor), path=str(self.__unix_socket_path)))
+            os.chmod(self.__unix_socket_path, wades_config.control_unix_socket_permissions)
+            logger.info("Control server listening on {}.".format(self.__unix_socket_path))
+        self.__started_event.set()
+        try:
+            await self.__stop_event.wait()
+        finally:
+            for server in servers:
+                server.close()
+                await server.wait_closed()
+            if self.__unix_socket_path is not None and self.__unix_socket_path.is_socket():
+                self.__unix_socket_path.unlink()
+            if len(self.__connection_tasks) > 0:
+                _, pending_tasks = await asyncio.wait(set(self.__connection_tasks),
+                                                      timeout=wades_config.control_server_shutdown_timeout_sec)
+                for pending_task in pending_tasks:
+                    pending_task.cancel()
+            executor.shutdown(wait=False)
+            self.__event_loop = None
+            self.__started_event.clear()
+            logger.info("Control server stopped.")
+
+    async def __accept(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter,
+                       executor: ThreadPoolExecutor) -> None:
+        """
+        Serves a new connection, unless there are already too many.
+        :param reader: The stream to read the request from.
+        :type reader: asyncio.StreamReader
+        :param writer: The stream to write the response to.
+        :type writer: asyncio.StreamWriter
+        :param executor: The pool of threads for blocking commands.
+        :type executor: concurrent.futures.ThreadPoolExecutor
+        """
+        if len(self.__connection_tasks) >= self.__max_connections_count:
+            self.__refused_connections_count += 1
+            # The request is read anyway, since closing a connection with unread data resets it before the client
+            # gets the response.
+            is_framed = False
+            try:
+                first_byte = await asyncio.wait_for(reader.read(1), timeout=self.__request_timeout_sec)
+                is_framed = first_byte == FrameProtocol.framed_connection_marker
+                if is_framed:
+                    await asyncio.wait_for(FrameProtocol.read_frame(reader, ControlServer.max_request_size_bytes),
+                                           timeout=self.__request_timeout_sec)
+                else:
+                    await asyncio.wait_for(reader.read(ControlServer.max_request_size_bytes),
+                                           timeout=self.__request_timeout_sec)
+            except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError, ValueError):
+                pass
+            try:
+                await self.__send_response(writer, ControlServer.too_many_connections_response,
+                                           ResponseEncoding.json, is_framed)
+            except asyncio.TimeoutError:
+                pass
+            writer.close()
+            return
+
+        connection_task = asyncio.current_task()
+        self.__connection_tasks.add(connection_task)
+        try:
+            await self.__serve_connection(reader, writer, executor)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            # The client went away or broke the protocol, or a streamed response failed half way.
+            self.__failed_requests_count += 1
+            logging.getLogger(self.__logger_name).warning(traceback.format_exc())
+        finally:
+            self.__connection_tasks.discard(connection_task)
+            writer.close()
+
+    async def __serve_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter,
+                                 executor: ThreadPoolExecutor) -> None:
+        """
+        Serves the requests of a connection: one for one-shot clients, and every request until the client closes the
+        connection or stays idle for wades_config.control_server_idle_timeout_sec for framed clients.
+        :param reader: The stream to read the requests from.
+        :type reader: asyncio.StreamReader
+        :param writer: The stream to write the responses to.
+        :type writer: asyncio.StreamWriter
+        :param executor: The pool of threads for blocking commands.
+        :type executor: concurrent.futures.ThreadPoolExecutor
+        """
+        address = writer.get_extra_info("peername")
+        try:
+            first_byte = await asyncio.wait_for(reader.read(1), timeout=self.__request_timeout_sec)
+        except asyncio.TimeoutError:
+            self.__timed_out_requests_count += 1
+            logging.getLogger(self.__logger_name).warning("Request from {} timed out.".format(address))
+            await self.__send_response(writer, ControlServer.request_timed_out_response, ResponseEncoding.json, False)
+            return
+
+        if first_byte != FrameProtocol.framed_connection_marker:
+            await self.__serve_one_shot_connection(reader, writer, first_byte, address, executor)
+        else:
+            await self.__serve_framed_connection(reader, writer, address, executor)
+
+    async def __serve_one_shot_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter,
+                                          first_byte: bytes, address: object, executor: ThreadPoolExecutor) -> None:
+        """
+        Serves the request of a one-shot client, which is either a command or an HTTP GET request. The response is
+        sent unframed, and the connection is closed after it.
+        :param reader: The stream to read the rest of the request from.
+        :type reader: asyncio.StreamReader
+        :param writer: The stream to write the response to.
+        :type writer: asyncio.StreamWriter
+        :param first_byte: The first byte of the request, already read. Empty if the client sent nothing.
+        :type first_byte: bytes
+        :param address: The address of the client, for the logs.
+        :type address: object
+        :param executor: The pool of threads for blocking commands.
+        :type executor: concurrent.futures.ThreadPoolExecutor
+        """
+        request = first_byte
+        if len(first_byte) > 0:
+            # The rest of the command was sent along with its first byte.
+            request += await asyncio.wait_for(reader.read(ControlServer.max_request_size_bytes - 1),
+                                              timeout=self.__request_timeout_sec)
+        if request.startswith(ControlServer.http_get_method) and len(self.__http_handlers) > 0:
+            await self.__serve_http_request(writer, request, address)
+            return
+        command = request.decode()
+        if self.__get_subscription_command(command) is not None:
+            await self.__send_response(writer, ControlServer.framed_connection_required_response,
+                                       ResponseEncoding.json, False)
+            return
+        response, is_modified = await self.__serve_request(command, address, executor)
+        await self.__send_response(writer, response, ResponseEncoding.json, False, is_modified)
+
+    async def __serve_framed_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter,
+                                        address: object, executor: ThreadPoolExecutor) -> None:
+        """
+        Serves the framed requests of a client until it closes the connection, stays idle for
+        wades_config.control_server_idle_timeout_sec, or subscribes. A subscription keeps the connection for itself.
+        :param reader: The stream to read the requests from.
+        :type reader: asyncio.StreamReader
+        :param writer: The stream to write the responses to.
+        :type writer: asyncio.StreamWriter
+        :param address: The address of the client, for the logs.
+        :type address: object
+        :param executor: The pool of threads for blocking commands.
+        :type executor: concurrent.futures.ThreadPoolExecutor
+        """
+        while True:
+            try:
+                payload = await asyncio.wait_for(
+                    FrameProtocol.read_frame(reader, ControlServer.max_request_size_bytes),
+                    timeout=wades_config.control_server_idle_timeout_sec)
+            except asyncio.TimeoutError:
+                logging.getLogger(self.__logger_name).info("Closing idle connection from {}.".format(address))
+                return
+            if payload is None:
+                return
+            command, response_encoding = FrameProtocol.decode_request(payload)
+            subscription_command = self.__get_subscription_command(command)
+            if subscription_command is not None:
+                # The connection is dedicated to the subscription from now on.
+                arguments = command[len(subscription_command):].strip()
+                await self.__serve_subscription(reader, writer, subscription_command, arguments, response_encoding,
+                                                address)
+                return
+            response, is_modified = await self.__serve_request(command, address, executor)
+            await self.__send_response(writer, response, response_encoding, True, is_modified)
+
+    async def __serve_http_request(self, writer: asyncio.StreamWriter, request: bytes, address: object) -> None:
+        """
+        Serves an HTTP GET request with the handler of its path, and closes the connection after the response.
+        :param writer: The stream to write the response to.
+        :type writer: asyncio.StreamWriter
+        :param request: The request, starting with its request line, e.g. b"GET /metrics HTTP/1.1".
+        :type request: bytes
+        :param address: The address of the client, for the logs.
+        :type address: object
+        """
+        logger = logging.getLogger(self.__logger_name)
+        request_line = request.split(b"\r\n", 1)[0].decode(errors="replace")
+        logger.info("HTTP request received {} from {}".format(request_line, address))
+        request_line_parts = request_line.split(" ")
+        # The query string is ignored.
+        path = request_line_parts[1].split("?", 1)[0] if len(request_line_parts) > 1 else ""
+        handler = self.__http_handlers.get(path)
+        status, body = "404 Not Found", "Not found.\n"
+        if handler is not None:
+            # noinspection PyBroadException
+            try:
+                status, body = "200 OK", handler()
+                self.__served_requests_count += 1
+            except Exception:
+                self.__failed_requests_count += 1
+                logger.error(traceback.format_exc())
+                status, body = "500 Internal Server Error", "Request failed.\n"
+        encoded_body = body.encode()
+        header = "HTTP/1.1 {}\r\nContent-Type: text/plain; version=0.0.4; charset=utf-8\r\nContent-Length: {}\r\n" \
+                 "Connection: close\r\n\r\n".format(status, len(encoded_body))
+        try:
+            writer.write(header.encode() + encoded_body)
+            self.__sent_bytes_count += len(encoded_body)
+            await asyncio.wait_for(writer.drain(), timeout=self.__request_timeout_sec)
+        except ConnectionError:
+            pass
+
+    def __get_subscription_command(self, command: str) -> Union[str, None]:
+        """
+        Gets the subscription command a request starts with.
+        :param command: The command of the request, with its arguments.
+        :type command: str
+        :return: The subscription command, or None if the request isn't a subscription.
+        :rtype: Union[str, None]
+        """
+        for subscription_command in self.__subscription_handlers.keys():
+            if command == subscription_command or command.startswith(subscription_command + " "):
+                return subscription_command
+        return None
+
+    async def __serve_subscription(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter,
+                                   subscription_command: str, arguments: str, response_encoding: ResponseEncoding,
+                                   address: object) -> None:
+        """
+        Subscribes a framed client, and sends it the messages of the subscription as they come, each one in a frame
+        encoded on its own. The subscription ends, with the end of response frame, when the client closes the
+        connection or sends anything, or when the server stops. Writing the messages never holds up the ones who
+        produce them: while the client is slow, they wait in the bounded buffer of the subscription.
+        :param reader: The stream of the client.
+        :type reader: asyncio.StreamReader
+        :param writer: The stream to write the messages to.
+        :type writer: asyncio.StreamWriter
+        :param subscription_command: The subscription command.
+        :type subscription_command: str
+        :param arguments: The arguments of the command.
+        :type arguments: str
+        :param response_encoding: The encoding of the messages.
+        :type response_encoding: ResponseEncoding
+        :param address: The address of the client, for the logs.
+        :type address: object
+        """
+        logger = logging.getLogger(self.__logger_name)
+        logger.info("Subscription received {} {} from {}".format(subscription_command, arguments, address))
+        try:
+            subscription = self.__subscription_handlers[subscription_command](arguments)
+        except Exception:
+            self.__failed_requests_count += 1
+            logger.error(traceback.format_exc())
+            await self.__send_response(writer, ControlServer.request_failed_response, response_encoding, True)
+            return
+        self.__served_requests_count += 1
+
+        client_done_task = asyncio.ensure_future(reader.read(1))
+        server_stopped_task = asyncio.ensure_future(self.__stop_event.wait())
+        try:
+            writer.write(FrameProtocol.encode_frame(FrameProtocol.encode_response_header(None, True)))
+            await asyncio.wait_for(writer.drain(), timeout=self.__request_timeout_sec)
+            while True:
+                messages_task = asyncio.ensure_future(subscription.get_messages())
+                done_tasks, _ = await asyncio.wait({messages_task, client_done_task, server_stopped_task},
+                                                   return_when=asyncio.FIRST_COMPLETED)
+                if messages_task not in done_tasks:
+                    messages_task.cancel()
+                    break
+                messages = messages_task.result()
+                if len(messages) == 0:
+                    break
+                for message in messages:
+                    encoded_message = b"".join(FrameProtocol.encode_response(
+                        message, response_encoding, wades_config.control_server_chunk_size_bytes))
+                    writer.write(FrameProtocol.encode_frame(encoded_message))
+                    self.__sent_bytes_count += len(encoded_message)
+                await asyncio.wait_for(writer.drain(), timeout=self.__request_timeout_sec)
+            if not client_done_task.done():
+                writer.write(FrameProtocol.end_of_response_frame)
+                await asyncio.wait_for(writer.drain(), timeout=self.__request_timeout_sec)
+        except ConnectionError:
+            pass
+        finally:
+            subscription.close()
+            client_done_task.cancel()
+            server_stopped_task.cancel()
+            logger.info("Subscription from {} ended.".format(address))
+
+    async def __serve_request(self, command: str, address: object, executor: ThreadPoolExecutor) \
+            -> Tuple[Union[str, Iterable[str], VersionedResponse], bool]:
+        """
+        Runs a command and gets its response, or the error response if it fails or times out.
+        :param command: The command, optionally followed by ControlServer.if_none_match_option and an ETag.
+        :type command: str
+        :param address: The address of the client, for the logs.
+        :type address: object
+        :param executor: The pool of threads for blocking commands.
+        :type executor: concurrent.futures.ThreadPoolExecutor
+        :return: The response to the command, and False if it is versioned and its ETag is the one sent with the
+                command.
+        :rtype: Tuple[Union[str, Iterable[str], VersionedResponse], bool]
+        """
+        logger = logging.getLogger(self.__logger_name)
+        logger.info("Request received {} from {}".format(command, address))
+        command, _, etag = command.partition(" {} ".format(ControlServer.if_none_match_option))
+        try:
+            response = await asyncio.wait_for(self.__execute(command, executor), timeout=self.__request_timeout_sec)
+            self.__served_requests_count += 1
+        except asyncio.TimeoutError:
+            self.__timed_out_requests_count += 1
+            logger.warning("Request from {} timed out.".format(address))
+            response = ControlServer.request_timed_out_response
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            self.__failed_requests_count += 1
+            logger.error(traceback.format_exc())
+            response = ControlServer.request_failed_response
+        is_modified = not isinstance(response, VersionedResponse) or response.get_etag() != etag.strip()
+        if not is_modified:
+            self.__not_modified_responses_count += 1
+        return response, is_modified
+
+    async def __execute(self, command: str, executor: ThreadPoolExecutor) \
+            -> Union[str, Iterable[str], VersionedResponse]:
+        """
+        Runs the handler of a command, in the pool of threads if it is blocking.
+        :param command: The command, with its arguments if it has any.
+        :type command: str
+        :param executor: The pool of threads for blocking commands.
+        :type executor: concurrent.futures.ThreadPoolExecutor
+        :return: The response to the command.
+        :rtype: Union[str, Iterable[str], VersionedResponse]
+        """
+        handler_arguments = list()
+        if command not in self.__command_handlers:
+            # The longest command with arguments the request starts with, so that commands can share a prefix.
+            matching_commands = [command_with_arguments for command_with_arguments in self.__commands_with_arguments
+                                 if command.startswith(command_with_arguments + " ")]
+            if len(matching_commands) == 0:
+                return ControlServer.unsupported_command_response
+            registered_command = max(matching_commands, key=len)
+            handler_arguments.append(command[len(registered_command):].strip())
+            command = registered_command
+        elif command in self.__commands_with_arguments:
+            handler_arguments.append("")
+        handler = self.__command_handlers[command]
+        if command in self.__blocking_commands:
+            return await asyncio.get_running_loop().run_in_executor(executor, handler, *handler_arguments)
+        return handler(*handler_arguments)
+
+    async def __send_response(self, writer: asyncio.StreamWriter,
+                              response: Union[str, Iterable[str], VersionedResponse],
+                              response_encoding: ResponseEncoding, is_framed: bool, is_modified: bool = True) -> None:
+        """
+        Streams a response in chunks of wades_config.control_server_chunk_size_bytes. Each chunk is written once the
+        previous one has been sent, so a large response is never held in memory as a whole.
+        :raises Exception if a piece of the response fails to be produced. The response is then incomplete, so the
+                connection must be closed.
+        :param writer: The stream to write the response to.
+        :type writer: asyncio.StreamWriter
+        :param response: The response as a json string, as the pieces of a json string, or already encoded.
+        :type response: Union[str, Iterable[str], VersionedResponse]
+        :param response_encoding: The encoding of the response.
+        :type response_encoding: ResponseEncoding
+        :param is_framed: True to send the response as frames, after the header frame and followed by the end of
+                response frame.
+        :type is_framed: bool
+        :param is_modified: False to send the not modified response instead of a versioned response.
+        :type is_modified: bool
+        """
+        etag = None
+        if isinstance(response, VersionedResponse):
+            etag = response.get_etag()
+            response = response.get_encoded_response(response_encoding) if is_modified \
+                else ControlServer.not_modified_response
+        if isinstance(response, bytes):
+            chunks = FrameProtocol.split_in_chunks(response, wades_config.control_server_chunk_size_bytes)
+        else:
+            chunks = FrameProtocol.encode_response(response, response_encoding,
+                                                   wades_config.control_server_chunk_size_bytes)
+        try:
+            if is_framed:
+                writer.write(FrameProtocol.encode_frame(FrameProtocol.encode_response_header(etag, is_modified)))
+            for chunk in chunks:
+                writer.write(FrameProtocol.encode_frame(chunk) if is_framed else chunk)
+                self.__sent_bytes_count += len(chunk)
+                await asyncio.wait_for(writer.drain(), timeout=self.__request_timeout_sec)
+            if is_framed:
+                writer.write(FrameProtocol.end_of_response_frame)
+                await asyncio.wait_for(writer.drain(), timeout=self.__request_timeout_sec)
+        except ConnectionError:
+            pass
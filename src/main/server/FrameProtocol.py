@@ -0,0 +1,175 @@
+import asyncio
+import json
+import struct
+import zlib
+from typing import Iterable, Iterator, Tuple, Union
+
+from src.main.common.enum.ResponseEncoding import ResponseEncoding
+from src.utils.error_messages import expected_type_but_received_message, expected_value_but_received_message
+
+
+class FrameProtocol:
+    # Framed protocol of the control server. After the marker, a client sends any number of request frames on the
+    # same connection, and the server answers each one with a stream of response frames:
+    # * Request frame: one byte with the value of the ResponseEncoding wanted, followed by the utf-8 command.
+    # * Response frames: a header frame, the encoded response split into chunks, and an empty frame. The header is
+    #   a json object with the ETag of the response, if it is versioned, and whether it was modified since the ETag
+    #   sent by the client.
+    # First byte sent by framed clients. Commands of one-shot clients are text, so they never start with it.
+    framed_connection_marker = b"\x00"
+    # Each frame is its payload prefixed with its length, as a 4-byte big-endian unsigned integer.
+    frame_header = struct.Struct(">I")
+    end_of_response_frame = frame_header.pack(0)
+
+    @staticmethod
+    def encode_frame(payload: bytes) -> bytes:
+        """
+        Prefixes a payload with its length.
+        :raises TypeError if payload is not of type 'bytes'.
+        :param payload: The payload of the frame.
+        :type payload: bytes
+        :return: The frame.
+        :rtype: bytes
+        """
+        if not isinstance(payload, bytes):
+            raise TypeError(expected_type_but_received_message.format("payload", "bytes", payload))
+        return FrameProtocol.frame_header.pack(len(payload)) + payload
+
+    @staticmethod
+    def encode_request(command: str, response_encoding: ResponseEncoding = ResponseEncoding.json) -> bytes:
+        """
+        Encodes a command as a request frame.
+        :raises TypeError if command is not of type 'str', or if response_encoding is not of type 'ResponseEncoding'.
+        :param command: The command.
+        :type command: str
+        :param response_encoding: The encoding of the response.
+        :type response_encoding: ResponseEncoding
+        :return: The request frame.
+        :rtype: bytes
+        """
+        if not isinstance(command, str):
+            raise TypeError(expected_type_but_received_message.format("command", "str", command))
+        if not isinstance(response_encoding, ResponseEncoding):
+            raise TypeError(expected_type_but_received_message.format("response_encoding", "ResponseEncoding",
+                                                                      response_encoding))
+        return FrameProtocol.encode_frame(bytes([response_encoding.value]) + command.encode())
+
+    @staticmethod
+    def decode_request(payload: bytes) -> Tuple[str, ResponseEncoding]:
+        """
+        Decodes the payload of a request frame.
+        :raises ValueError if the payload is empty or the response encoding is unknown.
+        :param payload: The payload of the request frame.
+        :type payload: bytes
+        :return: The command and the encoding of its response.
+        :rtype: Tuple[str, ResponseEncoding]
+        """
+        if len(payload) == 0:
+            raise ValueError(expected_value_but_received_message.format("payload", "not empty", payload))
+        return payload[1:].decode(), ResponseEncoding(payload[0])
+
+    @staticmethod
+    def encode_response_header(etag: Union[str, None], is_modified: bool) -> bytes:
+        """
+        Encodes the payload of the header frame of a response.
+        :param etag: The ETag of the response. None if the response isn't versioned.
+        :type etag: Union[str, None]
+        :param is_modified: False if the response wasn't modified since the ETag sent by the client.
+        :type is_modified: bool
+        :return: The payload of the header frame.
+        :rtype: bytes
+        """
+        return json.dumps({"etag": etag, "is_modified": is_modified}).encode()
+
+    @staticmethod
+    def decode_response_header(payload: bytes) -> Tuple[Union[str, None], bool]:
+        """
+        Decodes the payload of the header frame of a response.
+        :param payload: The payload of the header frame.
+        :type payload: bytes
+        :return: The ETag of the response, and whether it was modified since the ETag sent by the client.
+        :rtype: Tuple[Union[str, None], bool]
+        """
+        header = json.loads(payload)
+        return header["etag"], header["is_modified"]
+
+    @staticmethod
+    async def read_frame(reader: asyncio.StreamReader, max_payload_size_bytes: int) -> Union[bytes, None]:
+        """
+        Reads a frame from a stream.
+        :raises ValueError if the payload is larger than max_payload_size_bytes.
+        :raises asyncio.IncompleteReadError if the stream ends in the middle of the frame.
+        :param reader: The stream.
+        :type reader: asyncio.StreamReader
+        :param max_payload_size_bytes: The maximum size of the payload.
+        :type max_payload_size_bytes: int
+        :return: The payload of the frame, or None if the stream ended before a new frame.
+        :rtype: Union[bytes, None]
+        """
+        try:
+            header = await reader.readexactly(FrameProtocol.frame_header.size)
+        except asyncio.IncompleteReadError as error:
+            if len(error.partial) == 0:
+                return None
+            raise
+        payload_size = FrameProtocol.frame_header.unpack(header)[0]
+        if payload_size > max_payload_size_bytes:
+            raise ValueError(expected_value_but_received_message.format(
+                "payload_size", "at most {} bytes".format(max_payload_size_bytes), payload_size))
+        return await reader.readexactly(payload_size)
+
+    @staticmethod
+    def encode_response(response: Union[str, Iterable[str]], response_encoding: ResponseEncoding,
+                        chunk_size_bytes: int) -> Iterator[bytes]:
+        """
+        Encodes a response lazily, in chunks, so that it is never held in memory as a whole.
+        :param response: The response as a json string, or as the pieces of a json string.
+        :type response: Union[str, Iterable[str]]
+        :param response_encoding: The encoding of the response.
+        :type response_encoding: ResponseEncoding
+        :param chunk_size_bytes: The size of the chunks. The last one can be smaller.
+        :type chunk_size_bytes: int
+        :return: The encoded response, in chunks of chunk_size_bytes.
+        :rtype: Iterator[bytes]
+        """
+        pieces = [response] if isinstance(response, str) else response
+        compressor = zlib.compressobj() if response_encoding == ResponseEncoding.compressed_json else None
+        buffer = bytearray()
+        for piece in pieces:
+            encoded_piece = piece.encode()  # Defaults to utf-8
+            buffer += compressor.compress(encoded_piece) if compressor is not None else encoded_piece
+            while len(buffer) >= chunk_size_bytes:
+                yield bytes(buffer[:chunk_size_bytes])
+                del buffer[:chunk_size_bytes]
+        if compressor is not None:
+            buffer += compressor.flush()
+        yield from FrameProtocol.split_in_chunks(bytes(buffer), chunk_size_bytes)
+
+    @staticmethod
+    def split_in_chunks(encoded_response: bytes, chunk_size_bytes: int) -> Iterator[bytes]:
+        """
+        Splits a response that is already encoded in chunks.
+        :param encoded_response: The encoded response.
+        :type encoded_response: bytes
+        :param chunk_size_bytes: The size of the chunks. The last one can be smaller.
+        :type chunk_size_bytes: int
+        :return: The encoded response, in chunks of chunk_size_bytes.
+        :rtype: Iterator[bytes]
+        """
+        for chunk_start in range(0, len(encoded_response), chunk_size_bytes):
+            yield encoded_response[chunk_start:chunk_start + chunk_size_bytes]
+
+    @staticmethod
+    def decode_response(encoded_response: bytes, response_encoding: ResponseEncoding) -> str:
+        """
+        Decodes a whole response.
+        :param encoded_response: The chunks of the response, joined.
+        :type encoded_response: bytes
+        :param response_encoding: The encoding of the response.
+        :type response_encoding: ResponseEncoding
+        :return: The response as a json string.
+        :rtype: str
+        """
+        if response_encoding == ResponseEncoding.compressed_json:
+            encoded_response = zlib.decompress(encoded_response)
+        return encoded_response.decode()
@@ -0,0 +1,157 @@
+import asyncio
+import json
+import threading
+from collections import deque
+from typing import List, Set, Union
+
+import wades_config
+from src.main.common.AppSummary import AppSummary
+from src.main.common.enum.RiskLevel import RiskLevel
+from src.utils.error_messages import expected_type_but_received_message, expected_value_but_received_message
+
+
+class Subscription:
+
+    def __init__(self, min_risk_level: RiskLevel = RiskLevel.low, app_names: Union[Set[str], None] = None,
+                 buffer_size: int = wades_config.subscription_buffer_size) -> None:
+        """
+        Abstracts a client subscribed to the anomalies found by the modeller. Anomalies are offered by the modelling
+        side, from any thread, and are buffered until the client side, in an event loop, gets them. The buffer is
+        bounded: when it is full, the oldest anomaly is dropped, so a slow client never holds up the modelling. Each
+        message tells the client how many anomalies it missed so far.
+        :raises TypeError if min_risk_level is not of type 'RiskLevel', if app_names is not of type
+                'Union[Set[str], None]', or if buffer_size is not of type 'int'.
+        :raises ValueError if min_risk_level is RiskLevel.none, or if buffer_size is not positive.
+        :param min_risk_level: The lowest risk level of the anomalies sent to the client.
+        :type min_risk_level: RiskLevel
+        :param app_names: The names of the applications whose anomalies are sent to the client. If None, all of them.
+        :type app_names: Union[Set[str], None]
+        :param buffer_size: The maximum number of anomalies waiting to be sent to the client.
+        :type buffer_size: int
+        """
+        if not isinstance(min_risk_level, RiskLevel):
+            raise TypeError(expected_type_but_received_message.format("min_risk_level", "RiskLevel", min_risk_level))
+        if min_risk_level is RiskLevel.none:
+            raise ValueError(expected_value_but_received_message.format("min_risk_level", "above RiskLevel.none",
+                                                                        min_risk_level))
+        if app_names is not None and not isinstance(app_names, set):
+            raise TypeError(expected_type_but_received_message.format("app_names", "Union[Set[str], None]",
+                                                                      app_names))
+        if not isinstance(buffer_size, int):
+            raise TypeError(expected_type_but_received_message.format("buffer_size", "int", buffer_size))
+        if buffer_size < 1:
+            raise ValueError(expected_value_but_received_message.format("buffer_size", "larger than 0", buffer_size))
+
+        self.__min_risk_level = min_risk_level
+        self.__app_names = set(app_names) if app_names is not None else None
+        self.__buffer = deque(maxlen=buffer_size)
+        self.__lock = threading.Lock()
+        self.__event_loop = None
+        self.__messages_available = None
+        self.__is_closed = False
+        self.__delivered_messages_count = 0
+        self.__dropped_messages_count = 0
+
+    def matches(self, app_summary: AppSummary) -> bool:
+        """
+        Checks if an anomaly must be sent to the client.
+        :param app_summary: The summary of an anomalous application.
+        :type app_summary: AppSummary
+        :return: True if the risk level and the application of the anomaly are subscribed to, False otherwise.
+        :rtype: bool
+        """
+        return app_summary.get_risk_level() >= self.__min_risk_level and \
+            (self.__app_names is None or app_summary.get_app_name() in self.__app_names)
+
+    def offer(self, app_summary_json: str) -> None:
+        """
+        Buffers an anomaly for the client, dropping the oldest one if the buffer is full. It never blocks, and it can
+        be called from any thread.
+        :param app_summary_json: The summary of the anomalous application, as a json string.
+        :type app_summary_json: str
+        """
+        with self.__lock:
+            if self.__is_closed:
+                return
+            if len(self.__buffer) == self.__buffer.maxlen:
+                self.__dropped_messages_count += 1
+            self.__buffer.append(app_summary_json)
+            event_loop = self.__event_loop
+        if event_loop is not None:
+            try:
+                event_loop.call_soon_threadsafe(self.__messages_available.set)
+            except RuntimeError:
+                # The event loop was closed in the meantime.
+                pass
+
+    async def get_messages(self) -> List[str]:
+        """
+        Waits until anomalies are buffered, and takes them. It must always be awaited in the same event loop.
+        Format of each message:
+            {
+                app_summary: "{\"app_name\": \"firefox\", ...}",
+                dropped_messages_count: 3
+            }
+        :return: The buffered anomalies as json strings, oldest first, with the number of anomalies dropped so far.
+                Empty if the subscription was closed.
+        :rtype: List[str]
+        """
+        with self.__lock:
+            if self.__event_loop is None:
+                self.__event_loop = asyncio.get_running_loop()
+                self.__messages_available = asyncio.Event()
+        while True:
+            with self.__lock:
+                if self.__is_closed:
+                    return list()
+                if len(self.__buffer) > 0:
+                    app_summaries_json = list(self.__buffer)
+                    self.__buffer.clear()
+                    self.__delivered_messages_count += len(app_summaries_json)
+                    dropped_messages_count = self.__dropped_messages_count
+                    break
+                self.__messages_available.clear()
+            await self.__messages_available.wait()
+        return [json.dumps({"app_summary": app_summary_json, "dropped_messages_count": dropped_messages_count})
+                for app_summary_json in app_summaries_json]
+
+    def close(self) -> None:
+        """
+        Closes the subscription: no more anomalies are buffered, and the buffered ones are discarded.
+        """
+        with self.__lock:
+            self.__is_closed = True
+            self.__buffer.clear()
+            event_loop = self.__event_loop
+        if event_loop is not None:
+            try:
+                event_loop.call_soon_threadsafe(self.__messages_available.set)
+            except RuntimeError:
+                pass
+
+    def is_closed(self) -> bool:
+        """
+        Checks if the subscription was closed.
+        :return: True if the subscription was closed, False otherwise.
+        :rtype: bool
+        """
+        return self.__is_closed
+
+    def get_metrics(self) -> dict:
+        """
+        Gets how far behind the client is.
+        Format:
+            {
+                buffered_messages_count: 2,
+                delivered_messages_count: 120,
+                dropped_messages_count: 0
+            }
+        :return: The delivery metrics of the subscription.
+        :rtype: dict
+        """
+        with self.__lock:
+            return {
+                "buffered_messages_count": len(self.__buffer),
+                "delivered_messages_count": self.__delivered_messages_count,
+                "dropped_messages_count": self.__dropped_messages_count
+            }
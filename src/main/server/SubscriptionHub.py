@@ -0,0 +1,170 @@
+import shlex
+import threading
+from typing import List, Set, Tuple, Union
+
+import wades_config
+from src.main.common.AppSummary import AppSummary
+from src.main.common.enum.RiskLevel import RiskLevel
+from src.main.server.Subscription import Subscription
+from src.utils.error_messages import expected_type_but_received_message, expected_value_but_received_message
+
+
+class SubscriptionHub:
+    # Options of the subscription command, e.g. "subscribe anomalies --min-risk high --app firefox --app sshd".
+    min_risk_option = "--min-risk"
+    app_option = "--app"
+
+    def __init__(self, buffer_size: int = wades_config.subscription_buffer_size) -> None:
+        """
+        Pushes the anomalies found by the modeller to the subscribed clients, as they are found. Each subscription
+        filters the anomalies on its own and buffers them up to buffer_size, so publishing never waits for a client.
+        :raises TypeError if buffer_size is not of type 'int'.
+        :raises ValueError if buffer_size is not positive.
+        :param buffer_size: The maximum number of anomalies waiting to be sent to each client.
+        :type buffer_size: int
+        """
+        if not isinstance(buffer_size, int):
+            raise TypeError(expected_type_but_received_message.format("buffer_size", "int", buffer_size))
+        if buffer_size < 1:
+            raise ValueError(expected_value_but_received_message.format("buffer_size", "larger than 0", buffer_size))
+
+        self.__buffer_size = buffer_size
+        self.__subscriptions: List[Subscription] = list()
+        self.__lock = threading.Lock()
+        self.__published_anomalies_count = 0
+        self.__closed_subscriptions_metrics = {"delivered_messages_count": 0, "dropped_messages_count": 0}
+
+    def subscribe(self, min_risk_level: RiskLevel = RiskLevel.low, app_names: Union[Set[str], None] = None) \
+            -> Subscription:
+        """
+        Subscribes a client to the anomalies published from now on. The client must close the subscription once it
+        is done with it.
+        For more info about the arguments: 'src.main.server.Subscription.Subscription.__init__'
+        :return: The subscription.
+        :rtype: Subscription
+        """
+        subscription = Subscription(min_risk_level=min_risk_level, app_names=app_names,
+                                    buffer_size=self.__buffer_size)
+        with self.__lock:
+            self.__subscriptions.append(subscription)
+        return subscription
+
+    def subscribe_with_arguments(self, arguments: str) -> Subscription:
+        """
+        Subscribes a client with the options of the subscription command.
+        :raises ValueError if the options are not valid.
+        :param arguments: The options of the command, e.g. "--min-risk high --app firefox". Application names with
+                spaces must be quoted.
+        :type arguments: str
+        :return: The subscription.
+        :rtype: Subscription
+        """
+        min_risk_level, app_names = SubscriptionHub.parse_arguments(arguments)
+        return self.subscribe(min_risk_level=min_risk_level, app_names=app_names)
+
+    @staticmethod
+    def parse_arguments(arguments: str) -> Tuple[RiskLevel, Union[Set[str], None]]:
+        """
+        Parses the options of the subscription command. Both options are optional, and SubscriptionHub.app_option can
+        be repeated.
+        :raises TypeError if arguments is not of type 'str'.
+        :raises ValueError if an option is unknown, misses its value, or if the risk level is not one of low, medium
+                or high.
+        :param arguments: The options of the command.
+        :type arguments: str
+        :return: The lowest risk level, low by default, and the application names, None by default.
+        :rtype: Tuple[RiskLevel, Union[Set[str], None]]
+        """
+        if not isinstance(arguments, str):
+            raise TypeError(expected_type_but_received_message.format("arguments", "str", arguments))
+
+        tokens = shlex.split(arguments)
+        if len(tokens) % 2 != 0:
+            raise ValueError(expected_value_but_received_message.format("arguments", "options with values",
+                                                                        arguments))
+        min_risk_level = RiskLevel.low
+        app_names = None
+        for option, value in zip(tokens[::2], tokens[1::2]):
+            if option == SubscriptionHub.min_risk_option:
+                if value not in RiskLevel.__members__ or value == RiskLevel.none.name:
+                    raise ValueError(expected_value_but_received_message.format(option, "low, medium or high",
+                                                                                value))
+                min_risk_level = RiskLevel[value]
+            elif option == SubscriptionHub.app_option:
+                app_names = (app_names or set()) | {value}
+            else:
+                raise ValueError(expected_value_but_received_message.format(
+                    "option", "{} or {}".format(SubscriptionHub.min_risk_option, SubscriptionHub.app_option), option))
+        return min_risk_level, app_names
+
+    def publish(self, app_summaries: List[AppSummary]) -> None:
+        """
+        Offers the anomalous applications to the subscriptions that match them, and forgets the closed subscriptions.
+        Each application is converted to json once, and only if a subscription matches it.
+        :raises TypeError if app_summaries is not of type 'List[AppSummary]'.
+        :param app_summaries: The summaries of the modelled applications. The ones without risk are ignored.
+        :type app_summaries: List[AppSummary]
+        """
+        if not isinstance(app_summaries, list):
+            raise TypeError(expected_type_but_received_message.format("app_summaries", "List[AppSummary]",
+                                                                      app_summaries))
+
+        with self.__lock:
+            self.__forget_closed_subscriptions()
+            subscriptions = list(self.__subscriptions)
+
+        for app_summary in app_summaries:
+            if app_summary.get_risk_level() is RiskLevel.none:
+                continue
+            self.__published_anomalies_count += 1
+            matching_subscriptions = [subscription for subscription in subscriptions
+                                      if subscription.matches(app_summary)]
+            if len(matching_subscriptions) == 0:
+                continue
+            app_summary_json = str(app_summary)
+            for subscription in matching_subscriptions:
+                subscription.offer(app_summary_json)
+
+    def __forget_closed_subscriptions(self) -> None:
+        """
+        Forgets the closed subscriptions, keeping their delivery metrics in the totals of the hub. It must be called
+        with the lock held.
+        """
+        for subscription in self.__subscriptions:
+            if subscription.is_closed():
+                subscription_metrics = subscription.get_metrics()
+                for metric_name in self.__closed_subscriptions_metrics.keys():
+                    self.__closed_subscriptions_metrics[metric_name] += subscription_metrics[metric_name]
+        self.__subscriptions = [subscription for subscription in self.__subscriptions if not subscription.is_closed()]
+
+    def get_metrics(self) -> dict:
+        """
+        Gets the delivery metrics of the subscriptions.
+        Format:
+            {
+                subscriptions_count: 2,
+                published_anomalies_count: 35,
+                delivered_messages_count: 40,
+                dropped_messages_count: 0,
+                subscriptions: [{...}, {...}]
+            }
+        The metrics of each open subscription are described in
+        'src.main.server.Subscription.Subscription.get_metrics'. The delivered and dropped counts include the closed
+        subscriptions.
+        :return: The delivery metrics.
+        :rtype: dict
+        """
+        with self.__lock:
+            self.__forget_closed_subscriptions()
+            subscriptions_metrics = [subscription.get_metrics() for subscription in self.__subscriptions]
+            totals = dict(self.__closed_subscriptions_metrics)
+        for subscription_metrics in subscriptions_metrics:
+            for metric_name in totals.keys():
+                totals[metric_name] += subscription_metrics[metric_name]
+        return {
+            "subscriptions_count": len(subscriptions_metrics),
+            "published_anomalies_count": self.__published_anomalies_count,
+            "delivered_messages_count": totals["delivered_messages_count"],
+            "dropped_messages_count": totals["dropped_messages_count"],
+            "subscriptions": subscriptions_metrics
+        }
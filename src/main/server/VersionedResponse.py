@@ -0,0 +1,61 @@
+import hashlib
+import threading
+import zlib
+
+from src.main.common.enum.ResponseEncoding import ResponseEncoding
+from src.utils.error_messages import expected_type_but_received_message
+
+
+class VersionedResponse:
+
+    def __init__(self, response: str) -> None:
+        """
+        Abstracts a response that is encoded once and served as is to every client until it is replaced, such as the
+        modelled applications of a modelling cycle. Its version is tagged by an ETag derived from its content, so a
+        client that already has the response can be told that it wasn't modified.
+        :raises TypeError if response is not of type 'str'.
+        :param response: The response as a json string.
+        :type response: str
+        """
+        if not isinstance(response, str):
+            raise TypeError(expected_type_but_received_message.format("response", "str", response))
+
+        encoded_response = response.encode()  # Defaults to utf-8
+        self.__etag = hashlib.blake2b(encoded_response, digest_size=8).hexdigest()
+        self.__encoded_responses = {ResponseEncoding.json: encoded_response}
+        self.__lock = threading.Lock()
+
+    def get_etag(self) -> str:
+        """
+        Gets the ETag of the response. Two responses with the same content have the same ETag.
+        :return: The ETag.
+        :rtype: str
+        """
+        return self.__etag
+
+    def get_encoded_response(self, response_encoding: ResponseEncoding = ResponseEncoding.json) -> bytes:
+        """
+        Gets the response encoded. Each encoding is computed the first time it is requested, and then reused.
+        :raises TypeError if response_encoding is not of type 'ResponseEncoding'.
+        :param response_encoding: The encoding.
+        :type response_encoding: ResponseEncoding
+        :return: The encoded response.
+        :rtype: bytes
+        """
+        if not isinstance(response_encoding, ResponseEncoding):
+            raise TypeError(expected_type_but_received_message.format("response_encoding", "ResponseEncoding",
+                                                                      response_encoding))
+        with self.__lock:
+            encoded_response = self.__encoded_responses.get(response_encoding)
+            if encoded_response is None:
+                encoded_response = zlib.compress(self.__encoded_responses[ResponseEncoding.json])
+                self.__encoded_responses[response_encoding] = encoded_response
+            return encoded_response
+
+    def __str__(self) -> str:
+        """
+        Overloads the str method to return the response as a json string.
+        :return: The response.
+        :rtype: str
+        """
+        return self.__encoded_responses[ResponseEncoding.json].decode()
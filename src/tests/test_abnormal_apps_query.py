@@ -0,0 +1,68 @@
+from datetime import datetime
+
+import pytest
+
+import wades_config
+from src.main.common.AbnormalAppsQuery import AbnormalAppsQuery
+from src.main.common.enum.RiskLevel import RiskLevel
+
+"""
+This file contains test for AbnormalAppsQuery class.
+Functional test for the following methods in AbnormalAppsQuery class:
+* from_arguments()
+* matches()
+* matches_abnormal_attributes()
+
+Input validation test:
+* __init__()
+* from_arguments()
+"""
+
+
+def test_from_arguments_and_matches() -> None:
+    """
+    Test that the options of the history command are parsed into filters, and that records are matched against all
+    of them.
+    """
+    abnormal_apps_query = AbnormalAppsQuery.from_arguments(
+        "--app firefox --app 'Web Content' --since 2021-01-31 --until '2021-01-31 20:30:00' --min-risk medium "
+        "--attribute opened_files --cursor 120 --limit 20")
+    assert abnormal_apps_query.get_cursor() == 120
+    assert abnormal_apps_query.get_limit() == 20
+    assert abnormal_apps_query.matches("Web Content", RiskLevel.high.name, "2021-01-31 20:09:03:771116")
+    assert not abnormal_apps_query.matches("bash", RiskLevel.high.name, "2021-01-31 20:09:03:771116")
+    assert not abnormal_apps_query.matches("firefox", RiskLevel.low.name, "2021-01-31 20:09:03:771116")
+    assert not abnormal_apps_query.matches("firefox", RiskLevel.high.name, "2021-01-30 20:09:03:771116")
+    assert not abnormal_apps_query.matches("firefox", RiskLevel.high.name, "2021-01-31 20:30:00:000001")
+    assert abnormal_apps_query.matches_abnormal_attributes(["cpu_percents", "opened_files"])
+    assert not abnormal_apps_query.matches_abnormal_attributes(["cpu_percents"])
+
+    default_query = AbnormalAppsQuery.from_arguments("")
+    assert (default_query.get_cursor(), default_query.get_limit()) == (0, wades_config.history_query_default_limit)
+    assert default_query.matches("bash", RiskLevel.low.name, "2021-01-31 20:09:03:771116")
+    assert default_query.matches_abnormal_attributes(list())
+
+
+# noinspection PyTypeChecker
+def test_abnormal_apps_query_with_input_validation() -> None:
+    """
+    Test AbnormalAppsQuery with invalid inputs.
+    """
+    with pytest.raises(TypeError):
+        AbnormalAppsQuery(app_names=["firefox"])
+    with pytest.raises(TypeError):
+        AbnormalAppsQuery(since="2021-01-31")
+    with pytest.raises(TypeError):
+        AbnormalAppsQuery(min_risk_level="high")
+    with pytest.raises(TypeError):
+        AbnormalAppsQuery(cursor="0")
+    with pytest.raises(ValueError):
+        AbnormalAppsQuery(cursor=-1)
+    with pytest.raises(ValueError):
+        AbnormalAppsQuery(limit=wades_config.history_query_max_limit + 1)
+    assert AbnormalAppsQuery(until=datetime(2021, 1, 31)).get_limit() == wades_config.history_query_default_limit
+    with pytest.raises(TypeError):
+        AbnormalAppsQuery.from_arguments(None)
+    for arguments in ["--app", "--since yesterday", "--min-risk none", "--limit ten", "--limit 0", "--apps firefox"]:
+        with pytest.raises(ValueError):
+            AbnormalAppsQuery.from_arguments(arguments)
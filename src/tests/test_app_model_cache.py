@@ -0,0 +1,242 @@
+import datetime
+
+import numpy
+import pytest
+
+import wades_config
+from src.main.common.AppModelCache import AppModelCache
+from src.main.common.AppProfileBaseline import AppProfileBaseline
+from src.main.common.MultivariateBaseline import MultivariateBaseline
+from src.main.common.NumericAttributeModel import NumericAttributeModel
+from src.main.common.enum.AppProfileAttribute import AppProfileAttribute
+
+"""
+This file contains test for AppModelCache and NumericAttributeModel classes.
+Functional test for the following methods in AppModelCache class:
+* fit()
+* fit() with a multivariate baseline
+* add_new_samples()
+* is_refit_needed()
+* get_unknown_files()
+* get_unknown_users()
+* get_accessed_prohibited_files()
+* add_streaming_samples()
+* get_streaming_z_scores()
+* dict_format()
+* set_value_from_dict()
+
+Functional test for the following methods in NumericAttributeModel class:
+* fit()
+* count_outliers()
+
+Input validation test:
+* AppModelCache.__init__()
+* AppModelCache.fit()
+* AppModelCache.add_new_samples()
+* AppModelCache.add_streaming_samples()
+* AppModelCache.get_streaming_z_scores()
+* NumericAttributeModel.fit()
+"""
+
+
+def build_app_profile_data(samples_count: int, first_timestamp: datetime.datetime, memory_mean: float = 5000,
+                           opened_file: str = "/tmp/file") -> dict:
+    """
+    Builds application profile data, in the format of 'AppProfile.get_previously_retrieved_data', with one sample per
+    minute.
+    :param samples_count: The number of samples.
+    :type samples_count: int
+    :param first_timestamp: The retrieval timestamp of the first sample.
+    :type first_timestamp: datetime.datetime
+    :param memory_mean: The mean of the memory usages.
+    :type memory_mean: float
+    :param opened_file: The file opened by every sample.
+    :type opened_file: str
+    :return: The application profile data.
+    :rtype: dict
+    """
+    random_generator = numpy.random.default_rng(seed=samples_count)
+    retrieval_timestamps = [(first_timestamp + datetime.timedelta(minutes=index)).strftime(
+        wades_config.datetime_format) for index in range(samples_count)]
+    return {
+        AppProfileAttribute.app_name.name: "app",
+        AppProfileAttribute.data_retrieval_timestamps.name: retrieval_timestamps,
+        AppProfileAttribute.usernames.name: ["user"] * samples_count,
+        AppProfileAttribute.memory_infos.name: random_generator.normal(memory_mean, 100, samples_count).astype(
+            int).tolist(),
+        AppProfileAttribute.opened_files.name: [[opened_file]] * samples_count,
+        AppProfileAttribute.cpu_percents.name: random_generator.gamma(2, 1, samples_count).tolist(),
+        AppProfileAttribute.children_counts.name: [0] * samples_count,
+        AppProfileAttribute.threads_numbers.name: random_generator.integers(2, 6, samples_count).tolist(),
+        AppProfileAttribute.connections_numbers.name: [1] * samples_count
+    }
+
+
+def test_numeric_attribute_model_fit() -> None:
+    """
+    Test that the fitted model has the same histogram, quartiles and extremes as numpy and counts the outliers.
+    """
+    data = [3422, 3211, 2212, 2123, 3482, 3300, 2900, 12000]
+    model = NumericAttributeModel()
+    model.fit(data)
+
+    expected_bin_counts, expected_bin_edges = numpy.histogram(data, bins='fd')
+    assert model.get_bin_counts() == expected_bin_counts.tolist()
+    assert model.get_bin_edges() == expected_bin_edges.tolist()
+    assert model.get_quartiles() == tuple(numpy.percentile(data, [25, 75]).tolist())
+    assert model.get_lowest_point() == 2123
+    assert model.get_highest_point() == 12000
+    assert model.get_fitted_samples_count() == len(data)
+    assert model.count_outliers([3000, 12000, 100]) == 2
+
+    restored_model = NumericAttributeModel()
+    restored_model.set_value_from_dict(model.dict_format())
+    assert restored_model.dict_format() == model.dict_format()
+
+
+def test_refit_after_new_samples(monkeypatch) -> None:
+    """
+    Test that new samples are counted from the last seen sample and that a refit is needed once enough of them have
+    been added.
+    """
+    monkeypatch.setattr(wades_config, "model_cache_refit_samples_count", 50)
+    monkeypatch.setattr(wades_config, "model_cache_drift_min_samples_count", 10)
+    first_timestamp = datetime.datetime.now() - datetime.timedelta(days=1)
+    app_profile_data = build_app_profile_data(samples_count=200, first_timestamp=first_timestamp)
+    previous_data = {attribute_name: values[:100] for attribute_name, values in app_profile_data.items()
+                     if isinstance(values, list)}
+
+    model_cache = AppModelCache("app")
+    assert model_cache.is_refit_needed()
+    model_cache.fit(previous_data)
+    assert not model_cache.is_refit_needed()
+    assert model_cache.get_known_files().get_values() == {"/tmp/file"}
+    assert model_cache.get_known_files_observations_count() == 100
+    assert model_cache.get_known_users().get_values() == {"user"}
+    assert model_cache.get_numeric_model(AppProfileAttribute.memory_infos.name).get_fitted_samples_count() == 100
+
+    # Samples that were already added are ignored.
+    model_cache.add_new_samples(previous_data)
+    assert model_cache.get_new_samples_count() == 0
+
+    new_data = {attribute_name: values[:140] for attribute_name, values in app_profile_data.items()
+                if isinstance(values, list)}
+    model_cache.add_new_samples(new_data)
+    assert model_cache.get_new_samples_count() == 40
+    assert not model_cache.is_refit_needed()
+
+    model_cache.add_new_samples(app_profile_data)
+    assert model_cache.get_new_samples_count() == 100
+    assert model_cache.get_known_files_observations_count() == 200
+    assert model_cache.get_unknown_files(["/tmp/file", "/tmp/other_file"]) == {"/tmp/other_file"}
+    assert model_cache.get_unknown_users(["user", "root"]) == {"root"}
+    assert model_cache.is_refit_needed()
+
+    # Refitting doesn't read the known values again.
+    model_cache.fit(app_profile_data)
+    assert model_cache.get_new_samples_count() == 0
+    assert model_cache.get_known_files_observations_count() == 200
+    assert model_cache.get_fitted_timestamp() == datetime.datetime.strptime(
+        app_profile_data[AppProfileAttribute.data_retrieval_timestamps.name][-1], wades_config.datetime_format)
+
+    restored_model_cache = AppModelCache("app")
+    restored_model_cache.set_value_from_dict(model_cache.dict_format())
+    assert restored_model_cache.dict_format() == model_cache.dict_format()
+
+
+def test_refit_after_drift(monkeypatch) -> None:
+    """
+    Test that a refit is needed when too many of the new values are outliers, before the refit samples count is
+    reached.
+    """
+    monkeypatch.setattr(wades_config, "model_cache_refit_samples_count", 1000)
+    monkeypatch.setattr(wades_config, "model_cache_drift_min_samples_count", 10)
+    monkeypatch.setattr(wades_config, "model_cache_drift_outlier_fraction", 0.1)
+    first_timestamp = datetime.datetime.now() - datetime.timedelta(days=1)
+    model_cache = AppModelCache("app")
+    model_cache.fit(build_app_profile_data(samples_count=100, first_timestamp=first_timestamp))
+
+    drifted_data = build_app_profile_data(samples_count=20, first_timestamp=first_timestamp + datetime.timedelta(
+        hours=2), memory_mean=50000)
+    model_cache.add_new_samples(drifted_data)
+    assert model_cache.get_new_samples_count() == 20
+    assert model_cache.get_new_outliers_count(AppProfileAttribute.memory_infos.name) == 20
+    assert model_cache.is_refit_needed()
+    assert set(model_cache.dict_format()["numeric_models"].keys()) == set(AppProfileBaseline.numeric_attribute_names)
+
+
+def test_accessed_prohibited_files(monkeypatch) -> None:
+    """
+    Test that the prohibited files opened by the application are kept exactly, even when the known files are kept in
+    Bloom filters.
+    """
+    monkeypatch.setattr(wades_config, "opened_files_generalization_threshold", None)
+    monkeypatch.setattr(wades_config, "known_values_bloom_filter_threshold", 0)
+    prohibited_file = sorted(wades_config.prohibited_files)[0]
+    first_timestamp = datetime.datetime.now() - datetime.timedelta(days=1)
+    model_cache = AppModelCache("app")
+    model_cache.fit(build_app_profile_data(samples_count=50, first_timestamp=first_timestamp))
+    assert not model_cache.get_known_files().is_exact()
+    assert model_cache.get_accessed_prohibited_files() == set()
+
+    model_cache.add_new_samples(build_app_profile_data(
+        samples_count=5, first_timestamp=first_timestamp + datetime.timedelta(hours=2), opened_file=prohibited_file))
+    assert model_cache.get_accessed_prohibited_files() == {prohibited_file}
+    assert model_cache.get_unknown_files([prohibited_file]) == set()
+
+
+# noinspection PyTypeChecker
+def test_fit_drops_the_multivariate_baseline() -> None:
+    """
+    Test that fitting the numeric models drops the multivariate baseline, so it is rebuilt from the same data.
+    """
+    model_cache = AppModelCache("app")
+    model_cache.set_multivariate_baseline(
+        MultivariateBaseline(attribute_names=AppProfileBaseline.numeric_attribute_names))
+    model_cache.fit(build_app_profile_data(samples_count=50, first_timestamp=datetime.datetime(2020, 12, 14, 10, 0)))
+    assert model_cache.get_multivariate_baseline() is None
+
+
+def test_streaming_samples() -> None:
+    """
+    Test that the running statistics are folded and scored in the cache, without copying them.
+    """
+    model_cache = AppModelCache("app")
+    first_timestamp = datetime.datetime(2020, 12, 14, 10, 0)
+    app_profile_data = build_app_profile_data(samples_count=50, first_timestamp=first_timestamp)
+    assert model_cache.get_streaming_last_seen_timestamp() is None
+    z_scores = model_cache.get_streaming_z_scores(app_profile_data, minimum_samples_count=1,
+                                                  seasonal_minimum_samples_count=1)
+    assert numpy.isnan(z_scores[AppProfileAttribute.memory_infos.name]).all()
+
+    model_cache.add_streaming_samples(app_profile_data)
+    model_cache.add_streaming_samples(app_profile_data)
+    assert model_cache.get_streaming_last_seen_timestamp() == first_timestamp + datetime.timedelta(minutes=49)
+    assert model_cache.get_streaming_baseline().get_samples_count(AppProfileAttribute.memory_infos.name) == 50
+    # The samples are still unknown to the rest of the cache.
+    assert model_cache.get_last_seen_timestamp() is None
+    z_scores = model_cache.get_streaming_z_scores(
+        build_app_profile_data(samples_count=1, first_timestamp=first_timestamp, memory_mean=50000),
+        minimum_samples_count=1, seasonal_minimum_samples_count=1000)
+    assert z_scores[AppProfileAttribute.memory_infos.name][0] > wades_config.streaming_anomaly_z_score
+
+
+def test_app_model_cache_with_input_validation() -> None:
+    """
+    Test AppModelCache and NumericAttributeModel with invalid inputs.
+    """
+    with pytest.raises(TypeError):
+        AppModelCache(None)
+    model_cache = AppModelCache("app")
+    with pytest.raises(TypeError):
+        model_cache.fit(None)
+    with pytest.raises(TypeError):
+        model_cache.add_new_samples([1, 2])
+    with pytest.raises(TypeError):
+        model_cache.add_streaming_samples(None)
+    with pytest.raises(TypeError):
+        model_cache.get_streaming_z_scores(None, minimum_samples_count=1, seasonal_minimum_samples_count=1)
+    with pytest.raises(TypeError):
+        NumericAttributeModel().fit(None)
+    with pytest.raises(ValueError):
+        NumericAttributeModel().get_outlier_fences()
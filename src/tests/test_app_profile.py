@@ -1,4 +1,6 @@
+import copy
 import datetime
+from collections import namedtuple
 
 import psutil
 import pytest
@@ -17,21 +19,30 @@ This file contains test for AppProfile class.
 Functional test for the following methods in AppProfile class:
 * __eq__()
 * __ne__()
+* __copy__()
 * add_new_information_from_process_object()
 * add_open_files()
+* add_new_information_batch()
+* apply_sliding_window()
+* evict_oldest_samples()
 * dict_format()
 * get_previously_retrieved_data()
 * get_latest_retrieved_data()
+* get_retrieved_data()
 
 Input validation test:
 * add_new_information_from_process_object()
 * add_open_files()
 * add_new_information()
+* add_new_information_batch()
+* apply_sliding_window()
+* evict_oldest_samples()
 * set_value_from_dict()
 
 """
 
 logger_name = "testAppProfile"
+OpenFile = namedtuple("OpenFile", "path, fd")
 
 
 def test_application_equality() -> None:
@@ -53,6 +64,32 @@ def test_application_equality() -> None:
     assert (first_application_name != second_application)
 
 
+def test_copy() -> None:
+    """
+    Test that the copy of an application profile can take new samples and evict old ones without changing the
+    original profile.
+    """
+    app_profile = AppProfileDataManager.get_saved_profile("common_case_app", SAMPLE_APP_PROF_DATA_PATH)
+    app_profile.update_quantile_sketches()
+    app_profile_dict = app_profile.dict_format()
+    app_profile_state_dict = app_profile.state_dict_format()
+
+    app_profile_copy = copy.copy(app_profile)
+    assert app_profile_copy is not app_profile
+    assert app_profile_copy.dict_format() == app_profile_dict
+    assert app_profile_copy.state_dict_format() == app_profile_state_dict
+
+    app_profile_copy.add_new_information_batch(memory_usages=[100], child_processes_counts=[0], users=["user_1"],
+                                               open_files=[[OpenFile("/tmp/a", 3)]], cpu_percentages=[0.5],
+                                               data_retrieval_timestamp=datetime.datetime.now(),
+                                               threads_numbers=[1], connections_numbers=[0])
+    app_profile_copy.update_quantile_sketches()
+    app_profile_copy.evict_oldest_samples(app_profile_copy.get_samples_count())
+    assert app_profile_copy.get_samples_count() == 1
+    assert app_profile.dict_format() == app_profile_dict
+    assert app_profile.state_dict_format() == app_profile_state_dict
+
+
 def test_add_new_information_from_process_with_input_validation() -> None:
     """
     Test input validation for adding new process information with process object.
@@ -199,6 +236,183 @@ def test_add_information_with_input_validation() -> None:
                                         open_files=list(), threads_number=1, connections_num=-1)
 
 
+def test_add_new_information_batch() -> None:
+    """
+    Test adding the information of several processes in one batch. It should have the same result as adding the
+    processes one at a time.
+    """
+    timestamp = datetime.datetime.now()
+    batch_app_profile = AppProfile("Some application")
+    batch_app_profile.add_new_information_batch(memory_usages=[100, 250], child_processes_counts=[0, 2],
+                                                users=["user_1", "user_2"],
+                                                open_files=[[OpenFile("/tmp/a", 3), OpenFile("/tmp/a", 4)],
+                                                            [OpenFile("/tmp/b", 3)]],
+                                                cpu_percentages=[0.5, 3.0], data_retrieval_timestamp=timestamp,
+                                                threads_numbers=[1, 4], connections_numbers=[0, 2])
+
+    single_app_profile = AppProfile("Some application")
+    single_app_profile.add_new_information(memory_usage=100, child_processes_count=0, users=["user_1"],
+                                           open_files=[OpenFile("/tmp/a", 3), OpenFile("/tmp/a", 4)],
+                                           cpu_percentage=0.5, data_retrieval_timestamp=timestamp,
+                                           threads_number=1, connections_num=0)
+    single_app_profile.add_new_information(memory_usage=250, child_processes_count=2, users=["user_2"],
+                                           open_files=[OpenFile("/tmp/b", 3)],
+                                           cpu_percentage=3.0, data_retrieval_timestamp=timestamp,
+                                           threads_number=4, connections_num=2)
+
+    batch_app_profile_dict = batch_app_profile.dict_format()
+    single_app_profile_dict = single_app_profile.dict_format()
+    batch_app_profile_dict.pop(AppProfileAttribute.date_created_timestamp.name)
+    single_app_profile_dict.pop(AppProfileAttribute.date_created_timestamp.name)
+    assert batch_app_profile_dict == single_app_profile_dict
+    assert batch_app_profile.get_latest_retrieved_data_size() == 2
+    check_app_profile_has_the_right_format("Some application", batch_app_profile.dict_format())
+
+
+# noinspection PyTypeChecker
+def test_add_new_information_batch_with_input_validation() -> None:
+    """
+    Test add information batch with input validation.
+    """
+    app_profile = AppProfile("Some application")
+    valid_batch = {
+        "memory_usages": [1, 2],
+        "child_processes_counts": [0, 1],
+        "users": ["user"],
+        "open_files": [list(), list()],
+        "cpu_percentages": [0.5, 1.0],
+        "data_retrieval_timestamp": datetime.datetime.now(),
+        "threads_numbers": [1, 1],
+        "connections_numbers": [0, 0]
+    }
+
+    invalid_type_values = {
+        "memory_usages": [None, [1, None], [1.5, 2.5]],
+        "child_processes_counts": [None, ["1", "2"]],
+        "users": [None, "user"],
+        "open_files": [None, [None, None]],
+        "cpu_percentages": [None, ["", ""]],
+        "data_retrieval_timestamp": [None, "2021-01-01"],
+        "threads_numbers": [None, [1.0, 2.0]],
+        "connections_numbers": [None, [None, 1]]
+    }
+    for argument_name, invalid_values in invalid_type_values.items():
+        for invalid_value in invalid_values:
+            batch = dict(valid_batch)
+            batch[argument_name] = invalid_value
+            with pytest.raises(TypeError):
+                app_profile.add_new_information_batch(**batch)
+
+    invalid_values = {
+        "memory_usages": [[1], [1, -1]],
+        "child_processes_counts": [[0, 1, 2], [-1, 0]],
+        "cpu_percentages": [[0.5], [0.5, -0.5]],
+        "threads_numbers": [[1], [1, -2]],
+        "connections_numbers": [[0, 0, 0], [-1, 0]]
+    }
+    for argument_name, argument_invalid_values in invalid_values.items():
+        for invalid_value in argument_invalid_values:
+            batch = dict(valid_batch)
+            batch[argument_name] = invalid_value
+            with pytest.raises(ValueError):
+                app_profile.add_new_information_batch(**batch)
+
+    # data_retrieval_timestamp with value set to tomorrow
+    with pytest.raises(ValueError):
+        tomorrow_date = datetime.date.today() + datetime.timedelta(days=1)
+        batch = dict(valid_batch)
+        batch["data_retrieval_timestamp"] = datetime.datetime.combine(tomorrow_date, datetime.time.min)
+        app_profile.add_new_information_batch(**batch)
+
+    # Nothing is added when a batch is rejected.
+    assert len(app_profile.get_data_retrieval_timestamps()) == 0
+
+
+def add_sample_batches(app_profile: AppProfile, batches_count: int, batch_size: int = 2) -> None:
+    """
+    Helper method that adds batches of samples to an application profile. Each batch is retrieved one minute after
+    the previous one and the n-th batch uses the user 'user_n' and the file '/tmp/file_n'.
+    :param app_profile: The application profile to add the batches to.
+    :type app_profile: AppProfile
+    :param batches_count: The number of batches to add.
+    :type batches_count: int
+    :param batch_size: The number of samples in each batch.
+    :type batch_size: int
+    """
+    first_timestamp = datetime.datetime.now() - datetime.timedelta(minutes=batches_count)
+    for batch_index in range(batches_count):
+        app_profile.add_new_information_batch(
+            memory_usages=[100 + batch_index] * batch_size, child_processes_counts=[0] * batch_size,
+            users=["user_{}".format(batch_index)] * batch_size,
+            open_files=[[OpenFile("/tmp/file_{}".format(batch_index), 3)]] * batch_size,
+            cpu_percentages=[float(batch_index)] * batch_size,
+            data_retrieval_timestamp=first_timestamp + datetime.timedelta(minutes=batch_index),
+            threads_numbers=[1] * batch_size, connections_numbers=[0] * batch_size)
+
+
+def test_apply_sliding_window() -> None:
+    """
+    Test that the sliding window evicts the oldest samples into the baseline and never evicts the latest retrieved
+    data.
+    """
+    # Limit by number of samples
+    app_profile = AppProfile("Some application")
+    add_sample_batches(app_profile, batches_count=5)
+    latest_retrieved_data = app_profile.get_latest_retrieved_data()
+    assert app_profile.apply_sliding_window(max_samples=6) == 4
+    assert app_profile.get_samples_count() == 6
+    assert app_profile.get_evicted_samples_count() == 4
+    assert app_profile.get_latest_retrieved_data() == latest_retrieved_data
+    assert app_profile.get_memory_usages() == [102, 102, 103, 103, 104, 104]
+
+    baseline = app_profile.get_baseline()
+    assert baseline.get_users() == {"user_0", "user_1"}
+    assert baseline.get_opened_files() == {"/tmp/file_0", "/tmp/file_1"}
+
+    # The latest retrieved data is kept even if it does not fit in the window.
+    assert app_profile.apply_sliding_window(max_samples=1) == 4
+    assert app_profile.get_latest_retrieved_data() == latest_retrieved_data
+    assert app_profile.apply_sliding_window(max_samples=0) == 0
+
+    # Limit by time span
+    app_profile = AppProfile("Some application")
+    add_sample_batches(app_profile, batches_count=5)
+    assert app_profile.apply_sliding_window(max_time_span_sec=2.5 * 60) == 4
+    assert app_profile.get_memory_usages() == [102, 102, 103, 103, 104, 104]
+
+    # Limit by estimated size
+    app_profile = AppProfile("Some application")
+    add_sample_batches(app_profile, batches_count=5)
+    size_bytes = app_profile.get_estimated_size_bytes()
+    assert app_profile.apply_sliding_window(max_size_bytes=size_bytes) == 0
+    assert app_profile.apply_sliding_window(max_size_bytes=size_bytes // 2) > 0
+    assert app_profile.get_estimated_size_bytes() <= size_bytes // 2
+
+    # No limits
+    app_profile = AppProfile("Some application")
+    add_sample_batches(app_profile, batches_count=5)
+    assert app_profile.apply_sliding_window() == 0
+    assert app_profile.get_baseline().is_empty()
+
+
+# noinspection PyTypeChecker
+def test_apply_sliding_window_with_input_validation() -> None:
+    """
+    Test apply_sliding_window() and evict_oldest_samples() with input validation.
+    """
+    app_profile = AppProfile("Some application")
+    with pytest.raises(TypeError):
+        app_profile.apply_sliding_window(max_samples="10")
+    with pytest.raises(TypeError):
+        app_profile.apply_sliding_window(max_time_span_sec="10")
+    with pytest.raises(TypeError):
+        app_profile.apply_sliding_window(max_size_bytes=10.5)
+    with pytest.raises(TypeError):
+        app_profile.evict_oldest_samples(samples_count=None)
+    with pytest.raises(ValueError):
+        app_profile.evict_oldest_samples(samples_count=-1)
+
+
 def test_add_open_files_with_input_validation() -> None:
     """
     Test add open files with input validation.
@@ -404,3 +618,26 @@ def test_get_latest_retrieved_data() -> None:
     actual_latest_app_profile_data = app_profile.get_latest_retrieved_data()
 
     assert actual_latest_app_profile_data == expected_latest_app_profile_data
+
+
+def test_get_retrieved_data() -> None:
+    """
+    Test that get_retrieved_data returns only the samples retrieved in the requested range.
+    """
+    app_profile = AppProfile("Some application")
+    add_sample_batches(app_profile, batches_count=3)
+    assert app_profile.get_retrieved_data()[AppProfileAttribute.memory_infos.name] == [100, 100, 101, 101, 102, 102]
+
+    previous_retrieval_timestamp = app_profile.get_previous_retrieval_timestamp()
+    assert app_profile.get_retrieved_data(since_timestamp=previous_retrieval_timestamp) == \
+        app_profile.get_latest_retrieved_data()
+    until_previous_data = app_profile.get_retrieved_data(until_timestamp=previous_retrieval_timestamp)
+    assert until_previous_data[AppProfileAttribute.memory_infos.name] == [100, 100, 101, 101]
+    assert until_previous_data[AppProfileAttribute.usernames.name] == ["user_0", "user_0", "user_1", "user_1"]
+    assert app_profile.get_retrieved_data(since_timestamp=datetime.datetime.now())[
+        AppProfileAttribute.memory_infos.name] == []
+
+    with pytest.raises(TypeError):
+        app_profile.get_retrieved_data(since_timestamp="yesterday")
+    with pytest.raises(TypeError):
+        app_profile.get_retrieved_data(until_timestamp=1)
@@ -0,0 +1,92 @@
+import pytest
+
+import paths
+from src.main.common.AppProfile import AppProfile
+from src.main.psHandler.AppProfileCache import AppProfileCache
+from src.main.psHandler.AppProfileDataManager import AppProfileDataManager
+
+"""
+This file contains test for AppProfileCache class.
+Functional test for the following methods in AppProfileCache class:
+* is_cached()
+* get()
+* get_copy()
+* put()
+* remove()
+* get_metrics()
+
+Input validation test:
+* __init__()
+* get()
+* put()
+"""
+
+
+def test_profiles_are_written_through_and_read_from_memory() -> None:
+    """
+    Test that put() saves the profile and keeps it in memory, that get() only reads the saved profiles on a miss, and
+    that copies don't change the cached profile.
+    """
+    app_name = "common_case_app"
+    app_profile_cache = AppProfileCache(max_entries_count=4)
+    assert app_profile_cache.get(app_name) is None
+
+    app_profile = AppProfileDataManager.get_saved_profile(app_name, paths.SAMPLE_APP_PROF_DATA_PATH)
+    app_profile_cache.put(app_profile)
+    assert app_profile_cache.get(app_name) is app_profile
+    assert AppProfileDataManager.get_saved_profile(app_name).dict_format() == app_profile.dict_format()
+
+    app_profile_copy = app_profile_cache.get_copy(app_name)
+    assert app_profile_copy is not app_profile
+    app_profile_copy.evict_oldest_samples(app_profile_copy.get_samples_count())
+    assert app_profile_cache.get(app_name).get_samples_count() == app_profile.get_samples_count()
+    assert app_profile_cache.get(app_name).get_samples_count() > 0
+
+    # After a restart, the saved profile is loaded once and then read from memory.
+    restarted_app_profile_cache = AppProfileCache(max_entries_count=4)
+    assert not restarted_app_profile_cache.is_cached(app_name)
+    loaded_app_profile = restarted_app_profile_cache.get(app_name)
+    assert restarted_app_profile_cache.is_cached(app_name)
+    assert loaded_app_profile.dict_format() == app_profile.dict_format()
+    assert restarted_app_profile_cache.get(app_name) is loaded_app_profile
+    metrics = restarted_app_profile_cache.get_metrics()
+    assert metrics["hits_count"] == 1
+    assert metrics["misses_count"] == 1
+    assert metrics["entries_count"] == 1
+
+    restarted_app_profile_cache.remove(app_name)
+    assert restarted_app_profile_cache.get_cached_application_names() == list()
+    assert restarted_app_profile_cache.get(app_name) is not loaded_app_profile
+
+
+def test_least_recently_used_profiles_are_evicted() -> None:
+    """
+    Test that the least recently used profile is evicted when the cache is full, and that it can still be loaded from
+    disk.
+    """
+    app_profile_cache = AppProfileCache(max_entries_count=2)
+    for app_name in ["first_app", "second_app"]:
+        app_profile_cache.put(AppProfile(app_name))
+    # first_app is used again, so second_app becomes the least recently used profile.
+    app_profile_cache.get("first_app")
+    app_profile_cache.put(AppProfile("third_app"))
+    assert app_profile_cache.get_cached_application_names() == ["first_app", "third_app"]
+    assert app_profile_cache.get_metrics()["evictions_count"] == 1
+
+    assert app_profile_cache.get("second_app").get_application_name() == "second_app"
+    assert app_profile_cache.get_cached_application_names() == ["third_app", "second_app"]
+
+
+# noinspection PyTypeChecker
+def test_app_profile_cache_with_input_validation() -> None:
+    """
+    Test AppProfileCache with invalid inputs.
+    """
+    with pytest.raises(TypeError):
+        AppProfileCache(max_entries_count=None)
+    with pytest.raises(ValueError):
+        AppProfileCache(max_entries_count=0)
+    with pytest.raises(TypeError):
+        AppProfileCache().get(None)
+    with pytest.raises(TypeError):
+        AppProfileCache().put("app")
@@ -1,12 +1,18 @@
+import threading
 from datetime import datetime
 
 import pytest
 from numpy import nan
 
 import paths
+import wades_config
+from src.main.common.AbnormalAppsQuery import AbnormalAppsQuery
+from src.main.common.AppModelCache import AppModelCache
+from src.main.common.AppSummary import AppSummary
 from src.main.common.AppProfile import AppProfile
 from src.main.common.enum.AppProfileAttribute import AppProfileAttribute
 from src.main.common.enum.AppSummaryAttribute import AppSummaryAttribute
+from src.main.common.enum.RiskLevel import RiskLevel
 from src.main.modeller.FrequencyTechnique import FrequencyTechnique
 from src.main.psHandler.AppProfileDataManager import AppProfileDataManager
 from src.main.psHandler.ProcessHandler import ProcessHandler
@@ -16,14 +22,21 @@ from src.tests.test_helpers import check_app_profile_has_the_right_format
 Contains tests for AppProfileDataManager class
 
 Functional tests:
+* save_app_profile()
 * save_app_profiles()
 * get_saved_profiles()
 * get_saved_profiles_as_dict()
+* save_model_cache()
+* get_saved_model_cache()
+* save_daemon_snapshot()
+* get_daemon_snapshot()
+* get_saved_abnormal_apps_page()
 
 Input Validation tests:
 * save_app_profiles()
 * get_saved_profiles()
 * get_saved_profiles_as_dict()
+* get_saved_abnormal_apps_page()
 """
 
 logger_name = "testAppProfileDataManager"
@@ -90,6 +103,99 @@ def test_save_and_get_profile_data() -> None:
     assert latest_retrieved_data_timestamp == saved_retrieved_timestamp
 
 
+def test_save_and_get_profile_with_baseline() -> None:
+    """
+    Test save_app_profile() and get_saved_profile() with a profile that has evicted samples.
+    Checks that the baseline is saved and retrieved along with the profile's samples.
+    """
+    app_name = "common_case_app"
+    app_profile = AppProfileDataManager.get_saved_profile(app_name, paths.SAMPLE_APP_PROF_DATA_PATH)
+    app_profile.evict_oldest_samples(samples_count=2)
+    AppProfileDataManager.save_app_profile(app_profile)
+
+    saved_app_profile = AppProfileDataManager.get_saved_profile(app_name)
+    assert saved_app_profile.get_samples_count() == 3
+    assert saved_app_profile.get_evicted_samples_count() == 2
+    assert saved_app_profile.get_baseline().dict_format() == app_profile.get_baseline().dict_format()
+    assert saved_app_profile.dict_format() == app_profile.dict_format()
+
+
+def test_save_and_get_model_cache() -> None:
+    """
+    Test save_model_cache() and get_saved_model_cache().
+    Checks that the fitted models are saved next to the profile and retrieved without changes.
+    """
+    app_name = "common_case_app"
+    app_profile = AppProfileDataManager.get_saved_profile(app_name, paths.SAMPLE_APP_PROF_DATA_PATH)
+    AppProfileDataManager.save_app_profile(app_profile)
+    assert AppProfileDataManager.get_saved_model_cache(app_name) is None
+
+    model_cache = AppModelCache(app_name)
+    model_cache.fit(app_profile.get_previously_retrieved_data())
+    AppProfileDataManager.save_model_cache(model_cache)
+
+    saved_model_cache = AppProfileDataManager.get_saved_model_cache(app_name)
+    assert saved_model_cache.dict_format() == model_cache.dict_format()
+    model_cache_file_paths = list(paths.TEST_APP_PROF_DATA_DIR_PATH.glob(
+        "*" + wades_config.app_model_cache_file_suffix))
+    assert len(model_cache_file_paths) == 1
+
+    # A truncated file is reported as unreadable instead of as a json error.
+    model_cache_text = model_cache_file_paths[0].read_text()
+    model_cache_file_paths[0].write_text(model_cache_text[:len(model_cache_text) // 2])
+    with pytest.raises(ValueError):
+        AppProfileDataManager.get_saved_model_cache(app_name)
+
+    with pytest.raises(TypeError):
+        AppProfileDataManager.save_model_cache(None)
+    with pytest.raises(TypeError):
+        AppProfileDataManager.get_saved_model_cache(None)
+
+
+def test_save_and_get_daemon_snapshot() -> None:
+    """
+    Test save_daemon_snapshot() and get_daemon_snapshot().
+    Checks that the snapshot is retrieved without changes, and that missing or corrupt snapshots are ignored.
+    """
+    daemon_snapshot_file_path = paths.TEST_APP_PROF_DATA_DIR_PATH / "test_daemon_snapshot.json.z"
+    daemon_snapshot_file_path.unlink(missing_ok=True)
+    assert AppProfileDataManager.get_daemon_snapshot(daemon_snapshot_file_path) is None
+
+    process_handler = ProcessHandler(logger_name)
+    process_handler.get_memory_budget().mark_seen("common_case_app", 2048)
+    daemon_snapshot = {"version": 1, "process_handler": process_handler.dict_format()}
+    AppProfileDataManager.save_daemon_snapshot(daemon_snapshot, daemon_snapshot_file_path)
+    assert AppProfileDataManager.get_daemon_snapshot(daemon_snapshot_file_path) == daemon_snapshot
+    assert list(daemon_snapshot_file_path.parent.glob(daemon_snapshot_file_path.name + ".*.tmp")) == []
+
+    # Concurrent writers, such as the publishing stage and the exit handler, each write their own temporary file.
+    saving_threads = [threading.Thread(target=AppProfileDataManager.save_daemon_snapshot,
+                                       args=(daemon_snapshot, daemon_snapshot_file_path)) for _ in range(8)]
+    for saving_thread in saving_threads:
+        saving_thread.start()
+    for saving_thread in saving_threads:
+        saving_thread.join()
+    assert AppProfileDataManager.get_daemon_snapshot(daemon_snapshot_file_path) == daemon_snapshot
+    assert list(daemon_snapshot_file_path.parent.glob(daemon_snapshot_file_path.name + ".*.tmp")) == []
+
+    restored_process_handler = ProcessHandler(logger_name)
+    restored_process_handler.set_value_from_dict(
+        AppProfileDataManager.get_daemon_snapshot(daemon_snapshot_file_path)["process_handler"])
+    assert restored_process_handler.dict_format() == process_handler.dict_format()
+
+    with open(daemon_snapshot_file_path, "wb") as file:
+        file.write(b"not a snapshot")
+    assert AppProfileDataManager.get_daemon_snapshot(daemon_snapshot_file_path) is None
+    daemon_snapshot_file_path.unlink()
+
+    with pytest.raises(TypeError):
+        AppProfileDataManager.save_daemon_snapshot(None, daemon_snapshot_file_path)
+    with pytest.raises(TypeError):
+        AppProfileDataManager.save_daemon_snapshot(daemon_snapshot, str(daemon_snapshot_file_path))
+    with pytest.raises(TypeError):
+        AppProfileDataManager.get_daemon_snapshot(str(daemon_snapshot_file_path))
+
+
 def test_get_app_profile_as_dict_with_valid_input() -> None:
     """
     Test get_saved_profiles_as_dict().
@@ -240,3 +346,108 @@ def test_save_last_retrieved_data_timestamp_with_invalid_inputs() -> None:
     with pytest.raises(TypeError):
         AppProfileDataManager.save_last_retrieved_data_timestamp(retrieval_timestamp=timestamp,
                                                                  retrieval_timestamp_file_path="sdjs")
+
+
+def test_get_saved_abnormal_apps_page(tmp_path, monkeypatch) -> None:
+    """
+    Test that the saved abnormal apps are paged with their cursors and filtered, and that a record still being saved
+    is left for the next page.
+    """
+    monkeypatch.setattr(wades_config, "history_query_max_scanned_records", 4)
+    abnormal_apps_file_path = tmp_path / "abnormal_apps.csv"
+    abnormal_apps = list()
+    for app_index in range(6):
+        latest_retrieved_app_details = {
+            AppProfileAttribute.data_retrieval_timestamps.name: ["2021-02-1{} 20:09:03:771116".format(app_index)],
+            AppProfileAttribute.opened_files.name: list()
+        }
+        abnormal_apps.append(AppSummary(app_name="app_{}".format(app_index % 3), error_message="Anomalies found.",
+                                        risk=RiskLevel.high if app_index % 2 == 0 else RiskLevel.medium,
+                                        abnormal_attrs={"cpu_percents", "opened_files"} if app_index == 4
+                                        else {"cpu_percents"},
+                                        latest_retrieved_app_details=latest_retrieved_app_details,
+                                        modelled_app_details=dict()))
+    AppProfileDataManager.save_abnormal_apps(abnormal_apps, abnormal_apps_file_path)
+
+    def get_pages(**abnormal_apps_query_arguments) -> tuple:
+        pages = list()
+        cursor = 0
+        while True:
+            page = AppProfileDataManager.get_saved_abnormal_apps_page(
+                AbnormalAppsQuery(cursor=cursor, **abnormal_apps_query_arguments), abnormal_apps_file_path)
+            # Each record is identified by the day of its retrieval.
+            pages.append([(abnormal_app[AppSummaryAttribute.app_name.name],
+                           abnormal_app[AppProfileAttribute.data_retrieval_timestamps.name][8:10])
+                          for abnormal_app in page["abnormal_apps"]])
+            cursor = page["next_cursor"]
+            if not page["has_more"]:
+                return pages, cursor
+
+    all_pages, end_cursor = get_pages(limit=4)
+    assert all_pages == [[("app_0", "10"), ("app_1", "11"), ("app_2", "12"), ("app_0", "13")],
+                         [("app_1", "14"), ("app_2", "15")]]
+    assert end_cursor == abnormal_apps_file_path.stat().st_size
+    assert get_pages(min_risk_level=RiskLevel.high)[0] == [[("app_0", "10"), ("app_2", "12")], [("app_1", "14")]]
+    assert get_pages(app_names={"app_1"}, since=datetime(2021, 2, 12))[0] == [list(), [("app_1", "14")]]
+    assert get_pages(attribute_names={"opened_files"})[0] == [list(), [("app_1", "14")]]
+    assert get_pages(attribute_names={"opened_files"}, until=datetime(2021, 2, 13, 23))[0] == [list(), list()]
+    first_page = AppProfileDataManager.get_saved_abnormal_apps_page(AbnormalAppsQuery(limit=1),
+                                                                    abnormal_apps_file_path)
+    assert first_page["abnormal_apps"][0] == {
+        AppSummaryAttribute.app_name.name: "app_0",
+        AppSummaryAttribute.error_message.name: "Anomalies found.",
+        AppSummaryAttribute.risk.name: RiskLevel.high.name,
+        AppSummaryAttribute.abnormal_attributes.name: ["cpu_percents"],
+        AppProfileAttribute.data_retrieval_timestamps.name: "2021-02-10 20:09:03:771116"
+    }
+
+    with open(abnormal_apps_file_path, "a") as abnormal_apps_file:
+        abnormal_apps_file.write("app_3,Anomalies found.,high")
+    assert AppProfileDataManager.get_saved_abnormal_apps_page(AbnormalAppsQuery(cursor=end_cursor),
+                                                              abnormal_apps_file_path) == \
+        {"abnormal_apps": list(), "next_cursor": end_cursor, "has_more": False}
+    assert AppProfileDataManager.get_saved_abnormal_apps_page(AbnormalAppsQuery(), tmp_path / "missing.csv") == \
+        {"abnormal_apps": list(), "next_cursor": 0, "has_more": False}
+
+    with pytest.raises(ValueError):
+        AppProfileDataManager.get_saved_abnormal_apps_page(AbnormalAppsQuery(cursor=end_cursor + 1),
+                                                           abnormal_apps_file_path)
+    with pytest.raises(ValueError):
+        AppProfileDataManager.get_saved_abnormal_apps_page(AbnormalAppsQuery(cursor=3), abnormal_apps_file_path)
+    # noinspection PyTypeChecker
+    with pytest.raises(TypeError):
+        AppProfileDataManager.get_saved_abnormal_apps_page(None)
+
+
+def test_get_saved_abnormal_apps_page_with_multiline_records(tmp_path) -> None:
+    """
+    Test that the saved abnormal apps with values that span several lines are paged whole, and that such a record
+    still being saved is left for the next page.
+    """
+    abnormal_apps_file_path = tmp_path / "abnormal_apps.csv"
+    abnormal_apps = [AppSummary(app_name="app_{}".format(app_index), error_message="Anomalies found.\nSecond line.",
+                                risk=RiskLevel.high, abnormal_attrs={"cpu_percents"},
+                                latest_retrieved_app_details={
+                                    AppProfileAttribute.data_retrieval_timestamps.name: ["2021-02-10 20:09:03:771116"],
+                                    AppProfileAttribute.opened_files.name: list()},
+                                modelled_app_details=dict())
+                     for app_index in range(2)]
+    AppProfileDataManager.save_abnormal_apps(abnormal_apps, abnormal_apps_file_path)
+
+    first_page = AppProfileDataManager.get_saved_abnormal_apps_page(AbnormalAppsQuery(limit=1),
+                                                                    abnormal_apps_file_path)
+    assert [abnormal_app[AppSummaryAttribute.error_message.name] for abnormal_app in first_page["abnormal_apps"]] == \
+        ["Anomalies found.\nSecond line."]
+    assert first_page["has_more"]
+    second_page = AppProfileDataManager.get_saved_abnormal_apps_page(
+        AbnormalAppsQuery(cursor=first_page["next_cursor"]), abnormal_apps_file_path)
+    assert [abnormal_app[AppSummaryAttribute.app_name.name] for abnormal_app in second_page["abnormal_apps"]] == \
+        ["app_1"]
+    end_cursor = second_page["next_cursor"]
+    assert end_cursor == abnormal_apps_file_path.stat().st_size
+
+    with open(abnormal_apps_file_path, "a") as abnormal_apps_file:
+        abnormal_apps_file.write('app_2,"Anomalies found.\n')
+    assert AppProfileDataManager.get_saved_abnormal_apps_page(AbnormalAppsQuery(cursor=end_cursor),
+                                                              abnormal_apps_file_path) == \
+        {"abnormal_apps": list(), "next_cursor": end_cursor, "has_more": False}
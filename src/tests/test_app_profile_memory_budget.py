@@ -0,0 +1,84 @@
+import pytest
+
+from src.main.psHandler.AppProfileMemoryBudget import AppProfileMemoryBudget
+
+"""
+This file contains test for AppProfileMemoryBudget class.
+Functional test for the following methods in AppProfileMemoryBudget class:
+* mark_seen()
+* resize()
+* remove()
+* get_applications_to_compact()
+* dict_format() and set_value_from_dict()
+
+Input validation test:
+* __init__()
+* mark_seen()
+"""
+
+
+def test_get_applications_to_compact_in_least_recently_seen_order() -> None:
+    """
+    Test that the least recently seen applications are compacted first and only until the budget is met.
+    """
+    memory_budget = AppProfileMemoryBudget(budget_bytes=100)
+    memory_budget.mark_seen("first_app", 40)
+    memory_budget.mark_seen("second_app", 40)
+    memory_budget.mark_seen("third_app", 20)
+    assert not memory_budget.is_over_budget()
+    assert memory_budget.get_applications_to_compact() == list()
+
+    # first_app is seen again, so second_app becomes the least recently seen application.
+    memory_budget.mark_seen("first_app", 70)
+    assert memory_budget.get_total_size_bytes() == 130
+    assert memory_budget.is_over_budget()
+    assert memory_budget.get_tracked_application_names() == ["second_app", "third_app", "first_app"]
+    assert memory_budget.get_applications_to_compact() == ["second_app"]
+
+    # Resizing does not change the order.
+    memory_budget.resize("second_app", 5)
+    assert memory_budget.get_tracked_application_names() == ["second_app", "third_app", "first_app"]
+    assert memory_budget.get_total_size_bytes() == 95
+    assert not memory_budget.is_over_budget()
+
+    memory_budget.remove("first_app")
+    assert memory_budget.get_total_size_bytes() == 25
+    assert memory_budget.get_tracked_application_names() == ["second_app", "third_app"]
+
+
+# noinspection PyTypeChecker
+def test_memory_budget_with_input_validation() -> None:
+    """
+    Test AppProfileMemoryBudget with invalid inputs.
+    """
+    with pytest.raises(TypeError):
+        AppProfileMemoryBudget(budget_bytes=None)
+    with pytest.raises(ValueError):
+        AppProfileMemoryBudget(budget_bytes=-1)
+
+    memory_budget = AppProfileMemoryBudget(budget_bytes=100)
+    with pytest.raises(TypeError):
+        memory_budget.mark_seen(None, 10)
+    with pytest.raises(TypeError):
+        memory_budget.mark_seen("app", "10")
+
+
+def test_memory_budget_dict_round_trip() -> None:
+    """
+    Test that a tracker restored from a dictionary keeps the order and sizes of the tracked applications, and its own
+    budget.
+    """
+    memory_budget = AppProfileMemoryBudget(budget_bytes=100)
+    memory_budget.mark_seen("first_app", 40)
+    memory_budget.mark_seen("second_app", 70)
+    memory_budget.mark_seen("first_app", 45)
+
+    restored_memory_budget = AppProfileMemoryBudget(budget_bytes=1000)
+    restored_memory_budget.set_value_from_dict(memory_budget.dict_format())
+    assert restored_memory_budget.get_tracked_application_names() == ["second_app", "first_app"]
+    assert restored_memory_budget.get_total_size_bytes() == 115
+    assert not restored_memory_budget.is_over_budget()
+    assert restored_memory_budget.dict_format() == memory_budget.dict_format()
+
+    with pytest.raises(TypeError):
+        restored_memory_budget.set_value_from_dict(None)
@@ -0,0 +1,77 @@
+import pytest
+
+from src.utils.BenchmarkingUtils import BenchmarkingUtils
+from src.utils.Tracer import Tracer
+
+"""
+This file contains test for BenchmarkingUtils class.
+Functional test for the following methods in BenchmarkingUtils class:
+* get_method_execution_time_seconds()
+* span() and traced() with the tracer of the process
+
+Input validation test:
+* get_method_execution_time_seconds()
+* set_tracer()
+* traced()
+"""
+
+
+class TracedSteps:
+
+    @BenchmarkingUtils.traced()
+    def run(self, steps_count: int) -> int:
+        """
+        Runs a traced step steps_count times.
+        :param steps_count: The number of steps.
+        :type steps_count: int
+        :return: The number of steps.
+        :rtype: int
+        """
+        for _ in range(steps_count):
+            TracedSteps.__step()
+        return steps_count
+
+    @staticmethod
+    @BenchmarkingUtils.traced("step")
+    def __step() -> None:
+        """
+        Does nothing, in a span named "step".
+        """
+
+
+def test_spans_and_traced_functions() -> None:
+    """
+    Test that traced functions are timed by the tracer of the process, nested in the open spans, and that they are
+    called directly when the tracer is disabled.
+    """
+    previous_tracer = BenchmarkingUtils.get_tracer()
+    tracer = Tracer(is_enabled=True)
+    BenchmarkingUtils.set_tracer(tracer)
+    try:
+        with BenchmarkingUtils.span("cycle", cycle_index=1):
+            assert TracedSteps().run(3) == 3
+        assert TracedSteps.run.__name__ == "run"
+        assert list(tracer.get_cycle_breakdowns()[0]["spans"].keys()) == \
+            ["cycle", "cycle/TracedSteps.run", "cycle/TracedSteps.run/step"]
+        assert tracer.get_stats()["step"]["count"] == 3
+
+        tracer.set_enabled(False)
+        assert TracedSteps().run(2) == 2
+        assert tracer.get_stats()["step"]["count"] == 3
+    finally:
+        BenchmarkingUtils.set_tracer(previous_tracer)
+
+    assert BenchmarkingUtils.get_method_execution_time_seconds(lambda: None) >= 0
+
+
+# noinspection PyTypeChecker
+def test_benchmarking_utils_with_input_validation() -> None:
+    """
+    Test BenchmarkingUtils with invalid inputs.
+    """
+    with pytest.raises(TypeError):
+        BenchmarkingUtils.get_method_execution_time_seconds(None)
+    with pytest.raises(TypeError):
+        BenchmarkingUtils.set_tracer(None)
+    with pytest.raises(TypeError):
+        BenchmarkingUtils.traced(1)
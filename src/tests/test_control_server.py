@@ -0,0 +1,360 @@
+import json
+import socket
+import threading
+import time
+import urllib.error
+import urllib.request
+from pathlib import Path
+
+import pytest
+
+import wades_config
+from src.main.common.enum.ResponseEncoding import ResponseEncoding
+from src.main.server.ControlClient import ControlClient
+from src.main.common.AppSummary import AppSummary
+from src.main.common.enum.AppProfileAttribute import AppProfileAttribute
+from src.main.common.enum.RiskLevel import RiskLevel
+from src.main.server.ControlServer import ControlServer
+from src.main.server.SubscriptionHub import SubscriptionHub
+from src.main.server.VersionedResponse import VersionedResponse
+
+"""
+This file contains test for ControlServer class.
+Functional test for the following methods in ControlServer class:
+* register_command(), with and without arguments
+* run() with concurrent clients, time outs and connection limits
+* run() with framed clients on TCP and on a Unix domain socket, through ControlClient
+* run() with versioned responses and conditional requests
+* register_subscription_command() with subscriptions streamed until the server stops
+* register_http_path() with HTTP GET requests
+* stop()
+
+Input validation test:
+* __init__()
+* register_command()
+* register_subscription_command()
+* register_http_path()
+"""
+
+
+def send_request(port: int, request: str) -> object:
+    """
+    Sends a request to the control server and reads the response until the server closes the connection.
+    :param port: The port of the server.
+    :type port: int
+    :param request: The request.
+    :type request: str
+    :return: The response, parsed from json.
+    :rtype: object
+    """
+    with socket.create_connection((wades_config.localhost_address, port), timeout=10) as client:
+        client.sendall(request.encode())
+        data = b""
+        while True:
+            response_from_server = client.recv(4096)
+            if not response_from_server:
+                break
+            data += response_from_server
+    return json.loads(data)
+
+
+def start_control_server(control_server: ControlServer) -> threading.Thread:
+    """
+    Runs the control server in a thread and waits until it accepts connections.
+    :param control_server: The control server.
+    :type control_server: ControlServer
+    :return: The thread of the server.
+    :rtype: threading.Thread
+    """
+    server_thread = threading.Thread(target=control_server.run, daemon=True)
+    server_thread.start()
+    assert control_server.wait_until_started(timeout_sec=10)
+    return server_thread
+
+
+def send_request_in_thread(port: int, request: str, responses: list) -> threading.Thread:
+    """
+    Sends a request in a thread, and appends its response to responses.
+    :param port: The port of the server.
+    :type port: int
+    :param request: The request.
+    :type request: str
+    :param responses: The list the response is appended to.
+    :type responses: list
+    :return: The thread of the client.
+    :rtype: threading.Thread
+    """
+    client_thread = threading.Thread(target=lambda: responses.append(send_request(port, request)), daemon=True)
+    client_thread.start()
+    return client_thread
+
+
+def test_slow_commands_do_not_block_other_clients() -> None:
+    """
+    Test that a blocking command runs while other clients are served, and that unsupported or failing commands get an
+    error response.
+    """
+    release_slow_command = threading.Event()
+    control_server = ControlServer(port=0, request_timeout_sec=10)
+    control_server.register_command("slow", lambda: json.dumps(["slow"]) if release_slow_command.wait(10) else "",
+                                    is_blocking=True)
+    control_server.register_command("status", lambda: json.dumps(["running"]))
+    control_server.register_command("broken", lambda: json.dumps([1 / 0]))
+    control_server.register_command("echo", lambda arguments: json.dumps([arguments]), has_arguments=True)
+    control_server.register_command("echo twice", lambda arguments: json.dumps([arguments] * 2), is_blocking=True,
+                                    has_arguments=True)
+    server_thread = start_control_server(control_server)
+
+    slow_responses = list()
+    slow_client_thread = send_request_in_thread(control_server.get_port(), "slow", slow_responses)
+    time.sleep(0.2)
+    assert send_request(control_server.get_port(), "status") == ["running"]
+    assert control_server.get_metrics()["active_connections_count"] == 1
+    assert slow_responses == list()
+    release_slow_command.set()
+    slow_client_thread.join(timeout=10)
+    assert slow_responses == [["slow"]]
+
+    assert send_request(control_server.get_port(), "unknown") == ["Command not supported"]
+    assert send_request(control_server.get_port(), "broken") == ["Request failed."]
+    assert send_request(control_server.get_port(), "echo") == [""]
+    assert send_request(control_server.get_port(), "echo --app 'Web Content'") == ["--app 'Web Content'"]
+    assert send_request(control_server.get_port(), "echo twice 1") == ["1", "1"]
+    assert send_request(control_server.get_port(), "status 1") == ["Command not supported"]
+    assert control_server.get_commands() == ["slow", "status", "broken", "echo", "echo twice"]
+    metrics = control_server.get_metrics()
+    assert metrics["served_requests_count"] == 7
+    assert metrics["failed_requests_count"] == 1
+
+    control_server.stop()
+    server_thread.join(timeout=10)
+    assert not server_thread.is_alive()
+
+
+def test_request_time_outs_and_connection_limits() -> None:
+    """
+    Test that requests that take too long get a time out response and that connections beyond the limit are refused.
+    """
+    release_slow_command = threading.Event()
+    control_server = ControlServer(port=0, max_connections_count=1, request_timeout_sec=0.5)
+    control_server.register_command("slow", lambda: json.dumps(["slow"]) if release_slow_command.wait(10) else "",
+                                    is_blocking=True)
+    server_thread = start_control_server(control_server)
+
+    slow_responses = list()
+    slow_client_thread = send_request_in_thread(control_server.get_port(), "slow", slow_responses)
+    time.sleep(0.2)
+    assert send_request(control_server.get_port(), "slow") == ["Too many connections."]
+    slow_client_thread.join(timeout=10)
+    assert slow_responses == [["Request timed out."]]
+    release_slow_command.set()
+
+    metrics = control_server.get_metrics()
+    assert metrics["refused_connections_count"] == 1
+    assert metrics["timed_out_requests_count"] == 1
+    control_server.stop()
+    server_thread.join(timeout=10)
+
+
+def test_requests_in_progress_finish_on_stop(monkeypatch) -> None:
+    """
+    Test that stopping the server lets the requests in progress finish and refuses new connections.
+    """
+    monkeypatch.setattr(wades_config, "control_server_shutdown_timeout_sec", 5)
+    control_server = ControlServer(port=0)
+    control_server.register_command("slow", lambda: json.dumps(["slow"]) if time.sleep(0.5) is None else "",
+                                    is_blocking=True)
+    server_thread = start_control_server(control_server)
+    port = control_server.get_port()
+
+    slow_responses = list()
+    slow_client_thread = send_request_in_thread(port, "slow", slow_responses)
+    time.sleep(0.2)
+    control_server.stop()
+    slow_client_thread.join(timeout=10)
+    server_thread.join(timeout=10)
+    assert slow_responses == [["slow"]]
+    assert not server_thread.is_alive()
+    with pytest.raises(ConnectionError):
+        send_request(port, "slow")
+
+
+def test_framed_requests_on_persistent_connections(monkeypatch, tmp_path: Path) -> None:
+    """
+    Test that framed clients send many requests over one connection, on the Unix domain socket or on TCP, that
+    streamed responses are sent in chunks, optionally compressed, and that one-shot clients are still served.
+    """
+    monkeypatch.setattr(wades_config, "control_server_chunk_size_bytes", 16)
+    unix_socket_path = tmp_path / "wades.sock"
+    control_server = ControlServer(port=0, unix_socket_path=unix_socket_path)
+    apps = ["app{}".format(i) for i in range(100)]
+    control_server.register_command("apps", lambda: (piece for piece in
+                                                     ["[", ", ".join(json.dumps(app) for app in apps), "]"]))
+    control_server.register_command("status", lambda: json.dumps(["running"]))
+    control_server.register_command("broken", lambda: (json.dumps(["broken"])[:i] if i < 2 else str(1 / 0)
+                                                       for i in range(3)))
+    server_thread = start_control_server(control_server)
+    assert unix_socket_path.is_socket()
+    assert unix_socket_path.stat().st_mode & 0o777 == wades_config.control_unix_socket_permissions
+
+    with ControlClient(unix_socket_path=unix_socket_path, port=control_server.get_port(), timeout_sec=10) as client:
+        assert client.is_connected_to_unix_socket()
+        assert client.send_request("status") == ["running"]
+        assert client.send_request("apps") == apps
+        assert client.send_request("apps", response_encoding=ResponseEncoding.compressed_json) == apps
+        assert client.send_request("unknown") == ["Command not supported"]
+        assert control_server.get_metrics()["active_connections_count"] == 1
+    with ControlClient(port=control_server.get_port(), timeout_sec=10) as client:
+        assert not client.is_connected_to_unix_socket()
+        assert client.send_request("apps") == apps
+        with pytest.raises(ConnectionError):
+            client.send_request("broken")
+        assert client.send_request("status") == ["running"]
+    assert send_request(control_server.get_port(), "apps") == apps
+
+    metrics = control_server.get_metrics()
+    assert metrics["served_requests_count"] == 8
+    assert metrics["failed_requests_count"] == 1
+    assert metrics["sent_bytes_count"] > 3 * len(json.dumps(apps))
+    control_server.stop()
+    server_thread.join(timeout=10)
+    assert not unix_socket_path.exists()
+
+
+def test_versioned_responses_with_conditional_requests() -> None:
+    """
+    Test that versioned responses are sent with their ETag, and that clients that already have them get the not
+    modified response, until the response changes.
+    """
+    control_server = ControlServer(port=0)
+    versioned_responses = [VersionedResponse(json.dumps(["app1", "app2"]))]
+    control_server.register_command("apps", lambda: versioned_responses[-1])
+    control_server.register_command("status", lambda: json.dumps(["running"]))
+    server_thread = start_control_server(control_server)
+
+    with ControlClient(port=control_server.get_port(), timeout_sec=10) as client:
+        etag, response = client.send_conditional_request("apps")
+        assert (etag, response) == (versioned_responses[-1].get_etag(), ["app1", "app2"])
+        assert client.send_conditional_request("apps", etag=etag) == (etag, None)
+        assert client.send_conditional_request("apps", etag=etag, response_encoding=ResponseEncoding.compressed_json) \
+            == (etag, None)
+        assert client.send_conditional_request("status", etag=etag) == (None, ["running"])
+        versioned_responses.append(VersionedResponse(json.dumps(["app1"])))
+        new_etag, response = client.send_conditional_request("apps", etag=etag,
+                                                             response_encoding=ResponseEncoding.compressed_json)
+        assert new_etag != etag
+        assert response == ["app1"]
+    assert send_request(control_server.get_port(), "apps") == ["app1"]
+    assert send_request(control_server.get_port(), "apps {} {}".format(ControlServer.if_none_match_option,
+                                                                       new_etag)) == ["Not modified."]
+
+    assert control_server.get_metrics()["not_modified_responses_count"] == 3
+    control_server.stop()
+    server_thread.join(timeout=10)
+
+
+def test_subscriptions_are_streamed() -> None:
+    """
+    Test that subscribed clients get the anomalies as they are published until the server stops, that subscriptions
+    end when their clients disconnect, and that one-shot clients can't subscribe.
+    """
+    subscription_hub = SubscriptionHub()
+    control_server = ControlServer(port=0)
+    control_server.register_subscription_command("subscribe anomalies", subscription_hub.subscribe_with_arguments)
+    server_thread = start_control_server(control_server)
+    port = control_server.get_port()
+
+    messages = list()
+    subscriber_thread = threading.Thread(target=lambda: messages.extend(ControlClient(
+        port=port, timeout_sec=10).subscribe("subscribe anomalies --min-risk medium",
+                                             response_encoding=ResponseEncoding.compressed_json)), daemon=True)
+    subscriber_thread.start()
+    # Disconnects after the first message.
+    interrupted_messages = list()
+    interrupted_subscriber_thread = threading.Thread(target=lambda: interrupted_messages.append(next(ControlClient(
+        port=port, timeout_sec=10).subscribe("subscribe anomalies"))), daemon=True)
+    interrupted_subscriber_thread.start()
+    while subscription_hub.get_metrics()["subscriptions_count"] < 2:
+        time.sleep(0.01)
+    latest_retrieved_app_details = {AppProfileAttribute.opened_files.name: list()}
+    subscription_hub.publish([AppSummary(app_name="app_{}".format(risk.name), error_message="Anomalies found.",
+                                         risk=risk, abnormal_attrs={"cpu_percents"},
+                                         latest_retrieved_app_details=latest_retrieved_app_details,
+                                         modelled_app_details=dict())
+                              for risk in [RiskLevel.low, RiskLevel.high]])
+    interrupted_subscriber_thread.join(timeout=10)
+    assert json.loads(interrupted_messages[0]["app_summary"])["app_name"] == "app_low"
+    while subscription_hub.get_metrics()["subscriptions_count"] > 1:
+        time.sleep(0.01)
+        subscription_hub.publish(list())
+
+    assert next(ControlClient(port=port, timeout_sec=10).subscribe("subscribe anomalies --min-risk none")) == \
+        ["Request failed."]
+    assert send_request(port, "subscribe anomalies") == ["Command requires a framed connection."]
+    control_server.stop()
+    subscriber_thread.join(timeout=10)
+    server_thread.join(timeout=10)
+    assert [json.loads(message["app_summary"])["app_name"] for message in messages] == ["app_high"]
+    assert messages[0]["dropped_messages_count"] == 0
+    assert control_server.get_commands() == ["subscribe anomalies"]
+
+
+# noinspection PyTypeChecker
+def test_http_paths_are_served() -> None:
+    """
+    Test that HTTP GET requests for a registered path get its plain text response, and that the commands are still
+    served on the same port.
+    """
+    control_server = ControlServer(port=0)
+    control_server.register_http_path("/metrics", lambda: "wades_processes_seen_total 12\n")
+    control_server.register_http_path("/broken", lambda: str(1 / 0))
+    control_server.register_command("status", lambda: json.dumps(["running"]))
+    server_thread = start_control_server(control_server)
+    url = "http://{}:{}".format(wades_config.localhost_address, control_server.get_port())
+
+    with urllib.request.urlopen(url + "/metrics?format=text", timeout=10) as response:
+        assert response.status == 200
+        assert response.headers["Content-Type"].startswith("text/plain")
+        assert response.read() == b"wades_processes_seen_total 12\n"
+    for path, status in [("/missing", 404), ("/broken", 500)]:
+        with pytest.raises(urllib.error.HTTPError) as error_info:
+            urllib.request.urlopen(url + path, timeout=10)
+        assert error_info.value.code == status
+    assert send_request(control_server.get_port(), "status") == ["running"]
+
+    metrics = control_server.get_metrics()
+    assert (metrics["served_requests_count"], metrics["failed_requests_count"]) == (2, 1)
+    control_server.stop()
+    server_thread.join(timeout=10)
+
+
+def test_control_server_with_input_validation() -> None:
+    """
+    Test ControlServer with invalid inputs.
+    """
+    with pytest.raises(TypeError):
+        ControlServer(host=None)
+    with pytest.raises(TypeError):
+        ControlServer(port="7657")
+    with pytest.raises(ValueError):
+        ControlServer(max_connections_count=0)
+    with pytest.raises(ValueError):
+        ControlServer(workers_count=0)
+    with pytest.raises(ValueError):
+        ControlServer(request_timeout_sec=0)
+    with pytest.raises(TypeError):
+        ControlServer(unix_socket_path="wades.sock")
+    with pytest.raises(TypeError):
+        ControlServer().register_command(None, print)
+    with pytest.raises(TypeError):
+        ControlServer().register_command("command", None)
+    with pytest.raises(TypeError):
+        ControlServer().register_command("command", print, is_blocking=None)
+    with pytest.raises(TypeError):
+        ControlServer().register_command("command", print, has_arguments=None)
+    with pytest.raises(TypeError):
+        ControlServer().register_subscription_command("subscribe", None)
+    with pytest.raises(TypeError):
+        ControlServer().register_http_path(None, str)
+    with pytest.raises(TypeError):
+        ControlServer().register_http_path("/metrics", None)
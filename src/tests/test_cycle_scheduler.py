@@ -0,0 +1,163 @@
+import pytest
+
+from src.main.common.CycleScheduler import CycleScheduler
+from src.main.common.enum.OverrunPolicy import OverrunPolicy
+
+"""
+This file contains test for CycleScheduler class.
+Functional test for the following methods in CycleScheduler class:
+* wait_for_next_cycle() with each overrun policy
+* wait_for_next_cycle() with a jitter and a catch up limit
+* get_host_phase_offset()
+* get_metrics()
+
+Input validation test:
+* __init__()
+* get_host_phase_offset()
+"""
+
+
+class FakeClock:
+    """
+    Monotonic clock that only moves when the scheduler sleeps or when a cycle does some work.
+    """
+
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, duration_sec: float) -> None:
+        self.now += duration_sec
+
+
+def run_cycles(overrun_policy: OverrunPolicy, work_durations_sec: list, **scheduler_arguments) -> tuple:
+    """
+    Runs one cycle per work duration, with a period of 10 seconds and a phase offset of 3 seconds.
+    :param overrun_policy: The overrun policy of the scheduler.
+    :type overrun_policy: OverrunPolicy
+    :param work_durations_sec: The time spent in each cycle.
+    :type work_durations_sec: list
+    :param scheduler_arguments: The other arguments of the scheduler.
+    :type scheduler_arguments: dict
+    :return: The scheduler, the clock times at which the cycles started, relative to the creation of the scheduler,
+            and the cycle timings.
+    :rtype: tuple
+    """
+    clock = FakeClock()
+    start_time = clock.now
+    cycle_scheduler = CycleScheduler(period_sec=10, overrun_policy=overrun_policy, phase_offset_sec=3,
+                                     max_period_sec=40, clock=clock, sleep=clock.sleep, **scheduler_arguments)
+    start_times = list()
+    cycle_timings = list()
+    for work_duration_sec in work_durations_sec:
+        cycle_timings.append(cycle_scheduler.wait_for_next_cycle())
+        start_times.append(clock.now - start_time)
+        clock.now += work_duration_sec
+    return cycle_scheduler, start_times, cycle_timings
+
+
+def test_cycles_start_at_fixed_deadlines() -> None:
+    """
+    Test that the time spent in each cycle doesn't shift the next deadlines.
+    """
+    cycle_scheduler, start_times, cycle_timings = run_cycles(OverrunPolicy.skip, [4, 9.5, 0, 7])
+    assert start_times == [3, 13, 23, 33]
+    assert [cycle_timing["cycle_index"] for cycle_timing in cycle_timings] == [0, 1, 2, 3]
+    assert not any(cycle_timing["is_overrun"] for cycle_timing in cycle_timings)
+    assert all(cycle_timing["lateness_sec"] == 0 for cycle_timing in cycle_timings)
+    assert cycle_scheduler.get_overruns_count() == 0
+    assert cycle_scheduler.get_cycle_timings() == cycle_timings
+
+
+def test_overrun_policies() -> None:
+    """
+    Test that overruns are recorded, and that the missed deadlines are skipped, caught up or make the period longer
+    depending on the overrun policy.
+    """
+    # The second cycle lasts 25 seconds, so it overruns the deadlines at 23 and 33.
+    cycle_scheduler, start_times, cycle_timings = run_cycles(OverrunPolicy.skip, [1, 25, 1, 1])
+    assert start_times == [3, 13, 43, 53]
+    assert cycle_timings[2]["is_overrun"]
+    assert cycle_timings[2]["skipped_cycles_count"] == 2
+    assert cycle_scheduler.get_overruns_count() == 1
+    assert cycle_scheduler.get_skipped_cycles_count() == 2
+    assert cycle_scheduler.get_metrics()["max_lateness_sec"] == 15
+
+    cycle_scheduler, start_times, cycle_timings = run_cycles(OverrunPolicy.catch_up, [1, 25, 1, 1, 1])
+    assert start_times == [3, 13, 38, 39, 43]
+    assert [cycle_timing["is_overrun"] for cycle_timing in cycle_timings] == [False, False, True, True, False]
+    assert cycle_timings[2]["lateness_sec"] == 15
+    assert cycle_scheduler.get_skipped_cycles_count() == 0
+
+    cycle_scheduler, start_times, cycle_timings = run_cycles(OverrunPolicy.degrade, [1, 25, 30, 1, 1, 1])
+    assert start_times == [3, 13, 38, 68, 108, 128]
+    assert cycle_scheduler.get_period_sec() == 10
+    metrics = cycle_scheduler.get_metrics()
+    assert metrics["overruns_count"] == 2
+    assert metrics["cycles_count"] == 6
+    assert metrics["latest_cycle_timing"] == cycle_timings[-1]
+
+
+def test_jitter_and_catch_up_limit() -> None:
+    """
+    Test that each cycle starts after a jitter that doesn't shift the next deadlines, and that only a limited number of
+    missed deadlines are caught up.
+    """
+    random_numbers = iter([0.5, 0.1, 0.9, 0.0])
+    cycle_scheduler, start_times, cycle_timings = run_cycles(OverrunPolicy.skip, [0, 0, 0, 0], max_jitter_sec=2,
+                                                             get_random_number=lambda: next(random_numbers))
+    assert start_times == pytest.approx([4, 13.2, 24.8, 33])
+    assert [cycle_timing["jitter_sec"] for cycle_timing in cycle_timings] == pytest.approx([1, 0.2, 1.8, 0])
+    assert not any(cycle_timing["is_overrun"] for cycle_timing in cycle_timings)
+    assert cycle_scheduler.get_metrics()["max_jitter_sec"] == 2
+
+    # The second cycle lasts 45 seconds, so it overruns the deadlines at 23, 33, 43 and 53. Only one is caught up.
+    cycle_scheduler, start_times, cycle_timings = run_cycles(OverrunPolicy.catch_up, [1, 45, 1, 1, 1],
+                                                             max_catch_up_cycles_count=1)
+    assert start_times == [3, 13, 58, 63, 73]
+    assert [cycle_timing["is_overrun"] for cycle_timing in cycle_timings] == [False, False, True, True, False]
+    assert cycle_timings[3]["skipped_cycles_count"] == 3
+    assert cycle_scheduler.get_skipped_cycles_count() == 3
+
+
+def test_get_host_phase_offset() -> None:
+    """
+    Test that the phase offset of a host is always the same and within the bounds, and that it differs across hosts.
+    """
+    phase_offsets = [CycleScheduler.get_host_phase_offset(30, "host-{}".format(host_index))
+                     for host_index in range(50)]
+    assert all(0 <= phase_offset < 30 for phase_offset in phase_offsets)
+    assert len(set(phase_offsets)) == 50
+    assert CycleScheduler.get_host_phase_offset(30, "host-1") == phase_offsets[1]
+    assert 0 <= CycleScheduler.get_host_phase_offset(30) < 30
+
+
+# noinspection PyTypeChecker
+def test_cycle_scheduler_with_input_validation() -> None:
+    """
+    Test CycleScheduler with invalid inputs.
+    """
+    with pytest.raises(TypeError):
+        CycleScheduler(period_sec="10")
+    with pytest.raises(ValueError):
+        CycleScheduler(period_sec=0)
+    with pytest.raises(TypeError):
+        CycleScheduler(period_sec=10, overrun_policy="skip")
+    with pytest.raises(ValueError):
+        CycleScheduler(period_sec=10, phase_offset_sec=-1)
+    with pytest.raises(ValueError):
+        CycleScheduler(period_sec=10, max_period_sec=5)
+    with pytest.raises(TypeError):
+        CycleScheduler(period_sec=10, max_jitter_sec="1")
+    with pytest.raises(ValueError):
+        CycleScheduler(period_sec=10, max_jitter_sec=10)
+    with pytest.raises(TypeError):
+        CycleScheduler(period_sec=10, max_catch_up_cycles_count=1.5)
+    with pytest.raises(ValueError):
+        CycleScheduler(period_sec=10, max_catch_up_cycles_count=0)
+    with pytest.raises(TypeError):
+        CycleScheduler.get_host_phase_offset(None)
+    with pytest.raises(TypeError):
+        CycleScheduler.get_host_phase_offset(30, 12)
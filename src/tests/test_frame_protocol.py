@@ -0,0 +1,110 @@
+import asyncio
+import json
+
+import pytest
+
+from src.main.common.enum.ResponseEncoding import ResponseEncoding
+from src.main.server.FrameProtocol import FrameProtocol
+
+"""
+This file contains test for FrameProtocol class.
+Functional test for the following methods in FrameProtocol class:
+* encode_request() and decode_request()
+* read_frame()
+* encode_response() and decode_response()
+* encode_response_header() and decode_response_header()
+* split_in_chunks()
+
+Input validation test:
+* encode_frame()
+* encode_request()
+* decode_request()
+* read_frame()
+"""
+
+
+def read_frames(data: bytes, max_payload_size_bytes: int = 1024) -> list:
+    """
+    Reads all the frames of some data.
+    :param data: The frames.
+    :type data: bytes
+    :param max_payload_size_bytes: The maximum size of a payload.
+    :type max_payload_size_bytes: int
+    :return: The payloads of the frames.
+    :rtype: list
+    """
+    async def read_all_frames() -> list:
+        reader = asyncio.StreamReader()
+        reader.feed_data(data)
+        reader.feed_eof()
+        payloads = list()
+        while True:
+            payload = await FrameProtocol.read_frame(reader, max_payload_size_bytes)
+            if payload is None:
+                return payloads
+            payloads.append(payload)
+
+    return asyncio.run(read_all_frames())
+
+
+def test_encode_and_decode_request() -> None:
+    """
+    Test that requests are framed with their response encoding.
+    """
+    requests = FrameProtocol.encode_request("modelled apps") + \
+        FrameProtocol.encode_request("abnormal apps --history", ResponseEncoding.compressed_json)
+    payloads = read_frames(requests)
+    assert [FrameProtocol.decode_request(payload) for payload in payloads] == [
+        ("modelled apps", ResponseEncoding.json), ("abnormal apps --history", ResponseEncoding.compressed_json)]
+    assert read_frames(FrameProtocol.encode_frame(b"")) == [b""]
+
+
+@pytest.mark.parametrize("response_encoding", [ResponseEncoding.json, ResponseEncoding.compressed_json])
+def test_encode_and_decode_response(response_encoding: ResponseEncoding) -> None:
+    """
+    Test that responses are split in chunks that decode back to the response, whether they are given whole or in
+    pieces.
+    """
+    apps = [{"app_name": "app{}".format(i), "risk": "none"} for i in range(200)]
+    response = json.dumps(apps)
+    whole_chunks = list(FrameProtocol.encode_response(response, response_encoding, chunk_size_bytes=64))
+    pieces_chunks = list(FrameProtocol.encode_response((piece for piece in [response[:10], response[10:]]),
+                                                       response_encoding, chunk_size_bytes=64))
+    for chunks in [whole_chunks, pieces_chunks]:
+        assert all(len(chunk) == 64 for chunk in chunks[:-1])
+        assert 0 < len(chunks[-1]) <= 64
+        assert json.loads(FrameProtocol.decode_response(b"".join(chunks), response_encoding)) == apps
+    if response_encoding == ResponseEncoding.compressed_json:
+        assert len(b"".join(whole_chunks)) < len(response)
+    assert list(FrameProtocol.encode_response("", ResponseEncoding.json, chunk_size_bytes=64)) == list()
+
+
+def test_response_header_and_chunks() -> None:
+    """
+    Test that response headers decode back to their values, and that encoded responses are split in chunks.
+    """
+    assert FrameProtocol.decode_response_header(FrameProtocol.encode_response_header("3f2a", False)) == ("3f2a", False)
+    assert FrameProtocol.decode_response_header(FrameProtocol.encode_response_header(None, True)) == (None, True)
+    assert list(FrameProtocol.split_in_chunks(b"abcdefg", 3)) == [b"abc", b"def", b"g"]
+    assert list(FrameProtocol.split_in_chunks(b"", 3)) == list()
+
+
+# noinspection PyTypeChecker
+def test_frame_protocol_with_input_validation() -> None:
+    """
+    Test FrameProtocol with invalid inputs.
+    """
+    with pytest.raises(TypeError):
+        FrameProtocol.encode_frame("status")
+    with pytest.raises(TypeError):
+        FrameProtocol.encode_request(None)
+    with pytest.raises(TypeError):
+        FrameProtocol.encode_request("status", response_encoding=1)
+    with pytest.raises(ValueError):
+        FrameProtocol.decode_request(b"")
+    with pytest.raises(ValueError):
+        FrameProtocol.decode_request(b"\x07status")
+    with pytest.raises(ValueError):
+        read_frames(FrameProtocol.encode_frame(b"x" * 2048))
+    with pytest.raises(asyncio.IncompleteReadError):
+        read_frames(FrameProtocol.encode_frame(b"status")[:-1])
@@ -0,0 +1,177 @@
+import numpy
+import pytest
+
+from src.main.common.NumericAttributeModel import NumericAttributeModel
+from src.main.common.enum.RiskLevel import RiskLevel
+from src.main.modeller.FrequencyBatchEngine import FrequencyBatchEngine
+from src.main.modeller.FrequencyTechnique import FrequencyTechnique
+
+"""
+This file contains test for FrequencyBatchEngine class.
+Functional test for the following methods in FrequencyBatchEngine class:
+* detect_anomalies()
+* detect_anomalies_with_models()
+* score_points()
+
+Input validation test:
+* __init__()
+* detect_anomalies()
+* detect_anomalies_with_models()
+"""
+
+
+def build_random_segments(segments_count: int, seed: int) -> tuple:
+    """
+    Builds random segments with different distributions, lengths and value types.
+    :param segments_count: The number of segments to build.
+    :type segments_count: int
+    :param seed: The seed of the random generator.
+    :type seed: int
+    :return: The previous and latest values of each segment.
+    :rtype: tuple
+    """
+    random_generator = numpy.random.default_rng(seed=seed)
+    previous_segments = list()
+    latest_segments = list()
+    for segment_index in range(segments_count):
+        previous_length = int(random_generator.integers(0, 2000 if segment_index % 7 == 0 else 60))
+        latest_length = int(random_generator.integers(0, 5))
+        distribution = segment_index % 4
+        if distribution == 0:
+            previous_values = random_generator.normal(100, 10, previous_length).tolist()
+            latest_values = random_generator.normal(100, 40, latest_length).tolist()
+        elif distribution == 1:
+            previous_values = random_generator.integers(0, 4, previous_length).tolist()
+            latest_values = random_generator.integers(0, 8, latest_length).tolist()
+        elif distribution == 2:
+            previous_values = [5] * previous_length
+            latest_values = random_generator.integers(3, 8, latest_length).tolist()
+        else:
+            previous_values = random_generator.gamma(1, 3, previous_length).tolist()
+            latest_values = (random_generator.gamma(1, 3, latest_length) * 3).tolist()
+        previous_segments.append(previous_values)
+        latest_segments.append(latest_values)
+    return previous_segments, latest_segments
+
+
+def test_detect_anomalies_is_the_same_as_frequency_technique() -> None:
+    """
+    Test that the anomalies and risk levels found in many segments at once are the same as the ones found by the
+    frequency technique for each segment.
+    """
+    previous_segments, latest_segments = build_random_segments(segments_count=1000, seed=13)
+    frequency_technique = FrequencyTechnique()
+    batch_engine = FrequencyBatchEngine(min_number_count_non_anomalous=frequency_technique.
+                                        get_minimum_count_non_anomalous())
+
+    anomalies_found, risk_levels, point_risk_levels = batch_engine.detect_anomalies(
+        previous_segments=previous_segments, latest_segments=latest_segments)
+
+    assert anomalies_found.any()
+    segments_point_risk_levels = numpy.split(point_risk_levels,
+                                             numpy.cumsum([len(segment) for segment in latest_segments])[:-1])
+    for segment_index in range(len(previous_segments)):
+        # noinspection PyUnresolvedReferences
+        expected_anomaly_found, expected_risk_level, expected_point_risk_levels = \
+            frequency_technique._FrequencyTechnique__detect_anomalies_in_numeric_attribute(
+                previous_segments[segment_index], latest_segments[segment_index])
+        assert anomalies_found[segment_index] == expected_anomaly_found, segment_index
+        assert risk_levels[segment_index] == expected_risk_level.value, segment_index
+        assert segments_point_risk_levels[segment_index].tolist() == expected_point_risk_levels.tolist(), \
+            segment_index
+
+
+def test_detect_anomalies_with_models_is_the_same_as_frequency_technique() -> None:
+    """
+    Test that the anomalies and risk levels found in many segments at once against fitted models are the same as the
+    ones found by the frequency technique for each segment and its model.
+    """
+    previous_segments, latest_segments = build_random_segments(segments_count=1000, seed=17)
+    attribute_models = list()
+    for segment_index, previous_segment in enumerate(previous_segments):
+        attribute_model = None
+        if segment_index % 10 != 0:
+            attribute_model = NumericAttributeModel()
+            attribute_model.fit(previous_segment)
+        attribute_models.append(attribute_model)
+    # Values on the edges of the bins.
+    latest_segments[1] = attribute_models[1].get_bin_edges()
+    frequency_technique = FrequencyTechnique()
+    batch_engine = FrequencyBatchEngine(min_number_count_non_anomalous=frequency_technique.
+                                        get_minimum_count_non_anomalous())
+
+    anomalies_found, risk_levels, point_risk_levels = batch_engine.detect_anomalies_with_models(
+        attribute_models=attribute_models, latest_segments=latest_segments)
+
+    assert anomalies_found.any()
+    segments_point_risk_levels = numpy.split(point_risk_levels,
+                                             numpy.cumsum([len(segment) for segment in latest_segments])[:-1])
+    for segment_index in range(len(attribute_models)):
+        # noinspection PyUnresolvedReferences
+        expected_anomaly_found, expected_risk_level, expected_point_risk_levels = \
+            frequency_technique._FrequencyTechnique__detect_anomalies_in_numeric_attribute_with_model(
+                attribute_models[segment_index], latest_segments[segment_index])
+        assert anomalies_found[segment_index] == expected_anomaly_found, segment_index
+        assert risk_levels[segment_index] == expected_risk_level.value, segment_index
+        assert segments_point_risk_levels[segment_index].tolist() == expected_point_risk_levels.tolist(), \
+            segment_index
+
+
+def test_score_points() -> None:
+    """
+    Test that every point is scored, so an outlier after a milder one is not missed.
+    """
+    previous_values = list(range(1, 101))
+    q1, q3 = numpy.percentile(previous_values, [25, 75])
+    bin_counts = numpy.asarray([-1, 20, -1, -1])
+    point_risk_levels = FrequencyBatchEngine().score_points(latest_values=numpy.asarray([50, 90, 160, 1000]),
+                                                            q1=q1, q3=q3, lowest_points=1, highest_points=100,
+                                                            bin_counts=bin_counts)
+    # 160 is beyond the highest point but closer to the upper fence (150.25) than 1000 is.
+    assert point_risk_levels.tolist() == [RiskLevel.none.value, RiskLevel.none.value, RiskLevel.high.value,
+                                          RiskLevel.high.value]
+
+    point_risk_levels = FrequencyBatchEngine().score_points(latest_values=numpy.asarray([-100.0]), q1=q1, q3=q3,
+                                                            lowest_points=1, highest_points=100,
+                                                            bin_counts=numpy.asarray([-1]))
+    assert point_risk_levels.tolist() == [RiskLevel.medium.value]
+
+
+def test_detect_anomalies_with_empty_segments() -> None:
+    """
+    Test that segments without enough previous values or without latest values are not anomalous.
+    """
+    anomalies_found, risk_levels, point_risk_levels = FrequencyBatchEngine().detect_anomalies(
+        previous_segments=[list(), [1, 2], list(range(20))], latest_segments=[[100], [100], list()])
+    assert anomalies_found.tolist() == [False, False, False]
+    assert risk_levels.tolist() == [RiskLevel.none.value] * 3
+    assert point_risk_levels.tolist() == [RiskLevel.none.value] * 2
+
+    anomalies_found, risk_levels, point_risk_levels = FrequencyBatchEngine().detect_anomalies(
+        previous_segments=list(), latest_segments=list())
+    assert len(anomalies_found) == 0
+    assert len(risk_levels) == 0
+    assert len(point_risk_levels) == 0
+
+
+# noinspection PyTypeChecker
+def test_frequency_batch_engine_with_input_validation() -> None:
+    """
+    Test FrequencyBatchEngine with invalid inputs.
+    """
+    with pytest.raises(TypeError):
+        FrequencyBatchEngine(min_number_count_non_anomalous=None)
+
+    batch_engine = FrequencyBatchEngine()
+    with pytest.raises(TypeError):
+        batch_engine.detect_anomalies(previous_segments=None, latest_segments=list())
+    with pytest.raises(TypeError):
+        batch_engine.detect_anomalies(previous_segments=list(), latest_segments=None)
+    with pytest.raises(ValueError):
+        batch_engine.detect_anomalies(previous_segments=[[1]], latest_segments=list())
+    with pytest.raises(TypeError):
+        batch_engine.detect_anomalies_with_models(attribute_models=None, latest_segments=list())
+    with pytest.raises(TypeError):
+        batch_engine.detect_anomalies_with_models(attribute_models=list(), latest_segments=None)
+    with pytest.raises(ValueError):
+        batch_engine.detect_anomalies_with_models(attribute_models=[None], latest_segments=list())
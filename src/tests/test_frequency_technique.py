@@ -1,13 +1,19 @@
+import datetime
 from collections import namedtuple
 from typing import Dict
 
+import numpy
 import pytest
 
 import paths
 import wades_config
+from src.main.common.AppModelCache import AppModelCache
+from src.main.common.AppProfile import AppProfile
+from src.main.common.AppProfileBaseline import AppProfileBaseline
 from src.main.common.enum.AppProfileAttribute import AppProfileAttribute
 from src.main.common.enum.AppSummaryAttribute import AppSummaryAttribute
 from src.main.common.enum.RiskLevel import RiskLevel
+from src.main.modeller.DetectionTechnique import DetectionTechnique
 from src.main.psHandler.AppProfileDataManager import AppProfileDataManager
 from wades_config import anomaly_detected_message
 from src.main.modeller.FrequencyTechnique import FrequencyTechnique
@@ -17,6 +23,12 @@ This file contains test for FrequencyTechnique class.
 Methods with functional tests:
 * __init__()
 * __call__()
+* __call__() with profiles that have evicted samples
+* __call__() with quantile sketches
+* __call__() with batch modelling, with and without model caches
+* __call__() with model caches
+* __call__() with model caches after skipped cycles
+* __call__() with multivariate scoring
 * set_minimum_count_non_anomalous()
 * get_minimum_count_non_anomalous()
 
@@ -154,3 +166,281 @@ def test_execute_frequency_modelling_with_anomalies(modelling_test_scenario: App
         assert app_summary_dict[AppSummaryAttribute.error_message.name] is None
     assert app_summary_dict[AppSummaryAttribute.risk.name] == modelling_test_scenario.risk_level
     assert app_summary_dict[AppSummaryAttribute.abnormal_attributes.name] == modelling_test_scenario.anomalous_attrs
+
+    # The worst numeric point is reported when a numeric attribute is anomalous.
+    is_numeric_anomalous = not modelling_test_scenario.anomalous_attrs.isdisjoint(
+        AppProfileBaseline.numeric_attribute_names)
+    worst_point = app_summary.get_worst_point()
+    assert (worst_point is not None) == is_numeric_anomalous
+    assert (app_summary.get_anomalous_points_count() > 0) == is_numeric_anomalous
+    if worst_point is not None:
+        assert worst_point["attribute_name"] in modelling_test_scenario.anomalous_attrs
+        assert worst_point["risk"] <= modelling_test_scenario.risk_level
+
+
+@pytest.mark.usefixtures('setup_and_clean_up_modelling_requirements')
+def test_execute_frequency_modelling_with_evicted_samples() -> None:
+    """
+    Test that users and files found in the samples evicted from the sliding window are not considered anomalous.
+    """
+    app_profile = AppProfileDataManager.get_saved_profile("common_case_app", paths.SAMPLE_APP_PROF_DATA_PATH)
+    app_profile_dict = app_profile.dict_format()
+    evicted_user = "evicted_user"
+    evicted_file = "/tmp/evicted_file"
+    app_profile_dict[AppProfileAttribute.usernames.name][0] = evicted_user
+    app_profile_dict[AppProfileAttribute.usernames.name][-1] = evicted_user
+    app_profile_dict[AppProfileAttribute.opened_files.name][0] = [evicted_file]
+    app_profile_dict[AppProfileAttribute.opened_files.name][-1] = [evicted_file]
+    app_profile.set_value_from_dict(app_profile_dict)
+    app_profile.evict_oldest_samples(samples_count=1)
+
+    app_summary = FrequencyTechnique()(data=[app_profile])[0]
+    assert app_summary.get_risk_level() == RiskLevel.none
+    assert app_summary.get_abnormal_attrs() == set()
+
+
+@pytest.mark.usefixtures('setup_and_clean_up_modelling_requirements')
+def test_execute_frequency_modelling_with_quantile_sketches_on_sample_data(monkeypatch) -> None:
+    """
+    Test that modelling the recorded sample data with quantile sketches gives the same results as the exact
+    computation.
+    """
+    app_names = AppProfileDataManager.get_saved_app_profiles_names(paths.SAMPLE_APP_PROF_DATA_PATH)
+    for app_name in sorted(app_names):
+        app_profile = AppProfileDataManager.get_saved_profile(app_name, paths.SAMPLE_APP_PROF_DATA_PATH)
+        monkeypatch.setattr(wades_config, "use_quantile_sketches", False)
+        expected_app_summary = FrequencyTechnique()(data=[app_profile])[0]
+        monkeypatch.setattr(wades_config, "use_quantile_sketches", True)
+        actual_app_summary = FrequencyTechnique()(data=[app_profile])[0]
+
+        assert actual_app_summary.get_risk_level() == expected_app_summary.get_risk_level(), app_name
+        assert actual_app_summary.get_abnormal_attrs() == expected_app_summary.get_abnormal_attrs(), app_name
+
+
+def test_execute_frequency_modelling_with_quantile_sketches_on_large_history(monkeypatch) -> None:
+    """
+    Test that modelling a long history with quantile sketches detects the same anomalies as the exact computation.
+    The history is large enough for the sketches to be approximate.
+    """
+    random_generator = numpy.random.default_rng(seed=11)
+    cycles_count = 400
+    processes_count = 10
+    first_timestamp = datetime.datetime.now() - datetime.timedelta(minutes=cycles_count + 1)
+    app_profile = AppProfile("app_with_long_history")
+    for cycle in range(cycles_count):
+        app_profile.add_new_information_batch(
+            memory_usages=random_generator.normal(50000, 2000, processes_count).astype(int).tolist(),
+            child_processes_counts=random_generator.integers(0, 3, processes_count).tolist(),
+            users=["user"] * processes_count, open_files=[list()] * processes_count,
+            cpu_percentages=random_generator.gamma(2, 1.5, processes_count).tolist(),
+            data_retrieval_timestamp=first_timestamp + datetime.timedelta(minutes=cycle),
+            threads_numbers=random_generator.integers(4, 9, processes_count).tolist(),
+            connections_numbers=random_generator.integers(0, 4, processes_count).tolist())
+        if cycle % 50 == 0:
+            app_profile.update_quantile_sketches(k=100)
+
+    new_cycles = {
+        "normal": [50000, 1, 3.0, 6, 2],
+        "very_high_memory": [90000, 1, 3.0, 6, 2],
+        "very_low_memory": [10000, 1, 3.0, 6, 2],
+        "very_high_cpu": [50000, 1, 40.0, 6, 2],
+        "very_high_threads": [50000, 1, 3.0, 30, 2]
+    }
+    for cycle_index, new_cycle in enumerate(new_cycles.values()):
+        memory_usage, children_count, cpu_percentage, threads_number, connections_number = new_cycle
+        app_profile_copy = AppProfile("app_with_long_history")
+        app_profile_copy.set_value_from_dict(app_profile.dict_format())
+        app_profile_copy.set_state_from_dict(app_profile.state_dict_format())
+        app_profile_copy.add_new_information_batch(
+            memory_usages=[memory_usage], child_processes_counts=[children_count], users=["user"],
+            open_files=[list()], cpu_percentages=[cpu_percentage],
+            data_retrieval_timestamp=first_timestamp + datetime.timedelta(minutes=cycles_count),
+            threads_numbers=[threads_number], connections_numbers=[connections_number])
+
+        monkeypatch.setattr(wades_config, "use_quantile_sketches", False)
+        expected_app_summary = FrequencyTechnique()(data=[app_profile_copy])[0]
+        monkeypatch.setattr(wades_config, "use_quantile_sketches", True)
+        actual_app_summary = FrequencyTechnique()(data=[app_profile_copy])[0]
+
+        # The sketches of the profile are only updated by the ingestion, which may be running at the same time.
+        assert app_profile_copy.get_quantile_sketches()[AppProfileAttribute.memory_infos.name].get_count() == \
+            (cycles_count - 50) * processes_count
+        assert actual_app_summary.get_risk_level() == expected_app_summary.get_risk_level()
+        assert actual_app_summary.get_abnormal_attrs() == expected_app_summary.get_abnormal_attrs()
+
+
+@pytest.mark.usefixtures('setup_and_clean_up_modelling_requirements')
+def test_execute_frequency_modelling_in_batch_on_sample_data(monkeypatch) -> None:
+    """
+    Test that modelling all the recorded sample data in batch gives the same results as modelling each application on
+    its own.
+    """
+    app_names = AppProfileDataManager.get_saved_app_profiles_names(paths.SAMPLE_APP_PROF_DATA_PATH)
+    app_profiles = [AppProfileDataManager.get_saved_profile(app_name, paths.SAMPLE_APP_PROF_DATA_PATH)
+                    for app_name in sorted(app_names)]
+
+    # Without and with model caches, where the numeric attributes are scored against the fitted models.
+    for use_model_caches in (False, True):
+        monkeypatch.setattr(wades_config, "use_batch_modelling", False)
+        expected_app_summaries = FrequencyTechnique()(data=app_profiles,
+                                                      model_caches=dict() if use_model_caches else None)
+        monkeypatch.setattr(wades_config, "use_batch_modelling", True)
+        actual_app_summaries = FrequencyTechnique()(data=app_profiles,
+                                                    model_caches=dict() if use_model_caches else None)
+
+        assert len(actual_app_summaries) == len(expected_app_summaries)
+        for actual_app_summary, expected_app_summary in zip(actual_app_summaries, expected_app_summaries):
+            assert actual_app_summary.get_app_name() == expected_app_summary.get_app_name()
+            assert actual_app_summary.get_risk_level() == expected_app_summary.get_risk_level()
+            assert actual_app_summary.get_abnormal_attrs() == expected_app_summary.get_abnormal_attrs()
+            assert actual_app_summary.get_anomalous_points_count() == \
+                expected_app_summary.get_anomalous_points_count()
+            assert actual_app_summary.get_worst_point() == expected_app_summary.get_worst_point()
+
+
+@pytest.mark.usefixtures('setup_and_clean_up_modelling_requirements')
+def test_execute_frequency_modelling_with_new_model_caches_on_sample_data() -> None:
+    """
+    Test that modelling the recorded sample data with empty model caches gives the same results as modelling without
+    them, and that a cache is added for each application.
+    """
+    app_names = AppProfileDataManager.get_saved_app_profiles_names(paths.SAMPLE_APP_PROF_DATA_PATH)
+    app_profiles = [AppProfileDataManager.get_saved_profile(app_name, paths.SAMPLE_APP_PROF_DATA_PATH)
+                    for app_name in sorted(app_names)]
+
+    expected_app_summaries = FrequencyTechnique()(data=app_profiles)
+    model_caches = dict()
+    actual_app_summaries = FrequencyTechnique()(data=app_profiles, model_caches=model_caches)
+
+    assert set(model_caches.keys()) == app_names
+    for actual_app_summary, expected_app_summary in zip(actual_app_summaries, expected_app_summaries):
+        assert actual_app_summary.get_risk_level() == expected_app_summary.get_risk_level()
+        assert actual_app_summary.get_abnormal_attrs() == expected_app_summary.get_abnormal_attrs()
+        # The latest data is added to the cache once it is scored.
+        model_cache = model_caches[actual_app_summary.get_app_name()]
+        assert model_cache.get_last_seen_timestamp() is not None
+
+
+def test_execute_frequency_modelling_with_cached_models(monkeypatch) -> None:
+    """
+    Test that new data is scored against the cached models without refitting them, and that they are refitted once
+    enough new samples have been added.
+    """
+    monkeypatch.setattr(wades_config, "model_cache_refit_samples_count", 24)
+    monkeypatch.setattr(wades_config, "model_cache_drift_min_samples_count", 1000)
+    app_profile = AppProfile("app_with_cached_models")
+    first_timestamp = datetime.datetime.now() - datetime.timedelta(hours=2)
+    model_caches = {"app_with_cached_models": AppModelCache("app_with_cached_models")}
+
+    def add_cycle(cycle: int, memory_usage: int) -> None:
+        app_profile.add_new_information_batch(
+            memory_usages=[memory_usage, memory_usage + 10], child_processes_counts=[0, 0], users=["user"] * 2,
+            open_files=[list(), list()], cpu_percentages=[1.0, 2.0],
+            data_retrieval_timestamp=first_timestamp + datetime.timedelta(minutes=cycle),
+            threads_numbers=[3, 3], connections_numbers=[0, 0])
+
+    for cycle in range(20):
+        add_cycle(cycle, 1000 + cycle % 5)
+    FrequencyTechnique()(data=[app_profile], model_caches=model_caches)
+    fitted_timestamp = model_caches["app_with_cached_models"].get_fitted_timestamp()
+    assert fitted_timestamp is not None
+
+    for cycle in range(20, 30):
+        add_cycle(cycle, 1000 + cycle % 5)
+        app_summary = FrequencyTechnique()(data=[app_profile], model_caches=model_caches)[0]
+        assert app_summary.get_risk_level() == RiskLevel.none
+    assert model_caches["app_with_cached_models"].get_fitted_timestamp() == fitted_timestamp
+    assert model_caches["app_with_cached_models"].get_new_samples_count() == 22
+
+    add_cycle(30, 5000)
+    app_summary = FrequencyTechnique()(data=[app_profile], model_caches=model_caches)[0]
+    assert app_summary.get_abnormal_attrs() == {AppProfileAttribute.memory_infos.name}
+    assert model_caches["app_with_cached_models"].get_fitted_timestamp() == fitted_timestamp
+
+    # 24 new samples have been added since the last fit.
+    add_cycle(31, 1000)
+    FrequencyTechnique()(data=[app_profile], model_caches=model_caches)
+    assert model_caches["app_with_cached_models"].get_fitted_timestamp() > fitted_timestamp
+
+
+def test_execute_frequency_modelling_with_cached_models_after_skipped_cycles() -> None:
+    """
+    Test that the samples of the cycles where an application was not modelled are all scored against the cached models
+    before they are added to them, so a short spike or a new user in a skipped cycle is still reported.
+    """
+    app_profile = AppProfile("app_with_skipped_cycles")
+    first_timestamp = datetime.datetime.now() - datetime.timedelta(hours=2)
+    model_caches = dict()
+
+    def add_cycle(cycle: int, memory_usage: int, user: str = "user") -> None:
+        app_profile.add_new_information_batch(
+            memory_usages=[memory_usage, memory_usage + 10], child_processes_counts=[0, 0], users=[user] * 2,
+            open_files=[list(), list()], cpu_percentages=[1.0, 2.0],
+            data_retrieval_timestamp=first_timestamp + datetime.timedelta(minutes=cycle),
+            threads_numbers=[3, 3], connections_numbers=[0, 0])
+
+    for cycle in range(20):
+        add_cycle(cycle, 1000 + cycle % 5)
+        FrequencyTechnique()(data=[app_profile], model_caches=model_caches)
+
+    # Three cycles are retrieved before the application is modelled again, and only the last one is usual.
+    add_cycle(20, 5000)
+    add_cycle(21, 1001, user="root")
+    add_cycle(22, 1002)
+    app_summary = FrequencyTechnique()(data=[app_profile], model_caches=model_caches)[0]
+    assert app_summary.get_abnormal_attrs() == {AppProfileAttribute.memory_infos.name,
+                                                AppProfileAttribute.usernames.name}
+    assert app_summary.get_anomalous_points_count() == 2
+    assert app_summary.get_worst_point()["value"] == 5000
+    assert model_caches["app_with_skipped_cycles"].get_unknown_users(["root"]) == set()
+
+    # Once scored, the samples are known and are not reported again.
+    add_cycle(23, 1003)
+    app_summary = FrequencyTechnique()(data=[app_profile], model_caches=model_caches)[0]
+    assert app_summary.get_risk_level() == RiskLevel.none
+
+
+# noinspection PyTypeChecker
+@pytest.mark.usefixtures('setup_and_clean_up_modelling_requirements')
+def test_execute_frequency_modelling_with_multivariate_scoring(monkeypatch) -> None:
+    """
+    Test that a retrieval whose numeric values are usual on their own but not together is reported as a joint anomaly,
+    with and without model caches.
+    """
+    monkeypatch.setattr(wades_config, "use_multivariate_scoring", True)
+    random_generator = numpy.random.default_rng(seed=38)
+    first_timestamp = datetime.datetime.now() - datetime.timedelta(hours=2)
+    app_profile = AppProfile("app_with_correlated_attributes")
+    model_caches = dict()
+
+    def add_cycle(cycle: int, threads_numbers: list, memory_usages: list) -> None:
+        app_profile.add_new_information_batch(
+            memory_usages=memory_usages, child_processes_counts=[0, 0], users=["user"] * 2,
+            open_files=[list(), list()], cpu_percentages=[1.0, 1.0],
+            data_retrieval_timestamp=first_timestamp + datetime.timedelta(minutes=cycle),
+            threads_numbers=threads_numbers, connections_numbers=[0, 0])
+
+    # The memory usage grows with the number of threads.
+    for cycle in range(60):
+        threads_numbers = random_generator.integers(2, 11, 2).tolist()
+        add_cycle(cycle, threads_numbers, [threads_number * 1000 + int(random_generator.normal(0, 50))
+                                           for threads_number in threads_numbers])
+        FrequencyTechnique()(data=[app_profile], model_caches=model_caches)
+
+    add_cycle(60, [2, 9], [10000, 9000])
+    for app_summary in (FrequencyTechnique()(data=[app_profile])[0],
+                        FrequencyTechnique()(data=[app_profile], model_caches=model_caches)[0]):
+        assert app_summary.get_abnormal_attrs() == {DetectionTechnique.joint_numeric_attribute_name}
+        assert app_summary.get_risk_level() == RiskLevel.high
+    # The anomalous sample is left out of the cached baseline.
+    assert model_caches["app_with_correlated_attributes"].get_multivariate_baseline().get_samples_count() == 121
+
+    # When the numeric models are refitted, the baseline is rebuilt from all the samples, the anomalous one included.
+    monkeypatch.setattr(wades_config, "model_cache_refit_samples_count", 1)
+    add_cycle(61, [3, 4], [3000, 4000])
+    app_summary = FrequencyTechnique()(data=[app_profile], model_caches=model_caches)[0]
+    assert app_summary.get_risk_level() == RiskLevel.none
+    assert model_caches["app_with_correlated_attributes"].get_multivariate_baseline().get_samples_count() == 124
+
+    app_summary = FrequencyTechnique(attribute_names={AppProfileAttribute.memory_infos.name})(data=[app_profile])[0]
+    assert app_summary.get_risk_level() == RiskLevel.none
@@ -1,7 +1,14 @@
+import datetime
+from collections import namedtuple
 from typing import Dict, Set, List, Any
 
+import numpy
+
 from src.main.common.AppProfile import AppProfile
 from src.main.common.enum.AppProfileAttribute import AppProfileAttribute
+from src.main.psHandler.AppProfileDataManager import AppProfileDataManager
+
+OpenFile = namedtuple("OpenFile", ["path", "fd"])
 
 
 # noinspection DuplicatedCode
@@ -46,3 +53,30 @@ def check_app_profile_has_the_right_format(app_name: str, app_profile: dict) ->
     assert isinstance(opened_files, list)
     assert all(isinstance(files, (list, set)) and isinstance(file, str) for files in
                opened_files for file in files)
+
+
+def save_running_app_profiles(apps_count: int, cycles_count: int) -> None:
+    """
+    Saves application profiles that were all retrieved in the latest retrieval. Every third application has an
+    anomalous memory usage in its latest cycle.
+    :param apps_count: The number of applications to save.
+    :type apps_count: int
+    :param cycles_count: The number of retrieval cycles of each application.
+    :type cycles_count: int
+    """
+    random_generator = numpy.random.default_rng(seed=apps_count)
+    first_timestamp = datetime.datetime.now() - datetime.timedelta(minutes=cycles_count)
+    retrieval_timestamps = [first_timestamp + datetime.timedelta(minutes=cycle) for cycle in range(cycles_count)]
+    app_profiles = list()
+    for app_index in range(apps_count):
+        app_profile = AppProfile("app_{}".format(app_index))
+        for cycle, retrieval_timestamp in enumerate(retrieval_timestamps):
+            memory_usages = random_generator.normal(1000, 20, 3).astype(int).tolist()
+            if cycle == cycles_count - 1 and app_index % 3 == 0:
+                memory_usages[0] = 10000
+            app_profile.add_new_information_batch(
+                memory_usages=memory_usages, child_processes_counts=[0] * 3, users=["user"] * 3,
+                open_files=[[OpenFile("/tmp/app_{}".format(app_index), 3)]] * 3, cpu_percentages=[1.0] * 3,
+                data_retrieval_timestamp=retrieval_timestamp, threads_numbers=[2] * 3, connections_numbers=[0] * 3)
+        app_profiles.append(app_profile)
+    AppProfileDataManager.save_app_profiles(app_profiles, retrieval_timestamp=retrieval_timestamps[-1])
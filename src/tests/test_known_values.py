@@ -0,0 +1,133 @@
+import random
+import string
+
+import pytest
+
+from src.main.common.BloomFilter import BloomFilter
+from src.main.common.KnownValues import KnownValues
+
+"""
+This file contains test for KnownValues and BloomFilter classes.
+Functional test for the following methods in KnownValues class:
+* add_values()
+* get_unknown_values()
+* get_values()
+* dict_format()
+* set_value_from_dict()
+
+Functional test for the following methods in BloomFilter class:
+* add()
+* __contains__()
+
+Input validation test:
+* KnownValues.__init__()
+* KnownValues.add_values()
+* KnownValues.get_unknown_values()
+* BloomFilter.__init__()
+* BloomFilter.add()
+"""
+
+
+def build_random_paths(paths_count: int, seed: int) -> list:
+    """
+    Builds random file paths.
+    :param paths_count: The number of paths.
+    :type paths_count: int
+    :param seed: The seed of the random generator.
+    :type seed: int
+    :return: The random paths.
+    :rtype: list
+    """
+    random_generator = random.Random(seed)
+    return ["/tmp/" + "".join(random_generator.choices(string.ascii_lowercase, k=16)) for _ in range(paths_count)]
+
+
+def test_bloom_filter() -> None:
+    """
+    Test that the Bloom filter never misses an added value and that its false positive rate stays close to the
+    configured one.
+    """
+    added_paths = build_random_paths(paths_count=2000, seed=1)
+    other_paths = build_random_paths(paths_count=20000, seed=2)
+    bloom_filter = BloomFilter(capacity=2000, false_positive_rate=0.01)
+    for path in added_paths:
+        bloom_filter.add(path)
+
+    assert bloom_filter.is_full() or bloom_filter.get_items_count() > 1950
+    assert all(path in bloom_filter for path in added_paths)
+    false_positives_count = sum(path in bloom_filter for path in other_paths)
+    assert false_positives_count / len(other_paths) < 0.02
+    assert not bloom_filter.add(added_paths[0])
+
+    restored_bloom_filter = BloomFilter(capacity=1, false_positive_rate=0.5)
+    restored_bloom_filter.set_value_from_dict(bloom_filter.dict_format())
+    assert restored_bloom_filter.dict_format() == bloom_filter.dict_format()
+    assert all(path in restored_bloom_filter for path in added_paths)
+
+
+def test_known_values_exact() -> None:
+    """
+    Test that the known values are kept in a set when there is no Bloom filter threshold.
+    """
+    known_values = KnownValues()
+    known_values.add_values(["/tmp/a", "/tmp/b", "/tmp/a"])
+    assert known_values.is_exact()
+    assert known_values.get_values() == {"/tmp/a", "/tmp/b"}
+    assert known_values.get_observations_count() == 3
+    assert known_values.get_unknown_values(["/tmp/a", "/tmp/c", "/tmp/c"]) == {"/tmp/c"}
+
+    restored_known_values = KnownValues()
+    restored_known_values.set_value_from_dict(known_values.dict_format())
+    assert restored_known_values.get_values() == known_values.get_values()
+
+
+def test_known_values_with_bloom_filters() -> None:
+    """
+    Test that the known values are moved to Bloom filters once the threshold is exceeded, that no added value is
+    reported as unknown and that the false positive rate stays bounded as the filters grow.
+    """
+    added_paths = build_random_paths(paths_count=5000, seed=3)
+    other_paths = build_random_paths(paths_count=20000, seed=4)
+    known_values = KnownValues(bloom_filter_threshold=100, false_positive_rate=0.01)
+    known_values.add_values(added_paths[:100])
+    assert known_values.is_exact()
+    for first_path_index in range(100, len(added_paths), 100):
+        known_values.add_values(added_paths[first_path_index:first_path_index + 100])
+    assert not known_values.is_exact()
+    assert len(known_values.dict_format()["bloom_filters"]) > 1
+    assert known_values.get_observations_count() == len(added_paths)
+    with pytest.raises(ValueError):
+        known_values.get_values()
+
+    assert known_values.get_unknown_values(added_paths) == set()
+    false_positives_count = len(other_paths) - len(known_values.get_unknown_values(other_paths))
+    assert false_positives_count / len(other_paths) < 0.02
+
+    restored_known_values = KnownValues()
+    restored_known_values.set_value_from_dict(known_values.dict_format())
+    assert restored_known_values.dict_format() == known_values.dict_format()
+    assert restored_known_values.get_unknown_values(added_paths) == set()
+
+
+# noinspection PyTypeChecker
+def test_known_values_with_input_validation() -> None:
+    """
+    Test KnownValues and BloomFilter with invalid inputs.
+    """
+    with pytest.raises(TypeError):
+        KnownValues(bloom_filter_threshold="100")
+    with pytest.raises(TypeError):
+        KnownValues(false_positive_rate=1)
+    known_values = KnownValues()
+    with pytest.raises(TypeError):
+        known_values.add_values({"/tmp/a"})
+    with pytest.raises(TypeError):
+        known_values.get_unknown_values("/tmp/a")
+    with pytest.raises(TypeError):
+        BloomFilter(capacity=10.0, false_positive_rate=0.01)
+    with pytest.raises(ValueError):
+        BloomFilter(capacity=0, false_positive_rate=0.01)
+    with pytest.raises(ValueError):
+        BloomFilter(capacity=10, false_positive_rate=1.0)
+    with pytest.raises(TypeError):
+        BloomFilter(capacity=10, false_positive_rate=0.01).add(1)
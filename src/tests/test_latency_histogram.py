@@ -0,0 +1,54 @@
+import pytest
+
+from src.main.common.LatencyHistogram import LatencyHistogram
+
+"""
+This file contains test for LatencyHistogram class.
+Functional test for the following methods in LatencyHistogram class:
+* observe()
+* get_cumulative_counts()
+* dict_format()
+
+Input validation test:
+* __init__()
+"""
+
+
+def test_durations_are_counted_in_cumulative_buckets() -> None:
+    """
+    Test that each duration is counted in the first bucket whose upper bound is at least the duration, and that the
+    buckets are read as cumulative counts.
+    """
+    latency_histogram = LatencyHistogram([0.1, 1, 10])
+    for duration_sec in [0.05, 0.1, 0.5, 1, 3, 45]:
+        latency_histogram.observe(duration_sec)
+
+    assert latency_histogram.get_upper_bounds_sec() == [0.1, 1.0, 10.0]
+    assert latency_histogram.get_cumulative_counts() == [2, 4, 5, 6]
+    assert latency_histogram.get_count() == 6
+    assert latency_histogram.get_sum_sec() == pytest.approx(49.65)
+    assert latency_histogram.dict_format() == {
+        "buckets": {"0.1": 2, "1.0": 4, "10.0": 5, "+Inf": 6},
+        "sum_sec": latency_histogram.get_sum_sec(),
+        "count": 6
+    }
+    assert LatencyHistogram([1]).get_cumulative_counts() == [0, 0]
+
+
+# noinspection PyTypeChecker
+def test_latency_histogram_with_input_validation() -> None:
+    """
+    Test LatencyHistogram with invalid inputs.
+    """
+    with pytest.raises(TypeError):
+        LatencyHistogram(None)
+    with pytest.raises(TypeError):
+        LatencyHistogram(["0.1"])
+    with pytest.raises(ValueError):
+        LatencyHistogram(list())
+    with pytest.raises(ValueError):
+        LatencyHistogram([0, 1])
+    with pytest.raises(ValueError):
+        LatencyHistogram([1, 1])
+    with pytest.raises(ValueError):
+        LatencyHistogram([1, 0.5])
@@ -0,0 +1,118 @@
+import threading
+
+import pytest
+
+from src.main.common.MetricsRegistry import MetricsRegistry
+
+"""
+This file contains test for MetricsRegistry class.
+Functional test for the following methods in MetricsRegistry class:
+* increment(), set_gauge() and observe() from several threads
+* get_value()
+* get_metrics()
+* get_text_exposition()
+
+Input validation test:
+* __init__()
+* increment()
+* set_gauge()
+* observe()
+"""
+
+
+def test_metrics_are_updated_from_several_threads() -> None:
+    """
+    Test that counters and histograms updated from several threads don't lose updates, and that the metrics are read
+    keyed by their name and labels.
+    """
+    metrics_registry = MetricsRegistry(latency_buckets_sec=[0.1, 1])
+
+    def update_metrics() -> None:
+        for _ in range(1000):
+            metrics_registry.increment("processes_seen_total")
+            metrics_registry.observe("collection_duration_seconds", 0.5)
+    threads = [threading.Thread(target=update_metrics) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    metrics_registry.increment("processes_skipped_total", 2, labels={"reason": "AccessDenied"})
+    metrics_registry.increment("processes_skipped_total", labels={"reason": "NoSuchProcess"})
+    metrics_registry.set_gauge("pipeline_queue_depth", 3, {"stage": "modelling"})
+    metrics_registry.set_gauge("pipeline_queue_depth", 1, {"stage": "modelling"})
+
+    assert metrics_registry.get_value("processes_seen_total") == 4000
+    assert metrics_registry.get_value("processes_skipped_total", {"reason": "AccessDenied"}) == 2
+    assert metrics_registry.get_value("processes_skipped_total", {"reason": "ZombieProcess"}) is None
+    assert metrics_registry.get_value("missing_total") is None
+    assert metrics_registry.get_metrics() == {
+        "counters": {
+            "processes_seen_total": 4000,
+            'processes_skipped_total{reason="AccessDenied"}': 2,
+            'processes_skipped_total{reason="NoSuchProcess"}': 1
+        },
+        "gauges": {'pipeline_queue_depth{stage="modelling"}': 1},
+        "histograms": {
+            "collection_duration_seconds": {"buckets": {"0.1": 0, "1.0": 4000, "+Inf": 4000}, "sum_sec": 2000.0,
+                                            "count": 4000}
+        }
+    }
+
+
+def test_get_text_exposition() -> None:
+    """
+    Test that the metrics are exposed in the Prometheus text format, with the prefix of the registry and escaped label
+    values.
+    """
+    metrics_registry = MetricsRegistry(name_prefix="wades_", latency_buckets_sec=[0.1, 1])
+    assert metrics_registry.get_text_exposition() == ""
+    metrics_registry.increment("anomalies_total", labels={"risk": "high"})
+    metrics_registry.set_gauge("daemon_cpu_percent", 2.5)
+    metrics_registry.observe("modelling_technique_duration_seconds", 0.05, {"technique": "say \"hi\"\n"})
+    metrics_registry.observe("modelling_technique_duration_seconds", 2, {"technique": "say \"hi\"\n"})
+
+    assert metrics_registry.get_text_exposition().splitlines() == [
+        "# TYPE wades_anomalies_total counter",
+        'wades_anomalies_total{risk="high"} 1',
+        "# TYPE wades_daemon_cpu_percent gauge",
+        "wades_daemon_cpu_percent 2.5",
+        "# TYPE wades_modelling_technique_duration_seconds histogram",
+        'wades_modelling_technique_duration_seconds_bucket{technique="say \\"hi\\"\\n",le="0.1"} 1',
+        'wades_modelling_technique_duration_seconds_bucket{technique="say \\"hi\\"\\n",le="1.0"} 1',
+        'wades_modelling_technique_duration_seconds_bucket{technique="say \\"hi\\"\\n",le="+Inf"} 2',
+        'wades_modelling_technique_duration_seconds_sum{technique="say \\"hi\\"\\n"} 2.05',
+        'wades_modelling_technique_duration_seconds_count{technique="say \\"hi\\"\\n"} 2'
+    ]
+
+
+# noinspection PyTypeChecker
+def test_metrics_registry_with_input_validation() -> None:
+    """
+    Test MetricsRegistry with invalid inputs.
+    """
+    with pytest.raises(TypeError):
+        MetricsRegistry(name_prefix=None)
+    with pytest.raises(ValueError):
+        MetricsRegistry(latency_buckets_sec=list())
+    metrics_registry = MetricsRegistry()
+    metrics_registry.increment("processes_seen_total")
+    with pytest.raises(TypeError):
+        metrics_registry.increment(None)
+    with pytest.raises(TypeError):
+        metrics_registry.increment("processes_seen_total", "1")
+    with pytest.raises(ValueError):
+        metrics_registry.increment("processes_seen_total", -1)
+    with pytest.raises(ValueError):
+        metrics_registry.increment("processes seen")
+    with pytest.raises(TypeError):
+        metrics_registry.increment("processes_seen_total", labels=["reason"])
+    with pytest.raises(ValueError):
+        metrics_registry.increment("processes_seen_total", labels={"le": "1"})
+    with pytest.raises(ValueError):
+        metrics_registry.set_gauge("processes_seen_total", 1)
+    with pytest.raises(TypeError):
+        metrics_registry.set_gauge("daemon_cpu_percent", None)
+    with pytest.raises(TypeError):
+        metrics_registry.observe("collection_duration_seconds", "0.1")
+    with pytest.raises(ValueError):
+        metrics_registry.observe("processes_seen_total", 0.1)
@@ -0,0 +1,282 @@
+import datetime
+import json
+from typing import List, Union, Dict
+
+import pytest
+
+import paths
+import wades_config
+from src.main.common.AppModelCache import AppModelCache
+from src.main.common.AppProfile import AppProfile
+from src.main.common.AppSummary import AppSummary
+from src.main.common.MetricsRegistry import MetricsRegistry
+from src.main.common.enum.AppProfileAttribute import AppProfileAttribute
+from src.main.common.enum.RiskLevel import RiskLevel
+from src.main.modeller.DetectionTechnique import DetectionTechnique
+from src.main.modeller.Modeller import Modeller
+from src.main.modeller.TechniqueRegistry import TechniqueRegistry
+from src.main.psHandler.AppProfileCache import AppProfileCache
+from src.main.psHandler.AppProfileDataManager import AppProfileDataManager
+from src.tests.test_helpers import save_running_app_profiles
+
+"""
+This file contains test for Modeller class.
+Functional test for the following methods in Modeller class:
+* model_running_applications() with parallel modelling, and shutdown()
+* model_application_profiles() with techniques selected per application and per attribute
+* model_application_profiles() with techniques selected per attribute and model caches
+* model_running_applications() with adaptive modelling
+* dict_format() and set_value_from_dict(), with the responses for the connected clients
+* model_running_applications() with an application profile cache
+* model_running_applications() with unreadable fitted models
+Unit test for the following methods in TechniqueRegistry class:
+* register()
+* create_technique()
+"""
+
+
+class QuietTechnique(DetectionTechnique):
+    """
+    Detection technique that never finds anomalies.
+    """
+
+    def __call__(self, data: List[AppProfile], model_caches: Union[Dict[str, AppModelCache], None] = None,
+                 update_model_caches: bool = True) -> List[AppSummary]:
+        return [AppSummary(app_name=app_profile.get_application_name(), error_message=None, risk=RiskLevel.none,
+                           abnormal_attrs=set(), latest_retrieved_app_details=dict(), modelled_app_details=dict())
+                for app_profile in data]
+
+
+@pytest.mark.usefixtures('setup_and_clean_up_modelling_requirements')
+def test_model_running_applications_in_parallel(monkeypatch) -> None:
+    """
+    Test that modelling the running applications with a pool of processes gives the same results, in the same order,
+    as modelling them in a single process.
+    """
+    monkeypatch.setattr(wades_config, "use_model_cache", False)
+    save_running_app_profiles(apps_count=7, cycles_count=10)
+
+    monkeypatch.setattr(wades_config, "modelling_workers_count", 1)
+    modeller = Modeller()
+    modeller.model_running_applications()
+    expected_app_summaries = modeller.get_modelled_applications()
+
+    monkeypatch.setattr(wades_config, "modelling_workers_count", 3)
+    monkeypatch.setattr(wades_config, "modelling_chunk_size", 2)
+    modeller.model_running_applications()
+    executor = modeller._Modeller__executor
+    modeller.model_running_applications()
+    actual_app_summaries = modeller.get_modelled_applications()
+    assert modeller._Modeller__executor is executor
+    modeller.shutdown()
+    assert modeller._Modeller__executor is None
+
+    assert [app_summary.get_app_name() for app_summary in expected_app_summaries] == \
+        ["app_{}".format(app_index) for app_index in range(7)]
+    assert [str(app_summary) for app_summary in actual_app_summaries] == \
+        [str(app_summary) for app_summary in expected_app_summaries]
+    assert [app_summary.get_app_name() for app_summary in modeller.get_abnormal_applications()] == \
+        ["app_0", "app_3", "app_6"]
+
+
+def test_technique_registry() -> None:
+    """
+    Test that the registry only accepts detection techniques and only creates the registered ones.
+    """
+    TechniqueRegistry.register("quiet", QuietTechnique)
+    assert "quiet" in TechniqueRegistry.get_technique_names()
+    assert "frequency" in TechniqueRegistry.get_technique_names()
+
+    technique = TechniqueRegistry.create_technique("quiet", attribute_names={AppProfileAttribute.memory_infos.name})
+    assert isinstance(technique, QuietTechnique)
+    assert technique.get_attribute_names() == {AppProfileAttribute.memory_infos.name}
+
+    with pytest.raises(TypeError):
+        TechniqueRegistry.register("not_a_technique", AppSummary)
+    with pytest.raises(ValueError):
+        TechniqueRegistry.create_technique("unknown_technique")
+    with pytest.raises(ValueError):
+        TechniqueRegistry.create_technique("quiet", attribute_names={"unknown_attribute"})
+
+
+@pytest.mark.usefixtures('setup_and_clean_up_modelling_requirements')
+def test_model_application_profiles_with_selected_techniques(monkeypatch) -> None:
+    """
+    Test that each attribute is modelled by the technique selected for its application or for itself, and that the
+    summaries of the techniques are merged.
+    """
+    monkeypatch.setattr(wades_config, "use_model_cache", False)
+    TechniqueRegistry.register("quiet", QuietTechnique)
+    save_running_app_profiles(apps_count=7, cycles_count=10)
+    app_profiles = [AppProfileDataManager.get_saved_profile("app_{}".format(app_index)) for app_index in range(7)]
+
+    app_summaries = Modeller.model_application_profiles(app_profiles)
+    assert [app_summary.get_app_name() for app_summary in app_summaries if app_summary.get_risk_level() > 1] == \
+        ["app_0", "app_3", "app_6"]
+
+    monkeypatch.setattr(wades_config, "app_detection_techniques", {"app_3": "quiet"})
+    metrics_registry = MetricsRegistry()
+    app_summaries = Modeller.model_application_profiles(app_profiles, metrics_registry=metrics_registry)
+    assert [app_summary.get_app_name() for app_summary in app_summaries if app_summary.get_risk_level() > 1] == \
+        ["app_0", "app_6"]
+    assert metrics_registry.get_value("modelling_technique_duration_seconds", {"technique": "quiet"})["count"] == 1
+    assert metrics_registry.get_value("modelling_technique_duration_seconds",
+                                      {"technique": wades_config.detection_technique})["count"] == 1
+
+    monkeypatch.setattr(wades_config, "attribute_detection_techniques",
+                        {AppProfileAttribute.memory_infos.name: "quiet"})
+    app_summaries = Modeller.model_application_profiles(app_profiles)
+    assert [app_summary.get_app_name() for app_summary in app_summaries] == \
+        [app_profile.get_application_name() for app_profile in app_profiles]
+    assert all(app_summary.get_risk_level() == RiskLevel.none for app_summary in app_summaries)
+
+
+@pytest.mark.usefixtures('setup_and_clean_up_modelling_requirements')
+def test_model_application_profiles_with_selected_techniques_and_model_caches(monkeypatch) -> None:
+    """
+    Test that the new samples are added to the shared model caches only once every technique has scored them, so a
+    new user is reported whatever the technique of the numeric attributes.
+    """
+    first_timestamp = datetime.datetime.now() - datetime.timedelta(minutes=30)
+
+    def add_cycle(app_profile: AppProfile, cycle: int, user: str = "user") -> None:
+        app_profile.add_new_information_batch(
+            memory_usages=[1000 + cycle % 5, 1010], child_processes_counts=[0, 0], users=[user] * 2,
+            open_files=[list(), list()], cpu_percentages=[1.0, 2.0],
+            data_retrieval_timestamp=first_timestamp + datetime.timedelta(minutes=cycle),
+            threads_numbers=[3, 3], connections_numbers=[0, 0])
+
+    for attribute_techniques in (dict(), {AppProfileAttribute.memory_infos.name: "streaming"}):
+        monkeypatch.setattr(wades_config, "attribute_detection_techniques", attribute_techniques)
+        app_profile = AppProfile("app_with_new_user")
+        model_caches = dict()
+        for cycle in range(20):
+            add_cycle(app_profile, cycle)
+            Modeller.model_application_profiles([app_profile], model_caches=model_caches)
+
+        add_cycle(app_profile, 20, user="root")
+        app_summary = Modeller.model_application_profiles([app_profile], model_caches=model_caches)[0]
+        assert app_summary.get_abnormal_attrs() == {AppProfileAttribute.usernames.name}
+        assert app_summary.get_risk_level() == RiskLevel.medium
+        assert model_caches["app_with_new_user"].get_unknown_users(["root"]) == set()
+
+
+@pytest.mark.usefixtures('setup_and_clean_up_modelling_requirements')
+def test_model_running_applications_adaptively(monkeypatch) -> None:
+    """
+    Test that stable applications are skipped in some cycles but keep their last summary, while anomalous ones are
+    modelled every cycle. Only the summaries made in a cycle are returned.
+    """
+    monkeypatch.setattr(wades_config, "use_model_cache", True)
+    monkeypatch.setattr(wades_config, "use_adaptive_modelling", True)
+    save_running_app_profiles(apps_count=7, cycles_count=10)
+    app_names = {"app_{}".format(app_index) for app_index in range(7)}
+
+    modeller = Modeller()
+    for _ in range(6):
+        cycle_app_summaries = modeller.model_running_applications(running_app_names=app_names)
+    modelling_scheduler = modeller.get_scheduler()
+    assert [app_summary.get_app_name() for app_summary in modeller.get_modelled_applications()] == sorted(app_names)
+    assert {"app_0", "app_3", "app_6"}.issubset(app_summary.get_app_name() for app_summary in cycle_app_summaries)
+    assert len(cycle_app_summaries) < len(app_names)
+    assert [app_summary.get_app_name() for app_summary in modeller.get_abnormal_applications()] == \
+        ["app_0", "app_3", "app_6"]
+    assert all(modelling_scheduler.get_modelling_interval(app_name) == 1 for app_name in ["app_0", "app_3", "app_6"])
+    assert all(modelling_scheduler.get_modelling_interval(app_name) > 1 for app_name in ["app_1", "app_2", "app_4"])
+
+    assert modelling_scheduler.get_app_names_to_model(["app_1"], forced_app_names={"app_1"}) == ["app_1"]
+    modeller.model_running_applications(running_app_names={"app_1", "app_2"})
+    assert [app_summary.get_app_name() for app_summary in modeller.get_modelled_applications()] == ["app_1", "app_2"]
+
+    # Without model caches, the samples of the skipped cycles would never be scored, so every application is modelled.
+    monkeypatch.setattr(wades_config, "use_model_cache", False)
+    assert len(modeller.model_running_applications(running_app_names=app_names)) == len(app_names)
+
+
+@pytest.mark.usefixtures('setup_and_clean_up_modelling_requirements')
+def test_modeller_state_round_trip(monkeypatch) -> None:
+    """
+    Test that the state of the modeller survives a round trip through json, so that a restarted daemon serves the
+    same summaries and keeps the same modelling intervals.
+    """
+    monkeypatch.setattr(wades_config, "use_model_cache", True)
+    monkeypatch.setattr(wades_config, "use_adaptive_modelling", True)
+    save_running_app_profiles(apps_count=4, cycles_count=10)
+    app_names = {"app_{}".format(app_index) for app_index in range(4)}
+    modeller = Modeller()
+    for _ in range(4):
+        modeller.model_running_applications(running_app_names=app_names)
+
+    restored_modeller = Modeller()
+    restored_modeller.set_value_from_dict(json.loads(json.dumps(modeller.dict_format())))
+    assert restored_modeller.dict_format() == json.loads(json.dumps(modeller.dict_format()))
+    assert restored_modeller.get_modelled_application_as_json() == modeller.get_modelled_application_as_json()
+    assert [app_summary.get_app_name() for app_summary in restored_modeller.get_abnormal_applications()] == \
+        ["app_0", "app_3"]
+    assert restored_modeller.get_modelled_applications_response().get_etag() == \
+        modeller.get_modelled_applications_response().get_etag()
+    assert [json.loads(app_summary)["app_name"] for app_summary
+            in json.loads(str(restored_modeller.get_abnormal_applications_response()))] == ["app_0", "app_3"]
+    assert all(restored_modeller.get_scheduler().get_modelling_interval(app_name) ==
+               modeller.get_scheduler().get_modelling_interval(app_name) for app_name in app_names)
+
+    with pytest.raises(TypeError):
+        Modeller().set_value_from_dict(None)
+
+
+@pytest.mark.usefixtures('setup_and_clean_up_modelling_requirements')
+def test_model_running_applications_with_app_profile_cache(monkeypatch) -> None:
+    """
+    Test that modelling the profiles of an application profile cache gives the same results as modelling the saved
+    profiles, and that the profiles are only loaded once.
+    """
+    monkeypatch.setattr(wades_config, "use_model_cache", False)
+    monkeypatch.setattr(wades_config, "use_adaptive_modelling", False)
+    save_running_app_profiles(apps_count=5, cycles_count=6)
+    app_names = {"app_{}".format(app_index) for app_index in range(5)}
+
+    modeller = Modeller()
+    modeller.model_running_applications(running_app_names=app_names)
+    app_profile_cache = AppProfileCache()
+    metrics_registry = MetricsRegistry()
+    cached_modeller = Modeller(app_profile_cache=app_profile_cache, metrics_registry=metrics_registry)
+    for _ in range(3):
+        cached_modeller.model_running_applications(running_app_names=app_names)
+    assert cached_modeller.get_modelled_application_as_json() == modeller.get_modelled_application_as_json()
+    assert app_profile_cache.get_metrics()["misses_count"] == 5
+    assert app_profile_cache.get_metrics()["hits_count"] == 10
+    # Only the profiles missing from the cache are loaded from disk.
+    assert metrics_registry.get_value("app_profiles_loaded_total") == 5
+    assert metrics_registry.get_value("modelling_duration_seconds")["count"] == 3
+
+    with pytest.raises(TypeError):
+        Modeller(app_profile_cache=dict())
+    with pytest.raises(TypeError):
+        Modeller(metrics_registry=dict())
+
+
+@pytest.mark.usefixtures('setup_and_clean_up_modelling_requirements')
+def test_model_running_applications_with_unreadable_model_caches(monkeypatch) -> None:
+    """
+    Test that unreadable fitted models are treated as missing: the applications are fitted again and the fitted models
+    are saved over the unreadable ones.
+    """
+    monkeypatch.setattr(wades_config, "use_model_cache", True)
+    monkeypatch.setattr(wades_config, "use_adaptive_modelling", False)
+    save_running_app_profiles(apps_count=3, cycles_count=6)
+    app_names = {"app_{}".format(app_index) for app_index in range(3)}
+    modeller = Modeller()
+    modeller.model_running_applications(running_app_names=app_names)
+    expected_abnormal_app_names = [app_summary.get_app_name() for app_summary in modeller.get_abnormal_applications()]
+
+    model_cache_file_paths = list(paths.TEST_APP_PROF_DATA_DIR_PATH.glob(
+        "*" + wades_config.app_model_cache_file_suffix))
+    assert len(model_cache_file_paths) == 3
+    for model_cache_file_path in model_cache_file_paths:
+        model_cache_file_path.write_text(model_cache_file_path.read_text()[:10])
+
+    restarted_modeller = Modeller()
+    assert len(restarted_modeller.model_running_applications(running_app_names=app_names)) == 3
+    assert [app_summary.get_app_name() for app_summary in restarted_modeller.get_abnormal_applications()] == \
+        expected_abnormal_app_names
+    assert all(AppProfileDataManager.get_saved_model_cache(app_name) is not None for app_name in app_names)
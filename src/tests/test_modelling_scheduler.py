@@ -0,0 +1,111 @@
+import pytest
+
+import wades_config
+from src.main.common.AppProfileBaseline import AppProfileBaseline
+from src.main.common.AppSummary import AppSummary
+from src.main.common.enum.RiskLevel import RiskLevel
+from src.main.modeller.ModellingScheduler import ModellingScheduler
+
+"""
+This file contains test for ModellingScheduler class.
+Functional test for the following methods in ModellingScheduler class:
+* get_app_names_to_model()
+* update()
+* remove()
+
+Input validation test:
+* get_app_names_to_model()
+* update()
+"""
+
+
+def build_app_summary(app_name: str, memory_usage: int, risk: RiskLevel = RiskLevel.none) -> AppSummary:
+    """
+    Builds the summary of an application with one latest sample.
+    :param app_name: The name of the application.
+    :type app_name: str
+    :param memory_usage: The memory usage of the latest sample. The other numeric attributes are constant.
+    :type memory_usage: int
+    :param risk: The risk level of the application.
+    :type risk: RiskLevel
+    :return: The summary of the application.
+    :rtype: AppSummary
+    """
+    latest_app_details = {attribute_name: [10] for attribute_name in AppProfileBaseline.numeric_attribute_names}
+    latest_app_details["memory_infos"] = [memory_usage]
+    latest_app_details["opened_files"] = [list()]
+    return AppSummary(app_name=app_name, error_message=None if risk == RiskLevel.none else "Anomalies found.",
+                      risk=risk, abnormal_attrs=set(), latest_retrieved_app_details=latest_app_details,
+                      modelled_app_details=latest_app_details)
+
+
+def run_cycle(modelling_scheduler: ModellingScheduler, memory_usages: dict, forced_app_names: set = None) -> list:
+    """
+    Runs a cycle of the scheduler where the due applications are modelled.
+    :param modelling_scheduler: The scheduler.
+    :type modelling_scheduler: ModellingScheduler
+    :param memory_usages: The latest memory usage of each application, mapped by application name.
+    :type memory_usages: dict
+    :param forced_app_names: The applications that must be modelled.
+    :type forced_app_names: set
+    :return: The names of the modelled applications.
+    :rtype: list
+    """
+    app_names_to_model = modelling_scheduler.get_app_names_to_model(sorted(memory_usages.keys()),
+                                                                    forced_app_names=forced_app_names)
+    modelling_scheduler.update([build_app_summary(app_name, memory_usages[app_name])
+                                for app_name in app_names_to_model])
+    return app_names_to_model
+
+
+@pytest.mark.usefixtures('setup_and_clean_up_modelling_requirements')
+def test_stable_applications_are_modelled_less_often(monkeypatch) -> None:
+    """
+    Test that the interval of a stable application doubles up to the ceiling, while a volatile application is modelled
+    every cycle.
+    """
+    monkeypatch.setattr(wades_config, "modelling_max_interval_cycles", 4)
+    modelling_scheduler = ModellingScheduler()
+    modelled_counts = {"stable_app": 0, "volatile_app": 0}
+    for cycle in range(40):
+        memory_usages = {"stable_app": 1000 + cycle % 2, "volatile_app": int(1000 * 2 ** cycle)}
+        for app_name in run_cycle(modelling_scheduler, memory_usages):
+            modelled_counts[app_name] += 1
+
+    assert modelling_scheduler.get_modelling_interval("stable_app") == 4
+    assert modelling_scheduler.get_modelling_interval("volatile_app") == 1
+    assert modelled_counts["volatile_app"] == 40
+    assert modelled_counts["stable_app"] < 20
+
+
+@pytest.mark.usefixtures('setup_and_clean_up_modelling_requirements')
+def test_changing_applications_are_modelled_right_away(monkeypatch) -> None:
+    """
+    Test that anomalous applications go back to being modelled every cycle, and that forced applications are modelled
+    regardless of their interval.
+    """
+    monkeypatch.setattr(wades_config, "modelling_max_interval_cycles", 8)
+    modelling_scheduler = ModellingScheduler()
+    for cycle in range(30):
+        run_cycle(modelling_scheduler, {"app": 1000 + cycle % 2})
+    assert modelling_scheduler.get_modelling_interval("app") == 8
+
+    assert run_cycle(modelling_scheduler, {"app": 1000}, forced_app_names={"app"}) == ["app"]
+    modelling_scheduler.update([build_app_summary("app", 1000, risk=RiskLevel.high)])
+    assert modelling_scheduler.get_modelling_interval("app") == 1
+    assert run_cycle(modelling_scheduler, {"app": 1000}) == ["app"]
+
+    modelling_scheduler.remove("app")
+    assert modelling_scheduler.get_modelling_interval("app") == 1
+
+
+def test_modelling_scheduler_with_input_validation() -> None:
+    """
+    Test that the scheduler only accepts lists of application names and summaries.
+    """
+    with pytest.raises(TypeError):
+        ModellingScheduler().get_app_names_to_model({"app"})
+    with pytest.raises(TypeError):
+        ModellingScheduler().get_app_names_to_model(["app"], forced_app_names=["app"])
+    with pytest.raises(TypeError):
+        ModellingScheduler().update(build_app_summary("app", 1000))
@@ -0,0 +1,125 @@
+import datetime
+
+import numpy
+import pytest
+
+import wades_config
+from src.main.common.MultivariateBaseline import MultivariateBaseline
+from src.main.common.enum.AppProfileAttribute import AppProfileAttribute
+
+"""
+This file contains test for MultivariateBaseline class.
+Functional test for the following methods in MultivariateBaseline class:
+* add_samples()
+* get_distances()
+* dict_format()
+* set_value_from_dict()
+
+Input validation test:
+* __init__()
+* add_samples()
+* get_distances()
+"""
+
+attribute_names = [AppProfileAttribute.memory_infos.name, AppProfileAttribute.threads_numbers.name]
+
+
+def build_correlated_data(threads_numbers: list, memory_usages: list, first_timestamp: datetime.datetime) -> dict:
+    """
+    Builds application profile data with memory usages and threads numbers, one sample per minute.
+    :param threads_numbers: The threads numbers of the samples.
+    :type threads_numbers: list
+    :param memory_usages: The memory usages of the samples.
+    :type memory_usages: list
+    :param first_timestamp: The retrieval timestamp of the first sample.
+    :type first_timestamp: datetime.datetime
+    :return: The application profile data.
+    :rtype: dict
+    """
+    return {
+        AppProfileAttribute.data_retrieval_timestamps.name: [
+            (first_timestamp + datetime.timedelta(minutes=index)).strftime(wades_config.datetime_format)
+            for index in range(len(memory_usages))],
+        AppProfileAttribute.memory_infos.name: list(memory_usages),
+        AppProfileAttribute.threads_numbers.name: list(threads_numbers)
+    }
+
+
+def build_normal_data(samples_count: int, first_timestamp: datetime.datetime) -> dict:
+    """
+    Builds data where the memory usage grows with the number of threads.
+    :param samples_count: The number of samples.
+    :type samples_count: int
+    :param first_timestamp: The retrieval timestamp of the first sample.
+    :type first_timestamp: datetime.datetime
+    :return: The application profile data.
+    :rtype: dict
+    """
+    random_generator = numpy.random.default_rng(seed=samples_count)
+    threads_numbers = random_generator.integers(2, 11, samples_count)
+    memory_usages = (threads_numbers * 1000 + random_generator.normal(0, 100, samples_count)).astype(int)
+    return build_correlated_data(threads_numbers.tolist(), memory_usages.tolist(), first_timestamp)
+
+
+def test_add_samples_incrementally() -> None:
+    """
+    Test that merging samples in batches gives the mean and covariance of all the samples, and that samples already
+    seen are skipped.
+    """
+    data = build_normal_data(300, datetime.datetime(2020, 12, 14, 10, 0))
+    multivariate_baseline = MultivariateBaseline(attribute_names=attribute_names)
+    for samples_count in (10, 150, 300, 300):
+        multivariate_baseline.add_samples({attribute_name: values[:samples_count]
+                                           for attribute_name, values in data.items()}, minimum_samples_count=3)
+
+    samples = numpy.column_stack([data[attribute_name] for attribute_name in attribute_names]).astype(float)
+    assert multivariate_baseline.get_samples_count() == 300
+    assert multivariate_baseline.get_mean() == pytest.approx(samples.mean(axis=0))
+    assert multivariate_baseline.get_covariance() == pytest.approx(numpy.cov(samples, rowvar=False, bias=True))
+
+
+def test_get_distances_of_joint_anomalies() -> None:
+    """
+    Test that a sample whose values are usual on their own but not together is far from the baseline, and that it is
+    left out of the baseline.
+    """
+    first_timestamp = datetime.datetime(2020, 12, 14, 10, 0)
+    multivariate_baseline = MultivariateBaseline(attribute_names=attribute_names)
+    multivariate_baseline.add_samples(build_normal_data(300, first_timestamp), minimum_samples_count=3)
+
+    latest_data = build_correlated_data([10, 2], [10000, 10000], first_timestamp + datetime.timedelta(days=1))
+    distances = multivariate_baseline.get_distances(latest_data, minimum_samples_count=3)
+    assert distances[0] < 3
+    assert distances[1] > 10
+
+    multivariate_baseline.add_samples(latest_data, minimum_samples_count=3, maximum_distance=5.0)
+    assert multivariate_baseline.get_samples_count() == 301
+
+    new_multivariate_baseline = MultivariateBaseline(attribute_names=attribute_names)
+    assert numpy.isnan(new_multivariate_baseline.get_distances(latest_data, minimum_samples_count=3)).all()
+
+
+def test_multivariate_baseline_dict_format() -> None:
+    """
+    Test that the baseline is the same after being converted into a dictionary and back.
+    """
+    multivariate_baseline = MultivariateBaseline(attribute_names=attribute_names)
+    multivariate_baseline.add_samples(build_normal_data(50, datetime.datetime(2020, 12, 14, 10, 0)),
+                                      minimum_samples_count=3)
+
+    loaded_multivariate_baseline = MultivariateBaseline(attribute_names=list())
+    loaded_multivariate_baseline.set_value_from_dict(multivariate_baseline.dict_format())
+    assert loaded_multivariate_baseline.dict_format() == multivariate_baseline.dict_format()
+    assert loaded_multivariate_baseline.get_covariance() == pytest.approx(multivariate_baseline.get_covariance())
+
+
+def test_multivariate_baseline_with_input_validation() -> None:
+    """
+    Test that the baseline only accepts valid attribute names and data.
+    """
+    with pytest.raises(TypeError):
+        MultivariateBaseline(attribute_names="memory_infos")
+    with pytest.raises(TypeError):
+        MultivariateBaseline(attribute_names=attribute_names).add_samples(list(), minimum_samples_count=3)
+    with pytest.raises(TypeError):
+        MultivariateBaseline(attribute_names=attribute_names).get_distances(list(), minimum_samples_count=3)
@@ -0,0 +1,125 @@
+import pytest
+
+from src.main.common.PathMatcher import PathMatcher
+from src.main.common.PathTrie import PathTrie
+
+"""
+This file contains test for PathTrie and PathMatcher classes.
+Functional test for the following methods in PathTrie class:
+* add_values()
+* get_unknown_values()
+* get_values()
+* get_generalized_directories()
+* dict_format()
+* set_value_from_dict()
+
+Functional test for the following methods in PathMatcher class:
+* get_matching_paths()
+* get_compiled_matcher()
+* may_match_under()
+
+Input validation test:
+* PathTrie.__init__()
+* PathTrie.add_values()
+* PathMatcher.__init__()
+* PathMatcher.get_matching_paths()
+* PathMatcher.may_match_under()
+"""
+
+
+def test_path_trie_without_generalization() -> None:
+    """
+    Test that the trie knows the exact paths added while no directory has too many entries.
+    """
+    path_trie = PathTrie(generalization_threshold=3)
+    path_trie.add_values(["/etc/hosts", "/var/log/app.log", "/var/log/app.log", "/var/log"])
+    assert path_trie.get_observations_count() == 4
+    assert path_trie.get_values() == {"/etc/hosts", "/var/log/app.log", "/var/log"}
+    assert path_trie.get_generalized_directories() == set()
+    assert path_trie.get_unknown_values(["/etc/hosts", "/etc", "/var/log/other.log", "/var/log"]) == \
+        {"/etc", "/var/log/other.log"}
+
+
+def test_path_trie_with_generalization() -> None:
+    """
+    Test that a directory with too many distinct entries is generalized, so every path under it becomes known.
+    """
+    path_trie = PathTrie(generalization_threshold=3, prohibited_files={"/etc/passwd"})
+    path_trie.add_values(["/etc/hosts"] + ["/tmp/file_{}".format(index) for index in range(3)])
+    assert "/tmp/file_3" not in path_trie
+    path_trie.add_values(["/tmp/file_3"])
+    assert path_trie.get_generalized_directories() == {"/tmp"}
+    assert path_trie.get_values() == {"/etc/hosts", "/tmp/*"}
+    assert path_trie.get_unknown_values(["/tmp/xyz123", "/tmp/dir/file", "/etc/passwd"]) == {"/etc/passwd"}
+
+    # The root directory is never generalized.
+    path_trie.add_values(["/{}".format(index) for index in range(10)])
+    assert "/etc/passwd" not in path_trie
+
+    restored_path_trie = PathTrie(prohibited_files={"/etc/passwd"})
+    restored_path_trie.set_value_from_dict(path_trie.dict_format())
+    assert PathTrie.is_path_trie_dict(path_trie.dict_format())
+    assert restored_path_trie.dict_format() == path_trie.dict_format()
+    assert restored_path_trie.get_unknown_values(["/tmp/xyz123"]) == set()
+
+
+def test_path_trie_never_generalizes_directories_of_prohibited_files() -> None:
+    """
+    Test that the directories that can hold a prohibited file are not generalized, even in a restored trie, so the
+    prohibited files stay unknown.
+    """
+    prohibited_files = {"/etc/shadow", "/root/.ssh/", "/home/*/.ssh/id_*"}
+    path_trie = PathTrie(generalization_threshold=3, prohibited_files=prohibited_files)
+    path_trie.add_values(["/etc/file_{}".format(index) for index in range(5)] +
+                         ["/root/.ssh/file_{}".format(index) for index in range(5)] +
+                         ["/home/user_{}".format(index) for index in range(5)] +
+                         ["/usr/lib/file_{}".format(index) for index in range(5)])
+    assert path_trie.get_generalized_directories() == {"/usr/lib"}
+    assert path_trie.get_unknown_values(["/etc/shadow", "/root/.ssh/id_rsa", "/home/user/.ssh/id_rsa",
+                                         "/usr/lib/other"]) == {"/etc/shadow", "/root/.ssh/id_rsa",
+                                                                "/home/user/.ssh/id_rsa"}
+
+    generalizing_path_trie = PathTrie(generalization_threshold=3, prohibited_files=set())
+    generalizing_path_trie.add_values(["/etc/file_{}".format(index) for index in range(5)])
+    assert generalizing_path_trie.get_generalized_directories() == {"/etc"}
+    path_trie.set_value_from_dict(generalizing_path_trie.dict_format())
+    assert path_trie.get_generalized_directories() == set()
+    assert "/etc/shadow" not in path_trie
+
+
+def test_path_matcher() -> None:
+    """
+    Test that exact paths, directory prefixes and globs are matched.
+    """
+    path_matcher = PathMatcher({"/etc/shadow", "/root/.ssh/", "/home/*/.ssh/id_*"})
+    paths = ["/etc/shadow", "/etc/shadow-", "/root/.ssh/known_hosts", "/root/.sshrc", "/root/.ssh",
+             "/home/user/.ssh/id_rsa", "/home/user/.ssh/config"]
+    assert path_matcher.get_matching_paths(paths) == {"/etc/shadow", "/root/.ssh/known_hosts",
+                                                      "/home/user/.ssh/id_rsa"}
+    assert PathMatcher.get_compiled_matcher({"/etc/shadow"}) is PathMatcher.get_compiled_matcher({"/etc/shadow"})
+    assert PathMatcher(set()).get_matching_paths(paths) == set()
+
+    assert all(path_matcher.may_match_under(directory)
+               for directory in ["/", "/etc", "/root", "/root/.ssh/", "/root/.ssh/keys", "/home", "/home/user"])
+    assert not any(path_matcher.may_match_under(directory) for directory in ["/etc/ssl", "/usr/lib", "/roots"])
+
+
+# noinspection PyTypeChecker
+def test_path_trie_and_path_matcher_with_input_validation() -> None:
+    """
+    Test PathTrie and PathMatcher with invalid inputs.
+    """
+    with pytest.raises(TypeError):
+        PathTrie(generalization_threshold="3")
+    with pytest.raises(ValueError):
+        PathTrie(generalization_threshold=0)
+    with pytest.raises(TypeError):
+        PathTrie().add_values("/etc/hosts")
+    with pytest.raises(TypeError):
+        PathMatcher(["/etc/hosts"])
+    with pytest.raises(TypeError):
+        PathMatcher({"/etc/hosts"}).get_matching_paths("/etc/hosts")
+    with pytest.raises(TypeError):
+        PathMatcher({"/etc/hosts"}).may_match_under(None)
+    with pytest.raises(TypeError):
+        PathTrie(prohibited_files=["/etc/hosts"])
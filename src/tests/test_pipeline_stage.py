@@ -0,0 +1,136 @@
+import threading
+
+import pytest
+
+from src.main.common.MetricsRegistry import MetricsRegistry
+from src.main.common.PipelineStage import PipelineStage
+from src.main.common.enum.OverflowPolicy import OverflowPolicy
+
+"""
+This file contains test for PipelineStage class.
+Functional test for the following methods in PipelineStage class:
+* put()
+* process_next_item()
+* start() and stop()
+* get_metrics()
+
+Input validation test:
+* __init__()
+* set_next_stage()
+"""
+
+
+def test_items_are_handed_off_to_the_next_stage() -> None:
+    """
+    Test that the results of the handler are put in the queue of the next stage, and that None results and handler
+    errors are not.
+    """
+    results = list()
+    metrics_registry = MetricsRegistry()
+    first_stage = PipelineStage("first", lambda item: None if item == 0 else 10 // item, queue_size=4,
+                                metrics_registry=metrics_registry)
+    second_stage = PipelineStage("second", results.append, queue_size=4)
+    first_stage.set_next_stage(second_stage)
+    for item in [1, 0, 5, "a"]:
+        assert first_stage.put(item)
+    assert first_stage.get_queue_depth() == 4
+
+    while first_stage.process_next_item(timeout_sec=0):
+        pass
+    assert second_stage.get_queue_depth() == 2
+    while second_stage.process_next_item(timeout_sec=0):
+        pass
+    assert results == [10, 2]
+
+    first_stage_metrics = first_stage.get_metrics()
+    assert first_stage_metrics["name"] == "first"
+    assert first_stage_metrics["received_items_count"] == 4
+    assert first_stage_metrics["processed_items_count"] == 4
+    assert first_stage_metrics["failed_items_count"] == 1
+    assert first_stage_metrics["dropped_items_count"] == 0
+    assert first_stage_metrics["queue_depth"] == 0
+    assert first_stage_metrics["max_queue_depth"] == 4
+    assert second_stage.get_metrics()["received_items_count"] == 2
+    assert metrics_registry.get_value("pipeline_stage_duration_seconds", {"stage": "first"})["count"] == 4
+
+
+def test_drop_oldest_overflow_policy() -> None:
+    """
+    Test that a full stage drops its oldest items, or merges them into the new item if it can merge items.
+    """
+    results = list()
+    dropping_stage = PipelineStage("dropping", results.append, queue_size=2, overflow_policy=OverflowPolicy.drop_oldest)
+    assert dropping_stage.put(1)
+    assert dropping_stage.put(2)
+    assert not dropping_stage.put(3)
+    assert not dropping_stage.put(4)
+    while dropping_stage.process_next_item(timeout_sec=0):
+        pass
+    assert results == [3, 4]
+    assert dropping_stage.get_metrics()["dropped_items_count"] == 2
+
+    results = list()
+    merging_stage = PipelineStage("merging", results.append, queue_size=1, overflow_policy=OverflowPolicy.drop_oldest,
+                                  merge_items=lambda oldest_item, item: oldest_item | item)
+    for item in [{1}, {2}, {3}]:
+        merging_stage.put(item)
+    assert merging_stage.process_next_item(timeout_sec=0)
+    assert not merging_stage.process_next_item(timeout_sec=0)
+    assert results == [{1, 2, 3}]
+    merging_stage_metrics = merging_stage.get_metrics()
+    assert merging_stage_metrics["merged_items_count"] == 2
+    assert merging_stage_metrics["dropped_items_count"] == 0
+
+
+def test_running_stages_with_a_blocking_queue() -> None:
+    """
+    Test that running stages process every item in order when the producer has to wait for room in the queue.
+    """
+    results = list()
+    all_items_processed = threading.Event()
+
+    def collect_item(item: int) -> None:
+        results.append(item)
+        if item == 49:
+            all_items_processed.set()
+
+    first_stage = PipelineStage("first", lambda item: item, queue_size=2, overflow_policy=OverflowPolicy.block)
+    second_stage = PipelineStage("second", collect_item, queue_size=1, overflow_policy=OverflowPolicy.block)
+    first_stage.set_next_stage(second_stage)
+    second_stage.start()
+    first_stage.start()
+    for item in range(50):
+        first_stage.put(item)
+    assert all_items_processed.wait(timeout=10)
+    first_stage.stop(timeout_sec=1)
+    second_stage.stop(timeout_sec=1)
+
+    assert results == list(range(50))
+    first_stage_metrics = first_stage.get_metrics()
+    assert first_stage_metrics["processed_items_count"] == 50
+    assert first_stage_metrics["max_queue_depth"] <= 2
+    assert first_stage_metrics["items_per_second"] > 0
+    assert 0 <= first_stage_metrics["utilization"] <= 1
+
+
+# noinspection PyTypeChecker
+def test_pipeline_stage_with_input_validation() -> None:
+    """
+    Test PipelineStage with invalid inputs.
+    """
+    with pytest.raises(TypeError):
+        PipelineStage(None, print, queue_size=1)
+    with pytest.raises(TypeError):
+        PipelineStage("stage", None, queue_size=1)
+    with pytest.raises(TypeError):
+        PipelineStage("stage", print, queue_size=None)
+    with pytest.raises(ValueError):
+        PipelineStage("stage", print, queue_size=0)
+    with pytest.raises(TypeError):
+        PipelineStage("stage", print, queue_size=1, overflow_policy="block")
+    with pytest.raises(TypeError):
+        PipelineStage("stage", print, queue_size=1, merge_items=set())
+    with pytest.raises(TypeError):
+        PipelineStage("stage", print, queue_size=1, metrics_registry=dict())
+    with pytest.raises(TypeError):
+        PipelineStage("stage", print, queue_size=1).set_next_stage(print)
@@ -1,5 +1,10 @@
+import datetime
+from collections import namedtuple
+
 from src.main.common.AppProfile import AppProfile
+from src.main.common.enum.ProcessAttribute import ProcessAttribute
 from src.main.psHandler.AppProfileDataManager import AppProfileDataManager
+from src.main.psHandler.AppProfileMemoryBudget import AppProfileMemoryBudget
 from src.main.psHandler.ProcessHandler import ProcessHandler
 
 """
@@ -7,6 +12,7 @@ This file contains test for ProcessHandler class.
 
 Functional test for the following methods in AppProfile class:
 * collect_running_processes_information
+* save_running_processes with a memory budget
 
 Input validation test:
 
@@ -15,6 +21,28 @@ Output Format test:
 """
 
 logger_name = "testProcessHandler"
+MemoryInfo = namedtuple("MemoryInfo", ["rss"])
+
+
+def get_process_dict(app_name: str) -> dict:
+    """
+    Creates the information of a process, in the format of 'ProcessHandler.collect_running_processes'.
+    :param app_name: The name of the application of the process.
+    :type app_name: str
+    :return: The information of the process.
+    :rtype: dict
+    """
+    return {
+        ProcessAttribute.name.name: app_name,
+        ProcessAttribute.pid.name: 1,
+        ProcessAttribute.username.name: "user",
+        ProcessAttribute.memory_info.name: MemoryInfo(1000),
+        ProcessAttribute.open_files.name: list(),
+        ProcessAttribute.cpu_percent.name: 1.0,
+        ProcessAttribute.children_count.name: 0,
+        ProcessAttribute.num_threads.name: 2,
+        ProcessAttribute.connections.name: 0
+    }
 
 
 def test_collect_running_processes_information() -> None:
@@ -35,3 +63,35 @@ def test_collect_running_processes_information() -> None:
         data_retrieval_timestamps = app_profile.get_data_retrieval_timestamps()
         assert len(data_retrieval_timestamps) >= 1  # Some apps may have more than one process
         assert data_retrieval_timestamps[0] is not None
+
+
+def test_save_running_processes_with_memory_budget() -> None:
+    """
+    Test that once the profiles exceed the memory budget, the profile of the least recently seen application is
+    compacted, saved and resized in the budget, while the other profiles are left as they are.
+    """
+    process_handler = ProcessHandler(logger_name)
+    first_retrieval_time = datetime.datetime.now() - datetime.timedelta(minutes=3)
+    for cycle in range(2):
+        process_handler.save_running_processes(first_retrieval_time + datetime.timedelta(minutes=cycle),
+                                               {"app_a": [get_process_dict("app_a")],
+                                                "app_b": [get_process_dict("app_b")]})
+    # The budget only fits the profiles of the first two retrievals, and app_a is seen before app_b.
+    memory_budget = AppProfileMemoryBudget(budget_bytes=process_handler.get_memory_budget().get_total_size_bytes())
+    for app_name in ["app_a", "app_b"]:
+        memory_budget.mark_seen(app_name, AppProfileDataManager.get_saved_profile(app_name).get_estimated_size_bytes())
+    process_handler._ProcessHandler__memory_budget = memory_budget
+    process_handler.save_running_processes(first_retrieval_time + datetime.timedelta(minutes=2),
+                                           {"app_a": [get_process_dict("app_a")],
+                                            "app_b": [get_process_dict("app_b")]})
+
+    compacted_app_profile = AppProfileDataManager.get_saved_profile("app_a")
+    assert compacted_app_profile.get_samples_count() == 1
+    assert compacted_app_profile.get_evicted_samples_count() == 2
+    app_profile = AppProfileDataManager.get_saved_profile("app_b")
+    assert app_profile.get_samples_count() == 3
+    assert app_profile.get_evicted_samples_count() == 0
+    assert not memory_budget.is_over_budget()
+    assert memory_budget.get_tracked_application_names() == ["app_a", "app_b"]
+    assert memory_budget.get_total_size_bytes() == \
+        compacted_app_profile.get_estimated_size_bytes() + app_profile.get_estimated_size_bytes()
@@ -0,0 +1,102 @@
+import numpy
+import pytest
+
+from src.main.common.QuantileSketch import QuantileSketch
+
+"""
+This file contains test for QuantileSketch class.
+Functional test for the following methods in QuantileSketch class:
+* add_values()
+* get_quantiles()
+* get_bin_counts()
+* dict_format()
+* set_value_from_dict()
+
+Input validation test:
+* __init__()
+* add_values()
+* get_quantiles()
+"""
+
+
+def test_quantiles_are_exact_for_small_data() -> None:
+    """
+    Test that the sketch gives the same quartiles, extremes and bin counts as numpy while it keeps every value.
+    """
+    values = [3422, 3211, 2212, 2123, 3482, 3300, 2900, 12000]
+    sketch = QuantileSketch(k=200)
+    sketch.add_values(values)
+
+    assert sketch.get_count() == len(values)
+    assert sketch.get_min() == min(values)
+    assert sketch.get_max() == max(values)
+    assert sketch.get_quantiles([0.25, 0.5, 0.75]) == pytest.approx(numpy.percentile(values, [25, 50, 75]).tolist())
+
+    expected_bin_counts, bin_edges = numpy.histogram(values, bins='fd')
+    assert sketch.get_bin_counts(bin_edges).tolist() == expected_bin_counts.tolist()
+
+
+def test_quantiles_error_is_bounded_for_large_data() -> None:
+    """
+    Test that the rank error of the quantiles stays within the expected bound and that memory stays bounded when the
+    sketch summarizes many values.
+    """
+    k = 200
+    random_generator = numpy.random.default_rng(seed=7)
+    values = random_generator.lognormal(mean=10, sigma=1, size=100000)
+    sketch = QuantileSketch(k=k)
+    for batch_start in range(0, len(values), 100):
+        sketch.add_values(values[batch_start:batch_start + 100].tolist())
+
+    assert sketch.get_count() == len(values)
+    assert sketch.get_retained_items_count() < 3 * k
+    sorted_values = numpy.sort(values)
+    quantiles = [0.25, 0.5, 0.75]
+    for quantile, quantile_value in zip(quantiles, sketch.get_quantiles(quantiles)):
+        actual_rank = numpy.searchsorted(sorted_values, quantile_value) / len(values)
+        assert abs(actual_rank - quantile) < 2 / k
+
+    bin_edges = numpy.linspace(sorted_values[0], sorted_values[-1], 20)
+    assert sketch.get_bin_counts(bin_edges).sum() == len(values)
+
+
+def test_sketch_dict_format_round_trip() -> None:
+    """
+    Test that a sketch restored from its dict_format() gives the same results and keeps being updated in the same way.
+    """
+    random_generator = numpy.random.default_rng(seed=3)
+    sketch = QuantileSketch(k=50)
+    sketch.add_values(random_generator.normal(size=5000).tolist())
+
+    restored_sketch = QuantileSketch()
+    restored_sketch.set_value_from_dict(sketch.dict_format())
+    assert restored_sketch.get_k() == 50
+    assert restored_sketch.get_quantiles([0.1, 0.9]) == sketch.get_quantiles([0.1, 0.9])
+
+    new_values = random_generator.normal(size=1000).tolist()
+    sketch.add_values(new_values)
+    restored_sketch.add_values(new_values)
+    assert restored_sketch.dict_format() == sketch.dict_format()
+
+
+# noinspection PyTypeChecker
+def test_sketch_with_input_validation() -> None:
+    """
+    Test QuantileSketch with invalid inputs.
+    """
+    with pytest.raises(TypeError):
+        QuantileSketch(k=None)
+    with pytest.raises(ValueError):
+        QuantileSketch(k=2)
+
+    sketch = QuantileSketch()
+    with pytest.raises(TypeError):
+        sketch.add_values(None)
+    with pytest.raises(ValueError):
+        sketch.get_quantiles([0.5])
+
+    sketch.add_values([1, 2, 3])
+    with pytest.raises(TypeError):
+        sketch.get_quantiles(0.5)
+    with pytest.raises(ValueError):
+        sketch.get_quantiles([1.5])
@@ -0,0 +1,116 @@
+import numpy
+import pytest
+
+from src.main.common.RangeKeyDict import RangeKeyDict
+
+"""
+This file contains test for RangeKeyDict class.
+Functional test for the following methods in RangeKeyDict class:
+* __getitem__()
+* __setitem__()
+* __contains__()
+* __delitem__()
+* get_values()
+
+Input validation test:
+* __setitem__()
+* get_values()
+"""
+
+
+def build_histogram_range_key_dict(data_count_in_bins: numpy.ndarray, raw_bin_edges: numpy.ndarray) -> RangeKeyDict:
+    """
+    Builds a RangeKeyDict the same way the frequency technique does from an histogram.
+    :param data_count_in_bins: The number of data points in each bin.
+    :type data_count_in_bins: numpy.ndarray
+    :param raw_bin_edges: The edges of the bins.
+    :type raw_bin_edges: numpy.ndarray
+    :return: The histogram as a RangeKeyDict.
+    :rtype: RangeKeyDict
+    """
+    range_key_dict = RangeKeyDict()
+    for index in range(len(data_count_in_bins)):
+        range_key_dict[(raw_bin_edges[index], raw_bin_edges[index + 1])] = data_count_in_bins[index]
+    return range_key_dict
+
+
+def test_get_item_with_contiguous_ranges() -> None:
+    """
+    Test that keys are found in contiguous ranges, that a shared edge belongs to the range inserted first and that
+    keys outside every range are not found.
+    """
+    range_key_dict = RangeKeyDict()
+    range_key_dict[(0.0, 1.5)] = "first"
+    range_key_dict[(1.5, 3.0)] = "second"
+    range_key_dict[(3.0, 4.0)] = "third"
+
+    assert range_key_dict[0.0] == "first"
+    assert range_key_dict[1.5] == "first"
+    assert range_key_dict[2] == "second"
+    assert range_key_dict[3.0] == "second"
+    assert range_key_dict[4.0] == "third"
+    assert range_key_dict[(1.5, 3.0)] == "second"
+    assert range_key_dict[-0.1] is None
+    assert range_key_dict[4.1] is None
+    assert 3.5 in range_key_dict
+    assert 5 not in range_key_dict
+
+    # When the upper range is inserted first, it owns the shared edge.
+    reversed_range_key_dict = RangeKeyDict()
+    reversed_range_key_dict[(1.5, 3.0)] = "second"
+    reversed_range_key_dict[(0.0, 1.5)] = "first"
+    assert reversed_range_key_dict[1.5] == "second"
+
+    range_key_dict[2.5] = "updated"
+    assert range_key_dict[(1.5, 3.0)] == "updated"
+    del range_key_dict[2.5]
+    assert len(range_key_dict) == 2
+    assert range_key_dict[2.5] is None
+    assert range_key_dict[1.5] == "first"
+    assert range_key_dict[3.0] == "third"
+
+
+def test_get_item_with_overlapping_ranges() -> None:
+    """
+    Test that the first inserted range containing a key is found when ranges overlap.
+    """
+    range_key_dict = RangeKeyDict()
+    range_key_dict[(0, 10)] = "wide"
+    range_key_dict[(2, 4)] = "narrow"
+    range_key_dict[(8, 12)] = "overlapping"
+
+    assert range_key_dict[3] == "wide"
+    assert range_key_dict[11] == "overlapping"
+    assert range_key_dict.get_values([3, 11, 13]) == ["wide", "overlapping", None]
+
+
+def test_get_values_matches_get_item_on_histogram() -> None:
+    """
+    Test that the values found for many keys at once are the same as the ones found one key at a time, including
+    the bin edges and the keys outside the histogram.
+    """
+    random_generator = numpy.random.default_rng(seed=5)
+    data = random_generator.normal(100, 15, 10000).tolist()
+    data_count_in_bins, raw_bin_edges = numpy.histogram(data, bins='fd')
+    range_key_dict = build_histogram_range_key_dict(data_count_in_bins, raw_bin_edges)
+
+    keys = random_generator.uniform(20, 180, 1000).tolist() + raw_bin_edges.tolist()
+    expected_values = [range_key_dict[key] for key in keys]
+    assert range_key_dict.get_values(keys) == expected_values
+    assert range_key_dict.get_values(numpy.asarray(keys)) == expected_values
+    assert range_key_dict.get_values(list()) == list()
+    assert RangeKeyDict().get_values([1, 2]) == [None, None]
+
+
+# noinspection PyTypeChecker
+def test_range_key_dict_with_input_validation() -> None:
+    """
+    Test RangeKeyDict with invalid inputs.
+    """
+    range_key_dict = RangeKeyDict()
+    with pytest.raises(ValueError):
+        range_key_dict[(3, 1)] = "invalid"
+    with pytest.raises(ValueError):
+        range_key_dict[(1, 3.0)] = "invalid"
+    with pytest.raises(TypeError):
+        range_key_dict.get_values(None)
@@ -0,0 +1,124 @@
+import datetime
+
+import numpy
+import pytest
+
+import wades_config
+from src.main.common.StreamingBaseline import StreamingBaseline
+from src.main.common.enum.AppProfileAttribute import AppProfileAttribute
+
+"""
+This file contains test for StreamingBaseline class.
+Functional test for the following methods in StreamingBaseline class:
+* add_samples()
+* get_z_scores()
+* get_hour_of_week()
+* dict_format()
+* set_value_from_dict()
+
+Input validation test:
+* __init__()
+* add_samples()
+"""
+
+
+def build_memory_data(memory_usages: list, first_timestamp: datetime.datetime,
+                      period: datetime.timedelta = datetime.timedelta(minutes=1)) -> dict:
+    """
+    Builds application profile data with only memory usages, one sample per period.
+    :param memory_usages: The memory usages of the samples.
+    :type memory_usages: list
+    :param first_timestamp: The retrieval timestamp of the first sample.
+    :type first_timestamp: datetime.datetime
+    :param period: The time between two samples.
+    :type period: datetime.timedelta
+    :return: The application profile data.
+    :rtype: dict
+    """
+    return {
+        AppProfileAttribute.data_retrieval_timestamps.name: [
+            (first_timestamp + index * period).strftime(wades_config.datetime_format)
+            for index in range(len(memory_usages))],
+        AppProfileAttribute.memory_infos.name: list(memory_usages)
+    }
+
+
+def test_add_samples_only_once() -> None:
+    """
+    Test that the statistics are the plain mean and variance while few samples are folded, and that samples already
+    folded are skipped.
+    """
+    memory_usages = [100, 120, 80, 110, 90]
+    streaming_baseline = StreamingBaseline(attribute_names=[AppProfileAttribute.memory_infos.name], alpha=0.05,
+                                           seasonal_alpha=0.1)
+    data = build_memory_data(memory_usages, datetime.datetime(2020, 12, 14, 10, 0))
+    streaming_baseline.add_samples(data)
+    streaming_baseline.add_samples(data)
+
+    assert streaming_baseline.get_samples_count(AppProfileAttribute.memory_infos.name) == 5
+    assert streaming_baseline.get_mean(AppProfileAttribute.memory_infos.name) == pytest.approx(
+        numpy.mean(memory_usages))
+    assert streaming_baseline.get_variance(AppProfileAttribute.memory_infos.name) == pytest.approx(
+        numpy.var(memory_usages))
+    assert streaming_baseline.get_last_seen_timestamp() == datetime.datetime(2020, 12, 14, 10, 4)
+
+
+def test_get_z_scores_with_seasonal_buckets() -> None:
+    """
+    Test that values are scored against their hour of the week once it has enough samples, and against the overall
+    statistics otherwise.
+    """
+    # 2020-12-14 is a Monday. Mondays at 10:00 have a high memory usage, the rest of the week a low one.
+    first_timestamp = datetime.datetime(2020, 12, 14, 0, 0)
+    hourly_timestamps = [first_timestamp + datetime.timedelta(hours=hour) for hour in range(4 * 7 * 24)]
+    memory_usages = [5000 + hour % 3 if timestamp.weekday() == 0 and timestamp.hour == 10 else 1000 + hour % 3
+                     for hour, timestamp in enumerate(hourly_timestamps)]
+    streaming_baseline = StreamingBaseline(attribute_names=[AppProfileAttribute.memory_infos.name], alpha=0.05,
+                                           seasonal_alpha=0.5)
+    streaming_baseline.add_samples(build_memory_data(memory_usages, first_timestamp, datetime.timedelta(hours=1)))
+    assert StreamingBaseline.get_hour_of_week(datetime.datetime(2020, 12, 14, 10, 30)) == 10
+    assert streaming_baseline.get_samples_count(AppProfileAttribute.memory_infos.name, hour_of_week=10) == 4
+
+    next_monday = datetime.datetime(2021, 1, 11, 10, 0)
+    latest_data = build_memory_data([5000, 5000], next_monday, datetime.timedelta(hours=1))
+    seasonal_z_scores = streaming_baseline.get_z_scores(latest_data, minimum_samples_count=3,
+                                                        seasonal_minimum_samples_count=3)
+    overall_z_scores = streaming_baseline.get_z_scores(latest_data, minimum_samples_count=3,
+                                                       seasonal_minimum_samples_count=5)
+    # Monday 10:00 is usual, Monday 11:00 is not.
+    assert abs(seasonal_z_scores[AppProfileAttribute.memory_infos.name][0]) < 3
+    assert seasonal_z_scores[AppProfileAttribute.memory_infos.name][1] > 3
+    assert overall_z_scores[AppProfileAttribute.memory_infos.name][0] > 3
+
+    not_enough_samples_z_scores = streaming_baseline.get_z_scores(latest_data, minimum_samples_count=10 ** 6,
+                                                                  seasonal_minimum_samples_count=3)
+    assert numpy.isnan(not_enough_samples_z_scores[AppProfileAttribute.memory_infos.name]).all()
+
+
+def test_streaming_baseline_dict_format() -> None:
+    """
+    Test that the statistics are the same after being converted into a dictionary and back.
+    """
+    streaming_baseline = StreamingBaseline(attribute_names=[AppProfileAttribute.memory_infos.name], alpha=0.05,
+                                           seasonal_alpha=0.1)
+    streaming_baseline.add_samples(build_memory_data(list(range(100)), datetime.datetime(2020, 12, 14, 10, 0)))
+
+    loaded_streaming_baseline = StreamingBaseline(attribute_names=list(), alpha=1.0, seasonal_alpha=1.0)
+    loaded_streaming_baseline.set_value_from_dict(streaming_baseline.dict_format())
+    assert loaded_streaming_baseline.dict_format() == streaming_baseline.dict_format()
+    assert loaded_streaming_baseline.get_mean(AppProfileAttribute.memory_infos.name, hour_of_week=11) == \
+        streaming_baseline.get_mean(AppProfileAttribute.memory_infos.name, hour_of_week=11)
+
+
+def test_streaming_baseline_with_input_validation() -> None:
+    """
+    Test that the statistics only accept valid parameters and data.
+    """
+    with pytest.raises(TypeError):
+        StreamingBaseline(attribute_names="memory_infos", alpha=0.05, seasonal_alpha=0.1)
+    with pytest.raises(TypeError):
+        StreamingBaseline(attribute_names=list(), alpha=1, seasonal_alpha=0.1)
+    with pytest.raises(ValueError):
+        StreamingBaseline(attribute_names=list(), alpha=0.05, seasonal_alpha=1.5)
+    with pytest.raises(TypeError):
+        StreamingBaseline(attribute_names=list(), alpha=0.05, seasonal_alpha=0.1).add_samples(list())
@@ -0,0 +1,114 @@
+import datetime
+
+import pytest
+
+import wades_config
+from src.main.common.AppModelCache import AppModelCache
+from src.main.common.AppProfile import AppProfile
+from src.main.common.enum.AppProfileAttribute import AppProfileAttribute
+from src.main.common.enum.RiskLevel import RiskLevel
+from src.main.modeller.StreamingTechnique import StreamingTechnique
+
+"""
+This file contains test for StreamingTechnique class.
+Methods with functional tests:
+* __call__() with model caches
+* __call__() without model caches
+* __call__() with selected attributes
+
+Input validation test:
+* __init__()
+* __call__()
+"""
+
+
+def add_cycle(app_profile: AppProfile, cycle: int, memory_usage: int, user: str = "user") -> None:
+    """
+    Adds a retrieval of two processes to an application profile, one minute after the previous one.
+    :param app_profile: The application profile.
+    :type app_profile: AppProfile
+    :param cycle: The number of the retrieval.
+    :type cycle: int
+    :param memory_usage: The memory usage of the first process.
+    :type memory_usage: int
+    :param user: The user of the second process.
+    :type user: str
+    """
+    first_timestamp = datetime.datetime(2020, 12, 14, 10, 0)
+    app_profile.add_new_information_batch(
+        memory_usages=[memory_usage, 1000 + cycle % 5], child_processes_counts=[0, 0], users=["user", user],
+        open_files=[list(), list()], cpu_percentages=[1.0, 1.0 + cycle % 2],
+        data_retrieval_timestamp=first_timestamp + datetime.timedelta(minutes=cycle),
+        threads_numbers=[3, 3], connections_numbers=[0, 0])
+
+
+@pytest.mark.usefixtures('setup_and_clean_up_modelling_requirements')
+def test_execute_streaming_modelling_with_model_caches() -> None:
+    """
+    Test that each retrieval is scored against the running statistics saved in the model cache, and folded into them.
+    """
+    app_profile = AppProfile("streamed_app")
+    model_caches = dict()
+    for cycle in range(30):
+        add_cycle(app_profile, cycle, 1000 + cycle % 5)
+        app_summary = StreamingTechnique()(data=[app_profile], model_caches=model_caches)[0]
+        assert app_summary.get_risk_level() == RiskLevel.none
+    streaming_baseline = model_caches["streamed_app"].get_streaming_baseline()
+    assert streaming_baseline.get_samples_count(AppProfileAttribute.memory_infos.name) == 60
+
+    # The cache survives being saved and loaded.
+    loaded_model_cache = AppModelCache("streamed_app")
+    loaded_model_cache.set_value_from_dict(model_caches["streamed_app"].dict_format())
+    model_caches["streamed_app"] = loaded_model_cache
+
+    add_cycle(app_profile, 30, 5000, user="root")
+    app_summary = StreamingTechnique()(data=[app_profile], model_caches=model_caches)[0]
+    assert app_summary.get_error_message() == wades_config.anomaly_detected_message
+    assert app_summary.get_risk_level() == RiskLevel.high
+    assert app_summary.get_abnormal_attrs() == {AppProfileAttribute.memory_infos.name,
+                                                AppProfileAttribute.usernames.name}
+    assert app_summary.get_anomalous_points_count() == 1
+    assert app_summary.get_worst_point()["attribute_name"] == AppProfileAttribute.memory_infos.name
+    assert app_summary.get_worst_point()["value"] == 5000
+    assert model_caches["streamed_app"].get_streaming_baseline().get_samples_count(
+        AppProfileAttribute.memory_infos.name) == 62
+
+
+@pytest.mark.usefixtures('setup_and_clean_up_modelling_requirements')
+def test_execute_streaming_modelling_without_model_caches() -> None:
+    """
+    Test that a technique keeps its own running statistics when no model caches are provided, and only reports the
+    attributes it models.
+    """
+    app_profile = AppProfile("streamed_app")
+    streaming_technique = StreamingTechnique()
+    users_streaming_technique = StreamingTechnique(attribute_names={AppProfileAttribute.usernames.name})
+    for cycle in range(30):
+        add_cycle(app_profile, cycle, 1000 + cycle % 5)
+        streaming_technique(data=[app_profile])
+        users_streaming_technique(data=[app_profile])
+
+    add_cycle(app_profile, 30, 5000)
+    app_summary = streaming_technique(data=[app_profile])[0]
+    assert app_summary.get_abnormal_attrs() == {AppProfileAttribute.memory_infos.name}
+    app_summary = users_streaming_technique(data=[app_profile])[0]
+    assert app_summary.get_risk_level() == RiskLevel.none
+    assert app_summary.get_error_message() is None
+
+    # A fresh technique has too few samples to model.
+    app_summary = StreamingTechnique()(data=[AppProfile("new_app")])[0]
+    assert app_summary.get_risk_level() == RiskLevel.none
+
+
+def test_execute_streaming_modelling_with_invalid_inputs() -> None:
+    """
+    Test that the technique only accepts valid attributes, profiles and model caches.
+    """
+    with pytest.raises(ValueError):
+        StreamingTechnique(attribute_names={"unknown_attribute"})
+    with pytest.raises(TypeError):
+        StreamingTechnique()(data=AppProfile("app"))
+    with pytest.raises(TypeError):
+        StreamingTechnique()(data=["app"])
+    with pytest.raises(TypeError):
+        StreamingTechnique()(data=[AppProfile("app")], model_caches=list())
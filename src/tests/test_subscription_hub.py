@@ -0,0 +1,155 @@
+import asyncio
+import json
+
+import pytest
+
+from src.main.common.AppSummary import AppSummary
+from src.main.common.enum.AppProfileAttribute import AppProfileAttribute
+from src.main.common.enum.RiskLevel import RiskLevel
+from src.main.server.Subscription import Subscription
+from src.main.server.SubscriptionHub import SubscriptionHub
+
+"""
+This file contains test for SubscriptionHub and Subscription classes.
+Functional test for the following methods in SubscriptionHub class:
+* publish() with filtered and slow subscriptions
+* parse_arguments()
+* get_metrics()
+
+Functional test for the following methods in Subscription class:
+* get_messages() while anomalies are offered from another thread
+* close()
+
+Input validation test:
+* SubscriptionHub.__init__()
+* SubscriptionHub.publish()
+* SubscriptionHub.parse_arguments()
+* Subscription.__init__()
+"""
+
+
+def build_app_summary(app_name: str, risk: RiskLevel) -> AppSummary:
+    """
+    Builds the summary of a modelled application.
+    :param app_name: The name of the application.
+    :type app_name: str
+    :param risk: The risk level of the application.
+    :type risk: RiskLevel
+    :return: The summary of the application.
+    :rtype: AppSummary
+    """
+    return AppSummary(app_name=app_name, error_message=None if risk == RiskLevel.none else "Anomalies found.",
+                      risk=risk, abnormal_attrs=set() if risk == RiskLevel.none else {"cpu_percents"},
+                      latest_retrieved_app_details={AppProfileAttribute.opened_files.name: list()},
+                      modelled_app_details=dict())
+
+
+def get_app_names(messages: list) -> list:
+    """
+    Gets the names of the applications of subscription messages.
+    :param messages: The messages.
+    :type messages: list
+    :return: The application names, in message order.
+    :rtype: list
+    """
+    return [json.loads(json.loads(message)["app_summary"])["app_name"] for message in messages]
+
+
+def test_publish_to_filtered_and_slow_subscriptions() -> None:
+    """
+    Test that anomalies are only sent to the subscriptions that match them, and that slow subscriptions drop their
+    oldest anomalies instead of holding up publishing.
+    """
+    subscription_hub = SubscriptionHub(buffer_size=2)
+
+    async def receive_anomalies() -> tuple:
+        all_subscription = subscription_hub.subscribe()
+        high_risk_subscription = subscription_hub.subscribe(min_risk_level=RiskLevel.high)
+        firefox_subscription = subscription_hub.subscribe(app_names={"firefox"})
+        subscription_hub.publish([build_app_summary("firefox", RiskLevel.medium),
+                                  build_app_summary("sshd", RiskLevel.high),
+                                  build_app_summary("bash", RiskLevel.none)])
+        all_messages = await all_subscription.get_messages()
+        high_risk_messages = await high_risk_subscription.get_messages()
+        firefox_messages = await firefox_subscription.get_messages()
+
+        for app_index in range(5):
+            subscription_hub.publish([build_app_summary("app_{}".format(app_index), RiskLevel.low)])
+        slow_messages = await all_subscription.get_messages()
+        all_subscription.close()
+        return all_messages, high_risk_messages, firefox_messages, slow_messages
+
+    all_messages, high_risk_messages, firefox_messages, slow_messages = asyncio.run(receive_anomalies())
+    assert get_app_names(all_messages) == ["firefox", "sshd"]
+    assert get_app_names(high_risk_messages) == ["sshd"]
+    assert get_app_names(firefox_messages) == ["firefox"]
+    assert get_app_names(slow_messages) == ["app_3", "app_4"]
+    assert all(json.loads(message)["dropped_messages_count"] == 3 for message in slow_messages)
+
+    metrics = subscription_hub.get_metrics()
+    assert metrics["subscriptions_count"] == 2
+    assert metrics["published_anomalies_count"] == 7
+    assert metrics["delivered_messages_count"] == 6
+    assert metrics["dropped_messages_count"] == 3
+
+
+def test_get_messages_offered_from_another_thread() -> None:
+    """
+    Test that a subscription waiting in an event loop gets the anomalies offered from another thread, and that closing
+    it wakes it up.
+    """
+    subscription = Subscription()
+
+    async def receive_anomalies() -> tuple:
+        event_loop = asyncio.get_running_loop()
+        messages_task = asyncio.ensure_future(subscription.get_messages())
+        await asyncio.sleep(0.05)
+        assert not messages_task.done()
+        await event_loop.run_in_executor(None, subscription.offer, str(build_app_summary("firefox", RiskLevel.high)))
+        messages = await asyncio.wait_for(messages_task, timeout=10)
+        closed_messages_task = asyncio.ensure_future(subscription.get_messages())
+        await asyncio.sleep(0.05)
+        await event_loop.run_in_executor(None, subscription.close)
+        return messages, await asyncio.wait_for(closed_messages_task, timeout=10)
+
+    messages, closed_messages = asyncio.run(receive_anomalies())
+    assert get_app_names(messages) == ["firefox"]
+    assert closed_messages == list()
+    subscription.offer(str(build_app_summary("firefox", RiskLevel.high)))
+    assert subscription.get_metrics() == {"buffered_messages_count": 0, "delivered_messages_count": 1,
+                                          "dropped_messages_count": 0}
+
+
+def test_parse_arguments() -> None:
+    """
+    Test parsing the options of the subscription command.
+    """
+    assert SubscriptionHub.parse_arguments("") == (RiskLevel.low, None)
+    assert SubscriptionHub.parse_arguments("--min-risk high --app firefox --app 'Web Content'") == \
+        (RiskLevel.high, {"firefox", "Web Content"})
+
+
+# noinspection PyTypeChecker
+def test_subscription_hub_with_input_validation() -> None:
+    """
+    Test SubscriptionHub and Subscription with invalid inputs.
+    """
+    with pytest.raises(TypeError):
+        SubscriptionHub(buffer_size="2")
+    with pytest.raises(ValueError):
+        SubscriptionHub(buffer_size=0)
+    with pytest.raises(TypeError):
+        SubscriptionHub().publish(None)
+    with pytest.raises(TypeError):
+        SubscriptionHub.parse_arguments(None)
+    for arguments in ["--min-risk", "--min-risk none", "--min-risk critical", "--risk high"]:
+        with pytest.raises(ValueError):
+            SubscriptionHub.parse_arguments(arguments)
+    with pytest.raises(TypeError):
+        Subscription(min_risk_level=3)
+    with pytest.raises(ValueError):
+        Subscription(min_risk_level=RiskLevel.none)
+    with pytest.raises(TypeError):
+        Subscription(app_names=["firefox"])
+    with pytest.raises(ValueError):
+        Subscription(buffer_size=0)
@@ -0,0 +1,69 @@
+import pytest
+
+from src.main.common.AppProfile import AppProfile
+from src.utils.TechniqueBenchmark import TechniqueBenchmark
+
+"""
+This file contains test for TechniqueBenchmark class.
+Functional test for the following methods in TechniqueBenchmark class:
+* generate_workload()
+* run()
+* parse_arguments()
+* print_report()
+"""
+
+
+@pytest.mark.usefixtures('setup_and_clean_up_modelling_requirements')
+def test_run_benchmark_on_generated_workload() -> None:
+    """
+    Test that the benchmark replays the retrievals after the warm up samples and measures the frequency technique.
+    """
+    app_profiles, anomaly_onsets = TechniqueBenchmark.generate_workload(apps_count=4, retrievals_count=12,
+                                                                        anomalous_apps_count=2, seed=1)
+    assert len(app_profiles) == 4
+    assert sum(anomaly_onset is not None for anomaly_onset in anomaly_onsets.values()) == 2
+
+    technique_benchmark = TechniqueBenchmark(app_profiles, anomaly_onsets)
+    assert 4 * (12 - 3) <= technique_benchmark.get_replay_steps_count() < 4 * 12
+
+    report = technique_benchmark.run(["frequency"])
+    measures = report["frequency"]
+    assert measures["samples_per_second"] > 0
+    latency_percentiles = measures["latency_percentiles_seconds"]
+    assert 0 < latency_percentiles[50] <= latency_percentiles[95] <= latency_percentiles[99]
+    assert measures["peak_memory_bytes"] > 0
+    assert 0 < measures["precision"] <= 1
+    assert measures["recall"] == 1
+    assert measures["detected_apps_count"] == measures["anomalous_apps_count"] == 2
+    assert measures["mean_time_to_detect_seconds"] == 0
+
+
+def test_parse_arguments_and_print_report(capsys) -> None:
+    """
+    Test that the options of the benchmark command are parsed with their defaults, and that the report is printed.
+    """
+    assert TechniqueBenchmark.parse_arguments("") == (TechniqueBenchmark.default_apps_count,
+                                                      TechniqueBenchmark.default_retrievals_count,
+                                                      TechniqueBenchmark.default_anomalous_apps_count, None)
+    assert TechniqueBenchmark.parse_arguments("--apps 4 --technique frequency --retrievals 12 --technique streaming") \
+        == (4, 12, TechniqueBenchmark.default_anomalous_apps_count, ["frequency", "streaming"])
+
+    TechniqueBenchmark.print_report({"frequency": {"precision": 0.5, "recall": None}})
+    assert capsys.readouterr().out == "Technique: frequency\n    precision: 0.5\n    recall: None\n"
+
+
+def test_invalid_benchmark_input() -> None:
+    """
+    Test that the benchmark only accepts application profiles and labels.
+    """
+    with pytest.raises(TypeError):
+        TechniqueBenchmark(["app_profile"], dict())
+    with pytest.raises(TypeError):
+        TechniqueBenchmark([AppProfile("app")], ["app"])
+    with pytest.raises(ValueError):
+        TechniqueBenchmark([], dict()).run(["unknown_technique"])
+    with pytest.raises(TypeError):
+        TechniqueBenchmark.parse_arguments(None)
+    for arguments in ["--apps", "--apps -1", "--apps four", "--seed 1"]:
+        with pytest.raises(ValueError):
+            TechniqueBenchmark.parse_arguments(arguments)
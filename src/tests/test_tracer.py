@@ -0,0 +1,113 @@
+import threading
+import time
+
+import pytest
+
+from src.utils.Tracer import Tracer
+
+"""
+This file contains test for Tracer class.
+Functional test for the following methods in Tracer class:
+* span() with nested spans, spans of several threads and disabled spans
+* get_stats()
+* get_cycle_breakdowns()
+* reset()
+
+Input validation test:
+* __init__()
+* set_enabled()
+* span()
+"""
+
+
+def test_nested_spans_are_broken_down_per_cycle() -> None:
+    """
+    Test that nested spans get the path and the cycle of their parent, and that the breakdown of each cycle adds up
+    the spans of each path.
+    """
+    tracer = Tracer(is_enabled=True, cycles_count=2)
+    for cycle_index in range(3):
+        with tracer.span("collection", cycle_index=cycle_index) as collection_span:
+            for _ in range(2):
+                with tracer.span("save") as save_span:
+                    time.sleep(0.001)
+            assert save_span.get_path() == "collection/save"
+            assert save_span.get_cycle_index() == cycle_index
+            assert save_span.get_parent_span() is collection_span
+        assert tracer.get_current_span() is None
+        with tracer.span("modelling", cycle_index=cycle_index):
+            pass
+    with tracer.span("outside"):
+        pass
+
+    cycle_breakdowns = tracer.get_cycle_breakdowns()
+    assert [cycle_breakdown["cycle_index"] for cycle_breakdown in cycle_breakdowns] == [1, 2]
+    spans = cycle_breakdowns[-1]["spans"]
+    assert list(spans.keys()) == ["collection", "collection/save", "modelling"]
+    assert spans["collection/save"]["count"] == 2
+    assert 2 <= spans["collection/save"]["total_ms"] <= spans["collection"]["total_ms"]
+    assert cycle_breakdowns[-1]["total_ms"] == pytest.approx(spans["collection"]["total_ms"] +
+                                                             spans["modelling"]["total_ms"])
+
+    stats = tracer.get_stats()
+    assert list(stats.keys()) == ["collection", "modelling", "outside", "save"]
+    assert stats["save"]["count"] == 6
+    assert 1 <= stats["save"]["p50_ms"] <= stats["save"]["p95_ms"] <= stats["save"]["max_ms"]
+    assert stats["save"]["total_ms"] >= 6
+    tracer.reset()
+    assert tracer.get_stats() == dict()
+    assert tracer.get_cycle_breakdowns() == list()
+
+
+def test_spans_of_several_threads_and_disabled_spans() -> None:
+    """
+    Test that each thread nests its own spans, that spans are closed when the timed code raises an error, and that
+    disabled spans are not added.
+    """
+    tracer = Tracer(is_enabled=True)
+
+    def trace_steps(thread_index: int) -> None:
+        for _ in range(100):
+            with tracer.span("thread_{}".format(thread_index), cycle_index=thread_index):
+                with tracer.span("step"):
+                    pass
+    threads = [threading.Thread(target=trace_steps, args=(thread_index,)) for thread_index in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert tracer.get_stats()["step"]["count"] == 400
+    for cycle_breakdown in tracer.get_cycle_breakdowns():
+        assert list(cycle_breakdown["spans"].keys()) == ["thread_{}".format(cycle_breakdown["cycle_index"]),
+                                                         "thread_{}/step".format(cycle_breakdown["cycle_index"])]
+
+    with pytest.raises(ZeroDivisionError):
+        with tracer.span("failing"):
+            _ = 1 / 0
+    assert tracer.get_current_span() is None
+    assert tracer.get_stats()["failing"]["count"] == 1
+
+    tracer.set_enabled(False)
+    assert not tracer.is_enabled()
+    with tracer.span("disabled", cycle_index=10) as disabled_span:
+        assert disabled_span is None
+    assert "disabled" not in tracer.get_stats()
+
+
+# noinspection PyTypeChecker
+def test_tracer_with_input_validation() -> None:
+    """
+    Test Tracer with invalid inputs.
+    """
+    with pytest.raises(TypeError):
+        Tracer(is_enabled=None)
+    with pytest.raises(TypeError):
+        Tracer(cycles_count="20")
+    with pytest.raises(ValueError):
+        Tracer(cycles_count=0)
+    with pytest.raises(TypeError):
+        Tracer().set_enabled(None)
+    with pytest.raises(TypeError):
+        Tracer(is_enabled=True).span(None)
+    with pytest.raises(TypeError):
+        Tracer(is_enabled=True).span("collection", cycle_index="1")
@@ -0,0 +1,44 @@
+import json
+import zlib
+
+import pytest
+
+from src.main.common.enum.ResponseEncoding import ResponseEncoding
+from src.main.server.VersionedResponse import VersionedResponse
+
+"""
+This file contains test for VersionedResponse class.
+Functional test for the following methods in VersionedResponse class:
+* get_etag()
+* get_encoded_response()
+
+Input validation test:
+* __init__()
+* get_encoded_response()
+"""
+
+
+def test_versioned_response() -> None:
+    """
+    Test that the ETag follows the content of the response, and that each encoding is computed once.
+    """
+    response = json.dumps(["app{}".format(i) for i in range(100)])
+    versioned_response = VersionedResponse(response)
+    assert versioned_response.get_etag() == VersionedResponse(response).get_etag()
+    assert versioned_response.get_etag() != VersionedResponse(json.dumps(list())).get_etag()
+    assert versioned_response.get_encoded_response() == response.encode()
+    compressed_response = versioned_response.get_encoded_response(ResponseEncoding.compressed_json)
+    assert zlib.decompress(compressed_response) == response.encode()
+    assert versioned_response.get_encoded_response(ResponseEncoding.compressed_json) is compressed_response
+    assert str(versioned_response) == response
+
+
+# noinspection PyTypeChecker
+def test_versioned_response_with_input_validation() -> None:
+    """
+    Test VersionedResponse with invalid inputs.
+    """
+    with pytest.raises(TypeError):
+        VersionedResponse(["app"])
+    with pytest.raises(TypeError):
+        VersionedResponse("[]").get_encoded_response(1)
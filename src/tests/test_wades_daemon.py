@@ -0,0 +1,255 @@
+import datetime
+import json
+import time
+from typing import Dict, List, Set, Tuple, Union
+
+import pytest
+
+import paths
+import wades_config
+from src.main.WadesDaemon import WadesDaemon
+from src.main.common.AppSummary import AppSummary
+from src.main.common.enum.RiskLevel import RiskLevel
+from src.main.psHandler.AppProfileDataManager import AppProfileDataManager
+from src.tests.test_helpers import save_running_app_profiles
+
+"""
+This file contains test for WadesDaemon class.
+Functional test for the following methods in WadesDaemon class:
+* save_snapshot() and load_snapshot()
+* load_snapshot() with snapshots of another version, too old or unreadable
+* The pipeline built by the constructor, with merged modelling requests and paused modelling
+* main_thread_run()
+"""
+
+
+class StopCollecting(BaseException):
+    """
+    Raised by StubProcessHandler to leave the endless loop of 'WadesDaemon.main_thread_run'. The stages only catch
+    exceptions derived from Exception.
+    """
+
+
+class StubProcessHandler:
+    """
+    Process handler that collects the application "app_<cycle>" in each cycle and reports it as having opened a
+    prohibited file.
+    """
+
+    def __init__(self, max_collections_count: Union[int, None] = None) -> None:
+        self.__max_collections_count = max_collections_count
+        self.__collections_count = 0
+        self.__saved_app_names = set()
+        self.__latest_app_names = set()
+
+    def collect_running_processes(self) -> Tuple[datetime.datetime, Dict[str, list]]:
+        if self.__max_collections_count is not None and self.__collections_count >= self.__max_collections_count:
+            raise StopCollecting()
+        app_name = "app_{}".format(self.__collections_count)
+        self.__collections_count += 1
+        return datetime.datetime.now(), {app_name: list()}
+
+    def save_running_processes(self, retrieval_time: datetime.datetime,
+                               app_name_to_processes_map: Dict[str, list]) -> None:
+        self.__latest_app_names = set(app_name_to_processes_map.keys())
+        self.__saved_app_names.update(app_name_to_processes_map.keys())
+
+    def get_registered_app_profile_names(self) -> Set[str]:
+        return set(self.__saved_app_names)
+
+    def get_prohibited_files_app_names(self) -> Set[str]:
+        return set(self.__latest_app_names)
+
+    def dict_format(self) -> dict:
+        return {"saved_app_names": sorted(self.__saved_app_names)}
+
+
+class StubModeller:
+    """
+    Modeller that finds the applications it must model abnormal, and records the requests it receives.
+    """
+
+    def __init__(self) -> None:
+        self.modelling_requests = list()
+
+    def model_running_applications(self, running_app_names: Union[Set[str], None] = None,
+                                   forced_app_names: Union[Set[str], None] = None,
+                                   cycle_timing: Union[dict, None] = None) -> List[AppSummary]:
+        self.modelling_requests.append({"running_app_names": running_app_names, "forced_app_names": forced_app_names,
+                                        "cycle_index": cycle_timing["cycle_index"]})
+        return [AppSummary(app_name=app_name, error_message=None, risk=RiskLevel.high, abnormal_attrs=set(),
+                           latest_retrieved_app_details=dict(), modelled_app_details=dict())
+                for app_name in sorted(forced_app_names)]
+
+    def dict_format(self) -> dict:
+        return {"modelling_requests_count": len(self.modelling_requests)}
+
+    def shutdown(self) -> None:
+        pass
+
+
+def create_wades_daemon_with_stubs(monkeypatch, max_collections_count: Union[int, None] = None) \
+        -> Tuple[WadesDaemon, StubModeller]:
+    """
+    Creates a daemon whose stages use a stub process handler and a stub modeller.
+    :param max_collections_count: The number of collections after which the process handler raises StopCollecting.
+            If None, it never does.
+    :type max_collections_count: Union[int, None]
+    :return: The daemon and its modeller.
+    :rtype: Tuple[WadesDaemon, StubModeller]
+    """
+    wades_daemon = WadesDaemon()
+    stub_modeller = StubModeller()
+    monkeypatch.setattr(wades_daemon, "_WadesDaemon__ps_handler", StubProcessHandler(max_collections_count))
+    monkeypatch.setattr(wades_daemon, "_WadesDaemon__modeller", stub_modeller)
+    return wades_daemon, stub_modeller
+
+
+def get_modelled_applications_json(wades_daemon: WadesDaemon) -> str:
+    """
+    Gets the summaries served by the modeller of a daemon.
+    :param wades_daemon: The daemon.
+    :type wades_daemon: WadesDaemon
+    :return: The summaries of the modelled applications, as a json string.
+    :rtype: str
+    """
+    return wades_daemon._WadesDaemon__modeller.get_modelled_application_as_json()
+
+
+@pytest.mark.usefixtures('setup_and_clean_up_modelling_requirements')
+def test_save_and_load_snapshot(monkeypatch) -> None:
+    """
+    Test that a restarted daemon serves the summaries of the daemon that saved the snapshot, and that the snapshot
+    doesn't hold the application profiles.
+    """
+    monkeypatch.setattr(wades_config, "use_model_cache", False)
+    monkeypatch.setattr(wades_config, "use_adaptive_modelling", False)
+    save_running_app_profiles(apps_count=4, cycles_count=6)
+    wades_daemon = WadesDaemon()
+    wades_daemon._WadesDaemon__modeller.model_running_applications()
+    wades_daemon.save_snapshot()
+
+    daemon_snapshot = AppProfileDataManager.get_daemon_snapshot()
+    assert daemon_snapshot["version"] == wades_config.daemon_snapshot_version
+    assert set(daemon_snapshot.keys()) == {"version", "saved_timestamp", "modeller", "process_handler"}
+
+    restarted_wades_daemon = WadesDaemon()
+    assert restarted_wades_daemon.load_snapshot()
+    assert len(json.loads(get_modelled_applications_json(restarted_wades_daemon))) == 4
+    assert get_modelled_applications_json(restarted_wades_daemon) == get_modelled_applications_json(wades_daemon)
+
+
+@pytest.mark.usefixtures('setup_and_clean_up_modelling_requirements')
+def test_load_snapshot_that_is_ignored(monkeypatch) -> None:
+    """
+    Test that snapshots saved with another version, older than the maximum age or unreadable are ignored, and that the
+    daemon then starts without modelled applications.
+    """
+    monkeypatch.setattr(wades_config, "use_model_cache", False)
+    monkeypatch.setattr(wades_config, "use_adaptive_modelling", False)
+    assert not WadesDaemon().load_snapshot()
+
+    save_running_app_profiles(apps_count=2, cycles_count=6)
+    wades_daemon = WadesDaemon()
+    wades_daemon._WadesDaemon__modeller.model_running_applications()
+    wades_daemon.save_snapshot()
+
+    daemon_snapshot_version = wades_config.daemon_snapshot_version
+    monkeypatch.setattr(wades_config, "daemon_snapshot_version", daemon_snapshot_version + 1)
+    assert not WadesDaemon().load_snapshot()
+    monkeypatch.setattr(wades_config, "daemon_snapshot_version", daemon_snapshot_version)
+
+    daemon_snapshot_max_age_sec = wades_config.daemon_snapshot_max_age_sec
+    monkeypatch.setattr(wades_config, "daemon_snapshot_max_age_sec", -1)
+    assert not WadesDaemon().load_snapshot()
+    monkeypatch.setattr(wades_config, "daemon_snapshot_max_age_sec", daemon_snapshot_max_age_sec)
+    assert WadesDaemon().load_snapshot()
+
+    # A snapshot that can be decoded but not restored leaves the daemon as it was created.
+    daemon_snapshot = AppProfileDataManager.get_daemon_snapshot()
+    daemon_snapshot["modeller"] = {"modelled_applications": None}
+    AppProfileDataManager.save_daemon_snapshot(daemon_snapshot)
+    restarted_wades_daemon = WadesDaemon()
+    assert not restarted_wades_daemon.load_snapshot()
+    assert json.loads(get_modelled_applications_json(restarted_wades_daemon)) == list()
+
+    daemon_snapshot_file_path = paths.TEST_APP_PROF_DATA_DIR_PATH / wades_config.daemon_snapshot_file_name
+    compressed_daemon_snapshot = daemon_snapshot_file_path.read_bytes()
+    daemon_snapshot_file_path.write_bytes(compressed_daemon_snapshot[:len(compressed_daemon_snapshot) // 2])
+    restarted_wades_daemon = WadesDaemon()
+    assert not restarted_wades_daemon.load_snapshot()
+    assert json.loads(get_modelled_applications_json(restarted_wades_daemon)) == list()
+
+
+def test_pipeline(monkeypatch) -> None:
+    """
+    Test that each stage hands its result to the next one, that modelling requests merged in the modelling queue keep
+    the applications that must be modelled, and that a paused modeller publishes nothing.
+    """
+    monkeypatch.setattr(wades_config, "pipeline_modelling_queue_size", 1)
+    monkeypatch.setattr(wades_config, "pipeline_modelling_overflow_policy", "drop_oldest")
+    wades_daemon, stub_modeller = create_wades_daemon_with_stubs(monkeypatch)
+    collection_stage, ingestion_stage, modelling_stage, publishing_stage = wades_daemon._WadesDaemon__pipeline_stages
+    assert [pipeline_stage.get_name() for pipeline_stage in wades_daemon._WadesDaemon__pipeline_stages] == \
+        ["collection", "ingestion", "modelling", "publishing"]
+
+    for cycle_index in range(2):
+        collection_stage.put({"cycle_index": cycle_index})
+        assert collection_stage.process_next_item(timeout_sec=0)
+        assert ingestion_stage.process_next_item(timeout_sec=0)
+    # The request of the first cycle was merged into the one of the second cycle.
+    assert modelling_stage.get_queue_depth() == 1
+    assert modelling_stage.get_metrics()["merged_items_count"] == 1
+    assert modelling_stage.process_next_item(timeout_sec=0)
+    assert stub_modeller.modelling_requests == [
+        {"running_app_names": {"app_0", "app_1"}, "forced_app_names": {"app_0", "app_1"}, "cycle_index": 1}]
+
+    assert publishing_stage.process_next_item(timeout_sec=0)
+    published_state = wades_daemon._WadesDaemon__published_state
+    assert published_state["cycle_index"] == 1
+    assert published_state["modeller"] == {"modelling_requests_count": 1}
+    assert published_state["process_handler"] == {"saved_app_names": ["app_0", "app_1"]}
+    assert [app_summary.get_app_name() for app_summary in published_state["abnormal_applications"]] == \
+        ["app_0", "app_1"]
+
+    wades_daemon._WadesDaemon__set_modelling_paused(True)
+    collection_stage.put({"cycle_index": 2})
+    assert collection_stage.process_next_item(timeout_sec=0)
+    assert ingestion_stage.process_next_item(timeout_sec=0)
+    assert modelling_stage.process_next_item(timeout_sec=0)
+    assert len(stub_modeller.modelling_requests) == 1
+    assert publishing_stage.get_queue_depth() == 0
+    assert wades_daemon._WadesDaemon__published_state is published_state
+    assert all(pipeline_stage_metrics["failed_items_count"] == 0
+               for pipeline_stage_metrics in wades_daemon.get_pipeline_metrics())
+
+
+def test_main_thread_run(monkeypatch) -> None:
+    """
+    Test that the collections run at the deadlines of the collection scheduler, and that the other stages process
+    them in their own threads until the cycle is published.
+    """
+    monkeypatch.setattr(wades_config, "retrieval_periodicity_sec", 0.05)
+    monkeypatch.setattr(wades_config, "max_retrieval_periodicity_sec", 0.05)
+    monkeypatch.setattr(wades_config, "collection_max_phase_offset_sec", 0)
+    monkeypatch.setattr(wades_config, "collection_max_jitter_sec", 0)
+    monkeypatch.setattr(wades_config, "pipeline_ingestion_overflow_policy", "block")
+    monkeypatch.setattr(wades_config, "pipeline_modelling_overflow_policy", "block")
+    wades_daemon, stub_modeller = create_wades_daemon_with_stubs(monkeypatch, max_collections_count=3)
+    try:
+        with pytest.raises(StopCollecting):
+            wades_daemon.main_thread_run()
+        deadline = time.monotonic() + 10
+        while (wades_daemon._WadesDaemon__published_state is None or
+               wades_daemon._WadesDaemon__published_state["cycle_index"] != 2) and time.monotonic() < deadline:
+            time.sleep(0.01)
+    finally:
+        for pipeline_stage in wades_daemon._WadesDaemon__pipeline_stages[1:]:
+            pipeline_stage.stop(timeout_sec=1)
+
+    assert wades_daemon._WadesDaemon__published_state["cycle_index"] == 2
+    assert [modelling_request["cycle_index"] for modelling_request in stub_modeller.modelling_requests] == [0, 1, 2]
+    assert [modelling_request["forced_app_names"] for modelling_request in stub_modeller.modelling_requests] == \
+        [{"app_0"}, {"app_1"}, {"app_2"}]
+    # The fourth cycle is the one that stopped the loop.
+    assert wades_daemon.get_collection_metrics()["cycles_count"] == 4
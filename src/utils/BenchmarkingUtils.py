@@ -1,10 +1,14 @@
+import functools
 import time
-from typing import Callable
+from typing import Callable, ContextManager, Union
 
+from src.utils.Tracer import Tracer
 from src.utils.error_messages import expected_type_but_received_message
 
 
 class BenchmarkingUtils:
+    # Tracer of the spans opened with 'span()' and 'traced()'.
+    __tracer = Tracer()
 
     @staticmethod
     def get_method_execution_time_seconds(method_to_execute: Callable) -> float:
@@ -21,9 +25,9 @@ class BenchmarkingUtils:
             actual_method_to_execute_name = getattr(method_to_execute, '__name__', 'Unknown')
             raise TypeError(expected_type_but_received_message.format(actual_method_to_execute_name, 'Callable',
                                                                       type(method_to_execute)))
-        start_time = time.time()
+        start_time_ns = time.perf_counter_ns()
         method_to_execute()
-        return time.time() - start_time
+        return (time.perf_counter_ns() - start_time_ns) / 1e9
 
     @staticmethod
     def print_method_execution_time_seconds(method_to_execute: Callable) -> None:
@@ -39,3 +43,67 @@ class BenchmarkingUtils:
                                                                       type(method_to_execute)))
         execution_time = BenchmarkingUtils.get_method_execution_time_seconds(method_to_execute=method_to_execute)
         print(f"It took {execution_time} seconds to execute {method_to_execute_name}")
+
+    @staticmethod
+    def get_tracer() -> Tracer:
+        """
+        Gets the tracer of the spans of the process. It is enabled if wades_config.use_tracing is True.
+        :return: The tracer.
+        :rtype: Tracer
+        """
+        return BenchmarkingUtils.__tracer
+
+    @staticmethod
+    def set_tracer(tracer: Tracer) -> None:
+        """
+        Replaces the tracer of the spans of the process. The spans that are open keep their tracer.
+        :raises TypeError if tracer is not of type 'Tracer'.
+        :param tracer: The new tracer.
+        :type tracer: Tracer
+        """
+        if not isinstance(tracer, Tracer):
+            raise TypeError(expected_type_but_received_message.format("tracer", "Tracer", tracer))
+        BenchmarkingUtils.__tracer = tracer
+
+    @staticmethod
+    def span(name: str, cycle_index: Union[int, None] = None) -> ContextManager:
+        """
+        Creates a span of the tracer of the process, to time the code of a 'with' statement. For more info:
+        'src.utils.Tracer.Tracer.span'.
+        :param name: The name of the span.
+        :type name: str
+        :param cycle_index: The index of the collection cycle the span belongs to. If None, the cycle of the span it
+                is nested in, if any.
+        :type cycle_index: Union[int, None]
+        :return: The span, or a context manager that does nothing if the tracer is disabled.
+        :rtype: ContextManager
+        """
+        return BenchmarkingUtils.__tracer.span(name, cycle_index)
+
+    @staticmethod
+    def traced(name: Union[str, None] = None) -> Callable[[Callable], Callable]:
+        """
+        Decorates a function so that each call is timed by a span of the tracer of the process. When the tracer is
+        disabled, the function is called directly.
+        :raises TypeError if name is not of type 'Union[str, None]'.
+        :param name: The name of the span. If None, the qualified name of the function, e.g.
+                "ProcessHandler.collect_running_processes".
+        :type name: Union[str, None]
+        :return: The decorator.
+        :rtype: Callable[[Callable], Callable]
+        """
+        if name is not None and not isinstance(name, str):
+            raise TypeError(expected_type_but_received_message.format("name", "Union[str, None]", name))
+
+        def decorator(function: Callable) -> Callable:
+            span_name = name if name is not None else function.__qualname__
+
+            @functools.wraps(function)
+            def traced_function(*args, **kwargs):
+                tracer = BenchmarkingUtils.__tracer
+                if not tracer.is_enabled():
+                    return function(*args, **kwargs)
+                with tracer.span(span_name):
+                    return function(*args, **kwargs)
+            return traced_function
+        return decorator
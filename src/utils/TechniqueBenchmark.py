@@ -0,0 +1,334 @@
+import datetime
+import shlex
+import time
+import tracemalloc
+from typing import List, Dict, Union, Tuple
+
+import numpy
+
+import wades_config
+from src.main.common.AppProfile import AppProfile
+from src.main.common.enum.AppProfileAttribute import AppProfileAttribute
+from src.main.modeller.TechniqueRegistry import TechniqueRegistry
+from src.utils.error_messages import expected_type_but_received_message, expected_value_but_received_message
+
+
+class TechniqueBenchmark:
+    # Latency percentiles reported for each technique.
+    latency_percentiles = [50, 95, 99]
+    # Options of the benchmark command, and the size of the generated workload when they are not given.
+    apps_option = "--apps"
+    retrievals_option = "--retrievals"
+    anomalous_apps_option = "--anomalous-apps"
+    technique_option = "--technique"
+    default_apps_count = 20
+    default_retrievals_count = 60
+    default_anomalous_apps_count = 5
+
+    def __init__(self, app_profiles: List[AppProfile], anomaly_onsets: Dict[str, Union[str, None]],
+                 warm_up_samples_count: Union[int, None] = None) -> None:
+        """
+        Replays labelled application profiles through detection techniques to measure their cost and accuracy.
+        Each profile is replayed one retrieval at a time: at every step, the technique models the profile with the
+        samples retrieved up to that step, the last retrieval being the latest retrieved data.
+        :raises TypeError if app_profiles is not of type 'List[AppProfile]',
+                or if anomaly_onsets is not of type 'Dict[str, Union[str, None]]',
+                or if warm_up_samples_count is not of type 'Union[int, None]'.
+        :param app_profiles: The application profiles to replay.
+        :type app_profiles: List[AppProfile]
+        :param anomaly_onsets: The retrieval timestamp from which each application is anomalous, mapped by application
+                name. The applications that are not anomalous map to None or are missing. The timestamps have
+                'YYYY-MM-DD HH:MM:SS:microseconds' format.
+        :type anomaly_onsets: Dict[str, Union[str, None]]
+        :param warm_up_samples_count: The number of samples of each profile that are not replayed, so that the first
+                step has enough data to model. If None, wades_config.minimum_retrieval_size_for_modelling.
+        :type warm_up_samples_count: Union[int, None]
+        """
+        if not isinstance(app_profiles, list) or not all(isinstance(app_profile, AppProfile)
+                                                         for app_profile in app_profiles):
+            raise TypeError(expected_type_but_received_message.format("app_profiles", "List[AppProfile]",
+                                                                      app_profiles))
+        if not isinstance(anomaly_onsets, dict):
+            raise TypeError(expected_type_but_received_message.format("anomaly_onsets", "Dict[str, Union[str, None]]",
+                                                                      anomaly_onsets))
+        if warm_up_samples_count is not None and not isinstance(warm_up_samples_count, int):
+            raise TypeError(expected_type_but_received_message.format("warm_up_samples_count", "Union[int, None]",
+                                                                      warm_up_samples_count))
+        if warm_up_samples_count is None:
+            warm_up_samples_count = wades_config.minimum_retrieval_size_for_modelling
+
+        self.__anomaly_onsets = dict(anomaly_onsets)
+        self.__replay_steps = list()
+        for app_profile in app_profiles:
+            self.__replay_steps.extend(TechniqueBenchmark.__get_replay_steps(app_profile.dict_format(),
+                                                                             warm_up_samples_count))
+
+    @staticmethod
+    def __get_replay_steps(app_profile_dict: dict, warm_up_samples_count: int) -> List[Tuple[dict, str, int]]:
+        """
+        Splits an application profile into replay steps, one per retrieval after the warm up samples.
+        :param app_profile_dict: The application profile as a dictionary. For more info about the format:
+                'src.main.common.AppProfile.AppProfile.dict_format'
+        :type app_profile_dict: dict
+        :param warm_up_samples_count: The number of samples that are not replayed.
+        :type warm_up_samples_count: int
+        :return: The profile with the samples retrieved up to each step, the retrieval timestamp of the step and the
+                number of samples retrieved in the step.
+        :rtype: List[Tuple[dict, str, int]]
+        """
+        retrieval_timestamps = app_profile_dict[AppProfileAttribute.data_retrieval_timestamps.name]
+        replay_steps = list()
+        retrieval_start_index = 0
+        while retrieval_start_index < len(retrieval_timestamps):
+            retrieval_timestamp = retrieval_timestamps[retrieval_start_index]
+            retrieval_end_index = retrieval_start_index
+            while retrieval_end_index < len(retrieval_timestamps) and \
+                    retrieval_timestamps[retrieval_end_index] == retrieval_timestamp:
+                retrieval_end_index += 1
+            if retrieval_start_index >= warm_up_samples_count:
+                step_app_profile_dict = {attribute_name: values[:retrieval_end_index] if isinstance(values, list)
+                                         else values for attribute_name, values in app_profile_dict.items()}
+                replay_steps.append((step_app_profile_dict, retrieval_timestamp,
+                                     retrieval_end_index - retrieval_start_index))
+            retrieval_start_index = retrieval_end_index
+        return replay_steps
+
+    @staticmethod
+    def __build_app_profile(app_profile_dict: dict) -> AppProfile:
+        """
+        Builds an application profile from a dictionary.
+        :param app_profile_dict: The application profile as a dictionary.
+        :type app_profile_dict: dict
+        :return: The application profile.
+        :rtype: AppProfile
+        """
+        app_profile = AppProfile(app_profile_dict[AppProfileAttribute.app_name.name])
+        app_profile.set_value_from_dict(app_profile_dict)
+        return app_profile
+
+    def get_replay_steps_count(self) -> int:
+        """
+        Gets the number of replay steps of all the application profiles.
+        :return: The number of replay steps.
+        :rtype: int
+        """
+        return len(self.__replay_steps)
+
+    def run(self, technique_names: Union[List[str], None] = None) -> Dict[str, dict]:
+        """
+        Replays the application profiles through each technique and measures it.
+        The latencies are measured first; the peak memory is measured in a second replay, since tracing the memory
+        allocations slows the technique down.
+        :raises TypeError if technique_names is not of type 'Union[List[str], None]'.
+        :param technique_names: The names of the techniques to measure. If None, all the registered techniques.
+        :type technique_names: Union[List[str], None]
+        :return: The measures of each technique mapped by technique name.
+            Format:
+                {
+                    "frequency": {
+                        samples_per_second: 5230.4,
+                        latency_percentiles_seconds: {50: 0.0012, 95: 0.0031, 99: 0.0045},
+                        peak_memory_bytes: 1834021,
+                        precision: 0.92,
+                        recall: 0.85,
+                        detected_apps_count: 4,
+                        anomalous_apps_count: 5,
+                        mean_time_to_detect_seconds: 93.2
+                    },
+                    ...
+                }
+            Precision and recall are computed over the replay steps: a step is anomalous if its retrieval timestamp is
+            not older than the anomaly onset of its application. They are None when they are undefined. The time to
+            detect is the time between the onset and the first anomalous step found, averaged over the detected
+            applications; None if no application is detected.
+        :rtype: Dict[str, dict]
+        """
+        if technique_names is None:
+            technique_names = TechniqueRegistry.get_technique_names()
+        if not isinstance(technique_names, list):
+            raise TypeError(expected_type_but_received_message.format("technique_names", "Union[List[str], None]",
+                                                                      technique_names))
+
+        return {technique_name: self.__measure_technique(technique_name) for technique_name in technique_names}
+
+    def __measure_technique(self, technique_name: str) -> dict:
+        """
+        Replays the application profiles through a technique and measures it.
+        :param technique_name: The name of the technique.
+        :type technique_name: str
+        :return: The measures of the technique. For more info about the format: 'run()'.
+        :rtype: dict
+        """
+        technique = TechniqueRegistry.create_technique(technique_name)
+        latencies = list()
+        flagged_steps = list()
+        for app_profile_dict, _, _ in self.__replay_steps:
+            app_profile = TechniqueBenchmark.__build_app_profile(app_profile_dict)
+            start_time = time.perf_counter()
+            app_summaries = technique([app_profile])
+            latencies.append(time.perf_counter() - start_time)
+            flagged_steps.append(app_summaries[0].get_error_message() is not None)
+
+        technique = TechniqueRegistry.create_technique(technique_name)
+        tracemalloc.start()
+        for app_profile_dict, _, _ in self.__replay_steps:
+            technique([TechniqueBenchmark.__build_app_profile(app_profile_dict)])
+        _, peak_memory_bytes = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        measures = {
+            "samples_per_second": None,
+            "latency_percentiles_seconds": {percentile: None for percentile in TechniqueBenchmark.latency_percentiles},
+            "peak_memory_bytes": peak_memory_bytes
+        }
+        total_latency = sum(latencies)
+        samples_count = sum(step_samples_count for _, _, step_samples_count in self.__replay_steps)
+        if total_latency > 0:
+            measures["samples_per_second"] = samples_count / total_latency
+        if len(latencies) > 0:
+            measures["latency_percentiles_seconds"] = dict(zip(
+                TechniqueBenchmark.latency_percentiles,
+                numpy.percentile(latencies, TechniqueBenchmark.latency_percentiles).tolist()))
+        measures.update(self.__get_accuracy_measures(flagged_steps))
+        return measures
+
+    def __get_accuracy_measures(self, flagged_steps: List[bool]) -> dict:
+        """
+        Gets the precision, recall and time to detect of a technique.
+        :param flagged_steps: Flags for the replay steps that the technique found anomalous.
+        :type flagged_steps: List[bool]
+        :return: The accuracy measures. For more info about the format: 'run()'.
+        :rtype: dict
+        """
+        true_positives_count = false_positives_count = false_negatives_count = 0
+        first_detection_timestamps = dict()
+        for (app_profile_dict, retrieval_timestamp, _), is_flagged in zip(self.__replay_steps, flagged_steps):
+            app_name = app_profile_dict[AppProfileAttribute.app_name.name]
+            anomaly_onset = self.__anomaly_onsets.get(app_name)
+            # The timestamp format sorts like the timestamps themselves.
+            is_anomalous = anomaly_onset is not None and retrieval_timestamp >= anomaly_onset
+            true_positives_count += is_flagged and is_anomalous
+            false_positives_count += is_flagged and not is_anomalous
+            false_negatives_count += not is_flagged and is_anomalous
+            if is_flagged and is_anomalous and app_name not in first_detection_timestamps:
+                first_detection_timestamps[app_name] = retrieval_timestamp
+
+        flagged_count = true_positives_count + false_positives_count
+        anomalous_count = true_positives_count + false_negatives_count
+        times_to_detect = [(datetime.datetime.strptime(detection_timestamp, wades_config.datetime_format) -
+                            datetime.datetime.strptime(self.__anomaly_onsets[app_name], wades_config.datetime_format)
+                            ).total_seconds() for app_name, detection_timestamp in first_detection_timestamps.items()]
+        return {
+            "precision": true_positives_count / flagged_count if flagged_count > 0 else None,
+            "recall": true_positives_count / anomalous_count if anomalous_count > 0 else None,
+            "detected_apps_count": len(first_detection_timestamps),
+            "anomalous_apps_count": sum(anomaly_onset is not None for anomaly_onset in self.__anomaly_onsets.values()),
+            "mean_time_to_detect_seconds": float(numpy.mean(times_to_detect)) if len(times_to_detect) > 0 else None
+        }
+
+    @staticmethod
+    def generate_workload(apps_count: int, retrievals_count: int, anomalous_apps_count: int,
+                          seed: int = 0) -> Tuple[List[AppProfile], Dict[str, Union[str, None]]]:
+        """
+        Generates labelled application profiles, retrieved once per minute with a few processes per retrieval.
+        The anomalous applications have a memory usage spike in every retrieval after the last quarter of the
+        retrievals starts.
+        :param apps_count: The number of applications.
+        :type apps_count: int
+        :param retrievals_count: The number of retrievals of each application.
+        :type retrievals_count: int
+        :param anomalous_apps_count: The number of anomalous applications, taken from the first applications.
+        :type anomalous_apps_count: int
+        :param seed: The seed of the random generator.
+        :type seed: int
+        :return: The application profiles and the anomaly onset of each application.
+                For more info about the format: '__init__'.
+        :rtype: Tuple[List[AppProfile], Dict[str, Union[str, None]]]
+        """
+        random_generator = numpy.random.default_rng(seed=seed)
+        first_timestamp = datetime.datetime.now() - datetime.timedelta(minutes=retrievals_count)
+        onset_retrieval = retrievals_count - max(retrievals_count // 4, 1)
+        app_profiles = list()
+        anomaly_onsets = dict()
+        for app_index in range(apps_count):
+            app_name = "generated_app_{}".format(app_index)
+            processes_counts = random_generator.integers(1, 4, retrievals_count)
+            samples_count = int(processes_counts.sum())
+            retrieval_timestamps = [(first_timestamp + datetime.timedelta(minutes=retrieval)).strftime(
+                wades_config.datetime_format) for retrieval in range(retrievals_count)]
+            memory_usages = random_generator.normal(50000, 1000, samples_count).astype(int)
+            is_anomalous = app_index < anomalous_apps_count
+            if is_anomalous:
+                onset_sample_index = int(processes_counts[:onset_retrieval].sum())
+                memory_usages[onset_sample_index:] *= 10
+            anomaly_onsets[app_name] = retrieval_timestamps[onset_retrieval] if is_anomalous else None
+
+            app_profile = AppProfile(app_name)
+            app_profile.set_value_from_dict({
+                AppProfileAttribute.app_name.name: app_name,
+                AppProfileAttribute.date_created_timestamp.name: first_timestamp.strftime(
+                    wades_config.datetime_format),
+                AppProfileAttribute.usernames.name: ["user"] * samples_count,
+                AppProfileAttribute.memory_infos.name: memory_usages.tolist(),
+                AppProfileAttribute.opened_files.name: [["/tmp/{}.log".format(app_name)]] * samples_count,
+                AppProfileAttribute.cpu_percents.name: random_generator.gamma(2, 1, samples_count).tolist(),
+                AppProfileAttribute.children_counts.name: [0] * samples_count,
+                AppProfileAttribute.data_retrieval_timestamps.name: numpy.repeat(retrieval_timestamps,
+                                                                                 processes_counts).tolist(),
+                AppProfileAttribute.threads_numbers.name: random_generator.integers(2, 6, samples_count).tolist(),
+                AppProfileAttribute.connections_numbers.name: [0] * samples_count
+            })
+            app_profiles.append(app_profile)
+        return app_profiles, anomaly_onsets
+
+    @staticmethod
+    def parse_arguments(arguments: str) -> Tuple[int, int, int, Union[List[str], None]]:
+        """
+        Parses the options of the benchmark command. All the options are optional, and
+        TechniqueBenchmark.technique_option can be repeated.
+        :raises TypeError if arguments is not of type 'str'.
+        :raises ValueError if an option is unknown, misses its value, or if a count is not a non-negative integer.
+        :param arguments: The options of the command.
+        :type arguments: str
+        :return: The number of applications, of retrievals and of anomalous applications of the generated workload,
+                and the names of the techniques to measure, None for all the registered techniques.
+        :rtype: Tuple[int, int, int, Union[List[str], None]]
+        """
+        if not isinstance(arguments, str):
+            raise TypeError(expected_type_but_received_message.format("arguments", "str", arguments))
+
+        tokens = shlex.split(arguments)
+        if len(tokens) % 2 != 0:
+            raise ValueError(expected_value_but_received_message.format("arguments", "options with values",
+                                                                        arguments))
+        counts = {
+            TechniqueBenchmark.apps_option: TechniqueBenchmark.default_apps_count,
+            TechniqueBenchmark.retrievals_option: TechniqueBenchmark.default_retrievals_count,
+            TechniqueBenchmark.anomalous_apps_option: TechniqueBenchmark.default_anomalous_apps_count
+        }
+        technique_names = None
+        for option, value in zip(tokens[::2], tokens[1::2]):
+            if option in counts:
+                if not value.isdigit():
+                    raise ValueError(expected_value_but_received_message.format(option, "a non-negative integer",
+                                                                                value))
+                counts[option] = int(value)
+            elif option == TechniqueBenchmark.technique_option:
+                technique_names = (technique_names or list()) + [value]
+            else:
+                raise ValueError(expected_value_but_received_message.format(
+                    "option", ", ".join(list(counts.keys()) + [TechniqueBenchmark.technique_option]), option))
+        return counts[TechniqueBenchmark.apps_option], counts[TechniqueBenchmark.retrievals_option], \
+            counts[TechniqueBenchmark.anomalous_apps_option], technique_names
+
+    @staticmethod
+    def print_report(report: Dict[str, dict]) -> None:
+        """
+        Prints the measures of the techniques.
+        :param report: The measures of each technique. For more info about the format: 'run()'.
+        :type report: Dict[str, dict]
+        """
+        for technique_name, measures in report.items():
+            print(f"Technique: {technique_name}")
+            for measure_name, measure in measures.items():
+                print(f"    {measure_name}: {measure}")
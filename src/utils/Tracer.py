@@ -0,0 +1,208 @@
+import contextlib
+import threading
+from collections import OrderedDict
+from typing import ContextManager, Dict, List, Union
+
+import wades_config
+from src.main.common.QuantileSketch import QuantileSketch
+from src.utils.TracingSpan import TracingSpan
+from src.utils.error_messages import expected_type_but_received_message, expected_value_but_received_message
+
+
+class Tracer:
+    # Returned by 'span()' while the tracer is disabled, so that disabled spans cost a call and nothing else.
+    __disabled_span = contextlib.nullcontext()
+    __nanoseconds_per_millisecond = 1000000
+
+    def __init__(self, is_enabled: bool = wades_config.use_tracing,
+                 cycles_count: int = wades_config.tracing_cycles_count) -> None:
+        """
+        Times the hot path with nested spans. The durations are measured with time.perf_counter_ns and aggregated in
+        two ways:
+        * Per span name: count, total, p50, p95 and max. The percentiles come from a QuantileSketch, so they are exact
+            until the span has been closed 200 times, and approximate with bounded memory after that.
+        * Per collection cycle: count and total of each span path, for the latest cycles_count cycles, so a slow cycle
+            can be broken down into the steps it spent its time on.
+        Spans can be opened from any thread; each thread nests its own spans. While the tracer is disabled, spans are
+        no-ops.
+        :raises TypeError if is_enabled is not of type 'bool', or if cycles_count is not of type 'int'.
+        :raises ValueError if cycles_count is smaller than 1.
+        :param is_enabled: True to time the spans, False to make them no-ops.
+        :type is_enabled: bool
+        :param cycles_count: The number of cycles whose breakdown is kept.
+        :type cycles_count: int
+        """
+        if not isinstance(is_enabled, bool):
+            raise TypeError(expected_type_but_received_message.format("is_enabled", "bool", is_enabled))
+        if not isinstance(cycles_count, int):
+            raise TypeError(expected_type_but_received_message.format("cycles_count", "int", cycles_count))
+        if cycles_count < 1:
+            raise ValueError(expected_value_but_received_message.format("cycles_count", "larger than 0",
+                                                                        cycles_count))
+
+        self.__is_enabled = is_enabled
+        self.__cycles_count = cycles_count
+        self.__thread_state = threading.local()
+        # Guards the aggregated durations, since spans are closed by several threads.
+        self.__lock = threading.Lock()
+        self.__span_stats: Dict[str, dict] = dict()
+        self.__cycle_breakdowns: OrderedDict = OrderedDict()
+
+    def is_enabled(self) -> bool:
+        """
+        Checks if the spans are timed.
+        :return: True if the spans are timed, False if they are no-ops.
+        :rtype: bool
+        """
+        return self.__is_enabled
+
+    def set_enabled(self, is_enabled: bool) -> None:
+        """
+        Enables or disables the tracer. The spans that are open when it is disabled are still added.
+        :raises TypeError if is_enabled is not of type 'bool'.
+        :param is_enabled: True to time the spans, False to make them no-ops.
+        :type is_enabled: bool
+        """
+        if not isinstance(is_enabled, bool):
+            raise TypeError(expected_type_but_received_message.format("is_enabled", "bool", is_enabled))
+        self.__is_enabled = is_enabled
+
+    def span(self, name: str, cycle_index: Union[int, None] = None) -> ContextManager:
+        """
+        Creates a span, to be opened with a 'with' statement around the code to time.
+        :raises TypeError if name is not of type 'str', or if cycle_index is not of type 'Union[int, None]'.
+        :param name: The name of the span, e.g. "ProcessHandler.collect_running_processes".
+        :type name: str
+        :param cycle_index: The index of the collection cycle the span belongs to. If None, the cycle of the span it
+                is nested in, if any.
+        :type cycle_index: Union[int, None]
+        :return: The span, or a context manager that does nothing if the tracer is disabled. For more info:
+                'src.utils.TracingSpan.TracingSpan'.
+        :rtype: ContextManager
+        """
+        if not self.__is_enabled:
+            return Tracer.__disabled_span
+        if not isinstance(name, str):
+            raise TypeError(expected_type_but_received_message.format("name", "str", name))
+        if cycle_index is not None and not isinstance(cycle_index, int):
+            raise TypeError(expected_type_but_received_message.format("cycle_index", "Union[int, None]", cycle_index))
+        return TracingSpan(self, name, cycle_index)
+
+    def get_current_span(self) -> Union[TracingSpan, None]:
+        """
+        Gets the innermost open span of the calling thread.
+        :return: The open span, None if the thread has no open span.
+        :rtype: Union[TracingSpan, None]
+        """
+        return getattr(self.__thread_state, "current_span", None)
+
+    def set_current_span(self, tracing_span: Union[TracingSpan, None]) -> None:
+        """
+        Sets the innermost open span of the calling thread. It is called by the spans when they are opened and closed.
+        :param tracing_span: The open span, or None once the outermost span is closed.
+        :type tracing_span: Union[TracingSpan, None]
+        """
+        self.__thread_state.current_span = tracing_span
+
+    def add_span(self, tracing_span: TracingSpan) -> None:
+        """
+        Adds the duration of a closed span to the statistics of its name and to the breakdown of its cycle. When a
+        new cycle is added, the breakdown of the oldest cycle is dropped if there are more than cycles_count.
+        :param tracing_span: The closed span.
+        :type tracing_span: TracingSpan
+        """
+        duration_ns = tracing_span.get_duration_ns()
+        cycle_index = tracing_span.get_cycle_index()
+        with self.__lock:
+            span_stats = self.__span_stats.get(tracing_span.get_name())
+            if span_stats is None:
+                span_stats = {"count": 0, "total_ns": 0, "max_ns": 0, "sketch": QuantileSketch()}
+                self.__span_stats[tracing_span.get_name()] = span_stats
+            span_stats["count"] += 1
+            span_stats["total_ns"] += duration_ns
+            span_stats["max_ns"] = max(span_stats["max_ns"], duration_ns)
+            span_stats["sketch"].add_values([duration_ns])
+
+            if cycle_index is None:
+                return
+            cycle_breakdown = self.__cycle_breakdowns.get(cycle_index)
+            if cycle_breakdown is None:
+                cycle_breakdown = {"total_ns": 0, "paths": dict()}
+                self.__cycle_breakdowns[cycle_index] = cycle_breakdown
+                while len(self.__cycle_breakdowns) > self.__cycles_count:
+                    self.__cycle_breakdowns.popitem(last=False)
+            if tracing_span.get_parent_span() is None:
+                cycle_breakdown["total_ns"] += duration_ns
+            path_stats = cycle_breakdown["paths"].setdefault(tracing_span.get_path(), [0, 0])
+            path_stats[0] += 1
+            path_stats[1] += duration_ns
+
+    def get_stats(self) -> dict:
+        """
+        Gets the statistics of the durations of each span name.
+        Format:
+            {
+                ProcessHandler.collect_running_processes: {
+                    count: 120,
+                    total_ms: 30402.1,
+                    p50_ms: 250.3,
+                    p95_ms: 301.2,
+                    max_ms: 412.9
+                },
+                ...
+            }
+        :return: The statistics of each span name, sorted by name.
+        :rtype: dict
+        """
+        stats = dict()
+        with self.__lock:
+            for name, span_stats in sorted(self.__span_stats.items()):
+                p50_ns, p95_ns = span_stats["sketch"].get_quantiles([0.5, 0.95])
+                stats[name] = {
+                    "count": span_stats["count"],
+                    "total_ms": span_stats["total_ns"] / Tracer.__nanoseconds_per_millisecond,
+                    "p50_ms": p50_ns / Tracer.__nanoseconds_per_millisecond,
+                    "p95_ms": p95_ns / Tracer.__nanoseconds_per_millisecond,
+                    "max_ms": span_stats["max_ns"] / Tracer.__nanoseconds_per_millisecond
+                }
+        return stats
+
+    def get_cycle_breakdowns(self) -> List[dict]:
+        """
+        Gets the time spent in each span path of the latest cycles.
+        Format:
+            [
+                {
+                    cycle_index: 42,
+                    total_ms: 812.4,
+                    spans: {
+                        collection: {count: 1, total_ms: 260.1},
+                        collection/ProcessHandler.collect_running_processes: {count: 1, total_ms: 259.8},
+                        ...
+                    }
+                },
+                ...
+            ]
+        total_ms is the time spent in the outermost spans of the cycle, such as the stages of the daemon. The spans
+        are sorted by path, so nested spans follow the span they are nested in.
+        :return: The breakdown of each cycle, from the oldest to the newest.
+        :rtype: List[dict]
+        """
+        cycle_breakdowns = list()
+        with self.__lock:
+            for cycle_index, cycle_breakdown in self.__cycle_breakdowns.items():
+                cycle_breakdowns.append({
+                    "cycle_index": cycle_index,
+                    "total_ms": cycle_breakdown["total_ns"] / Tracer.__nanoseconds_per_millisecond,
+                    "spans": {path: {"count": count, "total_ms": total_ns / Tracer.__nanoseconds_per_millisecond}
+                              for path, (count, total_ns) in sorted(cycle_breakdown["paths"].items())}
+                })
+        return cycle_breakdowns
+
+    def reset(self) -> None:
+        """
+        Forgets the durations of every span closed so far.
+        """
+        with self.__lock:
+            self.__span_stats = dict()
+            self.__cycle_breakdowns = OrderedDict()
@@ -0,0 +1,92 @@
+import time
+from typing import TYPE_CHECKING, Union
+
+if TYPE_CHECKING:
+    from src.utils.Tracer import Tracer
+
+
+class TracingSpan:
+
+    def __init__(self, tracer: 'Tracer', name: str, cycle_index: Union[int, None] = None) -> None:
+        """
+        Times a block of code, as a context manager. A span opened while another span is open in the same thread is
+        nested in it: its path is the path of the parent followed by its name, e.g. "modelling/Modeller.model", and it
+        belongs to the cycle of its parent unless it has its own. Once closed, its duration is added to the tracer.
+        Spans are created by 'src.utils.Tracer.Tracer.span'.
+        :param tracer: The tracer the span is added to.
+        :type tracer: Tracer
+        :param name: The name of the span.
+        :type name: str
+        :param cycle_index: The index of the collection cycle the span belongs to. If None, the cycle of its parent.
+        :type cycle_index: Union[int, None]
+        """
+        self.__tracer = tracer
+        self.__name = name
+        self.__path = name
+        self.__cycle_index = cycle_index
+        self.__parent_span = None
+        self.__start_time_ns = None
+        self.__duration_ns = None
+
+    def get_name(self) -> str:
+        """
+        Gets the name of the span.
+        :return: The name of the span.
+        :rtype: str
+        """
+        return self.__name
+
+    def get_path(self) -> str:
+        """
+        Gets the names of the open spans the span is nested in, and its own name, separated by '/'.
+        :return: The path of the span.
+        :rtype: str
+        """
+        return self.__path
+
+    def get_parent_span(self) -> Union['TracingSpan', None]:
+        """
+        Gets the span this span is nested in.
+        :return: The parent span, None if the span is not nested or hasn't been opened.
+        :rtype: Union[TracingSpan, None]
+        """
+        return self.__parent_span
+
+    def get_cycle_index(self) -> Union[int, None]:
+        """
+        Gets the index of the collection cycle the span belongs to.
+        :return: The index of the cycle, None if neither the span nor its parents belong to one.
+        :rtype: Union[int, None]
+        """
+        return self.__cycle_index
+
+    def get_duration_ns(self) -> Union[int, None]:
+        """
+        Gets the duration of the span.
+        :return: The duration of the span in nanoseconds, None until it is closed.
+        :rtype: Union[int, None]
+        """
+        return self.__duration_ns
+
+    def __enter__(self) -> 'TracingSpan':
+        """
+        Opens the span, nested in the open span of the thread if there is one, and starts timing it.
+        :return: The span.
+        :rtype: TracingSpan
+        """
+        self.__parent_span = self.__tracer.get_current_span()
+        if self.__parent_span is not None:
+            self.__path = self.__parent_span.get_path() + "/" + self.__name
+            if self.__cycle_index is None:
+                self.__cycle_index = self.__parent_span.get_cycle_index()
+        self.__tracer.set_current_span(self)
+        self.__start_time_ns = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        """
+        Closes the span, also when the timed code raised an error, and adds its duration to the tracer.
+        """
+        self.__duration_ns = time.perf_counter_ns() - self.__start_time_ns
+        self.__tracer.set_current_span(self.__parent_span)
+        self.__tracer.add_span(self)
@@ -1,41 +1,125 @@
-import json
+import pathlib
+import shlex
 import sys
-import socket
 from pprint import pprint
-from typing import Any
+from typing import Any, Union
 
+import paths
 import wades_config
 from src.main.WadesDaemon import WadesDaemon
+from src.main.common.AbnormalAppsQuery import AbnormalAppsQuery
+from src.main.common.enum.ResponseEncoding import ResponseEncoding
+from src.main.server.ControlClient import ControlClient
+from src.utils.TechniqueBenchmark import TechniqueBenchmark
 from src.utils.error_messages import expected_type_but_received_message
 
 
-def send_request(request: str) -> Any:
+# Command of the abnormal apps history, followed by its options.
+history_command = "abnormal apps --history"
+
+
+def get_control_unix_socket_path() -> Union[pathlib.Path, None]:
+    """
+    Gets the path of the Unix domain socket of the modeller daemon.
+    :return: The path of the Unix domain socket, or None if the daemon doesn't listen on one.
+    :rtype: Union[pathlib.Path, None]
+    """
+    if not wades_config.use_control_unix_socket:
+        return None
+    return paths.TEST_CONTROL_UNIX_SOCKET_PATH if wades_config.is_test else paths.CONTROL_UNIX_SOCKET_PATH
+
+
+def send_request(request: str, response_encoding: ResponseEncoding = ResponseEncoding.json) -> Any:
     """
-    Opens a connection the modeller daemon and send a request.
+    Opens a connection the modeller daemon and send a request. The Unix domain socket of the daemon is used if it is
+    available.
     :param request: The message to send to the modeller.
     :type request: str
+    :param response_encoding: The encoding of the response. Compressed json is meant for bulk data.
+    :type response_encoding: ResponseEncoding
     :return: The response from the modeller.
     :rtype: Any
     """
     if not isinstance(request, str):
         raise TypeError(expected_type_but_received_message.format('request', 'str', request))
-    client = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
     try:
-        client.connect((wades_config.localhost_address, wades_config.modeller_thread_port))
+        with ControlClient(unix_socket_path=get_control_unix_socket_path()) as client:
+            return client.send_request(request, response_encoding=response_encoding)
     except ConnectionRefusedError:
         return "Modeller service is not accepting requests. Check configuration file and " \
                "change run_modeller_server value to True."
-    client.sendall(request.encode())
-    data = b''
-    while True:
-        response_from_server = client.recv(4096)
-        if not response_from_server:
-            break
 
-        data += response_from_server
 
-    client.close()
-    return json.loads(data)
+def subscribe(request: str) -> None:
+    """
+    Subscribes to the anomalies found by the modeller daemon, and prints them as they are found, until the daemon
+    stops or the user interrupts it.
+    :param request: The subscription command, with its options.
+    :type request: str
+    """
+    try:
+        for message in ControlClient(unix_socket_path=get_control_unix_socket_path()).subscribe(request):
+            pprint(message)
+    except ConnectionRefusedError:
+        print("Modeller service is not accepting requests. Check configuration file and "
+              "change run_modeller_server value to True.")
+    except KeyboardInterrupt:
+        pass
+
+
+def print_abnormal_apps_history(request: str) -> None:
+    """
+    Prints the saved abnormal applications that match the filters of a history command, one page at a time, so that
+    only one page is held in memory. It stops once the limit of the command is printed, or at the end of the history,
+    and prints the cursor to continue from.
+    :param request: The history command, with its options.
+    :type request: str
+    """
+    try:
+        limit = AbnormalAppsQuery.from_arguments(request[len(history_command):]).get_limit()
+    except ValueError as error:
+        print(error)
+        return
+    try:
+        with ControlClient(unix_socket_path=get_control_unix_socket_path()) as client:
+            page_request = request
+            printed_records_count = 0
+            while True:
+                page = client.send_request(page_request, response_encoding=ResponseEncoding.compressed_json)
+                if not isinstance(page, dict):
+                    pprint(page)
+                    return
+                for abnormal_app in page["abnormal_apps"]:
+                    pprint(abnormal_app)
+                printed_records_count += len(page["abnormal_apps"])
+                # A page can end before the limit when the daemon has scanned enough records for one page.
+                if not page["has_more"] or printed_records_count >= limit:
+                    break
+                page_request = "{} {} {} {} {}".format(request, AbnormalAppsQuery.cursor_option, page["next_cursor"],
+                                                       AbnormalAppsQuery.limit_option, limit - printed_records_count)
+            print("Next cursor: {}".format(page["next_cursor"]))
+    except ConnectionRefusedError:
+        print("Modeller service is not accepting requests. Check configuration file and "
+              "change run_modeller_server value to True.")
+
+
+def run_technique_benchmark(arguments: str) -> None:
+    """
+    Replays a generated workload through the detection techniques in this process, and prints their cost and accuracy.
+    The daemon is not involved.
+    :param arguments: The options of the benchmark command. For more info: 'TechniqueBenchmark.parse_arguments'.
+    :type arguments: str
+    """
+    try:
+        apps_count, retrievals_count, anomalous_apps_count, technique_names = \
+            TechniqueBenchmark.parse_arguments(arguments)
+        app_profiles, anomaly_onsets = TechniqueBenchmark.generate_workload(
+            apps_count=apps_count, retrievals_count=retrievals_count, anomalous_apps_count=anomalous_apps_count)
+        report = TechniqueBenchmark(app_profiles, anomaly_onsets).run(technique_names)
+    except ValueError as error:
+        print(error)
+        return
+    TechniqueBenchmark.print_report(report)
 
 
 def print_supported_commands() -> None:
@@ -43,8 +127,15 @@ def print_supported_commands() -> None:
     Prints the list of supported commands.
     """
     supported_commands = ["start", "stop",
-                          "modeller pause", "modeller status", "modeller continue", "abnormal apps",
-                          "modelled apps", "modelled apps --history", "help"]
+                          "modeller pause", "modeller status", "modeller continue", "pipeline status",
+                          "collection status", "subscriptions status", "abnormal apps", "modelled apps",
+                          "abnormal apps --history [--app <name>]... [--since <time>] [--until <time>] "
+                          "[--min-risk <level>] [--attribute <name>]... [--cursor <cursor>] [--limit <count>]",
+                          "subscribe anomalies [--min-risk <level>] [--app <name>]...",
+                          "metrics [--text]", "trace stats", "trace cycles",
+                          "benchmark techniques [--apps <count>] [--retrievals <count>] [--anomalous-apps <count>] "
+                          "[--technique <name>]...",
+                          "help"]
     for i in range(1, len(supported_commands) + 1):
         print("{}. {}".format(i, supported_commands[i - 1]))
 
@@ -62,12 +153,22 @@ def main(argv: list) -> None:
         wades_daemon.start()
     elif arguments == "stop":
         wades_daemon.terminate()
-    elif arguments in ["modeller pause", "modeller status", "modeller continue"]:
+    elif arguments in ["modeller pause", "modeller status", "modeller continue", "pipeline status",
+                       "collection status", "subscriptions status", "trace stats", "trace cycles",
+                       "abnormal apps", "modelled apps"]:
         response = send_request(arguments)
         pprint(response)
-    elif arguments in ["abnormal apps", "modelled apps", "abnormal apps --history"]:
-        abnormal_apps = send_request(arguments)
-        pprint(abnormal_apps)
+    elif arguments == "metrics":
+        pprint(send_request(arguments, response_encoding=ResponseEncoding.compressed_json))
+    elif arguments == "metrics --text":
+        print(send_request(arguments, response_encoding=ResponseEncoding.compressed_json), end="")
+    elif arguments == history_command or arguments.startswith(history_command + " "):
+        # The options are quoted again, so that values with spaces, such as times, reach the daemon whole.
+        print_abnormal_apps_history(" ".join(argv[:3] + [shlex.quote(option) for option in argv[3:]]))
+    elif arguments == "subscribe anomalies" or arguments.startswith("subscribe anomalies "):
+        subscribe(arguments)
+    elif arguments == "benchmark techniques" or arguments.startswith("benchmark techniques "):
+        run_technique_benchmark(" ".join(shlex.quote(option) for option in argv[2:]))
     elif arguments == "help":
         print_supported_commands()
     else:
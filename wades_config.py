@@ -1,6 +1,7 @@
 import logging
 
 datetime_format = "%Y-%m-%d %H:%M:%S:%f"
+# Exact paths, directory prefixes ending with '/' (e.g. "/root/.ssh/") or fnmatch globs (e.g. "/home/*/.ssh/id_*").
 prohibited_files = {"/etc/passwd", "/etc/shadow", "/etc/bashrc", "/etc/profile", "/etc/hosts", "/proc/cpuinfo",
                     "/proc/stat", "/proc/swaps", "/etc/aliases"}
 anomaly_detected_message = "Anomalies found."
@@ -16,8 +17,95 @@ log_file_max_size_bytes = 5 * 1024 * 1024
 max_number_rotating_log_files = 10
 modeller_thread_port = 7657
 localhost_address = "127.0.0.1"
+# Control server: concurrent clients, threads of the commands that read files, and timeouts.
+control_server_max_connections_count = 64
+control_server_request_timeout_sec = 30
+control_server_workers_count = 4
+control_server_shutdown_timeout_sec = 5
+# Framed control protocol, over TCP and over a Unix domain socket restricted by its permissions.
+control_server_idle_timeout_sec = 5 * 60
+control_server_chunk_size_bytes = 64 * 1024
+use_control_unix_socket = True
+control_unix_socket_file_name = "wades.sock"
+control_unix_socket_permissions = 0o660
+# Anomalies buffered for each subscribed client before the oldest ones are dropped.
+subscription_buffer_size = 256
+# Page size of the abnormal apps history queries, and records scanned before a page stops early.
+history_query_default_limit = 100
+history_query_max_limit = 1000
+history_query_max_scanned_records = 100000
+# Metrics of the daemon, with the bucket bounds of the latency histograms in seconds.
+metrics_name_prefix = "wades_"
+metrics_latency_buckets_sec = [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0]
+serve_metrics_over_http = True
+metrics_http_path = "/metrics"
+# Tracing of the hot path, aggregated per span and for the latest tracing_cycles_count cycles.
+use_tracing = True
+tracing_cycles_count = 20
 retrieval_timestamp_file_name = "retrieval_timestamp.txt"
 abnormal_apps_file_name = "abnormal_apps.csv"
 run_modeller_server = False
 is_test = True
 app_profile_file_names_map = "app_profiles_name.csv"
+app_profile_state_file_suffix = "_state.json"
+app_model_cache_file_suffix = "_model.json"
+# Sliding window of each application profile. A limit set to None is not enforced.
+app_profile_max_samples = 10 ** 5
+app_profile_max_time_span_sec = 30 * 24 * 60 * 60  # 30 days
+app_profile_max_size_bytes = 64 * 1024 * 1024
+# Streaming quantile sketches of the numeric attributes. Their rank error is about 1.65 / quantile_sketch_k.
+use_quantile_sketches = False
+quantile_sketch_k = 200
+# Models the numeric attributes of all the applications in one pass. Not used with quantile sketches.
+use_batch_modelling = True
+# Scores each sample as the vector of its numeric attributes, by its Mahalanobis distance.
+use_multivariate_scoring = False
+multivariate_distance_threshold = 5.0
+# Detection techniques by name, per application, per attribute and by default (see TechniqueRegistry).
+detection_technique = "frequency"
+app_detection_techniques = dict()
+attribute_detection_techniques = dict()
+# Streaming technique: weights of the new samples, samples needed per hour of the week, and anomaly threshold.
+streaming_alpha = 0.05
+streaming_seasonal_alpha = 0.1
+streaming_seasonal_minimum_samples_count = 30
+streaming_anomaly_z_score = 3.0
+# Fitted-model cache, refitted after model_cache_refit_samples_count new samples or when the new samples drift.
+use_model_cache = False
+model_cache_refit_samples_count = 500
+model_cache_drift_min_samples_count = 30
+model_cache_drift_outlier_fraction = 0.1
+# Known opened files and users are kept in Bloom filters above this many values. None keeps them in sets.
+known_values_bloom_filter_threshold = None
+known_values_false_positive_rate = 0.001
+# Directories with more distinct opened files than this are generalized. None keeps the exact paths.
+opened_files_generalization_threshold = None
+# Adaptive modelling cadence. Only used with use_model_cache.
+use_adaptive_modelling = False
+modelling_max_interval_cycles = 8
+modelling_stable_deviation = 2.0
+modelling_volatile_deviation = 4.0
+modelling_stability_alpha = 0.1
+# Parallel modelling, in chunks of applications, by a pool of processes kept between cycles.
+modelling_workers_count = 1
+modelling_chunk_size = 64
+# Collection schedule. Overrun policies: "skip", "catch_up" or "degrade".
+collection_overrun_policy = "skip"
+collection_max_phase_offset_sec = 30
+collection_max_jitter_sec = 5
+collection_max_catch_up_cycles_count = 3
+# Queues of the daemon pipeline stages. Overflow policies: "block" or "drop_oldest".
+pipeline_ingestion_queue_size = 8
+pipeline_ingestion_overflow_policy = "block"
+pipeline_modelling_queue_size = 1
+pipeline_modelling_overflow_policy = "drop_oldest"
+# Daemon state snapshot, saved every daemon_snapshot_interval_cycles cycles and on exit.
+daemon_snapshot_file_name = "daemon_snapshot.json.z"
+daemon_snapshot_interval_cycles = 10
+daemon_snapshot_max_age_sec = 24 * 60 * 60  # One day
+daemon_snapshot_version = 1
+# Application profiles kept in memory, shared by the process handler and the modeller.
+use_app_profile_cache = True
+app_profile_cache_max_entries_count = 1024
+# Budget of the estimated size of the samples of all the profiles, not of the daemon's resident memory.
+app_profiles_memory_budget_bytes = 1024 * 1024 * 1024